@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""Exercise imf_fetch.py against a local IMF DataMapper stand-in.
+
+Starts an HTTP server that serves synthetic indicator payloads with ETag and
+Last-Modified headers and an artificial per-request latency. Then runs:
+
+    cold          - empty cache, one worker (like one HTTP call per indicator in the flow)
+    cold parallel - empty cache, --workers concurrent requests
+    refresh       - nothing changed: every indicator should be a 304
+    one changed   - one payload updated on the server: 1 download, the rest 304
+    no validators - server stops sending ETag/Last-Modified: full downloads,
+                    but the content hash marks them unchanged
+
+Each scenario prints its wall time, bytes downloaded and request statuses,
+and the script exits non-zero if any scenario does not behave as expected.
+
+Usage:
+    python benchmark_fetch.py [--latency-ms 150] [--countries 196] [--workers 8]
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from imf_fetch import INDICATORS, fetch_all
+
+
+class StandInState:
+    def __init__(self, countries, years, latency):
+        self.latency = latency
+        self.validators = True
+        self.requests = Counter()
+        self.lock = threading.Lock()
+        self.payloads = {indicator: self.build(indicator, countries, years, seed=i) for i, indicator in enumerate(INDICATORS)}
+
+    @staticmethod
+    def build(indicator, countries, years, seed):
+        rng = random.Random(seed)
+        values = {
+            f"C{c:03d}": {str(year): round(rng.uniform(-50, 90000), 2) for year in range(1980, 1980 + years)}
+            for c in range(countries)
+        }
+        body = json.dumps({"values": {indicator: values}, "api": {"version": "1"}}).encode()
+        return {"body": body, "etag": f'"{hashlib.sha256(body).hexdigest()[:16]}"', "modified": formatdate(usegmt=True)}
+
+    def update(self, indicator):
+        payload = self.payloads[indicator]
+        body = payload["body"].replace(b"}}", b', "2099": 1.0}}', 1)
+        self.payloads[indicator] = {"body": body, "etag": f'"{hashlib.sha256(body).hexdigest()[:16]}"',
+                                    "modified": formatdate(usegmt=True)}
+
+
+class StandInServer(ThreadingHTTPServer):
+    # The default listen backlog of 5 drops connections when every worker connects at once
+    request_queue_size = 64
+    daemon_threads = True
+
+
+def make_handler(state):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            time.sleep(state.latency)
+            indicator = self.path.rstrip("/").split("/")[-1]
+            payload = state.payloads.get(indicator)
+            if payload is None:
+                self.send_response(404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            if state.validators and self.headers.get("If-None-Match") == payload["etag"]:
+                with state.lock:
+                    state.requests[304] += 1
+                self.send_response(304)
+                self.send_header("ETag", payload["etag"])
+                self.end_headers()
+                return
+            with state.lock:
+                state.requests[200] += 1
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload["body"])))
+            if state.validators:
+                self.send_header("ETag", payload["etag"])
+                self.send_header("Last-Modified", payload["modified"])
+            self.end_headers()
+            self.wfile.write(payload["body"])
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def run_scenario(name, state, base_url, cache_dir, workers, expected):
+    state.requests.clear()
+    start = time.perf_counter()
+    results, _ = fetch_all(INDICATORS, base_url=base_url, cache_dir=cache_dir, workers=workers)
+    elapsed = time.perf_counter() - start
+
+    statuses = Counter(result["status"] for result in results.values())
+    downloaded = sum(result["bytes"] for result in results.values())
+    ok = dict(statuses) == expected
+    summary = ", ".join(f"{count} {status}" for status, count in sorted(statuses.items()))
+    print(f"{'✅' if ok else '❌'} {name:<14} {elapsed:>6.2f}s {downloaded / 1024:>10,.1f} KB  "
+          f"{dict(state.requests)}  {summary}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark imf_fetch.py against a local stand-in server")
+    parser.add_argument("--latency-ms", type=float, default=150, help="Server delay per request (default: 150)")
+    parser.add_argument("--countries", type=int, default=196, help="Countries per payload (default: 196)")
+    parser.add_argument("--years", type=int, default=51, help="Years per country (default: 51)")
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent requests (default: 8)")
+    args = parser.parse_args()
+
+    state = StandInState(args.countries, args.years, args.latency_ms / 1000)
+    server = StandInServer(("127.0.0.1", 0), make_handler(state))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/api/v1"
+    payload_kb = sum(len(p["body"]) for p in state.payloads.values()) / 1024
+    print(f"🌐 Stand-in at {base_url}: {len(INDICATORS)} indicators, {payload_kb:,.0f} KB total, "
+          f"{args.latency_ms:g} ms per request")
+    print()
+
+    n = len(INDICATORS)
+    cache_dir = tempfile.mkdtemp(prefix="imf_cache_")
+    try:
+        checks = [
+            run_scenario("cold", state, base_url, tempfile.mkdtemp(dir=cache_dir), 1, {"changed": n}),
+            run_scenario("cold parallel", state, base_url, cache_dir, args.workers, {"changed": n}),
+            run_scenario("refresh", state, base_url, cache_dir, args.workers, {"not-modified": n}),
+        ]
+        state.update(INDICATORS[0])
+        checks.append(run_scenario("one changed", state, base_url, cache_dir, args.workers,
+                                   {"changed": 1, "not-modified": n - 1}))
+        state.validators = False
+        checks.append(run_scenario("no validators", state, base_url, cache_dir, args.workers, {"unchanged": n}))
+    finally:
+        server.shutdown()
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    if not all(checks):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
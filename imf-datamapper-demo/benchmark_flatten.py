@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""Benchmark imf_flatten.py against an in-memory port of imf-indicator.groovy.
+
+Generates a synthetic DataMapper response covering every indicator, country
+and year, then flattens it twice:
+
+    in-memory - like the Groovy script: read everything, parse, build every
+                line (with a timestamp per record), join and write
+    streaming - imf_flatten.flatten()
+
+It reports records/s and peak Python memory for each approach, and checks
+that both produce the same records apart from the ingestion timestamp. The
+in-memory port rounds with its own implementation of Java's Math.round, and
+both it and imf_flatten.round_value are checked against known Groovy results
+for ties, negative halves and large values.
+
+Usage:
+    python benchmark_flatten.py
+    python benchmark_flatten.py --indicators 8 --countries 196 --years 51
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from decimal import ROUND_FLOOR, Decimal
+
+from imf_flatten import flatten, ingestion_timestamp, round_value
+
+# What Math.round(value * 10) / 10.0 gives in Groovy for JsonSlurper's BigDecimals
+GROOVY_ROUNDING = [
+    ("12.35", 12.4),
+    ("12.25", 12.3),
+    ("2.25", 2.3),
+    ("0.05", 0.1),
+    ("1.449", 1.4),
+    ("-12.35", -12.3),
+    ("-2.25", -2.2),
+    ("-0.05", 0.0),
+    ("-0.06", -0.1),
+    ("89999.95", 90000.0),
+    ("-89999.95", -89999.9),
+    ("123456789.15", 123456789.2),
+    # 10000000000000000.5 is not a double; it becomes 1e16 before rounding
+    ("1000000000000000.05", 1e15),
+    ("29184", 29184.0),
+]
+
+_HALF = Decimal("0.5")
+
+
+def groovy_round(value):
+    """Math.round(value * 10) / 10.0 as Groovy evaluates it, for the in-memory port.
+
+    value * 10 is exact BigDecimal arithmetic; Math.round then takes it as a
+    double and returns the closest long, ties towards positive infinity.
+    """
+    scaled = Decimal(float(Decimal(value) * 10))
+    return int((scaled + _HALF).to_integral_value(ROUND_FLOOR)) / 10.0
+
+
+def check_rounding():
+    """Return the golden values either rounding gets wrong, as (function, input, got, expected)."""
+    failures = []
+    for func in (groovy_round, round_value):
+        for text, expected in GROOVY_ROUNDING:
+            got = func(Decimal(text))
+            if got != expected:
+                failures.append((func.__name__, text, got, expected))
+    return failures
+
+
+def write_payload(path, indicators, countries, years, seed=42):
+    """Write a response shaped like /api/v1/<indicator>, one country at a time."""
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('{"values":{')
+        for i in range(indicators):
+            f.write(("," if i else "") + f'"IND_{i:03d}":{{')
+            for c in range(countries):
+                series = {}
+                for year in range(1980, 1980 + years):
+                    # Up to 3 decimals, with ties like 12.35 to exercise rounding
+                    series[str(year)] = round(rng.uniform(-50, 90000), rng.choice((0, 1, 2, 2, 3)))
+                f.write(("," if c else "") + f'"C{c:03d}":' + json.dumps(series, separators=(",", ":")))
+            f.write("}")
+        f.write('},"api":{"version":"1","output-method":"json"}}')
+
+
+def flatten_in_memory(path, out_path):
+    """Port of imf-indicator.groovy: whole payload in memory, one string per record."""
+    with open(path, encoding="utf-8") as f:
+        parsed = json.loads(f.read(), parse_float=Decimal)
+    output_lines = []
+    for indicator, countries in parsed["values"].items():
+        for country_code, years in countries.items():
+            for year, value in years.items():
+                record = {
+                    "indicator": indicator,
+                    "country_code": country_code,
+                    "year": str(year),
+                    "value": groovy_round(value) if isinstance(value, (int, Decimal)) else value,
+                    "ingestion_timestamp": ingestion_timestamp(),
+                }
+                output_lines.append(json.dumps(record, separators=(",", ":")))
+    with open(out_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(output_lines) + "\n")
+    return len(output_lines)
+
+
+def flatten_streaming(path, out_path, batch_size):
+    with open(path, "rb") as source, open(out_path, "w", encoding="utf-8") as out:
+        return flatten(source, out, batch_size)
+
+
+def measure(func, *args):
+    start = time.perf_counter()
+    count = func(*args)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    func(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return count, elapsed, peak
+
+
+def records_without_timestamp(path):
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            del record["ingestion_timestamp"]
+            yield record
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the streaming IMF flattener")
+    parser.add_argument("--indicators", type=int, default=130, help="Indicators in the payload (default: 130, roughly all of WEO)")
+    parser.add_argument("--countries", type=int, default=196, help="Countries per indicator (default: 196)")
+    parser.add_argument("--years", type=int, default=51, help="Years per country, from 1980 (default: 51)")
+    parser.add_argument("--batch-size", type=int, default=10000, help="Streaming batch size (default: 10000)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        payload = os.path.join(tmp, "payload.json")
+        rounding_failures = check_rounding()
+        for name, text, got, expected in rounding_failures:
+            print(f"❌ {name}({text}) = {got}, Groovy gives {expected}")
+        print(("✅" if not rounding_failures else "❌") + f" Rounding matches Groovy on {len(GROOVY_ROUNDING)} known values")
+
+        write_payload(payload, args.indicators, args.countries, args.years)
+        size_mb = os.path.getsize(payload) / (1024 * 1024)
+        print(f"📦 Synthetic payload: {args.indicators} indicators × {args.countries} countries × "
+              f"{args.years} years, {size_mb:,.1f} MB")
+        print()
+        print(f"   {'approach':<10} {'records':>11} {'seconds':>8} {'records/s':>11} {'MB/s':>7} {'peak MB':>8}")
+
+        outputs = {}
+        for name, func, extra in (
+            ("in-memory", flatten_in_memory, ()),
+            ("streaming", flatten_streaming, (args.batch_size,)),
+        ):
+            outputs[name] = os.path.join(tmp, f"{name}.ndjson")
+            count, elapsed, peak = measure(func, payload, outputs[name], *extra)
+            print(f"   {name:<10} {count:>11,} {elapsed:>8.2f} {count / elapsed:>11,.0f} "
+                  f"{size_mb / elapsed:>7.1f} {peak / (1024 * 1024):>8.1f}")
+
+        matches = all(
+            a == b for a, b in zip(records_without_timestamp(outputs["in-memory"]),
+                                   records_without_timestamp(outputs["streaming"]), strict=True)
+        )
+        print()
+        print("✅ Outputs match" if matches else "❌ Outputs differ")
+
+    if rounding_failures or not matches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""Concurrent, cache-aware fetcher for IMF DataMapper indicators.
+
+Fetches indicators (optionally limited to some countries) in parallel over one
+pooled HTTP session. Responses are kept in an on-disk cache keyed by URL.
+Later runs revalidate with If-None-Match / If-Modified-Since, so unchanged
+indicators cost a 304 instead of a full download. A 200 whose body hashes the
+same as the cached copy is also treated as unchanged. Only changed indicators
+are reported as changed, and only they are flattened when --ndjson is given.
+
+Usage:
+    python imf_fetch.py                                  # the eight demo indicators
+    python imf_fetch.py NGDPD LP --countries USA CHN DEU
+    python imf_fetch.py --ndjson changed.ndjson          # flatten changed indicators only
+
+Set IMF_BASE_URL (or --base-url) to point at a mirror or a local stand-in.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from imf_flatten import flatten
+
+BASE_URL = os.getenv("IMF_BASE_URL", "https://www.imf.org/external/datamapper/api/v1")
+INDICATORS = ["NGDPDPC", "NGDPD", "NGDP_RPCH", "PCPIPCH", "LUR", "GGXWDG_NGDP", "BCA_NGDPD", "LP"]
+DEFAULT_CACHE_DIR = ".imf_cache"
+CHUNK_SIZE = 64 * 1024
+
+
+class ResponseCache:
+    """Response bodies on disk plus an index of validators and content hashes, keyed by URL."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.index_path = os.path.join(directory, "index.json")
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        try:
+            with open(self.index_path, encoding="utf-8") as f:
+                self.index = json.load(f)
+        except FileNotFoundError:
+            self.index = {}
+
+    def entry(self, url):
+        with self.lock:
+            entry = self.index.get(url)
+        if entry and os.path.exists(self.body_path(url)):
+            return entry
+        return None
+
+    def body_path(self, url):
+        return os.path.join(self.directory, hashlib.sha256(url.encode()).hexdigest()[:32] + ".json")
+
+    def store(self, url, temp_path, entry):
+        os.replace(temp_path, self.body_path(url))
+        with self.lock:
+            self.index[url] = entry
+
+    def touch(self, url, **updates):
+        with self.lock:
+            self.index[url].update(updates)
+
+    def save(self):
+        with self.lock:
+            data = json.dumps(self.index, indent=2, sort_keys=True)
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(temp_path, self.index_path)
+
+
+def create_session(pool_size):
+    """A session whose connection pool can serve every worker, with retries on throttling and 5xx."""
+    session = requests.Session()
+    retry = Retry(total=3, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504), allowed_methods=("GET",))
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=retry)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["Accept-Encoding"] = "gzip, deflate"
+    return session
+
+
+def indicator_url(base_url, indicator, countries=None):
+    path = "/".join([indicator, *(countries or [])])
+    return f"{base_url.rstrip('/')}/{path}"
+
+
+def fetch_indicator(session, cache, url, force=False, timeout=60):
+    """Fetch one URL with conditional headers; return a result dict with status changed/unchanged/not-modified."""
+    cached = None if force else cache.entry(url)
+    headers = {}
+    if cached:
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+    start = time.perf_counter()
+    with session.get(url, headers=headers, timeout=timeout, stream=True) as response:
+        if response.status_code == 304 and cached:
+            cache.touch(url, checked_at=time.time())
+            return {"url": url, "status": "not-modified", "bytes": 0, "seconds": time.perf_counter() - start}
+        response.raise_for_status()
+
+        # Stream to a temp file while hashing, so large payloads never sit in memory
+        digest = hashlib.sha256()
+        size = 0
+        fd, temp_path = tempfile.mkstemp(dir=cache.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in response.iter_content(CHUNK_SIZE):
+                    digest.update(chunk)
+                    size += len(chunk)
+                    f.write(chunk)
+        except Exception:
+            os.remove(temp_path)
+            raise
+        validators = {"etag": response.headers.get("ETag"), "last_modified": response.headers.get("Last-Modified")}
+
+    content_hash = digest.hexdigest()
+    unchanged = cached is not None and cached.get("sha256") == content_hash
+    cache.store(url, temp_path, {**validators, "sha256": content_hash, "bytes": size, "checked_at": time.time()})
+    return {
+        "url": url,
+        "status": "unchanged" if unchanged else "changed",
+        "bytes": size,
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def fetch_all(indicators, countries=None, base_url=BASE_URL, cache_dir=DEFAULT_CACHE_DIR, workers=8, force=False):
+    """Fetch indicators concurrently; return ({indicator: result}, cache)."""
+    cache = ResponseCache(cache_dir)
+    urls = {indicator: indicator_url(base_url, indicator, countries) for indicator in indicators}
+    results = {}
+    with create_session(workers) as session, ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {indicator: pool.submit(fetch_indicator, session, cache, url, force) for indicator, url in urls.items()}
+        for indicator, future in futures.items():
+            try:
+                results[indicator] = future.result()
+            except requests.RequestException as e:
+                results[indicator] = {"url": urls[indicator], "status": "error", "error": str(e), "bytes": 0, "seconds": 0.0}
+    cache.save()
+    return results, cache
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Fetch IMF DataMapper indicators concurrently with an on-disk cache")
+    parser.add_argument("indicators", nargs="*", default=INDICATORS, help="Indicator codes (default: the eight demo indicators)")
+    parser.add_argument("--countries", nargs="+", help="Only fetch these country codes")
+    parser.add_argument("--base-url", default=BASE_URL, help=f"API base URL (default: {BASE_URL})")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help=f"Cache directory (default: {DEFAULT_CACHE_DIR})")
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent requests (default: 8)")
+    parser.add_argument("--force", action="store_true", help="Ignore the cache and download everything")
+    parser.add_argument("--ndjson", help="Flatten changed indicators into this NDJSON file")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    start = time.perf_counter()
+    results, cache = fetch_all(args.indicators, args.countries, args.base_url, args.cache_dir, args.workers, args.force)
+    elapsed = time.perf_counter() - start
+
+    icons = {"changed": "⬇️ ", "unchanged": "🟰", "not-modified": "✅", "error": "❌"}
+    for indicator, result in results.items():
+        detail = result.get("error") or f"{result['bytes'] / 1024:,.1f} KB in {result['seconds'] * 1000:,.0f} ms"
+        print(f"{icons[result['status']]} {indicator:<12} {result['status']:<13} {detail}")
+
+    statuses = [result["status"] for result in results.values()]
+    downloaded = sum(result["bytes"] for result in results.values())
+    print()
+    print(f"📊 {len(results)} indicators in {elapsed:.2f}s: {statuses.count('changed')} changed, "
+          f"{statuses.count('unchanged')} unchanged, {statuses.count('not-modified')} not modified (304), "
+          f"{statuses.count('error')} failed; {downloaded / 1024:,.1f} KB downloaded")
+
+    changed = [indicator for indicator, result in results.items() if result["status"] == "changed"]
+    if args.ndjson and changed:
+        records = 0
+        with open(args.ndjson, "w", encoding="utf-8") as out:
+            for indicator in changed:
+                with open(cache.body_path(results[indicator]["url"]), "rb") as source:
+                    records += flatten(source, out)
+        print(f"✅ Wrote {records:,} records from {len(changed)} changed indicators to {args.ndjson}")
+
+    if "error" in statuses:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""Streaming flattener for IMF DataMapper API responses.
+
+Produces the same NDJSON records as imf-indicator.groovy:
+
+    {"indicator":"NGDPD","country_code":"USA","year":"2024","value":29184.9,"ingestion_timestamp":"..."}
+
+The Groovy script reads the whole response into memory and builds every
+output line before writing. This module walks values → indicator → country →
+year incrementally and writes records in batches as it goes. Memory is
+bounded by the read chunk, one country's year series and one output batch,
+not by the size of the response. Every record in a batch shares one ingestion
+timestamp, in UTC.
+
+Values are rounded like the Groovy script's Math.round(value * 10) / 10.0:
+decimals are parsed exactly (JsonSlurper uses BigDecimal) and ties round up.
+
+Usage:
+    curl -s https://www.imf.org/external/datamapper/api/v1/NGDPD | python imf_flatten.py > ngdpd.ndjson
+    python imf_flatten.py response.json -o records.ndjson --batch-size 5000
+"""
+
+import argparse
+import codecs
+import json
+import math
+import sys
+from datetime import datetime, timezone
+from decimal import Decimal
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+DEFAULT_BATCH_SIZE = 10000
+
+_decoder = json.JSONDecoder(parse_float=Decimal)
+_scanstring = json.decoder.scanstring
+_WHITESPACE = " \t\n\r"
+
+
+class _StreamReader:
+    """Minimal pull parser: walks objects member by member and decodes small values whole."""
+
+    def __init__(self, stream, chunk_size):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.text_decoder = codecs.getincrementaldecoder("utf-8")()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self):
+        while True:
+            raw = self.stream.read(self.chunk_size)
+            chunk = self.text_decoder.decode(raw, final=not raw) if isinstance(raw, bytes) else raw
+            # A chunk holding only part of a multi-byte character decodes to nothing
+            if chunk or not raw:
+                break
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r} but found {found or 'end of input'!r}")
+        self.pos += 1
+
+    def read_string(self):
+        self.expect('"')
+        while True:
+            try:
+                value, end = _scanstring(self.buf, self.pos)
+            except json.JSONDecodeError:
+                # Unterminated: the string continues in the next chunk
+                if not self._fill():
+                    raise
+                continue
+            self.pos = end
+            return value
+
+    def read_value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # A number ending exactly at the buffer edge may continue in the next chunk
+            if end == len(self.buf) and not self.eof and self._fill():
+                continue
+            self.pos = end
+            return value
+
+    def iter_members(self):
+        """Yield each key of the object at the cursor; the caller must consume its value."""
+        self.expect("{")
+        if self.peek() == "}":
+            self.pos += 1
+            return
+        while True:
+            key = self.read_string()
+            self.expect(":")
+            yield key
+            separator = self.peek()
+            self.pos += 1
+            if separator == "}":
+                return
+            if separator != ",":
+                raise ValueError(f"Expected ',' or '}}' but found {separator or 'end of input'!r}")
+
+
+def iter_series(stream, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield (indicator, country_code, {year: value}) from a DataMapper response, one country at a time."""
+    reader = _StreamReader(stream, chunk_size)
+    for key in reader.iter_members():
+        if key != "values" or reader.peek() != "{":
+            reader.read_value()
+            continue
+        for indicator in reader.iter_members():
+            if reader.peek() != "{":
+                reader.read_value()
+                continue
+            for country_code in reader.iter_members():
+                years = reader.read_value()
+                if isinstance(years, dict):
+                    yield indicator, country_code, years
+
+
+def round_value(value):
+    """Round to one decimal place exactly like Groovy's Math.round(value * 10) / 10.0."""
+    scaled = float(value * 10)
+    rounded = math.floor(scaled)
+    # Java's Math.round rounds half up (towards positive infinity)
+    if scaled - rounded >= 0.5:
+        rounded += 1
+    return rounded / 10
+
+
+def format_value(value):
+    if isinstance(value, (int, Decimal)) and not isinstance(value, bool):
+        return repr(round_value(value))
+    return json.dumps(value)
+
+
+def ingestion_timestamp():
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+
+
+def flatten(stream, out, batch_size=DEFAULT_BATCH_SIZE, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Write one NDJSON line per (indicator, country, year) to out; return the number of records."""
+    count = 0
+    lines = []
+    timestamp = None
+    for indicator, country_code, years in iter_series(stream, chunk_size):
+        prefix = f'{{"indicator":{json.dumps(indicator)},"country_code":{json.dumps(country_code)},"year":'
+        for year, value in years.items():
+            if not lines:
+                timestamp = ingestion_timestamp()
+            lines.append(f'{prefix}{json.dumps(str(year))},"value":{format_value(value)},'
+                         f'"ingestion_timestamp":"{timestamp}"}}\n')
+            if len(lines) >= batch_size:
+                out.write("".join(lines))
+                count += len(lines)
+                lines = []
+    if lines:
+        out.write("".join(lines))
+        count += len(lines)
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Flatten an IMF DataMapper response to NDJSON")
+    parser.add_argument("input", nargs="?", default="-", help="Response JSON file (default: stdin)")
+    parser.add_argument("-o", "--output", default="-", help="NDJSON output file (default: stdout)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f"Records per write and per ingestion timestamp (default: {DEFAULT_BATCH_SIZE})")
+    args = parser.parse_args()
+
+    source = sys.stdin.buffer if args.input == "-" else open(args.input, "rb")
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        count = flatten(source, out, args.batch_size)
+    finally:
+        if source is not sys.stdin.buffer:
+            source.close()
+        if out is not sys.stdout:
+            out.close()
+    print(f"Flattened {count:,} records", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,549 @@
+#!/usr/bin/env python3
+"""
+Asyncio API for producing historical stock quote CSV files to Kafka.
+
+Reuses produce.py's CSV-to-record logic without blocking the event loop:
+
+- AsyncProducer wraps the confluent Producer. A dedicated thread runs the
+  poll loop and hands delivery reports back to the event loop in batches, as
+  asyncio futures. A FIFO of slots bounds the number of messages in flight.
+- csv_batches() is an async iterator over the records of every CSV (or
+  Parquet) file in a path. Files are read on worker threads, a few at a time, and converted on
+  the loop one batch at a time.
+- produce_csv() validates each batch, produces the valid records and routes
+  the rest to a DeadLetterSink, like produce.py does.
+- A StepBudget shared by all of them caps the messages queued and rows parsed
+  per event loop step, so thousands of concurrent files do not turn into
+  long steps that hold up every other task on the loop.
+
+Embedding in a service:
+
+    async with AsyncProducer(config, max_in_flight=10000) as producer:
+        async for batch in csv_batches(Path('../data')):
+            for record in batch.records:
+                await producer.produce(topic, serialize_json_record(record), key=batch.symbol.encode('utf-8'))
+        await producer.flush()
+
+Usage:
+    uv run python async_produce.py ../data
+    uv run python async_produce.py ../data --max-in-flight 20000 --read-concurrency 16
+"""
+
+import argparse
+import asyncio
+import csv
+import io
+import itertools
+import os
+import sys
+import threading
+import weakref
+from collections import deque
+from pathlib import Path
+from typing import Any, AsyncIterator, Deque, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from confluent_kafka import KafkaException, Producer
+from dotenv import load_dotenv
+
+from produce import (
+    DEFAULT_SCHEMA,
+    DEFAULT_VALIDATION_BATCH_SIZE,
+    RECORD_VERSIONS,
+    DeadLetterSink,
+    csv_row_to_record,
+    extract_symbol_from_filename,
+    find_csv_files,
+    get_kafka_config,
+    parquet_records,
+    parquet_v2_records,
+    serialize_json_record,
+    to_v2_record,
+)
+from schema_validation import RecordValidator, load_validator
+
+DEFAULT_MAX_IN_FLIGHT = 10000
+DEFAULT_READ_CONCURRENCY = 8
+DEFAULT_POLL_INTERVAL = 0.05
+# Messages queued plus CSV rows parsed per event loop step, across all tasks
+STEP_BUDGET = 100
+
+
+class StepBudget:
+    """
+    Spread work over event loop steps: at most per_step units start in one step.
+
+    Thousands of tasks that become ready together would otherwise run back to
+    back in a single step, and every timer and socket callback would wait for
+    all of them. Once the budget is spent, take() waits, first in first out,
+    for the next step.
+    """
+
+    def __init__(self, per_step: int):
+        self.per_step = per_step
+        self.available = per_step
+        self._waiters: Deque[Tuple[asyncio.Future, int]] = deque()
+        self._refill_scheduled = False
+
+    async def take(self, units: int = 1):
+        if self.available > 0 and not self._waiters:
+            self._spend(units)
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append((waiter, units))
+        self._schedule_refill()
+        await waiter
+
+    def _spend(self, units: int):
+        # A large request may overdraw; the next step then starts in debt
+        self.available -= units
+        if self.available <= 0:
+            self._schedule_refill()
+
+    def _schedule_refill(self):
+        if not self._refill_scheduled:
+            self._refill_scheduled = True
+            asyncio.get_running_loop().call_soon(self._refill)
+
+    def _refill(self):
+        self._refill_scheduled = False
+        self.available = min(self.available + self.per_step, self.per_step)
+        while self._waiters and self.available > 0:
+            waiter, units = self._waiters.popleft()
+            if not waiter.done():
+                self._spend(units)
+                waiter.set_result(None)
+        if self._waiters:
+            self._schedule_refill()
+
+
+_step_budgets: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, StepBudget]' = weakref.WeakKeyDictionary()
+
+
+def step_budget() -> StepBudget:
+    """The StepBudget shared by every producer and CSV reader on the running loop."""
+    loop = asyncio.get_running_loop()
+    budget = _step_budgets.get(loop)
+    if budget is None:
+        budget = _step_budgets[loop] = StepBudget(STEP_BUDGET)
+    return budget
+
+
+class AsyncProducer:
+    """
+    An asyncio front end for a confluent Producer.
+
+    produce() waits for a free in-flight slot, not for delivery, and returns a
+    future that resolves to the delivered Message or fails with KafkaException.
+    Delivery reports are collected on the poll thread and resolved on the
+    event loop once per poll, so a burst of deliveries costs one loop wakeup.
+    """
+
+    def __init__(
+        self,
+        config: Dict[str, Any],
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+        poll_interval: float = DEFAULT_POLL_INTERVAL
+    ):
+        config = dict(config)
+        # The local queue must hold every message we allow in flight, or produce() raises BufferError
+        queue_limit = int(config.get('queue.buffering.max.messages', 100000))
+        config['queue.buffering.max.messages'] = max(queue_limit, max_in_flight)
+        self.producer = Producer(config)
+        self.max_in_flight = max_in_flight
+        self.poll_interval = poll_interval
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.delivered = 0
+        self.failed = 0
+        self.last_error: Optional[KafkaException] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._free_slots = max_in_flight
+        self._slot_waiters: Deque[asyncio.Future] = deque()
+        self._idle: Optional[asyncio.Event] = None
+        self._reports: List[Tuple[Optional[asyncio.Future], Any]] = []
+        self._stopping = threading.Event()
+        self._poller: Optional[threading.Thread] = None
+
+    async def start(self) -> 'AsyncProducer':
+        """Bind to the running event loop and start the poll thread."""
+        if self._poller:
+            return self
+        self._loop = asyncio.get_running_loop()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._poller = threading.Thread(target=self._poll_loop, name='KafkaPoller', daemon=True)
+        self._poller.start()
+        return self
+
+    async def __aenter__(self) -> 'AsyncProducer':
+        return await self.start()
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def _poll_loop(self):
+        """Serve delivery reports until close(); runs on the poll thread."""
+        while not self._stopping.is_set():
+            self.producer.poll(self.poll_interval)
+            if self._reports:
+                reports, self._reports = self._reports, []
+                try:
+                    self._loop.call_soon_threadsafe(self._resolve, reports)
+                except RuntimeError:
+                    # The event loop is closed; nobody is left to tell
+                    return
+
+    async def _acquire_slot(self):
+        # Not asyncio.Semaphore: on Python 3.11 its acquire() scans every waiter,
+        # which stalls the loop once thousands of tasks are waiting for a slot
+        if self._free_slots and not self._slot_waiters:
+            self._free_slots -= 1
+            return
+        waiter = self._loop.create_future()
+        self._slot_waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just before the cancellation
+                self._release_slot()
+            raise
+
+    def _release_slot(self):
+        # Hand the slot straight to the oldest waiter, so a woken task never finds it taken
+        while self._slot_waiters:
+            waiter = self._slot_waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._free_slots += 1
+
+    def _resolve(self, reports: List[Tuple[Optional[asyncio.Future], Any]]):
+        """Settle delivery futures and free their slots; runs on the event loop."""
+        if len(reports) > STEP_BUDGET:
+            # Every settled report wakes a task or two: leave the rest for the next step
+            self._loop.call_soon(self._resolve, reports[STEP_BUDGET:])
+            reports = reports[:STEP_BUDGET]
+        for future, (err, msg) in reports:
+            self._release_slot()
+            if err is None:
+                self.delivered += 1
+                if future is not None and not future.done():
+                    future.set_result(msg)
+            else:
+                self.failed += 1
+                self.last_error = KafkaException(err)
+                if future is not None and not future.done():
+                    future.set_exception(self.last_error)
+        self.in_flight -= len(reports)
+        if not self.in_flight:
+            self._idle.set()
+
+    async def produce(
+        self,
+        topic: str,
+        value: bytes,
+        key: Optional[bytes] = None,
+        headers: Optional[List[Tuple[str, bytes]]] = None,
+        track: bool = True
+    ) -> Optional[asyncio.Future]:
+        """
+        Queue one message once a slot is free and return its delivery future.
+
+        With track=False no future is created; failures are only counted in
+        self.failed and self.last_error. Use it for fire-and-forget bulk loads,
+        where unawaited futures would only pile up.
+        """
+        if not self._poller:
+            raise RuntimeError("AsyncProducer is not started; use 'async with' or await start()")
+        await self._acquire_slot()
+        future = None
+
+        def on_delivery(err, msg):
+            # Called on the poll thread: the list is swapped, never shared, so appending is enough
+            self._reports.append((future, (err, msg)))
+
+        try:
+            await step_budget().take()
+            future = self._loop.create_future() if track else None
+            while True:
+                try:
+                    self.producer.produce(topic, value, key, headers=headers, on_delivery=on_delivery)
+                    break
+                except BufferError:
+                    # The local queue is full despite the slot (e.g. other users of self.producer)
+                    await asyncio.sleep(self.poll_interval)
+        except BaseException:
+            # Cancelled or rejected: the message never got queued, so give its slot back
+            self._release_slot()
+            raise
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        self._idle.clear()
+        return future
+
+    async def send(
+        self,
+        topic: str,
+        value: bytes,
+        key: Optional[bytes] = None,
+        headers: Optional[List[Tuple[str, bytes]]] = None
+    ):
+        """Produce one message and wait for its delivery; returns the Message."""
+        return await (await self.produce(topic, value, key, headers))
+
+    async def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every queued message is delivered or failed; False on timeout."""
+        if not self._poller:
+            return True
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    async def close(self, timeout: Optional[float] = None):
+        """Flush, then stop the poll thread."""
+        if not self._poller:
+            return
+        await self.flush(timeout)
+        # Messages queued on self.producer directly (e.g. by a DeadLetterSink) are not counted in flight
+        await asyncio.to_thread(self.producer.flush, -1 if timeout is None else timeout)
+        self._stopping.set()
+        await asyncio.to_thread(self._poller.join)
+        self._poller = None
+
+
+class CsvBatch(NamedTuple):
+    """Up to batch_size converted records of one CSV file, plus the rows that failed conversion."""
+    source: str
+    symbol: str
+    records: List[Dict[str, Any]]
+    lines: List[int]
+    rejected: List[Tuple[Dict[str, str], str, int]]  # (row, reason, line)
+    typed: bool = False  # records are v2 already, read from typed Parquet columns
+
+
+def parse_csv_batches(
+    name: str,
+    text: str,
+    batch_size: int = DEFAULT_VALIDATION_BATCH_SIZE
+) -> Iterator[CsvBatch]:
+    """Convert the text of one CSV file, batch by batch."""
+    symbol = extract_symbol_from_filename(name)
+    records: List[Dict[str, Any]] = []
+    lines: List[int] = []
+    rejected: List[Tuple[Dict[str, str], str, int]] = []
+    reader = csv.DictReader(io.StringIO(text))
+    for row in reader:
+        try:
+            records.append(csv_row_to_record(row, symbol))
+            lines.append(reader.line_num)
+        except (KeyError, ValueError, AttributeError) as e:
+            rejected.append((row, f"conversion: {type(e).__name__}: {e}", reader.line_num))
+        if len(records) >= batch_size:
+            yield CsvBatch(name, symbol, records, lines, rejected)
+            records, lines, rejected = [], [], []
+    if records or rejected:
+        yield CsvBatch(name, symbol, records, lines, rejected)
+
+
+def split_parquet_batches(
+    name: str,
+    records: List[Dict[str, Any]],
+    batch_size: int = DEFAULT_VALIDATION_BATCH_SIZE,
+    rejected: Optional[Dict[int, str]] = None,
+    typed: bool = False
+) -> Iterator[CsvBatch]:
+    """Batch the records of one Parquet file; they were converted, and rows rejected, when the file was read."""
+    symbol = extract_symbol_from_filename(name)
+    rejected = rejected or {}
+    for start in range(0, len(records), batch_size):
+        indices = range(start, min(start + batch_size, len(records)))
+        kept = [i for i in indices if i not in rejected]
+        yield CsvBatch(name, symbol, [records[i] for i in kept], [i + 1 for i in kept],
+                       [(records[i], rejected[i], i + 1) for i in indices if i in rejected], typed)
+
+
+def read_input(path: Path, record_version: str = '1'):
+    """
+    A CSV file's text, or a Parquet file's (records, rejected rows, typed):
+    v1 records formatted in bulk by pyarrow, or with record_version '2' v2
+    records read straight from the typed columns.
+    """
+    if path.suffix.lower() != '.parquet':
+        return path.read_text()
+    if record_version == '2':
+        return (*parquet_v2_records(path), True)
+    return parquet_records(path), {}, False
+
+
+async def csv_batches(
+    path: Path,
+    batch_size: int = DEFAULT_VALIDATION_BATCH_SIZE,
+    read_concurrency: int = DEFAULT_READ_CONCURRENCY,
+    suffix: str = '.csv',
+    record_version: str = '1'
+) -> AsyncIterator[CsvBatch]:
+    """
+    Yield the CSV files under path as batches of records, in file completion order.
+    With suffix '.parquet', the Parquet files written by csv_to_parquet.py are read instead,
+    as v2 records if record_version is '2' (read_input).
+
+    Files are read on worker threads, at most read_concurrency ahead, so memory
+    stays bounded however many files there are. Parsing runs on the event loop
+    one batch per step: in a worker thread it would hold the GIL and stall the
+    loop anyway, for longer. Batches of one file keep their order.
+    """
+    # Thousands of readers started together would otherwise all list and submit in one step
+    await step_budget().take()
+    files = iter(find_csv_files(path, suffix))
+    pending: Dict[asyncio.Future, Path] = {}
+
+    def read_ahead():
+        for csv_path in itertools.islice(files, read_concurrency - len(pending)):
+            pending[asyncio.ensure_future(asyncio.to_thread(read_input, csv_path, record_version))] = csv_path
+
+    read_ahead()
+    try:
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            finished = [(pending.pop(task), task.result()) for task in done]
+            read_ahead()
+            for csv_path, content in finished:
+                if isinstance(content, str):
+                    batches = parse_csv_batches(csv_path.name, content, batch_size)
+                else:
+                    records, rejected, typed = content
+                    batches = split_parquet_batches(csv_path.name, records, batch_size, rejected, typed)
+                while True:
+                    # Rows cost about as much to parse as to produce; budget them the same way
+                    await step_budget().take(min(batch_size, STEP_BUDGET))
+                    batch = next(batches, None)
+                    if batch is None:
+                        break
+                    yield batch
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def produce_csv(
+    path: Path,
+    producer: AsyncProducer,
+    kafka_topic: str,
+    validator: Optional[RecordValidator] = None,
+    dead_letters: Optional[DeadLetterSink] = None,
+    batch_size: int = DEFAULT_VALIDATION_BATCH_SIZE,
+    read_concurrency: int = DEFAULT_READ_CONCURRENCY,
+    record_version: str = '1',
+    kafka_topic_v2: Optional[str] = None,
+    suffix: str = '.csv'
+) -> Dict[str, int]:
+    """
+    Produce every CSV file under path and wait for delivery.
+
+    record_version and kafka_topic_v2 select the record layout as in
+    produce.py. suffix selects CSV or Parquet files in a directory. Rows that fail conversion or validation go to dead_letters.
+    Returns the counts of records produced, dead-lettered and failed delivery.
+    """
+    dead_letters = dead_letters or DeadLetterSink()
+    # As in produce.py, v2 records never go to the v1 topic
+    kafka_topic_v2 = kafka_topic_v2 or f"{kafka_topic}_V2"
+    targets = [(topic, version) for topic, version in ((kafka_topic, '1'), (kafka_topic_v2, '2'))
+               if record_version in (version, 'both')]
+    headers = {version: [('schema_version', version.encode('utf-8'))] for _, version in targets}
+    failed_before = producer.failed
+    counts = {'records': 0, 'dead_lettered': 0, 'failed': 0}
+    async for batch in csv_batches(path, batch_size, read_concurrency, suffix, record_version):
+        for row, reason, line in batch.rejected:
+            dead_letters.send(row, reason, batch.source, line, batch.symbol)
+        invalid = dict(validator.validate_batch(batch.records)) if validator and not batch.typed else {}
+        key = batch.symbol.encode('utf-8')
+        for index, record in enumerate(batch.records):
+            if index not in invalid:
+                try:
+                    v2 = record if batch.typed else to_v2_record(record) if record_version != '1' else None
+                    layouts = {'1': record, '2': v2}
+                except ValueError as e:
+                    # Only reachable without validation: a v1 string the v2 conversion cannot parse
+                    invalid[index] = f"v2 conversion: {e}"
+                else:
+                    for topic, version in targets:
+                        await producer.produce(topic, serialize_json_record(layouts[version]), key,
+                                               headers[version], track=False)
+                    continue
+            dead_letters.send(record, invalid[index], batch.source, batch.lines[index], batch.symbol)
+        counts['records'] += len(batch.records) - len(invalid)
+        counts['dead_lettered'] += len(batch.rejected) + len(invalid)
+        # produce() only suspends when the in-flight limit is reached; let other tasks run between batches
+        await asyncio.sleep(0)
+    await producer.flush()
+    counts['failed'] = producer.failed - failed_before
+    return counts
+
+
+async def run(args) -> int:
+    config = get_kafka_config()
+    kafka_topic = os.getenv('KAFKA_TOPIC')
+    if not config or not kafka_topic:
+        print("ERROR: KAFKA_BOOTSTRAP_SERVERS and KAFKA_TOPIC must be set", file=sys.stderr)
+        return 1
+    config['client.id'] = 'nasdaq-demo-async-producer'
+    validator = None if args.no_validate else load_validator(args.schema)
+
+    async with AsyncProducer(config, args.max_in_flight) as producer:
+        dead_letter_topic = args.dead_letter_topic or os.getenv('KAFKA_DEAD_LETTER_TOPIC')
+        dead_letters = DeadLetterSink(producer.producer, dead_letter_topic, args.dead_letter_file)
+        print(f"Producing {args.path} to {kafka_topic} (max {args.max_in_flight} in flight)")
+        counts = await produce_csv(Path(args.path), producer, kafka_topic, validator, dead_letters,
+                                   read_concurrency=args.read_concurrency,
+                                   record_version=args.record_version or os.getenv('KAFKA_RECORD_VERSION', '1'),
+                                   kafka_topic_v2=os.getenv('KAFKA_TOPIC_V2'),
+                                   suffix=f'.{args.input_format}')
+        dead_letters.close()
+
+    print(f"{counts['records']} records delivered, {counts['dead_lettered']} dead-lettered to "
+          f"{dead_letters.describe()}, {counts['failed']} failed")
+    if counts['failed']:
+        print(f"Last delivery error: {producer.last_error}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Produce historical stock quote CSV files to Kafka with the asyncio API'
+    )
+    parser.add_argument('path', type=str, help='Path to a CSV or Parquet file, or a directory containing CSV files')
+    parser.add_argument('--input-format', choices=['csv', 'parquet'], default='csv',
+                        help='Files to pick up when path is a directory, as in produce.py (default: csv)')
+    parser.add_argument('--env-file', type=str, default='.env', help='Path to .env file (default: .env)')
+    parser.add_argument(
+        '--max-in-flight',
+        type=int,
+        default=DEFAULT_MAX_IN_FLIGHT,
+        help=f'Messages awaiting delivery at once (default: {DEFAULT_MAX_IN_FLIGHT})'
+    )
+    parser.add_argument(
+        '--read-concurrency',
+        type=int,
+        default=DEFAULT_READ_CONCURRENCY,
+        help=f'CSV files read ahead on worker threads (default: {DEFAULT_READ_CONCURRENCY})'
+    )
+    parser.add_argument('--schema', type=str, default=str(DEFAULT_SCHEMA), help='JSON Schema to validate records against')
+    parser.add_argument('--no-validate', action='store_true', help='Produce records without schema validation')
+    parser.add_argument('--record-version', choices=RECORD_VERSIONS,
+                        help='Record layout, as in produce.py (default: KAFKA_RECORD_VERSION or 1)')
+    parser.add_argument('--dead-letter-topic', type=str, help='Kafka topic for invalid rows (default: KAFKA_DEAD_LETTER_TOPIC)')
+    parser.add_argument('--dead-letter-file', type=str, help='Append invalid rows as NDJSON to this file')
+    args = parser.parse_args()
+
+    env_path = Path(args.env_file)
+    if env_path.exists():
+        load_dotenv(env_path)
+    sys.exit(asyncio.run(run(args)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Benchmark the asyncio producer API with thousands of small CSV files.
+
+Splits the CSVs in ../data into many small files, one symbol each, and
+produces them to a local librdkafka mock cluster, so no Kafka cluster is
+needed. Three runs:
+
+    produce_csv   - one produce_csv() call over the whole directory
+    file tasks    - one asyncio task per file, as an ingestion service would
+                    start them, each awaiting the delivery futures of its file
+    threads       - produce.py's CLI path: one thread per file (reference)
+
+A probe task measures event loop lag during the async runs. The run fails if
+any record is not produced or not delivered, if the in-flight limit is
+exceeded, or if the p99 loop lag exceeds --max-lag-ms.
+
+Usage:
+    uv run python benchmark_async.py
+    uv run python benchmark_async.py --files 5000 --rows 20 --max-in-flight 5000
+"""
+
+import argparse
+import asyncio
+import contextlib
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import List
+
+from confluent_kafka import Producer
+
+from async_produce import AsyncProducer, csv_batches, produce_csv
+from produce import find_csv_files, process_csv_file, serialize_json_record
+
+DATA_DIR = Path(__file__).resolve().parent.parent / 'data'
+TOPIC = 'HISTORICAL_STOCK_QUOTES'
+MOCK_CONFIG = {
+    'test.mock.num.brokers': 1,
+    'client.id': 'nasdaq-demo-benchmark',
+    'linger.ms': 5,
+    'log_level': 3,
+}
+
+
+def build_input(workdir: Path, files: int, rows: int) -> int:
+    """Write `files` CSVs of `rows` rows each, cycling through the source rows; return the row count."""
+    source = find_csv_files(DATA_DIR)[0].read_text().splitlines()
+    header, body = source[0], source[1:]
+    for i in range(files):
+        symbol = ''.join(chr(ord('A') + i // 26 ** k % 26) for k in (2, 1, 0))
+        start = i * rows % len(body)
+        chunk = (body[start:] + body)[:rows]
+        (workdir / f"HistoricalData_{symbol}.csv").write_text('\n'.join([header, *chunk]) + '\n')
+    return files * rows
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))] if ordered else 0.0
+
+
+class LagProbe:
+    """Sleep in short steps on the event loop and record how late each wakeup is."""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.lags: List[float] = []
+        self._task = None
+
+    async def _run(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.lags.append(time.perf_counter() - start - self.interval)
+
+    def __enter__(self):
+        self._task = asyncio.ensure_future(self._run())
+        return self
+
+    def __exit__(self, *exc_info):
+        self._task.cancel()
+
+
+async def run_produce_csv(workdir: Path, max_in_flight: int):
+    async with AsyncProducer(MOCK_CONFIG, max_in_flight) as producer:
+        with LagProbe() as probe:
+            start = time.perf_counter()
+            counts = await produce_csv(workdir, producer, TOPIC)
+            elapsed = time.perf_counter() - start
+    return elapsed, counts, producer.delivered, producer.peak_in_flight, probe.lags, []
+
+
+async def run_file_tasks(workdir: Path, max_in_flight: int):
+    latencies: List[float] = []
+    counts = {'records': 0, 'dead_lettered': 0, 'failed': 0}
+
+    async def produce_file(producer: AsyncProducer, csv_path: Path):
+        start = time.perf_counter()
+        futures = []
+        async for batch in csv_batches(csv_path, read_concurrency=1):
+            key = batch.symbol.encode('utf-8')
+            counts['dead_lettered'] += len(batch.rejected)
+            for record in batch.records:
+                futures.append(await producer.produce(TOPIC, serialize_json_record(record), key))
+            counts['records'] += len(batch.records)
+        await asyncio.gather(*futures)
+        latencies.append(time.perf_counter() - start)
+
+    async with AsyncProducer(MOCK_CONFIG, max_in_flight) as producer:
+        with LagProbe() as probe:
+            start = time.perf_counter()
+            await asyncio.gather(*(produce_file(producer, csv_path) for csv_path in find_csv_files(workdir)))
+            elapsed = time.perf_counter() - start
+    counts['failed'] = producer.failed
+    return elapsed, counts, producer.delivered, producer.peak_in_flight, probe.lags, latencies
+
+
+def run_threads(workdir: Path):
+    producer = Producer({**MOCK_CONFIG, 'queue.buffering.max.messages': 1000000})
+    start = time.perf_counter()
+    # produce.py prints a line per delivered message; keep it out of the way but still pay for it
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        threads = [threading.Thread(target=process_csv_file, args=(csv_path, idx, producer, TOPIC))
+                   for idx, csv_path in enumerate(find_csv_files(workdir), start=1)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        producer.flush()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the asyncio producer API with many small CSV files')
+    parser.add_argument('--files', type=int, default=2000, help='Small CSV files to generate (default: 2000)')
+    parser.add_argument('--rows', type=int, default=50, help='Rows per file (default: 50)')
+    parser.add_argument('--max-in-flight', type=int, default=10000, help='In-flight limit (default: 10000)')
+    parser.add_argument('--max-lag-ms', type=float, default=50.0, help='Allowed p99 event loop lag (default: 50)')
+    parser.add_argument('--skip-threads', action='store_true', help='Skip the thread-per-file reference run')
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix='async_bench_'))
+    checks = []
+    try:
+        rows = build_input(workdir, args.files, args.rows)
+        print(f"{args.files} CSV files x {args.rows} rows = {rows:,} records, "
+              f"max {args.max_in_flight:,} in flight, mock Kafka cluster\n")
+
+        for name, scenario in (('produce_csv', run_produce_csv), ('file tasks', run_file_tasks)):
+            elapsed, counts, delivered, peak, lags, latencies = asyncio.run(scenario(workdir, args.max_in_flight))
+            lag_p99 = percentile(lags, 99) * 1000
+            # The input is copied from valid source rows: every one must be produced, none dead-lettered
+            produced_ok = counts == {'records': rows, 'dead_lettered': 0, 'failed': 0}
+            ok = produced_ok and delivered == rows and peak <= args.max_in_flight and lag_p99 <= args.max_lag_ms
+            checks.append(ok)
+            print(f"  {name:<12} {elapsed:>6.2f}s {rows / elapsed:>9,.0f} rows/s  {delivered:,} delivered, "
+                  f"peak {peak:,} in flight  {'OK' if ok else 'FAIL'}")
+            if not produced_ok:
+                print(f"  {'':<12} expected {rows:,} records produced, got {counts['records']:,} produced, "
+                      f"{counts['dead_lettered']:,} dead-lettered, {counts['failed']:,} failed")
+            print(f"  {'':<12} loop lag p50 {percentile(lags, 50) * 1000:.1f} ms, p99 {lag_p99:.1f} ms, "
+                  f"max {max(lags, default=0) * 1000:.1f} ms")
+            if latencies:
+                print(f"  {'':<12} per-file delivery p50 {statistics.median(latencies) * 1000:.0f} ms, "
+                      f"p99 {percentile(latencies, 99) * 1000:.0f} ms")
+
+        if not args.skip_threads:
+            elapsed = run_threads(workdir)
+            print(f"  {'threads':<12} {elapsed:>6.2f}s {rows / elapsed:>9,.0f} rows/s  ({args.files} threads, reference)")
+
+        print("\nPASS" if all(checks) else "\nFAIL")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if not all(checks):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Benchmark produce.py's change index on a simulated daily re-export.
+
+Writes one CSV per symbol with the full history of the CSVs in ../data, then
+produces the directory to a local librdkafka mock cluster five times:
+
+    full       - without an index: every row, as produce.py always did
+    first      - with an empty index: every row is new and gets indexed
+    dry run    - the next day's re-export, in print mode: one new quote per
+                 symbol on top and a few historical quotes corrected by the
+                 vendor. Nothing is delivered, so the index must not change
+    refresh    - the same re-export, produced
+    repeat     - the refresh again: nothing is new, nothing is produced
+
+For each run the script reports the messages that reached the topic, the
+new, changed and unchanged counts, and the time taken. The run fails if any
+run produces more or fewer messages than the rows that are new or changed.
+
+Usage:
+    uv run python benchmark_change_index.py
+    uv run python benchmark_change_index.py --symbols 500 --corrections 20
+"""
+
+import argparse
+import contextlib
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List, Optional
+
+from confluent_kafka import Consumer, Producer, TopicPartition
+
+from change_index import ChangeIndex
+from produce import find_csv_files, process_csv_file
+
+DATA_DIR = Path(__file__).resolve().parent.parent / 'data'
+TOPIC = 'HISTORICAL_STOCK_QUOTES'
+
+
+def symbol_name(i: int) -> str:
+    """Letters only, to satisfy the schema's symbol pattern."""
+    return 'X' + ''.join(chr(ord('A') + i // 26 ** k % 26) for k in (2, 1, 0))
+
+
+def write_exports(workdir: Path, symbols: int) -> List[str]:
+    """Write HistoricalData_<SYMBOL>.csv files with the history of the source data; return the header and rows."""
+    lines: List[str] = []
+    for source in find_csv_files(DATA_DIR):
+        text = source.read_text().splitlines()
+        lines = lines or text[:1]
+        lines.extend(text[1:])
+    for i in range(symbols):
+        (workdir / f"HistoricalData_{symbol_name(i)}.csv").write_text('\n'.join(lines) + '\n')
+    return lines
+
+
+def refresh_exports(workdir: Path, lines: List[str], symbols: int, corrections: int) -> int:
+    """
+    Rewrite the files as the next day's export: a new quote on top (newest
+    first, as Nasdaq exports are) and `corrections` files with one older
+    quote's volume changed. Returns the rows that are new or changed.
+    """
+    header, rows = lines[0], lines[1:]
+    latest = max(datetime.strptime(row.split(',')[0], '%m/%d/%Y') for row in rows)
+    next_day = latest + timedelta(days=3 if latest.weekday() == 4 else 1)
+    new_row = f"{next_day:%m/%d/%Y}," + rows[0].split(',', 1)[1]
+    for i in range(symbols):
+        body = [new_row] + rows
+        if i < corrections:
+            fields = body[10 + i].split(',')
+            fields[2] = str(int(fields[2]) + 1)
+            body[10 + i] = ','.join(fields)
+        (workdir / f"HistoricalData_{symbol_name(i)}.csv").write_text('\n'.join([header, *body]) + '\n')
+    return symbols + corrections
+
+
+def topic_size(consumer: Consumer) -> int:
+    """Messages in the topic, summed over its partitions."""
+    partitions = consumer.list_topics(TOPIC, timeout=10).topics[TOPIC].partitions
+    return sum(consumer.get_watermark_offsets(TopicPartition(TOPIC, p), timeout=10)[1] for p in partitions)
+
+
+def run(files, producer: Optional[Producer], index: Optional[ChangeIndex]) -> float:
+    start = time.perf_counter()
+    # produce.py prints a line per delivered message; keep it out of the way but still pay for it
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        for idx, csv_file in enumerate(files, start=1):
+            process_csv_file(csv_file, idx, producer, TOPIC if producer else None, change_index=index)
+        if producer:
+            producer.flush()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark produce.py's change index on a daily re-export")
+    parser.add_argument('--symbols', type=int, default=100, help='Symbols (CSV files) to export (default: 100)')
+    parser.add_argument('--corrections', type=int, default=5, help='Historical quotes corrected in the refresh (default: 5)')
+    args = parser.parse_args()
+
+    producer = Producer({
+        'test.mock.num.brokers': 1,
+        'client.id': 'nasdaq-demo-benchmark',
+        'queue.buffering.max.messages': 1000000,
+        'linger.ms': 5,
+        'log_level': 3,
+    })
+    brokers = producer.list_topics(timeout=10).brokers.values()
+    consumer = Consumer({
+        'bootstrap.servers': ','.join(f"{b.host}:{b.port}" for b in brokers),
+        'group.id': 'benchmark-change-index',
+        'log_level': 3,
+    })
+
+    workdir = Path(tempfile.mkdtemp(prefix='change_index_bench_'))
+    index_path = str(workdir / 'change_index.sqlite')
+    failures = []
+    try:
+        lines = write_exports(workdir, args.symbols)
+        files = find_csv_files(workdir)
+        rows = args.symbols * (len(lines) - 1)
+        print(f"{len(files)} CSV files, {rows:,} rows, mock Kafka cluster\n")
+        print(f"  {'run':<9} {'rows':>9} {'produced':>9} {'new':>9} {'changed':>8} {'unchanged':>10} {'time':>8}")
+
+        changed_rows = 0
+        for name in ('full', 'first', 'dry run', 'refresh', 'repeat'):
+            if name == 'dry run':
+                changed_rows = refresh_exports(workdir, lines, args.symbols, args.corrections)
+                rows += args.symbols
+            active = producer if name != 'dry run' else None
+            index = ChangeIndex(index_path, f"{TOPIC}:None:v1" if active else None) if name != 'full' else None
+            indexed_before = index.size() if index else 0
+            before = topic_size(consumer)
+            elapsed = run(files, active, index)
+            produced = topic_size(consumer) - before
+            counts = index.counts if index else {'new': '-', 'changed': '-', 'unchanged': '-'}
+            print(f"  {name:<9} {rows:>9,} {produced:>9,} {counts['new']:>9} {counts['changed']:>8} "
+                  f"{counts['unchanged']:>10} {elapsed:>7.2f}s")
+
+            expected = {'full': rows, 'first': rows, 'refresh': changed_rows, 'dry run': 0, 'repeat': 0}[name]
+            if produced != expected:
+                failures.append(f"{name}: {produced:,} messages produced, expected {expected:,}")
+            if name == 'dry run' and index.size() != indexed_before:
+                failures.append(f"dry run changed the index from {indexed_before:,} to {index.size():,} rows")
+            if name == 'dry run' and index.counts['new'] + index.counts['changed'] != changed_rows:
+                failures.append(f"dry run found {index.describe_counts()}, expected {changed_rows:,} new or changed")
+            if index:
+                index.close()
+
+        size = os.path.getsize(index_path)
+        print(f"\n  index: {size / 1024**2:.1f} MB for {rows:,} rows ({size / rows:.0f} bytes/row)")
+    finally:
+        consumer.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    for failure in failures:
+        print(f"  FAIL: {failure}")
+    print("\nPASS" if not failures else "\nFAIL")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Compare the v1 and v2 quote record layouts: payload size and consumer parse cost.
+
+v1 carries prices as "$445.91" strings and dates as MM/DD/YYYY, so every
+consumer re-parses them on every row. v2 carries prices as integers scaled by
+10^4 (Avro: decimal(12,4)) and dates as epoch days, parsed once in produce.py.
+
+For the rows of the CSVs in ../data, the script reports:
+
+    - the average payload size of JSON and schemaless Avro messages
+    - the producer-side cost of the v1 -> v2 conversion
+    - the consumer-side cost of decoding a message into typed values
+      (datetime.date plus Decimal prices, or plus float prices)
+
+It fails if any v2 record does not validate against
+data/historical_stock_quotes_v2.json, or if v1 and v2 decode to different
+typed values.
+
+Usage:
+    uv run --with fastavro python benchmark_schema_v2.py
+    uv run --with fastavro python benchmark_schema_v2.py --copies 20 --rounds 5
+"""
+
+import argparse
+import csv
+import io
+import json
+import sys
+import time
+from datetime import date, datetime
+from decimal import Decimal
+from pathlib import Path
+
+from fastavro import parse_schema, schemaless_reader, schemaless_writer
+
+from produce import (
+    EPOCH_ORDINAL,
+    PRICE_DECIMALS,
+    csv_row_to_record,
+    extract_symbol_from_filename,
+    find_csv_files,
+    serialize_json_record,
+    to_v2_record,
+)
+from schema_validation import load_validator
+
+DATA_DIR = Path(__file__).resolve().parent.parent / 'data'
+PRICES = ('close_last', 'open', 'high', 'low')
+
+
+def load_records(copies: int):
+    records = []
+    for csv_path in find_csv_files(DATA_DIR):
+        symbol = extract_symbol_from_filename(csv_path.name)
+        with open(csv_path, 'r') as f:
+            records.extend(csv_row_to_record(row, symbol) for row in csv.DictReader(f))
+    return records * copies
+
+
+def avro_encode(schema, record) -> bytes:
+    buffer = io.BytesIO()
+    schemaless_writer(buffer, schema, record)
+    return buffer.getvalue()
+
+
+def avro_v2_record(record):
+    """fastavro takes Python values for logical types: date and Decimal."""
+    return {
+        **record,
+        'quote_date': date.fromordinal(record['quote_date'] + EPOCH_ORDINAL),
+        **{name: Decimal(record[name]).scaleb(-PRICE_DECIMALS) for name in PRICES},
+    }
+
+
+# Consumers: turn one message into (symbol, date, close, volume, open, high, low)
+
+def v1_decimal(record):
+    return (record['symbol'], datetime.strptime(record['date'], '%m/%d/%Y').date(),
+            Decimal(record['close_last'][1:]), record['volume'], Decimal(record['open'][1:]),
+            Decimal(record['high'][1:]), Decimal(record['low'][1:]))
+
+
+def v2_decimal(record):
+    return (record['symbol'], date.fromordinal(record['quote_date'] + EPOCH_ORDINAL),
+            Decimal(record['close_last']).scaleb(-PRICE_DECIMALS), record['volume'],
+            Decimal(record['open']).scaleb(-PRICE_DECIMALS), Decimal(record['high']).scaleb(-PRICE_DECIMALS),
+            Decimal(record['low']).scaleb(-PRICE_DECIMALS))
+
+
+def v1_float(record):
+    return (record['symbol'], datetime.strptime(record['date'], '%m/%d/%Y').date(),
+            float(record['close_last'][1:]), record['volume'], float(record['open'][1:]),
+            float(record['high'][1:]), float(record['low'][1:]))
+
+
+def v2_float(record):
+    return (record['symbol'], date.fromordinal(record['quote_date'] + EPOCH_ORDINAL),
+            record['close_last'] / 10000, record['volume'], record['open'] / 10000,
+            record['high'] / 10000, record['low'] / 10000)
+
+
+def avro_v2_typed(record):
+    # fastavro already returns date and Decimal for the logical types
+    return (record['symbol'], record['quote_date'], record['close_last'], record['volume'],
+            record['open'], record['high'], record['low'])
+
+
+def best_time(rounds: int, fn, items) -> float:
+    best = float('inf')
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for item in items:
+            fn(item)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare payload size and parse cost of quote records v1 and v2')
+    parser.add_argument('--copies', type=int, default=10, help='Times the source rows are repeated (default: 10)')
+    parser.add_argument('--rounds', type=int, default=3, help='Timed rounds per measurement; the best is kept (default: 3)')
+    args = parser.parse_args()
+
+    v1_records = load_records(args.copies)
+    rows = len(v1_records)
+    v2_records = [to_v2_record(record) for record in v1_records]
+
+    # Correctness first: v2 must validate and decode to exactly what v1 decodes to
+    validator = load_validator(str(DATA_DIR / 'historical_stock_quotes_v2.json'))
+    invalid = validator.validate_batch(v2_records)
+    mismatches = sum(v1_decimal(a) != v2_decimal(b) for a, b in zip(v1_records, v2_records))
+
+    avro_v1 = parse_schema(json.loads((DATA_DIR / 'historical_stock_quotes.avsc').read_text()))
+    avro_v2 = parse_schema(json.loads((DATA_DIR / 'historical_stock_quotes_v2.avsc').read_text()))
+    payloads = {
+        'JSON v1': [serialize_json_record(record) for record in v1_records],
+        'JSON v2': [serialize_json_record(record) for record in v2_records],
+        'Avro v1': [avro_encode(avro_v1, record) for record in v1_records],
+        'Avro v2': [avro_encode(avro_v2, avro_v2_record(record)) for record in v2_records],
+    }
+    mismatches += sum(v1_decimal(a) != avro_v2_typed(schemaless_reader(io.BytesIO(b), avro_v2))
+                      for a, b in zip(v1_records[:1000], payloads['Avro v2'][:1000]))
+
+    print(f"{rows:,} records from {DATA_DIR}\n")
+    print("Payload size per message")
+    baseline = sum(map(len, payloads['JSON v1'])) / rows
+    for name, encoded in payloads.items():
+        size = sum(map(len, encoded)) / rows
+        print(f"  {name:<8} {size:>6.1f} bytes  {(size / baseline - 1) * 100:+6.1f}% vs JSON v1")
+
+    convert = best_time(args.rounds, to_v2_record, v1_records)
+    print(f"\nProducer: v1 -> v2 conversion {convert / rows * 1e6:.2f} us/row (paid once, in produce.py)")
+
+    print("\nConsumer: message -> typed values (date, prices, volume)")
+    consumers = [
+        ('JSON v1', 'Decimal', lambda m: v1_decimal(json.loads(m)), payloads['JSON v1']),
+        ('JSON v2', 'Decimal', lambda m: v2_decimal(json.loads(m)), payloads['JSON v2']),
+        ('JSON v1', 'float', lambda m: v1_float(json.loads(m)), payloads['JSON v1']),
+        ('JSON v2', 'float', lambda m: v2_float(json.loads(m)), payloads['JSON v2']),
+        ('Avro v1', 'Decimal', lambda m: v1_decimal(schemaless_reader(io.BytesIO(m), avro_v1)), payloads['Avro v1']),
+        ('Avro v2', 'Decimal', lambda m: avro_v2_typed(schemaless_reader(io.BytesIO(m), avro_v2)), payloads['Avro v2']),
+    ]
+    timings = {}
+    for name, kind, fn, encoded in consumers:
+        timings[name, kind] = best_time(args.rounds, fn, encoded) / rows * 1e6
+    for (name, kind), micros in timings.items():
+        v1 = timings[name.replace('v2', 'v1'), kind]
+        saving = '' if name.endswith('v1') else f"  {(1 - micros / v1) * 100:5.1f}% less than {name[:-1]}1"
+        print(f"  {name:<8} {kind:<8} {micros:>6.2f} us/row{saving}")
+
+    print()
+    print(f"{len(invalid)} v2 record(s) fail historical_stock_quotes_v2.json, "
+          f"{mismatches} typed value mismatch(es) between v1 and v2")
+    ok = not invalid and not mismatches
+    print("PASS" if ok else "FAIL")
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
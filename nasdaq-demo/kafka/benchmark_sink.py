@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Benchmark and check sink_postgres.py against a local mock Kafka cluster.
+
+Produces the CSVs in ../data, several symbols per file, to a librdkafka mock
+cluster (half the symbols as v1 records, half as v2, plus a few malformed
+rows) and sinks them into a scratch database created with
+postgres/01-schema.sql. Two phases:
+
+    load     - every quote once: all inserts
+    replay   - a slice of the quotes again, half of them with a corrected
+               close price: updates for those, no writes for the rest
+
+For each phase the script reports rows/s and the latency of the database and
+offset commits. The run fails if the table does not hold exactly the valid
+rows, if any count differs from what was produced, if the TSLA rows differ
+from what postgres/02-seed-data.sql loads, or if the committed offsets do not
+cover the topic.
+
+Connection settings come from the standard libpq variables (PGHOST, PGPORT,
+PGUSER, PGPASSWORD); the user needs CREATEDB. psql must be on PATH.
+
+Usage:
+    uv run --with psycopg2-binary python benchmark_sink.py
+    uv run --with psycopg2-binary python benchmark_sink.py --copies 50 --batch-size 5000
+"""
+
+import argparse
+import csv
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import psycopg2
+from confluent_kafka import Producer
+
+from produce import (
+    DEFAULT_SCHEMA,
+    DeadLetterSink,
+    csv_row_to_record,
+    extract_symbol_from_filename,
+    find_csv_files,
+    scaled_price,
+    serialize_json_record,
+    to_v2_record,
+)
+from schema_validation import load_validator
+from sink_postgres import DEFAULT_SCHEMA_V2, PostgresSink, create_consumer, run, v2_price
+
+DATA_DIR = Path(__file__).resolve().parent.parent / 'data'
+POSTGRES_DIR = Path(__file__).resolve().parent.parent / 'postgres'
+TOPIC = 'HISTORICAL_STOCK_QUOTES'
+SEED_SYMBOL = 'TSLA'
+
+# v1 records that fail the schema, as a producer without validation would send them
+BAD_RECORDS = [
+    {'symbol': 'XBAD', 'date': '13/01/2025', 'close_last': '$1.00', 'volume': 100, 'open': '$1.00', 'high': '$1.00', 'low': '$1.00'},
+    {'symbol': 'XBAD', 'date': '01/02/2025', 'close_last': '1.00', 'volume': 100, 'open': '$1.00', 'high': '$1.00', 'low': '$1.00'},
+    {'symbol': 'xbad', 'date': '01/06/2025', 'close_last': '$1.00', 'volume': 100, 'open': '$1.00', 'high': '$1.00', 'low': '$1.00'},
+    # Valid by the schema, rejected by TO_DATE: the batch is retried by halves
+    {'symbol': 'XBAD', 'date': '02/31/2025', 'close_last': '$1.00', 'volume': 100, 'open': '$1.00', 'high': '$1.00', 'low': '$1.00'},
+]
+
+QUOTE_COLUMNS = "symbol, quote_date, close_price, volume, open_price, high_price, low_price"
+
+Quote = Tuple[str, Dict[str, Any]]  # (schema version, v1 record)
+
+
+def build_quotes(copies: int) -> List[Quote]:
+    """
+    `copies` symbols per source CSV. The first copy keeps the file's own symbol;
+    the others get letters-only symbols. Odd copies are sent as v2 records.
+    """
+    quotes: List[Quote] = []
+    for source_index, source in enumerate(find_csv_files(DATA_DIR)):
+        with open(source, newline='') as f:
+            rows = list(csv.DictReader(f))
+        for copy in range(copies):
+            if copy == 0:
+                symbol = extract_symbol_from_filename(source.name)
+            else:
+                symbol = 'X' + chr(ord('A') + source_index % 26) + chr(ord('A') + copy // 26 % 26) + chr(ord('A') + copy % 26)
+            version = '2' if copy % 2 else '1'
+            quotes.extend((version, csv_row_to_record(row, symbol)) for row in rows)
+    return quotes
+
+
+def produce_quotes(producer: Producer, quotes: List[Quote]):
+    for version, record in quotes:
+        value = to_v2_record(record) if version == '2' else record
+        producer.produce(TOPIC, key=record['symbol'].encode('utf-8'), value=serialize_json_record(value),
+                         headers=[('schema_version', version.encode('utf-8'))])
+        producer.poll(0)
+    producer.flush()
+
+
+def corrected(record: Dict[str, Any]) -> Dict[str, Any]:
+    """The record with its close price raised by one cent."""
+    return {**record, 'close_last': v2_price(scaled_price(record['close_last']) + 100)}
+
+
+def psql(database: str, sql_file: str):
+    subprocess.run(['psql', '-q', '-v', 'ON_ERROR_STOP=1', '-d', database, '-f', sql_file],
+                   cwd=POSTGRES_DIR, check=True, stdout=subprocess.DEVNULL)
+
+
+def fetch_quotes(database: str, symbol: str) -> List[Tuple]:
+    with psycopg2.connect(dbname=database) as conn, conn.cursor() as cur:
+        cur.execute(f"SELECT {QUOTE_COLUMNS} FROM nasdaq.historical_stock_quotes WHERE symbol = %s ORDER BY quote_date",
+                    (symbol,))
+        return cur.fetchall()
+
+
+def sink_phase(name: str, consumer, sink: PostgresSink, args, validators, failures: List[str]):
+    """Run the sink until the topic is drained and print its statistics."""
+    dead_letters = DeadLetterSink(path=os.devnull)
+    stats = run(consumer, sink, validators, dead_letters,
+                args.batch_size, args.batch_timeout, args.idle_timeout, report_interval=float('inf'))
+    dead_letters.close()
+    for tp in consumer.committed(consumer.assignment(), timeout=10):
+        _, high = consumer.get_watermark_offsets(tp, timeout=10)
+        if tp.offset != high:
+            failures.append(f"{name}: committed offset {tp.offset} of partition {tp.partition}, end offset {high}")
+    print(f"  {name:<7} {stats.summary()}".replace('\n', '\n  '))
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the Kafka to PostgreSQL sink on a mock Kafka cluster')
+    parser.add_argument('--copies', type=int, default=20, help='Symbols generated per source CSV (default: 20)')
+    parser.add_argument('--replay', type=float, default=0.2, help='Fraction of the quotes sent again (default: 0.2)')
+    parser.add_argument('--batch-size', type=int, default=2000, help='Messages per database transaction (default: 2000)')
+    parser.add_argument('--batch-timeout', type=float, default=0.5, help='Seconds to wait for a full batch (default: 0.5)')
+    parser.add_argument('--idle-timeout', type=float, default=3.0, help='Seconds without messages before a phase ends (default: 3)')
+    parser.add_argument('--group-id', default='benchmark-sink', help='Consumer group (default: benchmark-sink)')
+    parser.add_argument('--database', default='nasdaq_bench_sink', help='Scratch database prefix (default: nasdaq_bench_sink)')
+    parser.add_argument('--keep', action='store_true', help='Keep the scratch databases')
+    args = parser.parse_args()
+
+    producer = Producer({
+        'test.mock.num.brokers': 1,
+        'client.id': 'nasdaq-demo-benchmark',
+        'queue.buffering.max.messages': 1000000,
+        'linger.ms': 5,
+        'log_level': 3,
+    })
+    brokers = producer.list_topics(timeout=10).brokers.values()
+    os.environ['KAFKA_BOOTSTRAP_SERVERS'] = ','.join(f"{b.host}:{b.port}" for b in brokers)
+    os.environ['KAFKA_SECURITY_PROTOCOL'] = 'PLAINTEXT'
+
+    validators = {'1': load_validator(str(DEFAULT_SCHEMA)), '2': load_validator(str(DEFAULT_SCHEMA_V2))}
+    quotes = build_quotes(args.copies)
+    replayed = quotes[:int(len(quotes) * args.replay)]
+    changed = replayed[::2]
+    replay = [(version, corrected(record)) for version, record in changed] + replayed[1::2]
+    symbols = len({record['symbol'] for _, record in quotes})
+
+    databases = {'sink': args.database, 'seed': f"{args.database}_seed"}
+    admin = psycopg2.connect(dbname='postgres')
+    admin.autocommit = True
+    admin_cur = admin.cursor()
+    failures: List[str] = []
+    try:
+        for database in databases.values():
+            admin_cur.execute(f'DROP DATABASE IF EXISTS "{database}"')
+            admin_cur.execute(f'CREATE DATABASE "{database}"')
+            psql(database, '01-schema.sql')
+        psql(databases['seed'], '02-seed-data.sql')
+
+        print(f"{len(quotes):,} quotes of {symbols} symbols (+{len(BAD_RECORDS)} malformed), "
+              f"replaying {len(replay):,} ({len(changed):,} corrected), batches of {args.batch_size:,}, mock Kafka cluster\n")
+
+        # One consumer for both phases, as a long-running sink would be
+        consumer = create_consumer(args.group_id, [TOPIC])
+        conn = psycopg2.connect(dbname=databases['sink'])
+        try:
+            sink = PostgresSink(conn)
+            produce_quotes(producer, quotes + [('1', record) for record in BAD_RECORDS])
+            load = sink_phase('load', consumer, sink, args, validators, failures)
+            produce_quotes(producer, replay)
+            again = sink_phase('replay', consumer, sink, args, validators, failures)
+        finally:
+            consumer.close()
+            conn.close()
+
+        expected = {
+            'load': (load, len(quotes), 0, 0, len(BAD_RECORDS)),
+            'replay': (again, 0, len(changed), len(replay) - len(changed), 0),
+        }
+        for name, (stats, inserted, updated, unchanged, dead) in expected.items():
+            got = (stats.inserted, stats.updated, stats.unchanged, stats.dead_lettered)
+            if got != (inserted, updated, unchanged, dead):
+                failures.append(f"{name}: inserted/updated/unchanged/dead-lettered {got}, "
+                                f"expected {(inserted, updated, unchanged, dead)}")
+
+        with psycopg2.connect(dbname=databases['sink']) as conn, conn.cursor() as cur:
+            cur.execute("SELECT COUNT(*), COUNT(*) FILTER (WHERE updated_at > created_at) FROM nasdaq.historical_stock_quotes")
+            rows, touched = cur.fetchone()
+        if (rows, touched) != (len(quotes), len(changed)):
+            failures.append(f"table holds {rows:,} rows with {touched:,} updated, "
+                            f"expected {len(quotes):,} with {len(changed):,}")
+
+        # Compare only the seed symbol's rows that the replay left alone
+        replayed_keys = {(record['symbol'], record['date']) for _, record in changed}
+        sunk = [row for row in fetch_quotes(databases['sink'], SEED_SYMBOL)
+                if (row[0], row[1].strftime('%m/%d/%Y')) not in replayed_keys]
+        seeded = [row for row in fetch_quotes(databases['seed'], SEED_SYMBOL)
+                  if (row[0], row[1].strftime('%m/%d/%Y')) not in replayed_keys]
+        if not seeded or sunk != seeded:
+            failures.append(f"{SEED_SYMBOL}: {len(sunk):,} sunk rows differ from {len(seeded):,} rows of 02-seed-data.sql")
+        else:
+            print(f"\n  {SEED_SYMBOL}: {len(sunk):,} rows identical to 02-seed-data.sql")
+    finally:
+        admin_cur.execute("SELECT pg_terminate_backend(pid) FROM pg_stat_activity WHERE datname = ANY(%s) AND pid != pg_backend_pid()",
+                          (list(databases.values()),))
+        if not args.keep:
+            for database in databases.values():
+                admin_cur.execute(f'DROP DATABASE IF EXISTS "{database}"')
+        admin.close()
+
+    for failure in failures:
+        print(f"  FAIL: {failure}")
+    print("\nPASS" if not failures else "\nFAIL")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Measure the cost of schema validation in produce.py and check its dead-letter routing.
+
+Copies the CSVs in ../data under several symbols, injects malformed rows
+(bad dates, prices without $, non-numeric volumes) into one copy, and runs
+produce.py's per-file processing against a local librdkafka mock cluster, so
+no Kafka cluster is needed. Each run is timed with and without validation, and
+the best of several rounds is reported. Wall-clock differences between runs
+are noisy at this size, so the time spent inside validate_batch is also
+measured directly. The run fails if that time exceeds --max-overhead percent
+of the run without validation, or if any injected row is not dead-lettered.
+
+The mock brokers answer at once, so the run without validation is about the
+cheapest produce path there is. Validation costs about 1 µs per row in
+CPython, which is 6-7% of that path; the default gate of 8% leaves room for
+timing noise. Against real brokers the share is smaller.
+
+Usage:
+    uv run python benchmark_validation.py
+    uv run python benchmark_validation.py --copies 60 --rounds 5 --max-overhead 10
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+from confluent_kafka import Producer
+
+from produce import DEFAULT_SCHEMA, DeadLetterSink, find_csv_files, process_csv_file
+from schema_validation import load_validator
+
+DATA_DIR = Path(__file__).resolve().parent.parent / 'data'
+
+BAD_ROWS = [
+    ('13/01/2025', '$1.00', '100', '$1.00', '$1.00', '$1.00'),     # month 13
+    ('01/02/2025', '1.00', '100', '$1.00', '$1.00', '$1.00'),      # price without $
+    ('2025-01-03', '$1.00', '100', '$1.00', '$1.00', '$1.00'),     # ISO date
+    ('01/06/2025', '$1.00', 'n/a', '$1.00', '$1.00', '$1.00'),     # volume is not a number
+    ('01/07/2025', '$1.00', '100', '$12345.00', '$1.00', '$1.00'), # price out of range
+]
+
+
+def build_input(workdir: Path, copies: int) -> int:
+    """Write `copies` symbols per source CSV, with BAD_ROWS spread through the first; return the row count."""
+    sources = find_csv_files(DATA_DIR)
+    total = 0
+    for source in sources:
+        lines = source.read_text().splitlines()
+        header, rows = lines[0], lines[1:]
+        for copy in range(copies):
+            body = list(rows)
+            if copy == 0 and source == sources[0]:
+                step = max(1, len(body) // (len(BAD_ROWS) + 1))
+                for i, bad in enumerate(BAD_ROWS, start=1):
+                    body.insert(i * step, ','.join(bad))
+            # Letters only, to satisfy the schema's symbol pattern
+            symbol = 'X' + chr(ord('A') + copy // 26 % 26) + chr(ord('A') + copy % 26)
+            (workdir / f"HistoricalData_{symbol}.csv").write_text('\n'.join([header, *body]) + '\n')
+            total += len(body)
+    return total
+
+
+def time_validation(validator, spent: List[float]):
+    """Wrap validator.validate_batch so the time spent in it is added to spent[0]."""
+    validate_batch = validator.validate_batch
+
+    def timed(records):
+        start = time.perf_counter()
+        try:
+            return validate_batch(records)
+        finally:
+            spent[0] += time.perf_counter() - start
+
+    validator.validate_batch = timed
+
+
+def run(files, validator, dead_letter_path):
+    producer = Producer({
+        'test.mock.num.brokers': 1,
+        'client.id': 'nasdaq-demo-benchmark',
+        'queue.buffering.max.messages': 1000000,
+        'linger.ms': 5,
+        'log_level': 3,
+    })
+    dead_letters = DeadLetterSink(path=dead_letter_path)
+    start = time.perf_counter()
+    # produce.py prints a line per delivered message; keep it out of the way but still pay for it
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        for idx, csv_file in enumerate(files, start=1):
+            process_csv_file(csv_file, idx, producer, 'HISTORICAL_STOCK_QUOTES', validator, dead_letters)
+        producer.flush()
+    elapsed = time.perf_counter() - start
+    dead_letters.close()
+    return elapsed, dead_letters.count
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark schema validation overhead in produce.py')
+    parser.add_argument('--copies', type=int, default=30, help='Symbols generated per source CSV (default: 30)')
+    parser.add_argument('--rounds', type=int, default=3, help='Timed rounds per mode; the best is kept (default: 3)')
+    parser.add_argument('--max-overhead', type=float, default=8.0, help='Allowed time in validate_batch, in percent of the run without validation (default: 8)')
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix='produce_bench_'))
+    try:
+        rows = build_input(workdir, args.copies)
+        files = find_csv_files(workdir)
+        validator = load_validator(str(DEFAULT_SCHEMA))
+        spent = [0.0]
+        time_validation(validator, spent)
+        print(f"{len(files)} CSV files, {rows:,} rows ({len(BAD_ROWS)} malformed), mock Kafka cluster")
+
+        best = {'without validation': float('inf'), 'with validation': float('inf')}
+        dead = {}
+        validation = float('inf')
+        for _ in range(args.rounds):
+            for mode, active in (('without validation', None), ('with validation', validator)):
+                dead_letter_path = workdir / f"dead_letters_{mode.replace(' ', '_')}.ndjson"
+                dead_letter_path.unlink(missing_ok=True)
+                spent[0] = 0.0
+                elapsed, dead[mode] = run(files, active, str(dead_letter_path))
+                best[mode] = min(best[mode], elapsed)
+                if active:
+                    validation = min(validation, spent[0])
+
+        for mode, elapsed in best.items():
+            print(f"  {mode:<19} {elapsed:>7.2f}s {rows / elapsed:>11,.0f} rows/s  {dead[mode]} dead-lettered")
+        wall = (best['with validation'] / best['without validation'] - 1) * 100
+        overhead = validation / best['without validation'] * 100
+        print(f"  wall-clock difference {wall:+.1f}%")
+        print(f"  time in validate_batch {validation:.3f}s = {overhead:.1f}% of the run without validation "
+              f"({validation / rows * 1e6:.2f} µs/row)")
+        print(f"  {validator.fast_batches} batches on the fast path, {validator.slow_batches} split to find the invalid records")
+
+        reasons = [json.loads(line)['reason'] for line in
+                   (workdir / 'dead_letters_with_validation.ndjson').read_text().splitlines()]
+        for reason in reasons:
+            print(f"    {reason}")
+
+        ok = dead['with validation'] == len(BAD_ROWS) and overhead <= args.max_overhead
+        print("PASS" if ok else "FAIL")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
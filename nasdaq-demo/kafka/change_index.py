@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Remember what produce.py has sent, so a re-export only sends what changed.
+
+The index maps (symbol, quote date) to a 64-bit hash of the quote's values.
+It is a single SQLite file (WITHOUT ROWID, about 40 bytes per quote, read
+through mmap), so a daily refresh of years of history loads one symbol's
+hashes with one indexed range scan instead of re-sending every row.
+
+For each file, SymbolChanges classifies each valid record as new, changed or
+unchanged. Unchanged records are skipped. A record's hash is stored only
+once Kafka has acknowledged every message sent for it. Records that failed
+delivery, or that were never sent (no producer), are sent again next time.
+
+The index also records the topic(s) and record version it was built for. If
+produce.py is pointed at a different target, the index is cleared and every
+row counts as new.
+"""
+
+import sqlite3
+import threading
+from hashlib import blake2b
+from typing import Any, Callable, Dict, Optional, Set
+
+# Quote fields whose values decide whether a row changed
+VALUE_FIELDS = ('close_last', 'volume', 'open', 'high', 'low')
+FIELD_SEP = '\x1f'
+MMAP_SIZE = 256 * 1024 * 1024
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS row_hashes (
+    symbol TEXT NOT NULL,
+    quote_date INTEGER NOT NULL,
+    row_hash INTEGER NOT NULL,
+    PRIMARY KEY (symbol, quote_date)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS index_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def row_hash(record: Dict[str, Any]) -> int:
+    """A signed 64-bit hash of a record's values (SQLite integers are signed)."""
+    text = FIELD_SEP.join(str(record[field]) for field in VALUE_FIELDS)
+    return int.from_bytes(blake2b(text.encode('utf-8'), digest_size=8).digest(), 'big', signed=True)
+
+
+class ChangeIndex:
+    """
+    Persistent (symbol, epoch day) -> row hash map, shared by all CSV processing threads.
+
+    target describes where rows are produced (topics and record version). An
+    index built for another target is cleared. With target None the index is
+    only read, as in print mode.
+    """
+
+    def __init__(self, path: str, target: Optional[str] = None):
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE}")
+        self.conn.executescript(SCHEMA_SQL)
+        self.counts = {'new': 0, 'changed': 0, 'unchanged': 0}
+        self.reset = False
+        if target is not None:
+            self._check_target(target)
+
+    def _check_target(self, target: str):
+        with self.lock, self.conn:
+            row = self.conn.execute("SELECT value FROM index_meta WHERE key = 'target'").fetchone()
+            if row and row[0] != target:
+                self.conn.execute("DELETE FROM row_hashes")
+                self.reset = True
+            self.conn.execute("INSERT OR REPLACE INTO index_meta (key, value) VALUES ('target', ?)", (target,))
+
+    def clear(self):
+        """Forget every row, e.g. after the topic was recreated."""
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM row_hashes")
+
+    def load(self, symbol: str) -> Dict[int, int]:
+        with self.lock:
+            rows = self.conn.execute("SELECT quote_date, row_hash FROM row_hashes WHERE symbol = ?", (symbol,))
+            return dict(rows.fetchall())
+
+    def store(self, symbol: str, hashes: Dict[int, int]):
+        """Insert or replace the hashes of symbol's rows in one transaction."""
+        if not hashes:
+            return
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "INSERT INTO row_hashes (symbol, quote_date, row_hash) VALUES (?, ?, ?) "
+                "ON CONFLICT (symbol, quote_date) DO UPDATE SET row_hash = excluded.row_hash",
+                ((symbol, day, digest) for day, digest in hashes.items())
+            )
+
+    def add_counts(self, counts: Dict[str, int]):
+        with self.lock:
+            for status, count in counts.items():
+                self.counts[status] += count
+
+    def size(self) -> int:
+        """Rows in the index."""
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM row_hashes").fetchone()[0]
+
+    def describe_counts(self) -> str:
+        return (f"{self.counts['new']} new, {self.counts['changed']} changed, "
+                f"{self.counts['unchanged']} unchanged (skipped)")
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+class SymbolChanges:
+    """Change detection for the rows of one symbol, i.e. one CSV file."""
+
+    def __init__(self, index: ChangeIndex, symbol: str):
+        self.index = index
+        self.symbol = symbol
+        self.known = index.load(symbol)
+        self.counts = {'new': 0, 'changed': 0, 'unchanged': 0}
+        # Filled from delivery callbacks, which may run on any thread that polls the producer
+        self.delivered: Dict[int, int] = {}
+        self.failed: Set[int] = set()
+
+    def classify(self, day: int, digest: int) -> str:
+        """'new', 'changed' or 'unchanged', counted."""
+        previous = self.known.get(day)
+        status = 'new' if previous is None else 'unchanged' if previous == digest else 'changed'
+        self.counts[status] += 1
+        return status
+
+    def delivery_callback(self, day: int, digest: int, callback: Callable) -> Callable:
+        """Wrap a delivery callback so the row's hash is kept once its message is delivered."""
+        def on_delivery(err, msg):
+            if err:
+                self.failed.add(day)
+            else:
+                self.delivered[day] = digest
+            callback(err, msg)
+        return on_delivery
+
+    def finish(self):
+        """Store the hashes of delivered rows and add this file's counts to the index totals. Call after flush()."""
+        self.index.store(self.symbol, {day: digest for day, digest in self.delivered.items() if day not in self.failed})
+        self.index.add_counts(self.counts)
+
+    def describe(self) -> str:
+        return f"{self.counts['new']} new, {self.counts['changed']} changed, {self.counts['unchanged']} unchanged"
+
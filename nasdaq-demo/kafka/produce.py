@@ -1,6 +1,26 @@
 #!/usr/bin/env python3
 """
 Process historical stock quote CSV files and produce to Kafka in JSON format.
+
+Records are validated against data/historical_stock_quotes.json in batches
+before they are produced. Rows that fail conversion or validation are routed,
+with the reason, to a dead-letter topic and/or NDJSON file.
+
+--record-version selects the record layout:
+  1     prices as "$445.91" strings and dates as MM/DD/YYYY (the default)
+  2     prices as integers scaled by 10^4 and dates as epoch days
+        (data/historical_stock_quotes_v2.json), parsed once here
+  both  v1 and v2, for migrating consumers
+v1 records go to KAFKA_TOPIC and v2 records to KAFKA_TOPIC_V2 (default
+<KAFKA_TOPIC>_V2), so switching from both to 2 only stops the v1 feed.
+Every message carries a schema_version header.
+
+Parquet files written by postgres/csv_to_parquet.py are accepted in place of
+CSVs (--input-format parquet for directories); they need pyarrow. With
+--record-version 2 their typed columns are read straight into v2 records.
+
+--change-index keeps a hash of every delivered row (change_index.py), so a
+re-export of the same files only produces the rows that are new or changed.
 """
 
 import argparse
@@ -10,13 +30,32 @@ import os
 import sys
 import threading
 import time
+from datetime import date
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 
 from confluent_kafka import Producer
 from confluent_kafka.admin import AdminClient, NewTopic, KafkaException
 from dotenv import load_dotenv
 
+from change_index import ChangeIndex, SymbolChanges, row_hash
+from schema_validation import RecordValidator, load_validator
+
+DEFAULT_SCHEMA = Path(__file__).resolve().parent.parent / 'data' / 'historical_stock_quotes.json'
+DEFAULT_VALIDATION_BATCH_SIZE = 1000
+
+RECORD_VERSIONS = ('1', '2', 'both')
+# Parquet files are the output of postgres/csv_to_parquet.py
+INPUT_SUFFIXES = ('.csv', '.parquet')
+# v2 prices are integers in units of 1/PRICE_SCALE USD; Nasdaq quotes carry at most 4 decimals
+PRICE_SCALE = 10_000
+PRICE_DECIMALS = 4
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+# Limits of data/historical_stock_quotes_v2.json, checked in bulk on typed Parquet input
+MAX_SCALED_PRICE = 99_999_999
+SYMBOL_PATTERN = '^[A-Z]{1,5}$'
+PRICE_FIELDS = ('close_last', 'open', 'high', 'low')
+
 
 def get_kafka_config() -> Optional[Dict[str, Any]]:
     """
@@ -165,6 +204,56 @@ def delivery_callback(err, msg):
         print(f'Message delivered to {msg.topic()} [{msg.partition()}] at offset {msg.offset()}')
 
 
+class DeadLetterSink:
+    """
+    Route invalid rows, with the reason, to a dead-letter topic and/or an NDJSON file.
+    With neither configured, the reasons are printed to stderr.
+    Shared by all CSV processing threads.
+    """
+
+    def __init__(self, producer: Optional[Producer] = None, topic: Optional[str] = None, path: Optional[str] = None):
+        self.producer = producer if topic else None
+        self.topic = topic
+        self.file = open(path, 'a', encoding='utf-8') if path else None
+        self.path = path
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def send(self, payload: Dict[str, Any], reason: str, source: str, line: int, symbol: str):
+        entry = {
+            'reason': reason,
+            'source_file': source,
+            'line': line,
+            'record': payload,
+        }
+        value = json.dumps(entry).encode('utf-8')
+        with self.lock:
+            self.count += 1
+            if self.file:
+                self.file.write(value.decode('utf-8') + '\n')
+        if self.producer:
+            self.producer.produce(
+                topic=self.topic,
+                key=symbol.encode('utf-8'),
+                value=value,
+                headers=[('dead_letter_reason', reason.encode('utf-8'))],
+            )
+        if not self.producer and not self.file:
+            print(f"[DLQ] {source}:{line}: {reason}", file=sys.stderr)
+
+    def describe(self) -> str:
+        targets = []
+        if self.producer:
+            targets.append(f"topic {self.topic}")
+        if self.file:
+            targets.append(f"file {self.path}")
+        return ' and '.join(targets) or 'stderr'
+
+    def close(self):
+        if self.file:
+            self.file.close()
+
+
 def extract_symbol_from_filename(filename: str) -> str:
     """
     Extract stock symbol from filename.
@@ -195,77 +284,331 @@ def csv_row_to_record(row: Dict[str, str], symbol: str) -> Dict[str, Any]:
     }
 
 
+def parquet_records(path: Path) -> List[Dict[str, Any]]:
+    """
+    Read a Parquet file written by postgres/csv_to_parquet.py as v1 records.
+    Its columns are already typed and cleaned, so the records are formatted
+    in bulk: prices keep 2 to 4 decimals, as in the Nasdaq CSVs.
+    """
+    # Optional dependency, only needed for Parquet input
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+    
+    def price(column) -> pa.Array:
+        # "445.9100" -> "$445.91", in one pass: a separate '$' join costs more than the regex
+        return pc.replace_substring_regex(pc.cast(column, pa.string()), r'^(\d+\.\d\d\d*?)0*$', r'$\1')
+    
+    # ParquetFile.read skips the dataset layer of read_table, which dominates for one small file
+    table = pq.ParquetFile(path).read()
+    columns = {
+        'symbol': pc.cast(table['symbol'], pa.string()),
+        # ISO text rearranged to MM/DD/YYYY, cheaper than strftime
+        'date': pc.replace_substring_regex(pc.cast(table['quote_date'], pa.string()),
+                                           r'^(\d{4})-(\d\d)-(\d\d)$', r'\2/\3/\1'),
+        'close_last': price(table['close_price']),
+        'volume': table['volume'],
+        'open': price(table['open_price']),
+        'high': price(table['high_price']),
+        'low': price(table['low_price']),
+    }
+    # Column by column is several times faster than Table.to_pylist()
+    names = list(columns)
+    return [dict(zip(names, row)) for row in zip(*(column.to_pylist() for column in columns.values()))]
+
+
+def parquet_v2_records(path: Path) -> Tuple[List[Dict[str, Any]], Dict[int, str]]:
+    """
+    Read a Parquet file written by postgres/csv_to_parquet.py as v2 records.
+    The decimal and date columns become scaled integers and epoch days in
+    bulk, with no strings on the way, so the records need neither to_v2_record
+    nor schema validation. Returns the records and, by index, why each row the
+    v2 layout cannot hold (a null, a value out of range, a bad symbol) is rejected.
+    """
+    # Optional dependency, only needed for Parquet input
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+    
+    def scaled(column) -> pa.ChunkedArray:
+        # decimal(10,4) * 10^4 has no fraction left, so the cast is exact
+        return pc.cast(pc.multiply(column, pa.scalar(PRICE_SCALE)), pa.int64())
+    
+    table = pq.ParquetFile(path).read()
+    columns = {
+        'symbol': pc.cast(table['symbol'], pa.string()),
+        # date32 is stored as days since 1970-01-01
+        'quote_date': pc.cast(table['quote_date'], pa.int32()),
+        'close_last': scaled(table['close_price']),
+        'volume': table['volume'],
+        'open': scaled(table['open_price']),
+        'high': scaled(table['high_price']),
+        'low': scaled(table['low_price']),
+    }
+    names = list(columns)
+    records = [dict(zip(names, row)) for row in zip(*(column.to_pylist() for column in columns.values()))]
+    
+    checks = [(name, pc.is_null(column), None) for name, column in columns.items()]
+    checks.append(('symbol', pc.invert(pc.match_substring_regex(columns['symbol'], SYMBOL_PATTERN)),
+                   f"does not match {SYMBOL_PATTERN}"))
+    checks.append(('quote_date', pc.less(columns['quote_date'], 0), "is below the minimum 0"))
+    for name in PRICE_FIELDS:
+        checks.append((name, pc.less(columns[name], 0), "is below the minimum 0"))
+        checks.append((name, pc.greater(columns[name], MAX_SCALED_PRICE), f"is above the maximum {MAX_SCALED_PRICE}"))
+    reasons: Dict[int, List[str]] = {}
+    for name, failed, problem in checks:
+        # A comparison with a null is null; the null check already reports it
+        failed = pc.fill_null(failed, False)
+        if not pc.any(failed).as_py():
+            continue
+        for index in pc.indices_nonzero(failed).to_pylist():
+            value = records[index][name]
+            reasons.setdefault(index, []).append(f"{name}: {value!r} {problem}" if problem else f"{name}: missing")
+    return records, {index: '; '.join(problems) for index, problems in reasons.items()}
+
+
+def read_records(
+    path: Path,
+    symbol: str,
+    record_version: str = '1'
+) -> Iterator[Tuple[int, Dict[str, Any], Optional[str]]]:
+    """
+    Yield (line, record, None) for each row of a CSV or Parquet file, or
+    (line, row, reason) for a row that cannot be converted.
+    Parquet rows are numbered from 1. With record_version '2' they are read
+    straight into v2 records (parquet_v2_records).
+    """
+    if path.suffix.lower() == '.parquet':
+        if record_version == '2':
+            records, rejected = parquet_v2_records(path)
+        else:
+            records, rejected = parquet_records(path), {}
+        for index, record in enumerate(records):
+            yield index + 1, record, rejected.get(index)
+        return
+    with open(path, 'r') as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            try:
+                record = csv_row_to_record(row, symbol)
+            except (KeyError, ValueError, AttributeError) as e:
+                yield reader.line_num, row, f"conversion: {type(e).__name__}: {e}"
+                continue
+            yield reader.line_num, record, None
+
+
+def scaled_price(price: str) -> int:
+    """
+    Convert a "$445.91" price string to an integer number of 1/PRICE_SCALE USD.
+    Exact: no float rounding on the way.
+    """
+    whole, _, fraction = price.lstrip('$').partition('.')
+    if len(fraction) > PRICE_DECIMALS:
+        raise ValueError(f"price {price!r} has more than {PRICE_DECIMALS} decimals")
+    return int(whole) * PRICE_SCALE + int(fraction.ljust(PRICE_DECIMALS, '0'))
+
+
+def epoch_days(mm_dd_yyyy: str) -> int:
+    """Convert a MM/DD/YYYY date to days since 1970-01-01."""
+    month, day, year = mm_dd_yyyy.split('/')
+    return date(int(year), int(month), int(day)).toordinal() - EPOCH_ORDINAL
+
+
+def to_v2_record(record: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Convert a v1 record to the typed v2 layout (data/historical_stock_quotes_v2.json).
+    The v1 record must already be valid, so the conversion cannot fail on shape.
+    """
+    return {
+        'symbol': record['symbol'],
+        'quote_date': epoch_days(record['date']),
+        'close_last': scaled_price(record['close_last']),
+        'volume': record['volume'],
+        'open': scaled_price(record['open']),
+        'high': scaled_price(record['high']),
+        'low': scaled_price(record['low'])
+    }
+
+
+def produce_record(
+    record: Dict[str, Any],
+    symbol: str,
+    thread_id: int,
+    producer: Optional[Producer],
+    kafka_topic: Optional[str],
+    version: str = '1',
+    callback: Callable = delivery_callback
+):
+    """Produce one record to Kafka, or print it if there is no producer."""
+    if producer and kafka_topic:
+        # Serialize and produce to Kafka
+        json_bytes = serialize_json_record(record)
+        
+        # Use the stock symbol as the key for partitioning
+        key = symbol.encode('utf-8')
+        
+        # Produce the message
+        producer.produce(
+            topic=kafka_topic,
+            key=key,
+            value=json_bytes,
+            headers=[('schema_version', version.encode('utf-8'))],
+            callback=callback
+        )
+        
+        # Poll to handle delivery callbacks
+        producer.poll(0)
+    else:
+        # Print mode (no Kafka connection)
+        print(f"[Thread {thread_id}] v{version} {record}")
+
+
+def produce_batch(
+    batch: List[Dict[str, Any]],
+    lines: List[int],
+    source: str,
+    symbol: str,
+    thread_id: int,
+    producer: Optional[Producer],
+    kafka_topic: Optional[str],
+    validator: Optional[RecordValidator],
+    dead_letters: DeadLetterSink,
+    record_version: str = '1',
+    kafka_topic_v2: Optional[str] = None,
+    changes: Optional[SymbolChanges] = None,
+    typed: bool = False
+) -> int:
+    """
+    Validate a batch of records and produce the valid ones.
+    Invalid records go to the dead-letter sink. With changes, valid records
+    the index has already seen unchanged are skipped. typed records are v2
+    records read from typed columns (parquet_v2_records): they are neither
+    validated nor converted again.
+    Returns the number of valid records, produced or skipped.
+    """
+    invalid = dict(validator.validate_batch(batch)) if validator and not typed else {}
+    if not invalid and record_version == '1' and not changes:
+        for record in batch:
+            produce_record(record, symbol, thread_id, producer, kafka_topic)
+        return len(batch)
+    for index, record in enumerate(batch):
+        if index in invalid:
+            dead_letters.send(record, invalid[index], source, lines[index], symbol)
+            continue
+        try:
+            v2 = record if typed else to_v2_record(record) if record_version != '1' else None
+        except ValueError as e:
+            # Only reachable without validation: a v1 string the v2 conversion cannot parse
+            dead_letters.send(record, f"v2 conversion: {e}", source, lines[index], symbol)
+            invalid[index] = str(e)
+            continue
+        callback = delivery_callback
+        if changes:
+            try:
+                day = v2['quote_date'] if v2 else epoch_days(record['date'])
+            except ValueError as e:
+                # Only reachable without validation: the index is keyed by a valid date
+                dead_letters.send(record, f"date: {e}", source, lines[index], symbol)
+                invalid[index] = str(e)
+                continue
+            # Runs that only send v2 hash v2 values, so CSV and Parquet input of the same quotes match
+            digest = row_hash(v2 if record_version == '2' else record)
+            if changes.classify(day, digest) == 'unchanged':
+                continue
+            callback = changes.delivery_callback(day, digest, delivery_callback)
+        if record_version != '2':
+            produce_record(record, symbol, thread_id, producer, kafka_topic, callback=callback)
+        if v2 is not None:
+            produce_record(v2, symbol, thread_id, producer, kafka_topic_v2, '2', callback)
+    return len(batch) - len(invalid)
+
+
 def process_csv_file(
     csv_path: Path,
     thread_id: int,
     producer: Optional[Producer],
-    kafka_topic: Optional[str]
+    kafka_topic: Optional[str],
+    validator: Optional[RecordValidator] = None,
+    dead_letters: Optional[DeadLetterSink] = None,
+    batch_size: int = DEFAULT_VALIDATION_BATCH_SIZE,
+    record_version: str = '1',
+    kafka_topic_v2: Optional[str] = None,
+    change_index: Optional[ChangeIndex] = None
 ):
     """
-    Process a single CSV file in a thread.
-    Read each row, convert to JSON format, and produce to Kafka (or print if no producer).
+    Process a single CSV (or Parquet) file in a thread.
+    Read each row, convert to JSON format, validate in batches, and produce to Kafka (or print if no producer).
+    Rows that fail conversion or validation go to the dead-letter sink instead.
+    With a change index, only rows that are new or changed since the last delivery are produced.
     """
     symbol = extract_symbol_from_filename(csv_path.name)
+    dead_letters = dead_letters or DeadLetterSink()
+    # Parquet columns are typed: v2-only runs read them straight into v2 records
+    typed = record_version == '2' and csv_path.suffix.lower() == '.parquet'
+    changes = SymbolChanges(change_index, symbol) if change_index else None
     
     print(f"[Thread {thread_id}] Processing {csv_path.name} (Symbol: {symbol})")
     
     try:
-        with open(csv_path, 'r') as f:
-            reader = csv.DictReader(f)
-            record_count = 0
+        record_count = 0
+        dead_letter_count = 0
+        batch: List[Dict[str, Any]] = []
+        lines: List[int] = []
+        
+        for line, record, error in read_records(csv_path, symbol, record_version):
+            if error:
+                dead_letters.send(record, error, csv_path.name, line, symbol)
+                dead_letter_count += 1
+                continue
             
-            for row in reader:
-                # Convert CSV row to record
-                record = csv_row_to_record(row, symbol)
-                
-                if producer and kafka_topic:
-                    # Serialize and produce to Kafka
-                    json_bytes = serialize_json_record(record)
-                    
-                    # Use the stock symbol as the key for partitioning
-                    key = symbol.encode('utf-8')
-                    
-                    # Produce the message
-                    producer.produce(
-                        topic=kafka_topic,
-                        key=key,
-                        value=json_bytes,
-                        callback=delivery_callback
-                    )
-                    
-                    # Poll to handle delivery callbacks
-                    producer.poll(0)
-                else:
-                    # Print mode (no Kafka connection)
-                    print(f"[Thread {thread_id}] {record}")
-                
-                record_count += 1
+            batch.append(record)
+            lines.append(line)
+            if len(batch) >= batch_size:
+                produced = produce_batch(batch, lines, csv_path.name, symbol, thread_id,
+                                         producer, kafka_topic, validator, dead_letters,
+                                         record_version, kafka_topic_v2, changes, typed)
+                record_count += produced
+                dead_letter_count += len(batch) - produced
+                batch, lines = [], []
+        
+        if batch:
+            produced = produce_batch(batch, lines, csv_path.name, symbol, thread_id,
+                                     producer, kafka_topic, validator, dead_letters,
+                                     record_version, kafka_topic_v2, changes, typed)
+            record_count += produced
+            dead_letter_count += len(batch) - produced
         
         # Flush any remaining messages for this thread
         if producer:
             producer.flush()
         
-        print(f"[Thread {thread_id}] Completed {csv_path.name}: {record_count} records processed")
+        # Every delivery callback for this file has run: remember what was delivered
+        if changes:
+            changes.finish()
+        
+        print(f"[Thread {thread_id}] Completed {csv_path.name}: {record_count} records processed"
+              + (f" ({changes.describe()})" if changes else "")
+              + (f", {dead_letter_count} dead-lettered" if dead_letter_count else ""))
     
     except Exception as e:
         print(f"[Thread {thread_id}] ERROR processing {csv_path.name}: {e}", file=sys.stderr)
 
 
-def find_csv_files(path: Path) -> List[Path]:
+def find_csv_files(path: Path, suffix: str = '.csv') -> List[Path]:
     """
     Find all CSV files in the given path.
-    If path is a file, return it as a single-item list.
-    If path is a directory, return all CSV files in it.
+    If path is a file, return it as a single-item list; CSV and Parquet files are accepted.
+    If path is a directory, return all files in it with the given suffix (.csv or .parquet).
     """
     if path.is_file():
-        if path.suffix.lower() == '.csv':
+        if path.suffix.lower() in INPUT_SUFFIXES:
             return [path]
         else:
-            raise ValueError(f"File {path} is not a CSV file")
+            raise ValueError(f"File {path} is not a CSV or Parquet file")
     elif path.is_dir():
-        csv_files = list(path.glob('*.csv'))
+        csv_files = list(path.glob(f'*{suffix}'))
         if not csv_files:
-            raise ValueError(f"No CSV files found in directory {path}")
+            raise ValueError(f"No {suffix} files found in directory {path}")
         return sorted(csv_files)
     else:
         raise ValueError(f"Path {path} does not exist")
@@ -278,7 +621,7 @@ def main():
     parser.add_argument(
         'path',
         type=str,
-        help='Path to a CSV file or directory containing CSV files'
+        help='Path to a CSV or Parquet file, or a directory containing CSV files (see --input-format)'
     )
     parser.add_argument(
         '--env-file',
@@ -291,6 +634,51 @@ def main():
         action='store_true',
         help='Delete and recreate the Kafka topic before producing messages'
     )
+    parser.add_argument(
+        '--schema',
+        type=str,
+        default=str(DEFAULT_SCHEMA),
+        help='JSON Schema to validate records against (default: ../data/historical_stock_quotes.json)'
+    )
+    parser.add_argument(
+        '--no-validate',
+        action='store_true',
+        help='Produce records without schema validation'
+    )
+    parser.add_argument(
+        '--dead-letter-topic',
+        type=str,
+        help='Kafka topic for invalid rows (default: KAFKA_DEAD_LETTER_TOPIC from the environment)'
+    )
+    parser.add_argument(
+        '--dead-letter-file',
+        type=str,
+        help='Append invalid rows as NDJSON to this file'
+    )
+    parser.add_argument(
+        '--validation-batch-size',
+        type=int,
+        default=DEFAULT_VALIDATION_BATCH_SIZE,
+        help=f'Records validated together (default: {DEFAULT_VALIDATION_BATCH_SIZE})'
+    )
+    parser.add_argument(
+        '--record-version',
+        choices=RECORD_VERSIONS,
+        help='Record layout: 1 (strings), 2 (scaled integers and epoch days) or both '
+             '(v1 goes to KAFKA_TOPIC, v2 to KAFKA_TOPIC_V2) (default: KAFKA_RECORD_VERSION or 1)'
+    )
+    parser.add_argument(
+        '--input-format',
+        choices=[suffix.lstrip('.') for suffix in INPUT_SUFFIXES],
+        default='csv',
+        help='Files to pick up when path is a directory (default: csv)'
+    )
+    parser.add_argument(
+        '--change-index',
+        type=str,
+        help='Index file of delivered row hashes; only rows that are new or changed since the last run are '
+             'produced (default: KAFKA_CHANGE_INDEX from the environment, or every row is produced)'
+    )
     
     args = parser.parse_args()
     
@@ -307,7 +695,7 @@ def main():
     
     # Find CSV files
     try:
-        csv_files = find_csv_files(input_path)
+        csv_files = find_csv_files(input_path, f'.{args.input_format}')
         print(f"Found {len(csv_files)} CSV file(s) to process\n")
     except ValueError as e:
         print(f"ERROR: {e}", file=sys.stderr)
@@ -316,15 +704,28 @@ def main():
     # Get Kafka topic
     kafka_topic = os.getenv('KAFKA_TOPIC')
     
+    record_version = args.record_version or os.getenv('KAFKA_RECORD_VERSION', '1')
+    if record_version not in RECORD_VERSIONS:
+        print(f"ERROR: KAFKA_RECORD_VERSION must be one of {', '.join(RECORD_VERSIONS)}", file=sys.stderr)
+        sys.exit(1)
+    
+    # v2 records always go to a topic of their own so v1 consumers and tables are not affected
+    kafka_topic_v2 = None
+    if record_version != '1' and kafka_topic:
+        kafka_topic_v2 = os.getenv('KAFKA_TOPIC_V2') or f"{kafka_topic}_V2"
+    topics = [topic for topic, version in ((kafka_topic, '1'), (kafka_topic_v2, '2'))
+              if topic and record_version in (version, 'both')]
+    
     # Recreate topic if requested
     if args.recreate_topic:
         if not kafka_topic:
             print("ERROR: KAFKA_TOPIC not set in environment", file=sys.stderr)
             sys.exit(1)
         
-        if not recreate_topic(kafka_topic):
-            print("ERROR: Failed to recreate topic", file=sys.stderr)
-            sys.exit(1)
+        for topic in topics:
+            if not recreate_topic(topic):
+                print("ERROR: Failed to recreate topic", file=sys.stderr)
+                sys.exit(1)
     
     # Create Kafka producer
     producer = create_kafka_producer()
@@ -334,7 +735,39 @@ def main():
         sys.exit(1)
     
     if producer and kafka_topic:
-        print(f"Will produce messages to topic: {kafka_topic}\n")
+        if record_version == 'both':
+            print(f"Will produce v1 messages to topic: {kafka_topic} and v2 messages to topic: {kafka_topic_v2}\n")
+        else:
+            print(f"Will produce v{record_version} messages to topic: {topics[0]}\n")
+    
+    # Compile the schema once for every thread
+    validator = None
+    if not args.no_validate:
+        try:
+            validator = load_validator(args.schema)
+        except (OSError, ValueError) as e:
+            print(f"ERROR: Cannot load schema {args.schema}: {e}", file=sys.stderr)
+            sys.exit(1)
+        print(f"Validating records against {args.schema}")
+    
+    dead_letter_topic = args.dead_letter_topic or os.getenv('KAFKA_DEAD_LETTER_TOPIC')
+    if dead_letter_topic and not producer:
+        print("KAFKA_BOOTSTRAP_SERVERS not set: dead-letter topic ignored", file=sys.stderr)
+    dead_letters = DeadLetterSink(producer, dead_letter_topic, args.dead_letter_file)
+    print(f"Invalid rows go to: {dead_letters.describe()}\n")
+    
+    # Skip rows already delivered to the same topic(s) with the same values
+    change_index = None
+    change_index_path = args.change_index or os.getenv('KAFKA_CHANGE_INDEX')
+    if change_index_path:
+        # In print mode nothing is delivered, so the index is only read
+        target = f"{kafka_topic}:{kafka_topic_v2}:v{record_version}" if producer else None
+        change_index = ChangeIndex(change_index_path, target)
+        if change_index.reset:
+            print(f"Change index {change_index_path} was built for another topic or record version: starting over")
+        if args.recreate_topic and producer:
+            change_index.clear()
+        print(f"Producing only new or changed rows ({change_index.size()} rows in {change_index_path})\n")
     
     # Create a thread for each CSV file
     threads = []
@@ -342,7 +775,8 @@ def main():
     for idx, csv_file in enumerate(csv_files, start=1):
         thread = threading.Thread(
             target=process_csv_file,
-            args=(csv_file, idx, producer, kafka_topic),
+            args=(csv_file, idx, producer, kafka_topic, validator, dead_letters, args.validation_batch_size,
+                  record_version, kafka_topic_v2, change_index),
             name=f"CSVProcessor-{idx}"
         )
         threads.append(thread)
@@ -358,6 +792,14 @@ def main():
     if producer:
         print("\nFlushing remaining messages...")
         producer.flush()
+    dead_letters.close()
+    
+    if dead_letters.count:
+        print(f"\n{dead_letters.count} invalid record(s) sent to {dead_letters.describe()}")
+    
+    if change_index:
+        print(f"\nChange index: {change_index.describe_counts()}")
+        change_index.close()
     
     print("\nAll threads completed. Exiting.")
 
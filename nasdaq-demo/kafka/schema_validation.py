@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Compile a JSON Schema into fast checks for flat records.
+
+Supports the subset of JSON Schema used by the files in data/: an object with
+`properties` and `required`, and per-property `type`, `pattern`, `enum`,
+`minimum`/`maximum` and `minLength`/`maxLength`. Unsupported validation
+keywords are rejected at compile time, so they can never pass silently.
+
+Batches are validated column-wise. Type checks run as one set of types per
+column. Every anchored `pattern` is fused into a single row regex, and a whole
+batch is checked with one regex match. A batch that fails the fast path is
+split in halves and each half re-checked the same way, so only the failing
+records are validated one by one to find their reasons.
+"""
+
+import json
+import re
+from itertools import chain
+from operator import itemgetter
+from typing import Any, Dict, List, Optional, Tuple
+
+JSON_TYPES = {
+    'string': (str,),
+    'integer': (int,),
+    'number': (int, float),
+    'boolean': (bool,),
+    'null': (type(None),),
+    'object': (dict,),
+    'array': (list,),
+}
+ANNOTATIONS = {'title', 'description', 'examples', 'default', '$comment', '$schema', '$id', 'format'}
+SUPPORTED = {'type', 'pattern', 'enum', 'minimum', 'maximum', 'minLength', 'maxLength'}
+
+# Separator for the fused batch regex; a batch only takes the fast path if it appears nowhere in its values
+FIELD_SEP = '\x1f'
+
+_MISSING = object()
+
+
+def _strip_anchors(pattern: str) -> Optional[str]:
+    """
+    Return the body of a ^...$ pattern if it can be embedded in a larger regex, else None.
+
+    Embedding is unsafe with inner anchors or backreferences, whose group
+    numbers would shift.
+    """
+    if not (pattern.startswith('^') and pattern.endswith('$') and not pattern.endswith('\\$')):
+        return None
+    body = pattern[1:-1]
+    if re.search(r'(?<!\\)\$|(?<![\\\[])\^|\\\d|\(\?P=', body):
+        return None
+    return body
+
+
+def _non_capturing(body: str) -> str:
+    """Turn the capturing groups of a pattern into (?:...); the fused regex never reads them and they cost time."""
+    out = []
+    escaped = False
+    class_start = None  # index of the '[' of the character class we are in
+    for i, char in enumerate(body):
+        if escaped:
+            escaped = False
+        elif char == '\\':
+            escaped = True
+        elif class_start is not None:
+            # A ']' right after '[' or '[^' is a literal
+            if char == ']' and i - class_start > (2 if body[class_start + 1] == '^' else 1):
+                class_start = None
+        elif char == '[':
+            class_start = i
+        elif char == '(' and not body.startswith('?', i + 1):
+            out.append('(?:')
+            continue
+        out.append(char)
+    return ''.join(out)
+
+
+class FieldCheck:
+    """The compiled constraints of one property."""
+
+    def __init__(self, name: str, spec: Dict[str, Any]):
+        unsupported = set(spec) - SUPPORTED - ANNOTATIONS
+        if unsupported:
+            raise ValueError(f"Unsupported keywords for '{name}': {', '.join(sorted(unsupported))}")
+        self.name = name
+        json_type = spec.get('type')
+        types = json_type if isinstance(json_type, list) else [json_type] if json_type else []
+        self.types = tuple(t for name_ in types for t in JSON_TYPES[name_]) or None
+        # bool is a subclass of int, but JSON Schema keeps them apart
+        self.reject_bool = bool(types) and 'boolean' not in types
+        self.type_label = ' or '.join(types)
+        self.pattern = spec.get('pattern')
+        # JSON Schema patterns are ECMA-262: \d is ASCII only and $ does not match before a trailing newline
+        self.search = re.compile(self._python_pattern(self.pattern), re.ASCII).search if self.pattern else None
+        body = _strip_anchors(self.pattern) if self.pattern and self.types == (str,) else None
+        self.fused = _non_capturing(body) if body is not None else None
+        self.enum = spec.get('enum')
+        self.minimum = spec.get('minimum')
+        self.maximum = spec.get('maximum')
+        self.min_length = spec.get('minLength')
+        self.max_length = spec.get('maxLength')
+
+    @staticmethod
+    def _python_pattern(pattern: str) -> str:
+        if pattern.endswith('$') and not pattern.endswith('\\$'):
+            return pattern[:-1] + r'\Z'
+        return pattern
+
+    @property
+    def needs_column_check(self) -> bool:
+        return self.fused is None or any(
+            limit is not None for limit in (self.enum, self.minimum, self.maximum, self.min_length, self.max_length))
+
+    def error(self, value: Any) -> Optional[str]:
+        """Return why value fails this field, or None."""
+        if self.types is not None and (not isinstance(value, self.types) or (self.reject_bool and isinstance(value, bool))):
+            return f"{self.name}: expected {self.type_label}, got {type(value).__name__} {value!r}"
+        if self.search is not None and isinstance(value, str) and not self.search(value):
+            return f"{self.name}: {value!r} does not match {self.pattern}"
+        if self.enum is not None and value not in self.enum:
+            return f"{self.name}: {value!r} is not one of {self.enum}"
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            if self.minimum is not None and value < self.minimum:
+                return f"{self.name}: {value!r} is below the minimum {self.minimum}"
+            if self.maximum is not None and value > self.maximum:
+                return f"{self.name}: {value!r} is above the maximum {self.maximum}"
+        if isinstance(value, str):
+            if self.min_length is not None and len(value) < self.min_length:
+                return f"{self.name}: {value!r} is shorter than {self.min_length}"
+            if self.max_length is not None and len(value) > self.max_length:
+                return f"{self.name}: {value!r} is longer than {self.max_length}"
+        return None
+
+    def column_passes(self, column: List[Any]) -> bool:
+        """Fast check of every value of this field in a batch; a fused field's type and pattern are already checked."""
+        if self.types is not None and self.fused is None:
+            seen = set(map(type, column))
+            if not all(issubclass(t, self.types) for t in seen) or (self.reject_bool and bool in seen):
+                return False
+        if self.search is not None and self.fused is None:
+            if not all(map(self.search, column)):
+                return False
+        if self.enum is not None and not set(column) <= set(self.enum):
+            return False
+        if self.minimum is not None and min(column) < self.minimum:
+            return False
+        if self.maximum is not None and max(column) > self.maximum:
+            return False
+        if self.min_length is not None and min(map(len, column)) < self.min_length:
+            return False
+        if self.max_length is not None and max(map(len, column)) > self.max_length:
+            return False
+        return True
+
+
+class RecordValidator:
+    """Validates records against a compiled schema, one at a time or in batches."""
+
+    # Failing batches this small are validated record by record instead of split further
+    LEAF_SIZE = 8
+
+    def __init__(self, schema: Dict[str, Any]):
+        if schema.get('type', 'object') != 'object':
+            raise ValueError("Only object schemas are supported")
+        self.title = schema.get('title', 'record')
+        self.required = tuple(schema.get('required', []))
+        self.additional = schema.get('additionalProperties', True)
+        self.fields = [FieldCheck(name, spec) for name, spec in schema.get('properties', {}).items()]
+
+        fused = [field for field in self.fields if field.fused is not None]
+        if len(fused) < 2:
+            # Nothing to fuse: a lone pattern is checked with its column
+            for field in fused:
+                field.fused = None
+            fused = []
+        self.fused_names = tuple(field.name for field in fused)
+        self.get_fused = itemgetter(*self.fused_names) if fused else None
+        row = ''.join(f"(?:{field.fused}){FIELD_SEP}" for field in fused)
+        # Possessive: a batch is never re-read with fewer rows, which saves the regex its backtracking state
+        self.match_batch = re.compile(f"(?:{row})*+", re.ASCII).fullmatch if fused else None
+        # Fields whose values the fast path still has to check column by column
+        self.column_fields = [field for field in self.fields if field.needs_column_check]
+        self.unchecked_required = [name for name in self.required if name not in {f.name for f in self.fields}]
+        self.fast_batches = 0
+        self.slow_batches = 0
+
+    def validate(self, record: Dict[str, Any]) -> Optional[str]:
+        """Return every reason record is invalid, joined with '; ', or None if it is valid."""
+        errors = [f"{name}: missing" for name in self.required if name not in record]
+        for field in self.fields:
+            value = record.get(field.name, _MISSING)
+            if value is not _MISSING:
+                error = field.error(value)
+                if error:
+                    errors.append(error)
+        if self.additional is False:
+            known = {field.name for field in self.fields}
+            errors.extend(f"{name}: not allowed" for name in record if name not in known)
+        return '; '.join(errors) or None
+
+    def _batch_passes(self, records: List[Dict[str, Any]]) -> bool:
+        try:
+            if self.match_batch is not None:
+                # One join over every fused value of the batch, each followed by FIELD_SEP
+                text = FIELD_SEP.join(chain.from_iterable(map(self.get_fused, records))) + FIELD_SEP
+                # An exact separator count pins every value to its own field in the fused regex
+                if text.count(FIELD_SEP) != len(records) * len(self.fused_names) or self.match_batch(text) is None:
+                    return False
+            for field in self.column_fields:
+                if not field.column_passes([record[field.name] for record in records]):
+                    return False
+            for name in self.unchecked_required:
+                if not all(name in record for record in records):
+                    return False
+        except (KeyError, TypeError):
+            # A missing field or a non-string value: let the slow path explain it
+            return False
+        return self.additional is not False
+
+    def validate_batch(self, records: List[Dict[str, Any]]) -> List[Tuple[int, str]]:
+        """Return (index, reason) for each invalid record in the batch."""
+        if not records:
+            return []
+        if self._batch_passes(records):
+            self.fast_batches += 1
+            return []
+        self.slow_batches += 1
+        invalid: List[Tuple[int, str]] = []
+        self._find_invalid(records, 0, invalid)
+        return invalid
+
+    def _find_invalid(self, records: List[Dict[str, Any]], offset: int, invalid: List[Tuple[int, str]]):
+        """Append (offset + index, reason) for the invalid records of a batch known to fail the fast path."""
+        # Without additional properties the fast path never passes, so splitting would not help
+        if len(records) <= self.LEAF_SIZE or self.additional is False:
+            for index, record in enumerate(records, start=offset):
+                reason = self.validate(record)
+                if reason:
+                    invalid.append((index, reason))
+            return
+        # A few bad records in a large batch: a half that passes costs one fast check. The fast path
+        # holds for a batch only if it holds for every record, so when the first half passes the
+        # second is known to fail and is not checked again.
+        middle = len(records) // 2
+        first, second = records[:middle], records[middle:]
+        first_fails = not self._batch_passes(first)
+        if first_fails:
+            self._find_invalid(first, offset, invalid)
+        if not first_fails or not self._batch_passes(second):
+            self._find_invalid(second, offset + middle, invalid)
+
+
+def load_validator(path: str) -> RecordValidator:
+    """Read a JSON Schema file and compile it."""
+    with open(path, 'r') as f:
+        return RecordValidator(json.load(f))
@@ -0,0 +1,447 @@
+#!/usr/bin/env python3
+"""
+Consume historical stock quotes from Kafka and upsert them into PostgreSQL.
+
+Lands the topic produce.py writes in nasdaq.historical_stock_quotes
+(postgres/01-schema.sql or 01-schema-partitioned.sql), so the Kafka to table
+path can be reproduced without Openflow:
+
+- Messages are consumed in batches. v1 and v2 records (schema_version
+  header) are validated like produce.py does; invalid ones go to a
+  DeadLetterSink with their partition and offset.
+- Each batch is COPYed into a staging table as text and cleaned in SQL with
+  the rules of postgres/02-seed-data.sql: '$' stripped, prices cast to
+  DECIMAL(10,4), MM/DD/YYYY dates, rows without a date skipped. The result
+  is upserted on (symbol, quote_date). Rows whose values did not change are
+  not rewritten, so a redelivered batch causes no writes and no CDC traffic.
+- Kafka offsets are committed only after the database commit. A crash in
+  between redelivers the batch, which the upsert makes harmless.
+- A batch that fails on data PostgreSQL cannot cast (a valid-looking
+  02/31/2025, an out-of-range price) is retried by halves down to the
+  failing rows. Those are dead-lettered, so they cannot block the offsets
+  behind them.
+
+Reports rows/s and the latency of the database and offset commits.
+
+Usage:
+    uv run --with psycopg2-binary python sink_postgres.py
+    uv run --with psycopg2-binary python sink_postgres.py --batch-size 5000 --idle-timeout 10
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import psycopg2
+from confluent_kafka import Consumer, KafkaError, KafkaException, Message, TopicPartition
+from dotenv import load_dotenv
+from psycopg2 import sql
+
+from produce import (
+    DEFAULT_SCHEMA,
+    EPOCH_ORDINAL,
+    PRICE_DECIMALS,
+    PRICE_SCALE,
+    DeadLetterSink,
+    get_kafka_config,
+)
+from schema_validation import RecordValidator, load_validator
+
+DEFAULT_SCHEMA_V2 = DEFAULT_SCHEMA.with_name('historical_stock_quotes_v2.json')
+DEFAULT_TABLE = 'nasdaq.historical_stock_quotes'
+DEFAULT_GROUP_ID = 'nasdaq-demo-postgres-sink'
+DEFAULT_BATCH_SIZE = 2000
+DEFAULT_BATCH_TIMEOUT = 1.0
+DEFAULT_REPORT_INTERVAL = 10.0
+
+# Raw text columns, as temp_stock_data in 02-seed-data.sql, plus the symbol and
+# the message's position in its batch
+STAGING_SQL = """
+CREATE TEMP TABLE IF NOT EXISTS sink_staging (
+    seq INT,
+    symbol TEXT,
+    date_str TEXT,
+    close_last TEXT,
+    volume TEXT,
+    open_price TEXT,
+    high_price TEXT,
+    low_price TEXT
+) ON COMMIT DELETE ROWS
+"""
+
+# The cleaning of 02-seed-data.sql (clean_price, parse_date). When a batch holds
+# the same quote twice, the later message wins.
+UPSERT_SQL = """
+WITH upserted AS (
+    INSERT INTO {table} AS t (symbol, quote_date, close_price, volume, open_price, high_price, low_price)
+    SELECT DISTINCT ON (symbol, quote_date)
+        symbol, quote_date, close_price, volume, open_price, high_price, low_price
+    FROM (
+        SELECT
+            seq,
+            symbol,
+            TO_DATE(date_str, 'MM/DD/YYYY') AS quote_date,
+            REPLACE(close_last, '$', '')::DECIMAL(10,4) AS close_price,
+            volume::BIGINT AS volume,
+            REPLACE(open_price, '$', '')::DECIMAL(10,4) AS open_price,
+            REPLACE(high_price, '$', '')::DECIMAL(10,4) AS high_price,
+            REPLACE(low_price, '$', '')::DECIMAL(10,4) AS low_price
+        FROM sink_staging
+        WHERE date_str IS NOT NULL
+          AND date_str != ''
+    ) cleaned
+    ORDER BY symbol, quote_date, seq DESC
+    ON CONFLICT (symbol, quote_date) DO UPDATE SET
+        close_price = EXCLUDED.close_price,
+        volume = EXCLUDED.volume,
+        open_price = EXCLUDED.open_price,
+        high_price = EXCLUDED.high_price,
+        low_price = EXCLUDED.low_price,
+        updated_at = CURRENT_TIMESTAMP
+    WHERE (t.close_price, t.volume, t.open_price, t.high_price, t.low_price)
+        IS DISTINCT FROM (EXCLUDED.close_price, EXCLUDED.volume, EXCLUDED.open_price, EXCLUDED.high_price, EXCLUDED.low_price)
+    RETURNING (xmax = 0) AS inserted
+)
+SELECT COUNT(*) FILTER (WHERE inserted), COUNT(*) FILTER (WHERE NOT inserted)
+FROM upserted
+"""
+
+
+def message_version(msg: Message) -> str:
+    """The schema_version header produce.py sets; messages without one are v1."""
+    for key, value in msg.headers() or []:
+        if key == 'schema_version':
+            return value.decode('utf-8')
+    return '1'
+
+
+def v2_price(price: int) -> str:
+    """Render a scaled v2 price the way v1 carries it, e.g. 4459100 -> "$445.9100"."""
+    return f"${price // PRICE_SCALE}.{price % PRICE_SCALE:0{PRICE_DECIMALS}d}"
+
+
+def staging_row(seq: int, record: Dict[str, Any], version: str) -> Tuple:
+    """A validated record as a row of sink_staging text columns."""
+    if version == '2':
+        quote_date = date.fromordinal(record['quote_date'] + EPOCH_ORDINAL)
+        return (seq, record['symbol'], quote_date.strftime('%m/%d/%Y'), v2_price(record['close_last']),
+                record['volume'], v2_price(record['open']), v2_price(record['high']), v2_price(record['low']))
+    return (seq, record['symbol'], record['date'], record['close_last'],
+            record['volume'], record['open'], record['high'], record['low'])
+
+
+class PostgresSink:
+    """Upserts batches of staging rows into the quotes table, one transaction per batch."""
+
+    def __init__(self, conn, table: str = DEFAULT_TABLE):
+        self.conn = conn
+        self.table = table
+        self.upsert = sql.SQL(UPSERT_SQL).format(table=sql.Identifier(*table.split('.')))
+        with conn.cursor() as cur:
+            cur.execute(STAGING_SQL)
+        conn.commit()
+
+    def write(self, rows: List[Tuple]) -> Tuple[int, int]:
+        """COPY rows into staging, upsert and commit. Returns (inserted, updated)."""
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        buffer.seek(0)
+        try:
+            with self.conn.cursor() as cur:
+                cur.copy_expert("COPY sink_staging FROM STDIN WITH (FORMAT csv)", buffer)
+                cur.execute(self.upsert)
+                inserted, updated = cur.fetchone()
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        return inserted, updated
+
+    def write_isolating(self, rows: List[Tuple]) -> Tuple[int, int, List[Tuple[Tuple, str]]]:
+        """
+        Write a batch that failed on bad data (e.g. a 02/31 date or a price
+        beyond DECIMAL(10,4)) by halves, down to the rows PostgreSQL rejects.
+        Returns (inserted, updated, [(row, error)]) for the rejected rows.
+        """
+        if len(rows) == 1:
+            try:
+                return (*self.write(rows), [])
+            except psycopg2.DataError as e:
+                return 0, 0, [(rows[0], str(e).strip().splitlines()[0])]
+        middle = len(rows) // 2
+        inserted = updated = 0
+        rejected: List[Tuple[Tuple, str]] = []
+        # Halves in order, so a later message for the same quote still wins
+        for half in (rows[:middle], rows[middle:]):
+            try:
+                half_inserted, half_updated = self.write(half)
+                half_rejected = []
+            except psycopg2.DataError:
+                half_inserted, half_updated, half_rejected = self.write_isolating(half)
+            inserted += half_inserted
+            updated += half_updated
+            rejected.extend(half_rejected)
+        return inserted, updated, rejected
+
+
+class SinkStats:
+    """Counts and commit latencies, reported as the sink runs."""
+
+    def __init__(self):
+        self.started: Optional[float] = None  # first batch received; excludes the consumer group join
+        self.finished: Optional[float] = None  # last batch committed; excludes the idle tail
+        self.messages = 0
+        self.inserted = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.dead_lettered = 0
+        self.db_commits: List[float] = []
+        self.offset_commits: List[float] = []
+
+    @property
+    def elapsed(self) -> float:
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.perf_counter()) - self.started
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.messages / self.elapsed if self.elapsed else 0.0
+
+    @staticmethod
+    def _latency(values: List[float]) -> str:
+        if not values:
+            return "-"
+        ordered = sorted(values)
+        p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+        return f"p50 {statistics.median(ordered) * 1000:.1f} ms, p99 {p99 * 1000:.1f} ms"
+
+    def summary(self) -> str:
+        elapsed = self.elapsed
+        return (f"{self.messages:,} messages in {elapsed:.1f}s ({self.rows_per_second:,.0f} rows/s): "
+                f"{self.inserted:,} inserted, {self.updated:,} updated, {self.unchanged:,} unchanged, "
+                f"{self.dead_lettered:,} dead-lettered\n"
+                f"  database commit: {self._latency(self.db_commits)} over {len(self.db_commits):,} batches\n"
+                f"  offset commit:   {self._latency(self.offset_commits)}")
+
+
+def consume_batch(consumer: Consumer, batch_size: int, batch_timeout: float) -> List[Message]:
+    """Up to batch_size messages, waiting at most batch_timeout seconds for them."""
+    messages: List[Message] = []
+    deadline = time.monotonic() + batch_timeout
+    while len(messages) < batch_size:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        for msg in consumer.consume(batch_size - len(messages), remaining):
+            error = msg.error()
+            if error is None:
+                messages.append(msg)
+            elif error.code() != KafkaError._PARTITION_EOF:
+                raise KafkaException(error)
+    return messages
+
+
+def next_offsets(messages: List[Message]) -> List[TopicPartition]:
+    """The offsets to commit after messages: one past the last message of each partition."""
+    latest: Dict[Tuple[str, int], int] = {}
+    for msg in messages:
+        key = (msg.topic(), msg.partition())
+        latest[key] = max(latest.get(key, -1), msg.offset())
+    return [TopicPartition(topic, partition, offset + 1) for (topic, partition), offset in latest.items()]
+
+
+def decode_batch(
+    messages: List[Message],
+    validators: Dict[str, Optional[RecordValidator]],
+    dead_letters: DeadLetterSink
+) -> List[Tuple]:
+    """Turn messages into staging rows; undecodable and invalid records go to the dead-letter sink."""
+    by_version: Dict[str, List[Tuple[int, Message, Dict[str, Any]]]] = {}
+    for seq, msg in enumerate(messages):
+        source = f"{msg.topic()}[{msg.partition()}]"
+        key = (msg.key() or b'').decode('utf-8', 'replace')
+        version = message_version(msg)
+        if version not in validators:
+            dead_letters.send(msg.value().decode('utf-8', 'replace'), f"unknown schema_version {version!r}",
+                              source, msg.offset(), key)
+            continue
+        try:
+            record = json.loads(msg.value())
+        except (TypeError, ValueError) as e:
+            dead_letters.send((msg.value() or b'').decode('utf-8', 'replace'), f"decode: {e}", source, msg.offset(), key)
+            continue
+        by_version.setdefault(version, []).append((seq, msg, record))
+
+    rows = []
+    for version, entries in by_version.items():
+        validator = validators[version]
+        invalid = dict(validator.validate_batch([record for _, _, record in entries])) if validator else {}
+        for index, (seq, msg, record) in enumerate(entries):
+            if index in invalid:
+                dead_letters.send(record, invalid[index], f"{msg.topic()}[{msg.partition()}]", msg.offset(),
+                                  (msg.key() or b'').decode('utf-8', 'replace'))
+            else:
+                rows.append(staging_row(seq, record, version))
+    return rows
+
+
+def run(
+    consumer: Consumer,
+    sink: PostgresSink,
+    validators: Dict[str, Optional[RecordValidator]],
+    dead_letters: DeadLetterSink,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    batch_timeout: float = DEFAULT_BATCH_TIMEOUT,
+    idle_timeout: Optional[float] = None,
+    report_interval: float = DEFAULT_REPORT_INTERVAL
+) -> SinkStats:
+    """
+    Consume, upsert and commit batches until idle_timeout seconds pass without
+    a message once partitions are assigned (or forever). Offsets are committed only after the batch's
+    database transaction commits.
+    """
+    stats = SinkStats()
+    last_message = last_report = time.monotonic()
+    while True:
+        messages = consume_batch(consumer, batch_size, batch_timeout)
+        now = time.monotonic()
+        if not consumer.assignment():
+            # Still joining the consumer group: that is not idle time
+            last_message = now
+        if not messages:
+            if idle_timeout is not None and now - last_message >= idle_timeout:
+                return stats
+            continue
+        last_message = now
+        if stats.started is None:
+            stats.started = time.perf_counter()
+
+        dead_before = dead_letters.count
+        rows = decode_batch(messages, validators, dead_letters)
+        if rows:
+            start = time.perf_counter()
+            try:
+                inserted, updated = sink.write(rows)
+                rejected = []
+            except psycopg2.DataError:
+                # Valid by the schema but not castable by PostgreSQL: find the rows, so they cannot stall the sink
+                inserted, updated, rejected = sink.write_isolating(rows)
+                for row, error in rejected:
+                    msg = messages[row[0]]
+                    dead_letters.send(json.loads(msg.value()), f"database: {error}",
+                                      f"{msg.topic()}[{msg.partition()}]", msg.offset(),
+                                      (msg.key() or b'').decode('utf-8', 'replace'))
+            stats.db_commits.append(time.perf_counter() - start)
+            stats.inserted += inserted
+            stats.updated += updated
+            stats.unchanged += len(rows) - len(rejected) - inserted - updated
+
+        start = time.perf_counter()
+        consumer.commit(offsets=next_offsets(messages), asynchronous=False)
+        stats.offset_commits.append(time.perf_counter() - start)
+        stats.messages += len(messages)
+        stats.dead_lettered += dead_letters.count - dead_before
+        stats.finished = time.perf_counter()
+
+        if now - last_report >= report_interval:
+            print(stats.summary().splitlines()[0])
+            last_report = now
+
+
+def create_consumer(group_id: str, topics: List[str]) -> Optional[Consumer]:
+    """A consumer with manual offset commits, subscribed to topics. None if Kafka is not configured."""
+    config = get_kafka_config()
+    if not config:
+        return None
+    config.update({
+        'group.id': group_id,
+        'client.id': 'nasdaq-demo-postgres-sink',
+        'enable.auto.commit': False,
+        'auto.offset.reset': 'earliest',
+    })
+    print(f"Creating Kafka consumer with bootstrap servers: {config['bootstrap.servers']}")
+    consumer = Consumer(config)
+    consumer.subscribe(topics)
+    return consumer
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Consume historical stock quotes from Kafka and upsert them into PostgreSQL')
+    parser.add_argument('--env-file', type=str, default='.env', help='Path to .env file (default: .env)')
+    parser.add_argument('--topic', action='append',
+                        help='Topic to consume; repeat for several (default: KAFKA_TOPIC from the environment)')
+    parser.add_argument('--group-id', type=str, default=DEFAULT_GROUP_ID, help=f'Consumer group (default: {DEFAULT_GROUP_ID})')
+    parser.add_argument('--dsn', type=str, default='',
+                        help='PostgreSQL connection string (default: PGHOST, PGUSER, PGPASSWORD, ... from the environment)')
+    parser.add_argument('--table', type=str, default=DEFAULT_TABLE, help=f'Target table (default: {DEFAULT_TABLE})')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f'Messages per database transaction (default: {DEFAULT_BATCH_SIZE})')
+    parser.add_argument('--batch-timeout', type=float, default=DEFAULT_BATCH_TIMEOUT,
+                        help=f'Seconds to wait for a full batch (default: {DEFAULT_BATCH_TIMEOUT})')
+    parser.add_argument('--idle-timeout', type=float,
+                        help='Stop after this many seconds without messages (default: run until interrupted)')
+    parser.add_argument('--no-validate', action='store_true', help='Skip schema validation of consumed records')
+    parser.add_argument('--dead-letter-file', type=str, help='Append invalid records as NDJSON to this file')
+    args = parser.parse_args()
+
+    env_path = Path(args.env_file)
+    if env_path.exists():
+        print(f"Loading configuration from {env_path}")
+        load_dotenv(env_path)
+    else:
+        print(f"No .env file found at {env_path}, using environment variables")
+
+    topics = args.topic or list(filter(None, [os.getenv('KAFKA_TOPIC')]))
+    if not topics:
+        print("ERROR: KAFKA_TOPIC not set in environment", file=sys.stderr)
+        sys.exit(1)
+
+    validators: Dict[str, Optional[RecordValidator]] = {'1': None, '2': None}
+    if not args.no_validate:
+        try:
+            validators = {'1': load_validator(str(DEFAULT_SCHEMA)), '2': load_validator(str(DEFAULT_SCHEMA_V2))}
+        except (OSError, ValueError) as e:
+            print(f"ERROR: Cannot load schema: {e}", file=sys.stderr)
+            sys.exit(1)
+
+    try:
+        conn = psycopg2.connect(args.dsn)
+    except psycopg2.OperationalError as e:
+        print(f"ERROR: Cannot connect to PostgreSQL: {e}", file=sys.stderr)
+        sys.exit(1)
+    sink = PostgresSink(conn, args.table)
+
+    consumer = create_consumer(args.group_id, topics)
+    if not consumer:
+        print("ERROR: KAFKA_BOOTSTRAP_SERVERS not set in environment", file=sys.stderr)
+        sys.exit(1)
+
+    dead_letters = DeadLetterSink(path=args.dead_letter_file)
+    print(f"Consuming {', '.join(topics)} into {args.table} in batches of {args.batch_size}; "
+          f"invalid records go to: {dead_letters.describe()}\n")
+
+    stats = None
+    try:
+        stats = run(consumer, sink, validators, dead_letters, args.batch_size, args.batch_timeout, args.idle_timeout)
+    except KeyboardInterrupt:
+        print("\nInterrupted")
+    finally:
+        consumer.close()
+        conn.close()
+        dead_letters.close()
+
+    if stats:
+        print(f"\n{stats.summary()}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+-- PostgreSQL Schema Setup for Openflow CDC Demo (partitioned variant)
+-- Alternative to 01-schema.sql for large or growing quote histories.
+--
+-- historical_stock_quotes is range-partitioned by quote_date, one partition per
+-- year, and carries only two indexes:
+--   - the primary key (symbol, quote_date), which also serves lookups by symbol
+--     and enforces what the UNIQUE constraint of 01-schema.sql enforced
+--   - a BRIN index on quote_date, a few pages per partition, for date ranges
+-- 01-schema.sql maintains five B-trees per row instead (id, the UNIQUE
+-- constraint, symbol, quote_date, symbol + quote_date).
+--
+-- id is kept as a plain column so replicated rows keep the same shape.
+-- The publication uses publish_via_partition_root, so CDC sees a single
+-- historical_stock_quotes table rather than one table per partition.
+--
+-- Usage: psql -f 01-schema-partitioned.sql (or ./setup.sh --partitioned)
+
+\echo 'Creating demo schema and partitioned tables...'
+
+-- Create a demo schema (optional, but good practice)
+CREATE SCHEMA IF NOT EXISTS nasdaq;
+
+-- Set search path to include our demo schema
+SET search_path TO nasdaq, public;
+
+-- Create a table for historical market data, partitioned by quote date
+CREATE TABLE IF NOT EXISTS historical_stock_quotes (
+    id SERIAL,
+    symbol VARCHAR(10) NOT NULL,
+    quote_date DATE NOT NULL,
+    close_price DECIMAL(10,4) NOT NULL,
+    volume BIGINT NOT NULL,
+    open_price DECIMAL(10,4) NOT NULL,
+    high_price DECIMAL(10,4) NOT NULL,
+    low_price DECIMAL(10,4) NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (symbol, quote_date)
+) PARTITION BY RANGE (quote_date);
+
+-- Quotes are appended in date order, so a BRIN range summary is enough for date filters
+CREATE INDEX IF NOT EXISTS idx_hsq_quote_date_brin ON historical_stock_quotes
+    USING BRIN (quote_date) WITH (autosummarize = on);
+
+-- Function to create one partition per calendar year (existing partitions are kept)
+CREATE OR REPLACE FUNCTION create_quote_partitions(first_year INT, last_year INT)
+RETURNS VOID AS $$
+BEGIN
+    FOR year IN first_year..last_year LOOP
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS nasdaq.%I PARTITION OF nasdaq.historical_stock_quotes FOR VALUES FROM (%L) TO (%L)',
+            'historical_stock_quotes_' || year, make_date(year, 1, 1), make_date(year + 1, 1, 1)
+        );
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Yearly partitions through next year; anything else lands in the default partition.
+-- Create partitions for new years before their data arrives: a year whose rows are
+-- already in the default partition cannot be split out without moving them first.
+SELECT create_quote_partitions(2000, EXTRACT(YEAR FROM CURRENT_DATE)::INT + 1);
+CREATE TABLE IF NOT EXISTS historical_stock_quotes_default PARTITION OF historical_stock_quotes DEFAULT;
+
+-- Set REPLICA IDENTITY to DEFAULT for CDC (ensures primary keys are in WAL)
+ALTER TABLE historical_stock_quotes REPLICA IDENTITY DEFAULT;
+
+-- 03-migrate-to-partitioned.sql sets skip_publication: it copies the existing rows
+-- first and only then puts the table in the (existing) publication
+\if :{?skip_publication}
+\else
+-- Create publication for Openflow CDC connector; changes to every partition
+-- are published as changes to historical_stock_quotes
+CREATE PUBLICATION openflow WITH (publish_via_partition_root = true);
+
+-- Add the table to the publication
+ALTER PUBLICATION openflow ADD TABLE historical_stock_quotes;
+
+\echo 'Publication "openflow" created for CDC with historical_stock_quotes table (published via partition root)'
+\endif
+
+\echo 'Partitioned schema setup completed successfully!'
@@ -0,0 +1,75 @@
+-- Migrate an existing nasdaq.historical_stock_quotes (01-schema.sql) to the
+-- partitioned layout of 01-schema-partitioned.sql, in one transaction.
+--
+-- The old table is renamed to historical_stock_quotes_heap and kept for
+-- verification and rollback. Its rows are copied into the new table before the
+-- new table joins the openflow publication, so the copy is not replicated as
+-- new inserts. Writes and reads on the table wait until the migration commits.
+--
+-- The replicated table keeps its name and columns, but its primary key becomes
+-- (symbol, quote_date). Re-snapshot the table in the Openflow connector after
+-- migrating so the destination picks up the new key.
+--
+-- Usage: psql -v ON_ERROR_STOP=1 -f 03-migrate-to-partitioned.sql
+-- Afterwards, once verified: DROP TABLE nasdaq.historical_stock_quotes_heap;
+
+\echo 'Migrating historical_stock_quotes to the partitioned schema...'
+
+SET search_path TO nasdaq, public;
+
+BEGIN;
+
+LOCK TABLE historical_stock_quotes IN ACCESS EXCLUSIVE MODE;
+
+-- Move the old table and the names it owns out of the way
+ALTER PUBLICATION openflow DROP TABLE historical_stock_quotes;
+ALTER TABLE historical_stock_quotes RENAME TO historical_stock_quotes_heap;
+ALTER INDEX historical_stock_quotes_pkey RENAME TO historical_stock_quotes_heap_pkey;
+ALTER INDEX historical_stock_quotes_symbol_quote_date_key RENAME TO historical_stock_quotes_heap_symbol_quote_date_key;
+ALTER SEQUENCE historical_stock_quotes_id_seq RENAME TO historical_stock_quotes_heap_id_seq;
+
+-- Create the partitioned table, without touching the publication yet
+\set skip_publication true
+\ir 01-schema-partitioned.sql
+\unset skip_publication
+
+-- Cover every year present in the old table, including any before 2000
+SELECT create_quote_partitions(
+    EXTRACT(YEAR FROM MIN(quote_date))::INT,
+    EXTRACT(YEAR FROM MAX(quote_date))::INT
+)
+FROM historical_stock_quotes_heap
+HAVING COUNT(*) > 0;
+
+-- Copy in date order so each partition's BRIN ranges stay narrow
+INSERT INTO historical_stock_quotes
+    (id, symbol, quote_date, close_price, volume, open_price, high_price, low_price, created_at, updated_at)
+SELECT id, symbol, quote_date, close_price, volume, open_price, high_price, low_price, created_at, updated_at
+FROM historical_stock_quotes_heap
+ORDER BY quote_date, symbol;
+
+-- New rows continue the old id sequence
+SELECT setval('historical_stock_quotes_id_seq', MAX(id))
+FROM historical_stock_quotes
+HAVING MAX(id) IS NOT NULL;
+
+-- Summarize the BRIN ranges filled by the copy (autosummarize covers later inserts)
+SELECT brin_summarize_new_values(inhrelid::regclass)
+FROM pg_inherits
+WHERE inhparent = 'idx_hsq_quote_date_brin'::regclass;
+
+ANALYZE historical_stock_quotes;
+
+-- Publish the new table under the old name
+ALTER PUBLICATION openflow SET (publish_via_partition_root = true);
+ALTER PUBLICATION openflow ADD TABLE historical_stock_quotes;
+
+COMMIT;
+
+\echo ''
+\echo 'Row counts (old heap table vs partitioned table):'
+SELECT
+    (SELECT COUNT(*) FROM historical_stock_quotes_heap) AS heap_rows,
+    (SELECT COUNT(*) FROM historical_stock_quotes) AS partitioned_rows;
+
+\echo 'Migration completed. Drop nasdaq.historical_stock_quotes_heap once the counts match.'
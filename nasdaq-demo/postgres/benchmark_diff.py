@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Benchmark diff_tables.py against a full comparison, on a PostgreSQL table and
+its Parquet export.
+
+Fills nasdaq.historical_stock_quotes in a scratch database with --symbols x
+--days synthetic quotes and exports it to Parquet. It then compares the
+database (postgres:) with the export (parquet:) in two runs:
+
+    identical  - right after the export
+    drifted    - after deleting, updating and inserting --changes rows each
+                 in the database, as a replica that missed some changes
+
+and once more with a full comparison that fetches every row from both sides.
+For each it reports the queries, the values fetched and the time taken. The
+run fails if diff_tables.py reports anything but the rows that were changed.
+
+Needs a PostgreSQL server (PGHOST, PGPORT, PGUSER, PGPASSWORD), a user with
+CREATEDB and psql on PATH.
+
+Usage:
+    uv run --with psycopg2-binary --with duckdb python benchmark_diff.py
+    uv run --with psycopg2-binary --with duckdb python benchmark_diff.py --symbols 2000 --days 2500
+"""
+
+import argparse
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Set, Tuple
+
+import psycopg2
+
+from diff_tables import DEFAULT_FANOUT, DEFAULT_LEAF_ROWS, TABLES, Key, Side, diff_tables, open_side
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+START_DATE = '2015-01-01'
+
+FILL_SQL = """
+SELECT setseed(0.42);
+INSERT INTO nasdaq.historical_stock_quotes (symbol, quote_date, close_price, volume, open_price, high_price, low_price)
+SELECT 'X' || chr(65 + s / 676 % 26) || chr(65 + s / 26 % 26) || chr(65 + s % 26),
+       DATE '{start}' + d,
+       round((10 + random() * 500)::numeric, 4), (random() * 1e8)::bigint,
+       round((10 + random() * 500)::numeric, 4), round((10 + random() * 500)::numeric, 4),
+       round((10 + random() * 500)::numeric, 4)
+FROM generate_series(0, {symbols} - 1) s, generate_series(0, {days} - 1) d
+"""
+
+EXPORT_SQL = ("COPY (SELECT symbol, quote_date, close_price, volume, open_price, high_price, low_price "
+              "FROM nasdaq.historical_stock_quotes) TO STDOUT WITH (FORMAT csv, HEADER true)")
+
+# The table's types, so the export renders values as the database does
+PARQUET_COLUMNS = ("{'symbol': 'VARCHAR', 'quote_date': 'DATE', 'close_price': 'DECIMAL(10,4)', "
+                   "'volume': 'BIGINT', 'open_price': 'DECIMAL(10,4)', 'high_price': 'DECIMAL(10,4)', "
+                   "'low_price': 'DECIMAL(10,4)'}")
+
+
+def create_database(database: str, symbols: int, days: int):
+    admin = psycopg2.connect(dbname='postgres')
+    admin.autocommit = True
+    with admin.cursor() as cur:
+        cur.execute(f'DROP DATABASE IF EXISTS "{database}"')
+        cur.execute(f'CREATE DATABASE "{database}"')
+    admin.close()
+    subprocess.run(['psql', '-q', '-v', 'ON_ERROR_STOP=1', '-d', database, '-f', '01-schema.sql'],
+                   cwd=SCRIPT_DIR, check=True, stdout=subprocess.DEVNULL)
+    conn = psycopg2.connect(dbname=database)
+    with conn.cursor() as cur:
+        cur.execute(FILL_SQL.format(start=START_DATE, symbols=symbols, days=days))
+        cur.execute("ANALYZE nasdaq.historical_stock_quotes")
+    conn.commit()
+    return conn
+
+
+def drop_database(database: str):
+    admin = psycopg2.connect(dbname='postgres')
+    admin.autocommit = True
+    with admin.cursor() as cur:
+        cur.execute(f'DROP DATABASE IF EXISTS "{database}"')
+    admin.close()
+
+
+def export_parquet(conn, workdir: Path) -> Path:
+    import duckdb
+    csv_path = workdir / 'export.csv'
+    with conn.cursor() as cur, open(csv_path, 'wb') as f:
+        cur.copy_expert(EXPORT_SQL, f)
+    parquet_dir = workdir / 'parquet'
+    parquet_dir.mkdir()
+    with duckdb.connect() as duck:
+        duck.execute(f"COPY (SELECT * FROM read_csv('{csv_path}', header = true, columns = {PARQUET_COLUMNS})) "
+                     f"TO '{parquet_dir / 'HistoricalData_ALL.parquet'}' (FORMAT parquet, COMPRESSION zstd)")
+    csv_path.unlink()
+    return parquet_dir
+
+
+def drift(conn, symbols: int, days: int, changes: int) -> Dict[str, Set[Key]]:
+    """Delete, update and insert `changes` random rows each; returns the keys as diff_tables.py reports them."""
+    rng = random.Random(7)
+    with conn.cursor() as cur:
+        cur.execute("SELECT DATE %s + d FROM generate_series(0, %s) d", (START_DATE, days))
+        dates = [row[0] for row in cur.fetchall()]
+        names = [f"X{chr(65 + s // 676 % 26)}{chr(65 + s // 26 % 26)}{chr(65 + s % 26)}" for s in range(symbols)]
+        picked: Set[Tuple[int, int]] = set()
+        while len(picked) < min(2 * changes, symbols * days):
+            picked.add((rng.randrange(symbols), rng.randrange(days)))
+        picked = sorted(picked)
+        rng.shuffle(picked)
+        deleted = {(names[s], dates[d]) for s, d in picked[:changes]}
+        updated = {(names[s], dates[d]) for s, d in picked[changes:]}
+        inserted = {(names[rng.randrange(symbols)], dates[days]) for _ in range(changes)}
+        for key in deleted:
+            cur.execute("DELETE FROM nasdaq.historical_stock_quotes WHERE symbol = %s AND quote_date = %s", key)
+        for key in updated:
+            cur.execute("UPDATE nasdaq.historical_stock_quotes SET volume = volume + 1 "
+                        "WHERE symbol = %s AND quote_date = %s", key)
+        for key in inserted:
+            cur.execute("INSERT INTO nasdaq.historical_stock_quotes "
+                        "(symbol, quote_date, close_price, volume, open_price, high_price, low_price) "
+                        "VALUES (%s, %s, 1, 1, 1, 1, 1)", key)
+    conn.commit()
+    # The database is the source: its deletes are missing from the export, its inserts are extra rows there
+    return {'extra': deleted, 'changed': updated, 'missing': inserted}
+
+
+def full_comparison(sides: List[Side]) -> Tuple[Dict[str, Set[Key]], int]:
+    """Fetch every row of both sides and compare them in Python; returns the differences and values fetched."""
+    spec = sides[0].spec
+    columns = ', '.join(spec.key + spec.values)
+    width = len(spec.key)
+    copies, fetched = [], 0
+    for side in sides:
+        cur = side.conn.cursor()
+        cur.execute(f"SELECT {columns} FROM {side.table}")
+        rows = {}
+        while True:
+            batch = cur.fetchmany(10_000)
+            if not batch:
+                break
+            fetched += sum(len(row) for row in batch)
+            for row in batch:
+                rows[tuple(row[:width])] = tuple(row[width:])
+        cur.close()
+        copies.append(rows)
+    source, target = copies
+    return {
+        'missing': set(source) - set(target),
+        'extra': set(target) - set(source),
+        'changed': {key for key in source.keys() & target.keys() if source[key] != target[key]},
+    }, fetched
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark diff_tables.py against a full comparison')
+    parser.add_argument('--symbols', type=int, default=500, help='Symbols to generate (default: 500)')
+    parser.add_argument('--days', type=int, default=2000, help='Days of quotes per symbol (default: 2000)')
+    parser.add_argument('--changes', type=int, default=10, help='Rows deleted, updated and inserted each (default: 10)')
+    parser.add_argument('--fanout', type=int, default=DEFAULT_FANOUT,
+                        help=f'diff_tables.py --fanout (default: {DEFAULT_FANOUT})')
+    parser.add_argument('--leaf-rows', type=int, default=DEFAULT_LEAF_ROWS,
+                        help=f'diff_tables.py --leaf-rows (default: {DEFAULT_LEAF_ROWS})')
+    parser.add_argument('--database', default='nasdaq_bench_diff', help='Scratch database (default: nasdaq_bench_diff)')
+    args = parser.parse_args()
+    if not 1 <= args.symbols <= 26 ** 3:
+        parser.error(f'--symbols must be between 1 and {26 ** 3}')
+
+    spec = TABLES['quotes']
+    workdir = Path(tempfile.mkdtemp(prefix='diff_bench_'))
+    failures = []
+    sides: List[Side] = []
+    conn = None
+    try:
+        start = time.perf_counter()
+        conn = create_database(args.database, args.symbols, args.days)
+        parquet_dir = export_parquet(conn, workdir)
+        rows = args.symbols * args.days
+        print(f"{rows:,} quotes in PostgreSQL and Parquet, set up in {time.perf_counter() - start:.1f}s\n")
+
+        sides = [open_side(f"postgres:dbname={args.database}", spec, None, 'source'),
+                 open_side(f"parquet:{parquet_dir}", spec, None, 'target')]
+        print(f"  {'run':<10} {'differences':>12} {'queries':>8} {'values fetched':>15} {'time':>8}")
+
+        expected = {'missing': set(), 'extra': set(), 'changed': set()}
+        for name in ('identical', 'drifted', 'full'):
+            if name == 'drifted':
+                expected = drift(conn, args.symbols, args.days, args.changes)
+            for side in sides:
+                side.queries = side.values_fetched = 0
+
+            start = time.perf_counter()
+            if name == 'full':
+                found, fetched = full_comparison(sides)
+                queries = len(sides)
+            else:
+                result = diff_tables(sides[0], sides[1], args.fanout, args.leaf_rows)
+                found = {'missing': set(result.missing), 'extra': set(result.extra), 'changed': set(result.changed)}
+                fetched = sum(side.values_fetched for side in sides)
+                queries = sum(side.queries for side in sides)
+            elapsed = time.perf_counter() - start
+
+            differences = sum(len(keys) for keys in found.values())
+            print(f"  {name:<10} {differences:>12,} {queries:>8,} {fetched:>15,} {elapsed:>7.2f}s")
+            for kind in expected:
+                if found[kind] != expected[kind]:
+                    failures.append(f"{name}: {len(found[kind]):,} {kind} rows reported, "
+                                    f"expected {len(expected[kind]):,}")
+            if name == 'identical' and queries != 2:
+                failures.append(f"identical: {queries} queries, expected one per side")
+    finally:
+        for side in sides:
+            side.conn.close()
+        if conn:
+            conn.close()
+        drop_database(args.database)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    for failure in failures:
+        print(f"  FAIL: {failure}")
+    print("\nPASS" if not failures else "\nFAIL")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
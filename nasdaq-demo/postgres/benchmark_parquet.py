@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Compare loading the demo data from CSV and from Parquet (csv_to_parquet.py).
+
+Both datasets are scaled up: HistoricalData_TSLA.csv is copied under
+--copies symbols, and RELAY_WHS.csv is repeated --copies times under shifted
+geo codes. Each is converted to Parquet, then for each format the script
+times:
+
+    read      - from file to typed, cleaned columns in Python (pyarrow),
+                as any local consumer would need them
+    records   - to produce.py's v1 records (quotes only), what produce.py
+                does before validating
+    v2        - to produce.py's v2 records (quotes only): from CSV, v1
+                records converted by to_v2_record; from Parquet, read
+                straight from the typed columns
+    load      - into PostgreSQL: the CSV with the seed SQL (\\copy into a
+                TEXT staging table, then the cleaning INSERT ... SELECT), the
+                Parquet with load_parquet.py
+
+and reports file sizes. The run fails if the two formats load different
+table contents, or if produce.py reads different v1 or v2 records from them.
+
+The load needs a PostgreSQL server (PGHOST, PGPORT, PGUSER, PGPASSWORD), a
+user with CREATEDB and psql on PATH; --no-database skips it.
+
+Usage:
+    uv run --with pyarrow --with psycopg2-binary python benchmark_parquet.py
+    uv run --with pyarrow --with psycopg2-binary python benchmark_parquet.py --copies 30 --no-database
+"""
+
+import argparse
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import psycopg2
+import pyarrow.parquet as pq
+
+from csv_to_parquet import DATASETS, convert, read_csv
+from load_parquet import load
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+QUOTES_CSV = SCRIPT_DIR.parent / 'data' / 'HistoricalData_TSLA.csv'
+WHO_CSV = SCRIPT_DIR.parent.parent / 'postgres-cdc-demo' / 'RELAY_WHS.csv'
+KAFKA_DIR = SCRIPT_DIR.parent / 'kafka'
+
+# who.life_expectancy as created in the postgres-cdc-demo walkthrough
+WHO_SCHEMA_SQL = """
+CREATE SCHEMA IF NOT EXISTS who;
+CREATE TABLE IF NOT EXISTS who.life_expectancy (
+    year            SMALLINT       NOT NULL,
+    geo_code        SMALLINT       NOT NULL,
+    geo_code_type   VARCHAR(50)    NOT NULL,
+    geo_name        VARCHAR(150)   NOT NULL,
+    sex             VARCHAR(10)    NOT NULL,
+    life_expectancy NUMERIC(16,8)  NOT NULL,
+    PRIMARY KEY (year, geo_code, sex)
+);
+"""
+
+# The CSV seed steps: 02-seed-data.sql, and step 3b of the postgres-cdc-demo skill
+CSV_SEED_SQL = {
+    'quotes': ("""
+        CREATE TEMP TABLE temp_stock_data (
+            date_str TEXT, close_last TEXT, volume TEXT, open_price TEXT, high_price TEXT, low_price TEXT
+        ) ON COMMIT DROP
+    """, """
+        INSERT INTO nasdaq.historical_stock_quotes (symbol, quote_date, close_price, volume, open_price, high_price, low_price)
+        SELECT %s, TO_DATE(date_str, 'MM/DD/YYYY'), REPLACE(close_last, '$', '')::DECIMAL(10,4), volume::BIGINT,
+               REPLACE(open_price, '$', '')::DECIMAL(10,4), REPLACE(high_price, '$', '')::DECIMAL(10,4),
+               REPLACE(low_price, '$', '')::DECIMAL(10,4)
+        FROM temp_stock_data
+        WHERE date_str IS NOT NULL AND date_str != ''
+        ON CONFLICT (symbol, quote_date) DO NOTHING
+    """, 'temp_stock_data'),
+    'who': ("""
+        CREATE TEMP TABLE _raw_import (
+            ind_id TEXT, ind_code TEXT, ind_uuid TEXT, ind_per_code TEXT,
+            dim_time TEXT, dim_time_type TEXT, dim_geo_code_m49 TEXT,
+            dim_geo_code_type TEXT, dim_publish_state TEXT, ind_name TEXT,
+            geo_name_short TEXT, dim_sex TEXT, amount_n TEXT
+        ) ON COMMIT DROP
+    """, """
+        INSERT INTO who.life_expectancy (year, geo_code, geo_code_type, geo_name, sex, life_expectancy)
+        SELECT dim_time::SMALLINT, dim_geo_code_m49::SMALLINT, dim_geo_code_type,
+               geo_name_short, dim_sex, amount_n::NUMERIC(16,8)
+        FROM _raw_import
+    """, '_raw_import'),
+}
+
+CHECKSUM_SQL = {
+    'quotes': "SELECT COUNT(*), md5(string_agg(q::text, '|' ORDER BY symbol, quote_date)) FROM "
+              "(SELECT symbol, quote_date, close_price, volume, open_price, high_price, low_price "
+              "FROM nasdaq.historical_stock_quotes) q",
+    'who': "SELECT COUNT(*), md5(string_agg(w::text, '|' ORDER BY year, geo_code, sex)) FROM who.life_expectancy w",
+}
+
+
+def symbol_name(i: int) -> str:
+    return 'X' + ''.join(chr(ord('A') + i // 26 ** k % 26) for k in (2, 1, 0))
+
+
+def scale_inputs(workdir: Path, copies: int) -> Dict[str, List[Path]]:
+    """CSV inputs: `copies` quote files, and one RELAY_WHS.csv with `copies` sets of geo codes."""
+    csv_dir = workdir / 'csv'
+    csv_dir.mkdir()
+    quotes = []
+    for i in range(copies):
+        path = csv_dir / f"HistoricalData_{symbol_name(i)}.csv"
+        shutil.copyfile(QUOTES_CSV, path)
+        quotes.append(path)
+
+    lines = WHO_CSV.read_text(encoding='utf-8').splitlines()
+    header, rows = lines[0], lines[1:]
+    geo = header.split(',').index('DIM_GEO_CODE_M49')
+    out = [header]
+    for copy in range(copies):
+        for row in rows:
+            fields = row.split(',')
+            fields[geo] = str(int(fields[geo]) + 1000 * copy)  # geo_code is a SMALLINT
+            out.append(','.join(fields))
+    who = csv_dir / 'RELAY_WHS.csv'
+    who.write_text('\n'.join(out) + '\n', encoding='utf-8')
+    return {'quotes': quotes, 'who': [who]}
+
+
+def timed(fn: Callable) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def load_csv(conn, dataset: str, paths: List[Path]):
+    create, insert, staging = CSV_SEED_SQL[dataset]
+    for path in paths:
+        with conn.cursor() as cur, open(path, 'rb') as f:
+            cur.execute(create)
+            cur.copy_expert(f"COPY {staging} FROM STDIN WITH (FORMAT csv, HEADER true)", f)
+            cur.execute(insert, (path.stem.split('_')[-1],) if dataset == 'quotes' else None)
+        conn.commit()
+
+
+def create_database(admin_cur, database: str):
+    admin_cur.execute(f'DROP DATABASE IF EXISTS "{database}"')
+    admin_cur.execute(f'CREATE DATABASE "{database}"')
+    subprocess.run(['psql', '-q', '-v', 'ON_ERROR_STOP=1', '-d', database, '-f', '01-schema.sql'],
+                   cwd=SCRIPT_DIR, check=True, stdout=subprocess.DEVNULL)
+    conn = psycopg2.connect(dbname=database)
+    with conn.cursor() as cur:
+        cur.execute(WHO_SCHEMA_SQL)
+    conn.commit()
+    return conn
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare loading the demo data from CSV and from Parquet')
+    parser.add_argument('--copies', type=int, default=20, help='Symbols / geo code sets to generate (default: 20, max 32)')
+    parser.add_argument('--no-database', action='store_true', help='Skip the PostgreSQL load')
+    parser.add_argument('--database-prefix', default='nasdaq_bench_parquet', help='Prefix of the scratch databases')
+    args = parser.parse_args()
+    if not 1 <= args.copies <= 32:
+        parser.error('--copies must be between 1 and 32 (geo codes are SMALLINT)')
+
+    sys.path.insert(0, str(KAFKA_DIR))
+    from produce import read_records, to_v2_record
+
+    workdir = Path(tempfile.mkdtemp(prefix='parquet_bench_'))
+    failures = []
+    try:
+        inputs = scale_inputs(workdir, args.copies)
+        outputs: Dict[str, List[Path]] = {}
+        for dataset, paths in inputs.items():
+            parquet_dir = workdir / 'parquet'
+            parquet_dir.mkdir(exist_ok=True)
+            outputs[dataset] = [convert(path, parquet_dir)[0] for path in paths]
+
+        results = {}
+        for dataset in DATASETS:
+            csv_paths, parquet_paths = inputs[dataset], outputs[dataset]
+            rows = sum(pq.ParquetFile(path).metadata.num_rows for path in parquet_paths)
+            result = results[dataset] = {
+                'rows': rows,
+                'size': (sum(p.stat().st_size for p in csv_paths), sum(p.stat().st_size for p in parquet_paths)),
+                'read': (timed(lambda: [read_csv(p, dataset) for p in csv_paths]),
+                         timed(lambda: [pq.ParquetFile(p).read() for p in parquet_paths])),
+            }
+            if dataset == 'quotes':
+                records = {}
+                result['records'] = tuple(
+                    timed(lambda: records.__setitem__(fmt, [r for p in paths for _, r, _ in read_records(p, p.stem.split('_')[-1])]))
+                    for fmt, paths in (('csv', csv_paths), ('parquet', parquet_paths))
+                )
+                by_key = {fmt: sorted(recs, key=lambda r: (r['symbol'], r['date'])) for fmt, recs in records.items()}
+                if by_key['csv'] != by_key['parquet']:
+                    failures.append("produce.py reads different records from the CSV and the Parquet files")
+
+                v2 = {}
+                result['v2'] = (
+                    timed(lambda: v2.__setitem__('csv', [to_v2_record(r) for p in csv_paths
+                                                         for _, r, _ in read_records(p, p.stem.split('_')[-1])])),
+                    timed(lambda: v2.__setitem__('parquet', [r for p in parquet_paths
+                                                             for _, r, _ in read_records(p, p.stem.split('_')[-1], '2')])),
+                )
+                by_key = {fmt: sorted(recs, key=lambda r: (r['symbol'], r['quote_date'])) for fmt, recs in v2.items()}
+                if by_key['csv'] != by_key['parquet']:
+                    failures.append("produce.py reads different v2 records from the CSV and the Parquet files")
+
+        if not args.no_database:
+            admin = psycopg2.connect(dbname='postgres')
+            admin.autocommit = True
+            admin_cur = admin.cursor()
+            databases = {fmt: f"{args.database_prefix}_{fmt}" for fmt in ('csv', 'parquet')}
+            conns = {}
+            try:
+                for fmt, database in databases.items():
+                    conns[fmt] = create_database(admin_cur, database)
+                for dataset in DATASETS:
+                    results[dataset]['load'] = (
+                        timed(lambda: load_csv(conns['csv'], dataset, inputs[dataset])),
+                        timed(lambda: [load(conns['parquet'], path, dataset) for path in outputs[dataset]]),
+                    )
+                    checksums = {}
+                    for fmt, conn in conns.items():
+                        with conn.cursor() as cur:
+                            cur.execute(CHECKSUM_SQL[dataset])
+                            checksums[fmt] = cur.fetchone()
+                    if checksums['csv'] != checksums['parquet']:
+                        failures.append(f"{DATASETS[dataset].table}: CSV load {checksums['csv']}, "
+                                        f"Parquet load {checksums['parquet']}")
+            finally:
+                for conn in conns.values():
+                    conn.close()
+                for database in databases.values():
+                    admin_cur.execute(f'DROP DATABASE IF EXISTS "{database}"')
+                admin.close()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    for dataset, result in results.items():
+        csv_size, parquet_size = result['size']
+        print(f"{DATASETS[dataset].table}: {result['rows']:,} rows")
+        print(f"  {'size':<8} {csv_size / 1024**2:8.2f} MB CSV  {parquet_size / 1024**2:8.2f} MB Parquet  "
+              f"{(1 - parquet_size / csv_size) * 100:4.0f}% smaller")
+        for phase in ('read', 'records', 'v2', 'load'):
+            if phase in result:
+                csv_seconds, parquet_seconds = result[phase]
+                change = (1 - parquet_seconds / csv_seconds) * 100
+                print(f"  {phase:<8} {csv_seconds:8.3f} s  CSV  {parquet_seconds:8.3f} s  Parquet  "
+                      f"{abs(change):4.0f}% {'faster' if change >= 0 else 'slower'}")
+        print()
+
+    for failure in failures:
+        print(f"  FAIL: {failure}")
+    print("PASS" if not failures else "FAIL")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+Compare the heap schema (01-schema.sql) with the partitioned schema
+(01-schema-partitioned.sql): write throughput, WAL volume and CDC volume.
+
+Each schema is created in its own scratch database by running its SQL file
+with psql, and a pgoutput replication slot is opened on the openflow
+publication, as the Openflow connector would. The same synthetic quotes are
+then written to both:
+
+    insert   - one trading day for every symbol per transaction, the way
+               daily quotes arrive
+    update   - price corrections to random existing rows
+
+For each phase the script reports rows/s, the WAL written per row (every
+index write ends up there) and the bytes per row a CDC client decodes from
+the slot. Table and index sizes are reported at the end.
+
+Finally, 03-migrate-to-partitioned.sql is run on the heap database. The run
+fails if the row counts differ after the migration, if the copy is decoded
+as inserts, or if changes are not published under the partition root.
+
+WAL is cluster-wide, so run against a server without other write activity.
+The slot needs wal_level=logical (rds.logical_replication=1 on RDS).
+
+Connection settings come from the standard libpq variables (PGHOST, PGPORT,
+PGUSER, PGPASSWORD); the user needs CREATEDB and REPLICATION.
+
+Usage:
+    python benchmark_schema.py
+    python benchmark_schema.py --symbols 2000 --days 250 --updates 20000
+"""
+
+import argparse
+import random
+import subprocess
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from typing import NamedTuple, Set
+
+import psycopg2
+from psycopg2 import errors
+from psycopg2.extras import execute_batch, execute_values
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+SCHEMAS = {
+    'heap': '01-schema.sql',
+    'partitioned': '01-schema-partitioned.sql',
+}
+MIGRATION = '03-migrate-to-partitioned.sql'
+SLOT_PREFIX = 'benchmark_schema'
+
+INSERT_SQL = """
+INSERT INTO nasdaq.historical_stock_quotes
+    (symbol, quote_date, close_price, volume, open_price, high_price, low_price)
+VALUES %s
+"""
+
+# One statement per row, as in the demo's CDC walkthrough, so the planner prunes to one partition
+UPDATE_SQL = """
+UPDATE nasdaq.historical_stock_quotes
+SET close_price = close_price * 1.01, updated_at = CURRENT_TIMESTAMP
+WHERE symbol = %s AND quote_date = %s
+"""
+
+# Summarise what a pgoutput client would receive: total bytes, insert and update
+# messages, the relation ids those refer to, and the relation messages naming them
+DECODE_SQL = """
+SELECT
+    COALESCE(SUM(octet_length(data)), 0),
+    COUNT(*) FILTER (WHERE get_byte(data, 0) = ascii('I')),
+    COUNT(*) FILTER (WHERE get_byte(data, 0) = ascii('U')),
+    array_agg(DISTINCT substring(data FROM 2 FOR 4)) FILTER (WHERE get_byte(data, 0) IN (ascii('I'), ascii('U'))),
+    array_agg(data) FILTER (WHERE get_byte(data, 0) = ascii('R'))
+FROM pg_logical_slot_get_binary_changes(%s, NULL, NULL, 'proto_version', '1', 'publication_names', 'openflow')
+"""
+
+# The quotes table, or all of its partitions
+SIZE_SQL = """
+SELECT COALESCE(SUM(pg_relation_size(c.oid)), 0), COALESCE(SUM(pg_indexes_size(c.oid)), 0)
+FROM pg_class c
+JOIN pg_namespace n ON n.oid = c.relnamespace
+WHERE n.nspname = 'nasdaq' AND c.relkind = 'r' AND c.relname LIKE 'historical\\_stock\\_quotes%'
+"""
+
+ROOT_TABLE = 'nasdaq.historical_stock_quotes'
+
+
+class SlotOutput(NamedTuple):
+    bytes: int
+    inserts: int
+    updates: int
+    tables: Set[str]  # the tables the inserts and updates were published as
+
+
+def connect(database: str):
+    """Connect with the libpq environment (PGHOST, PGUSER, ...) to the given database."""
+    conn = psycopg2.connect(dbname=database)
+    conn.autocommit = True
+    return conn
+
+
+def psql(database: str, sql_file: str):
+    subprocess.run(['psql', '-q', '-v', 'ON_ERROR_STOP=1', '-d', database, '-f', sql_file],
+                   cwd=SCRIPT_DIR, check=True, stdout=subprocess.DEVNULL)
+
+
+def synthetic_days(symbols: int, days: int, seed: int):
+    """Yield one list of quote rows per business day, one row per symbol, as random walks."""
+    rng = random.Random(seed)
+    names = [f"S{i:05d}" for i in range(symbols)]
+    closes = [rng.uniform(10, 500) for _ in names]
+    day = date(2015, 1, 2)
+    for _ in range(days):
+        rows = []
+        for i, name in enumerate(names):
+            close = closes[i] = max(1.0, closes[i] * (1 + rng.gauss(0, 0.02)))
+            open_ = close * (1 + rng.gauss(0, 0.005))
+            rows.append((name, day, round(close, 4), rng.randint(100_000, 50_000_000), round(open_, 4),
+                         round(max(open_, close) * 1.01, 4), round(min(open_, close) * 0.99, 4)))
+        yield rows
+        day += timedelta(days=3 if day.weekday() == 4 else 1)
+
+
+def checkpoint(cur) -> bool:
+    """Start each phase after a checkpoint so both schemas pay the same full-page writes."""
+    try:
+        cur.execute("CHECKPOINT")
+        return True
+    except errors.InsufficientPrivilege:
+        return False
+
+
+class Phase:
+    """Time a write phase and measure the WAL and slot output it produced."""
+
+    def __init__(self, cur, slot):
+        self.cur = cur
+        self.slot = slot
+
+    def __enter__(self):
+        self.cur.execute("SELECT pg_current_wal_lsn()")
+        self.start_lsn = self.cur.fetchone()[0]
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        if exc_type is not None:
+            return
+        self.seconds = time.perf_counter() - self.start
+        self.cur.execute("SELECT pg_wal_lsn_diff(pg_current_wal_lsn(), %s)", (self.start_lsn,))
+        self.wal_bytes = int(self.cur.fetchone()[0])
+        self.decoded = decode_slot(self.cur, self.slot) if self.slot else None
+
+
+def decode_slot(cur, slot: str) -> SlotOutput:
+    """Consume the slot and summarise the pgoutput messages it returned."""
+    cur.execute(DECODE_SQL, (slot,))
+    size, inserts, updates, relids, relation_messages = cur.fetchone()
+    # A relation message is 'R', the relation id, then the namespace and name as C strings
+    names = {}
+    for message in map(bytes, relation_messages or []):
+        namespace, name = message[5:].split(b'\0')[:2]
+        names[message[1:5]] = f"{namespace.decode()}.{name.decode()}"
+    tables = {names.get(bytes(relid), 'unknown') for relid in relids or []}
+    return SlotOutput(int(size), inserts, updates, tables)
+
+
+def run_schema(name: str, database: str, args, slot):
+    psql(database, SCHEMAS[name])
+    conn = connect(database)
+    cur = conn.cursor()
+    if slot:
+        cur.execute("SELECT pg_create_logical_replication_slot(%s, 'pgoutput')", (slot,))
+
+    checkpointed = checkpoint(cur)
+    rows = 0
+    keys = []
+    with Phase(cur, slot) as insert:
+        conn.autocommit = False
+        for day_rows in synthetic_days(args.symbols, args.days, args.seed):
+            execute_values(cur, INSERT_SQL, day_rows, page_size=len(day_rows))
+            conn.commit()
+            rows += len(day_rows)
+            keys.extend((row[0], row[1]) for row in day_rows)
+        conn.autocommit = True
+
+    checkpoint(cur)
+    targets = random.Random(args.seed).sample(keys, min(args.updates, len(keys)))
+    with Phase(cur, slot) as update:
+        conn.autocommit = False
+        for offset in range(0, len(targets), args.symbols):
+            execute_batch(cur, UPDATE_SQL, targets[offset:offset + args.symbols], page_size=100)
+            conn.commit()
+        conn.autocommit = True
+
+    cur.execute(SIZE_SQL)
+    table_bytes, index_bytes = cur.fetchone()
+    conn.close()
+    return {
+        'phases': {'insert': (insert, rows), 'update': (update, len(targets))},
+        'table_bytes': table_bytes,
+        'index_bytes': index_bytes,
+        'checkpointed': checkpointed,
+    }
+
+
+def check_migration(database: str, slot):
+    """Migrate the heap database and return (seconds, failed checks)."""
+    start = time.perf_counter()
+    psql(database, MIGRATION)
+    seconds = time.perf_counter() - start
+
+    conn = connect(database)
+    cur = conn.cursor()
+    failures = []
+    cur.execute("SELECT (SELECT COUNT(*) FROM nasdaq.historical_stock_quotes_heap), "
+                "(SELECT COUNT(*) FROM nasdaq.historical_stock_quotes)")
+    heap_rows, partitioned_rows = cur.fetchone()
+    if heap_rows != partitioned_rows:
+        failures.append(f"row counts differ: {heap_rows:,} heap vs {partitioned_rows:,} partitioned")
+    cur.execute("SELECT pubviaroot FROM pg_publication WHERE pubname = 'openflow'")
+    if cur.fetchone() != (True,):
+        failures.append("openflow does not publish via the partition root")
+
+    if slot:
+        copied = decode_slot(cur, slot)
+        if copied.inserts:
+            failures.append(f"the copy was decoded as {copied.inserts:,} inserts")
+        cur.execute(INSERT_SQL.replace('%s', "('MIGRATED', CURRENT_DATE, 1, 1, 1, 1, 1)"))
+        inserted = decode_slot(cur, slot)
+        if inserted.inserts != 1 or inserted.tables != {ROOT_TABLE}:
+            failures.append(f"a new row is decoded as {inserted.inserts} insert(s) into {sorted(inserted.tables)}")
+    conn.close()
+    return seconds, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the heap and partitioned quote schemas')
+    parser.add_argument('--symbols', type=int, default=1000, help='Symbols, i.e. rows per daily transaction (default: 1000)')
+    parser.add_argument('--days', type=int, default=500, help='Trading days to insert (default: 500)')
+    parser.add_argument('--updates', type=int, default=50000, help='Rows to update afterwards (default: 50000)')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed (default: 42)')
+    parser.add_argument('--database-prefix', default='nasdaq_bench', help='Prefix of the scratch databases (default: nasdaq_bench)')
+    parser.add_argument('--keep', action='store_true', help='Keep the scratch databases')
+    args = parser.parse_args()
+
+    admin = connect('postgres')
+    admin_cur = admin.cursor()
+    admin_cur.execute("SHOW wal_level")
+    use_slot = admin_cur.fetchone()[0] == 'logical'
+    if not use_slot:
+        print("wal_level is not logical: reporting WAL volume only, without CDC slot output or migration checks\n")
+
+    databases = {name: f"{args.database_prefix}_{name}" for name in SCHEMAS}
+    # Replication slot names are cluster-wide, so each database gets its own
+    slots = {name: f"{SLOT_PREFIX}_{name}" if use_slot else None for name in SCHEMAS}
+    results = {}
+    failures = []
+    try:
+        for name, database in databases.items():
+            admin_cur.execute(f'DROP DATABASE IF EXISTS "{database}"')
+            admin_cur.execute(f'CREATE DATABASE "{database}"')
+            results[name] = run_schema(name, database, args, slots[name])
+        migration_seconds, failures = check_migration(databases['heap'], slots['heap'])
+    finally:
+        for name, database in databases.items():
+            admin_cur.execute("SELECT pg_drop_replication_slot(slot_name) FROM pg_replication_slots "
+                              "WHERE slot_name = %s AND NOT active", (slots[name],))
+            if not args.keep:
+                admin_cur.execute(f'DROP DATABASE IF EXISTS "{database}"')
+        admin.close()
+
+    print(f"{args.symbols:,} symbols x {args.days:,} days, {args.updates:,} updates\n")
+    print(f"  {'schema':<12} {'phase':<7} {'rows/s':>9} {'WAL B/row':>10} {'CDC B/row':>10}")
+    for name, result in results.items():
+        for phase_name, (phase, rows) in result['phases'].items():
+            cdc = f"{phase.decoded.bytes / rows:>10.0f}" if phase.decoded and rows else f"{'-':>10}"
+            print(f"  {name:<12} {phase_name:<7} {rows / phase.seconds:>9,.0f} {phase.wal_bytes / rows:>10.0f} {cdc}")
+    print()
+    for name, result in results.items():
+        print(f"  {name:<12} table {result['table_bytes'] / 1024**2:7.1f} MB, "
+              f"indexes {result['index_bytes'] / 1024**2:7.1f} MB")
+    if not all(result['checkpointed'] for result in results.values()):
+        print("\n  (no CHECKPOINT privilege: WAL figures include a varying number of full-page images)")
+
+    print()
+    heap, partitioned = (results[name]['phases'] for name in ('heap', 'partitioned'))
+    for phase_name, (phase, _) in partitioned.items():
+        saved = 1 - phase.wal_bytes / heap[phase_name][0].wal_bytes
+        print(f"  {phase_name}: the partitioned schema writes {saved * 100:.0f}% less WAL than the heap schema")
+        if phase.decoded and phase.decoded.tables != {ROOT_TABLE}:
+            failures.append(f"partitioned {phase_name}s are published as {sorted(phase.decoded.tables)}")
+    print(f"  migration of the heap database: {migration_seconds:.1f}s")
+    for failure in failures:
+        print(f"  FAIL: {failure}")
+    print("\nPASS" if not failures else "\nFAIL")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
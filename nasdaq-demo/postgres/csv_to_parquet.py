@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Convert the demo CSVs to typed, dictionary-encoded Parquet.
+
+The CSVs are text: every load re-parses "$445.91" prices and MM/DD/YYYY
+dates, and RELAY_WHS.csv repeats the same indicator and country strings on
+every row. This applies the seed SQL's cleaning once and writes the result
+with the target table's columns and types:
+
+    HistoricalData_<SYMBOL>.csv  ->  nasdaq.historical_stock_quotes columns
+        (02-seed-data.sql: '$' stripped, DECIMAL(10,4) prices, MM/DD/YYYY
+        dates, BIGINT volume, rows without a date skipped)
+    RELAY_WHS.csv                ->  who.life_expectancy columns
+        (postgres-cdc-demo: SMALLINT year and geo code, NUMERIC(16,8) value;
+        the IND_* and other columns the demo never loads are dropped)
+
+Decimals are rounded half away from zero, as PostgreSQL casts do. Rows are
+sorted by the table's primary key, so row group statistics are selective.
+Repeated strings are dictionary-encoded. Files are zstd-compressed with
+--row-group-size rows per row group.
+
+load_parquet.py loads the output into PostgreSQL. kafka/produce.py and
+kafka/async_produce.py produce it directly.
+
+Usage:
+    uv run --with pyarrow python csv_to_parquet.py ../data/HistoricalData_TSLA.csv
+    uv run --with pyarrow python csv_to_parquet.py ../data ../../postgres-cdc-demo/RELAY_WHS.csv --output-dir parquet
+"""
+
+import argparse
+import csv
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List, NamedTuple, Optional, Tuple
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+
+DEFAULT_ROW_GROUP_SIZE = 128 * 1024
+
+
+class Dataset(NamedTuple):
+    table: str                      # PostgreSQL table the seed SQL loads
+    key: Tuple[str, ...]            # its primary key, the sort order of the file
+    dictionary: Tuple[str, ...]     # string columns stored dictionary-encoded
+    clean: Callable[[pa.Table, Path], pa.Table]
+
+
+def to_decimal(column: pa.ChunkedArray, precision: int, scale: int) -> pa.ChunkedArray:
+    """Cast decimal strings like ::DECIMAL(precision, scale): extra digits are rounded half away from zero."""
+    wide = pc.cast(column, pa.decimal128(38, 20))
+    return pc.cast(pc.round(wide, ndigits=scale, round_mode='half_towards_infinity'), pa.decimal128(precision, scale))
+
+
+def clean_quotes(raw: pa.Table, path: Path) -> pa.Table:
+    """The cleaning of 02-seed-data.sql, with the symbol taken from the file name."""
+    raw = raw.filter(pc.is_valid(raw['Date']))
+    symbol = path.stem.split('_')[-1]
+
+    def price(name: str) -> pa.ChunkedArray:
+        return to_decimal(pc.replace_substring(raw[name], '$', ''), 10, 4)
+
+    return pa.table({
+        'symbol': pa.array([symbol] * raw.num_rows, pa.string()),
+        'quote_date': pc.cast(pc.strptime(raw['Date'], format='%m/%d/%Y', unit='s'), pa.date32()),
+        'close_price': price('Close/Last'),
+        'volume': pc.cast(raw['Volume'], pa.int64()),
+        'open_price': price('Open'),
+        'high_price': price('High'),
+        'low_price': price('Low'),
+    })
+
+
+def clean_who(raw: pa.Table, path: Path) -> pa.Table:
+    """The INSERT ... SELECT of the postgres-cdc-demo seed step."""
+    return pa.table({
+        'year': pc.cast(raw['DIM_TIME'], pa.int16()),
+        'geo_code': pc.cast(raw['DIM_GEO_CODE_M49'], pa.int16()),
+        'geo_code_type': raw['DIM_GEO_CODE_TYPE'],
+        'geo_name': raw['GEO_NAME_SHORT'],
+        'sex': raw['DIM_SEX'],
+        'life_expectancy': to_decimal(raw['AMOUNT_N'], 16, 8),
+    })
+
+
+DATASETS = {
+    'quotes': Dataset('nasdaq.historical_stock_quotes', ('symbol', 'quote_date'), ('symbol',), clean_quotes),
+    'who': Dataset('who.life_expectancy', ('year', 'geo_code', 'sex'), ('geo_code_type', 'geo_name', 'sex'), clean_who),
+}
+
+
+def detect_dataset(path: Path) -> Optional[str]:
+    """The dataset of a CSV or Parquet file, from its name (HistoricalData_<SYMBOL>, RELAY_WHS)."""
+    if path.stem.startswith('HistoricalData_'):
+        return 'quotes'
+    if path.stem.upper().startswith('RELAY_WHS'):
+        return 'who'
+    return None
+
+
+def read_csv(path: Path, dataset: str) -> pa.Table:
+    """Read a CSV as text columns and clean it into the table's types; empty fields are NULL."""
+    with open(path, newline='') as f:
+        header = next(csv.reader(f))
+    # No type inference: the cleaning casts from the text, as the seed SQL does from TEXT columns
+    raw = pacsv.read_csv(path, convert_options=pacsv.ConvertOptions(
+        column_types={name: pa.string() for name in header},
+        strings_can_be_null=True,
+    ))
+    return DATASETS[dataset].clean(raw, path)
+
+
+def write_parquet(table: pa.Table, path: Path, dataset: str, row_group_size: int = DEFAULT_ROW_GROUP_SIZE):
+    """Sort by the primary key and write; the dataset's repeated strings become dictionary columns."""
+    spec = DATASETS[dataset]
+    table = table.sort_by([(column, 'ascending') for column in spec.key])
+    for name in spec.dictionary:
+        index = table.schema.get_field_index(name)
+        table = table.set_column(index, name, pc.cast(table[name], pa.dictionary(pa.int32(), pa.string())))
+    pq.write_table(table, path, row_group_size=row_group_size, compression='zstd',
+                   use_dictionary=list(spec.dictionary))
+
+
+def convert(path: Path, output_dir: Optional[Path], row_group_size: int = DEFAULT_ROW_GROUP_SIZE) -> Tuple[Path, int]:
+    """Convert one CSV; returns the Parquet path and its row count."""
+    dataset = detect_dataset(path)
+    if not dataset:
+        raise ValueError(f"{path.name}: expected HistoricalData_<SYMBOL>.csv or RELAY_WHS.csv")
+    target = (output_dir or path.parent) / f"{path.stem}.parquet"
+    table = read_csv(path, dataset)
+    write_parquet(table, target, dataset, row_group_size)
+    return target, table.num_rows
+
+
+def find_csv_files(paths: List[Path]) -> List[Path]:
+    files = []
+    for path in paths:
+        if path.is_dir():
+            files.extend(sorted(f for f in path.glob('*.csv') if detect_dataset(f)))
+        elif path.is_file():
+            files.append(path)
+        else:
+            raise ValueError(f"Path {path} does not exist")
+    return files
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert the demo CSVs to typed, dictionary-encoded Parquet')
+    parser.add_argument('paths', nargs='+', type=Path, help='CSV files, or directories of them')
+    parser.add_argument('--output-dir', type=Path, help='Directory for the Parquet files (default: next to each CSV)')
+    parser.add_argument('--row-group-size', type=int, default=DEFAULT_ROW_GROUP_SIZE,
+                        help=f'Rows per row group (default: {DEFAULT_ROW_GROUP_SIZE})')
+    args = parser.parse_args()
+
+    try:
+        files = find_csv_files(args.paths)
+    except ValueError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(1)
+    if args.output_dir:
+        args.output_dir.mkdir(parents=True, exist_ok=True)
+
+    for path in files:
+        start = time.perf_counter()
+        try:
+            target, rows = convert(path, args.output_dir, args.row_group_size)
+        except (ValueError, pa.ArrowInvalid) as e:
+            print(f"ERROR: {path.name}: {e}", file=sys.stderr)
+            sys.exit(1)
+        csv_bytes, parquet_bytes = path.stat().st_size, target.stat().st_size
+        print(f"{path.name} -> {target}: {rows:,} rows, {csv_bytes / 1024:,.0f} KB -> {parquet_bytes / 1024:,.0f} KB "
+              f"({(1 - parquet_bytes / csv_bytes) * 100:.0f}% smaller) in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
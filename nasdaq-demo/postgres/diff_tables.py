@@ -0,0 +1,398 @@
+#!/usr/bin/env python3
+"""
+Find the rows that differ between two copies of a demo table, e.g. the
+PostgreSQL source of the CDC demo and the Snowflake table Openflow writes.
+
+Instead of pulling both tables, each side hashes its rows where the data is.
+Only a row count and a 64-bit hash per key range cross the network:
+
+    1. Each side returns the count and the sum of its row hashes for the
+       whole table. If they match, the copies are identical.
+    2. Otherwise the range is split into --fanout sub-ranges at keys taken
+       from the side with more rows, and both sides return a count and a
+       hash for every sub-range in one query. Only the ranges that differ
+       are split again, Merkle-style.
+    3. A range of at most --leaf-rows rows is compared row by row by key
+       and row hash. The full rows are fetched only for the keys that differ.
+
+A row hash is the first 64 bits of the MD5 of the row's columns as text,
+joined with '|'. Every side renders values the same way (ISO dates,
+decimals with their full scale), so the hashes match across databases.
+
+Sides:
+
+    postgres:DSN            PostgreSQL via psycopg2 (empty DSN: PGHOST, PGUSER, ...)
+    snowflake:CONNECTION    Snowflake via snowflake-connector-python, a named
+                            connection from ~/.snowflake/connections.toml
+    duckdb:PATH             a DuckDB database file
+    parquet:PATH            Parquet files written by csv_to_parquet.py (a file,
+                            or a directory of them), queried with DuckDB
+
+Another DB-API database needs a Dialect in DIALECTS: its parameter style and
+how to turn a hex digest into an integer.
+
+The exit status is 0 if the copies are identical, 1 if rows differ and 2 on
+errors, as with diff.
+
+Usage:
+    uv run --with psycopg2-binary python diff_tables.py --dataset who postgres: postgres:dbname=who_replica
+    uv run --with psycopg2-binary --with duckdb python diff_tables.py --dataset quotes postgres: parquet:../data/parquet
+    uv run --with psycopg2-binary --with snowflake-connector-python python diff_tables.py --dataset who \\
+        postgres: snowflake:default --target-table PG_CDC_DEMO_DB.WHO.LIFE_EXPECTANCY
+"""
+
+import abc
+import argparse
+import math
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+DEFAULT_FANOUT = 64
+DEFAULT_LEAF_ROWS = 2000
+# Keys per query when fetching the rows that differ
+FETCH_BATCH_SIZE = 500
+HASH_MODULUS = 2 ** 64
+
+Key = Tuple[Any, ...]
+
+
+class TableSpec(NamedTuple):
+    table: str                  # table name in the demo's PostgreSQL database
+    key: Tuple[str, ...]        # primary key, in sort order
+    values: Tuple[str, ...]     # compared columns besides the key
+    parquet_glob: str           # csv_to_parquet.py's files for the table
+
+
+# Generated columns (id, created_at) are left out: they differ between copies by design
+TABLES = {
+    'quotes': TableSpec('nasdaq.historical_stock_quotes', ('symbol', 'quote_date'),
+                        ('close_price', 'volume', 'open_price', 'high_price', 'low_price'),
+                        'HistoricalData_*.parquet'),
+    'who': TableSpec('who.life_expectancy', ('year', 'geo_code', 'sex'),
+                     ('geo_code_type', 'geo_name', 'life_expectancy'),
+                     'RELAY_WHS*.parquet'),
+}
+
+
+class Dialect(abc.ABC):
+    """SQL for one database. The defaults are standard SQL; subclasses fill in the rest."""
+
+    placeholder = '%s'
+    row_compare = False     # supports (a, b) < (x, y)
+
+    def row_text(self, columns: Sequence[str]) -> str:
+        return " || '|' || ".join(f"COALESCE(CAST({column} AS VARCHAR), '<null>')" for column in columns)
+
+    @abc.abstractmethod
+    def row_hash(self, columns: Sequence[str]) -> str:
+        """The first 16 hex digits of the MD5 of row_text as an integer; signed or unsigned."""
+
+    def compare(self, columns: Sequence[str], op: str, values: Key) -> Tuple[str, List[Any]]:
+        """columns op values, comparing in key order; op is '<' or '>='."""
+        if self.row_compare:
+            placeholders = ', '.join([self.placeholder] * len(values))
+            return f"({', '.join(columns)}) {op} ({placeholders})", list(values)
+        # a < x OR (a = x AND (b < y OR (b = y AND c < z))), innermost last
+        clause, params = f"{columns[-1]} {op} {self.placeholder}", [values[-1]]
+        strict = op.rstrip('=')
+        for column, value in zip(reversed(columns[:-1]), reversed(values[:-1])):
+            clause = (f"({column} {strict} {self.placeholder} OR "
+                      f"({column} = {self.placeholder} AND {clause}))")
+            params = [value, value, *params]
+        return clause, params
+
+
+class PostgresDialect(Dialect):
+    row_compare = True
+
+    def row_hash(self, columns):
+        return f"('x' || SUBSTR(MD5({self.row_text(columns)}), 1, 16))::BIT(64)::BIGINT"
+
+
+class DuckDBDialect(Dialect):
+    # No row_compare: DuckDB rewrites a >= and < pair of row comparisons into an unsupported BETWEEN
+    placeholder = '?'
+
+    def row_hash(self, columns):
+        return f"('0x' || SUBSTR(MD5({self.row_text(columns)}), 1, 16))::UBIGINT"
+
+
+class SnowflakeDialect(Dialect):
+    def row_hash(self, columns):
+        return f"TO_NUMBER(SUBSTR(MD5({self.row_text(columns)}), 1, 16), 'XXXXXXXXXXXXXXXX')"
+
+
+DIALECTS = {
+    'postgres': PostgresDialect(),
+    'duckdb': DuckDBDialect(),
+    'snowflake': SnowflakeDialect(),
+}
+
+
+class Side:
+    """One copy of the table behind a DB-API connection; counts the queries and values it fetches."""
+
+    def __init__(self, label: str, conn, dialect: Dialect, table: str, spec: TableSpec):
+        self.label = label
+        self.conn = conn
+        self.dialect = dialect
+        self.table = table
+        self.spec = spec
+        self.queries = 0
+        self.values_fetched = 0
+
+    def _fetch(self, query: str, params: List[Any]) -> List[tuple]:
+        cur = self.conn.cursor()
+        try:
+            cur.execute(query, params)
+            rows = cur.fetchall()
+        finally:
+            cur.close()
+        self.queries += 1
+        self.values_fetched += sum(len(row) for row in rows)
+        return rows
+
+    def _where(self, lo: Optional[Key], hi: Optional[Key]) -> Tuple[str, List[Any]]:
+        """Rows with lo <= key < hi; None is unbounded."""
+        clauses, params = ['1 = 1'], []
+        for bound, op in ((lo, '>='), (hi, '<')):
+            if bound is not None:
+                clause, values = self.dialect.compare(self.spec.key, op, bound)
+                clauses.append(clause)
+                params.extend(values)
+        return ' AND '.join(clauses), params
+
+    def summary(self, lo: Optional[Key], hi: Optional[Key], bounds: List[Key]) -> List[Tuple[int, int]]:
+        """(row count, hash) of each range lo <= key < bounds[0], bounds[0] <= key < bounds[1], ... < hi."""
+        params: List[Any] = []
+
+        def bucket(first: int, last: int) -> str:
+            """Bucket of a row known to be in buckets first..last: a binary search over the bounds."""
+            if first == last:
+                return str(first)
+            middle = (first + last + 1) // 2
+            clause, values = self.dialect.compare(self.spec.key, '<', bounds[middle - 1])
+            params.extend(values)
+            lower = bucket(first, middle - 1)
+            return f"CASE WHEN {clause} THEN {lower} ELSE {bucket(middle, last)} END"
+
+        bucket_sql = bucket(0, len(bounds))
+        where, where_params = self._where(lo, hi)
+        columns = self.spec.key + self.spec.values
+        query = (f"SELECT {bucket_sql} AS bucket, COUNT(*), SUM({self.dialect.row_hash(columns)}) "
+                 f"FROM {self.table} WHERE {where} GROUP BY 1")
+        result = [(0, 0)] * (len(bounds) + 1)
+        for bucket_id, count, total in self._fetch(query, params + where_params):
+            result[int(bucket_id)] = (int(count), int(total) % HASH_MODULUS)
+        return result
+
+    def boundaries(self, lo: Optional[Key], hi: Optional[Key], step: int) -> List[Key]:
+        """Every step-th key in the range, skipping the first, so each sub-range holds step rows of this side."""
+        key = ', '.join(self.spec.key)
+        where, params = self._where(lo, hi)
+        query = (f"SELECT {key} FROM (SELECT {key}, ROW_NUMBER() OVER (ORDER BY {key}) AS rn "
+                 f"FROM {self.table} WHERE {where}) numbered "
+                 f"WHERE rn > 1 AND MOD(rn - 1, {step}) = 0 ORDER BY {key}")
+        return [tuple(row) for row in self._fetch(query, params)]
+
+    def row_hashes(self, lo: Optional[Key], hi: Optional[Key]) -> Dict[Key, int]:
+        width = len(self.spec.key)
+        where, params = self._where(lo, hi)
+        query = (f"SELECT {', '.join(self.spec.key)}, {self.dialect.row_hash(self.spec.key + self.spec.values)} "
+                 f"FROM {self.table} WHERE {where}")
+        return {tuple(row[:width]): int(row[width]) % HASH_MODULUS for row in self._fetch(query, params)}
+
+    def rows(self, keys: List[Key]) -> Dict[Key, tuple]:
+        """The compared values of the rows with these keys."""
+        width = len(self.spec.key)
+        match = '(' + ' AND '.join(f"{column} = {self.dialect.placeholder}" for column in self.spec.key) + ')'
+        found = {}
+        for start in range(0, len(keys), FETCH_BATCH_SIZE):
+            batch = keys[start:start + FETCH_BATCH_SIZE]
+            query = (f"SELECT {', '.join(self.spec.key + self.spec.values)} FROM {self.table} "
+                     f"WHERE {' OR '.join([match] * len(batch))}")
+            for row in self._fetch(query, [value for key in batch for value in key]):
+                found[tuple(row[:width])] = tuple(row[width:])
+        return found
+
+
+class TableDiff:
+    """Keys that differ between a source and a target, with the work it took to find them."""
+
+    def __init__(self):
+        self.missing: List[Key] = []    # in the source only
+        self.extra: List[Key] = []      # in the target only
+        self.changed: List[Key] = []    # in both, with different values
+        self.source_rows = 0
+        self.target_rows = 0
+        self.ranges = 0                 # key ranges hashed on both sides
+        self.leaves = 0                 # ranges compared row by row
+
+    def __bool__(self):
+        return bool(self.missing or self.extra or self.changed)
+
+    def describe(self) -> str:
+        return (f"{len(self.missing):,} missing from the target, {len(self.extra):,} only in the target, "
+                f"{len(self.changed):,} changed")
+
+
+def diff_range(source: Side, target: Side, lo: Optional[Key], hi: Optional[Key], counts: Tuple[int, int],
+               fanout: int, leaf_rows: int, result: TableDiff):
+    """Find the differing keys of a range whose summaries differ; counts are its (source, target) rows."""
+    if max(counts) <= leaf_rows or min(counts) == 0:
+        # Small, or one side is empty: every row of the other side differs anyway
+        result.leaves += 1
+        source_hashes = source.row_hashes(lo, hi) if counts[0] else {}
+        target_hashes = target.row_hashes(lo, hi) if counts[1] else {}
+        for key, digest in source_hashes.items():
+            if key not in target_hashes:
+                result.missing.append(key)
+            elif target_hashes[key] != digest:
+                result.changed.append(key)
+        result.extra.extend(key for key in target_hashes if key not in source_hashes)
+        return
+
+    splitter = source if counts[0] >= counts[1] else target
+    bounds = splitter.boundaries(lo, hi, math.ceil(max(counts) / fanout))
+    edges = [lo, *bounds, hi]
+    summaries = zip(source.summary(lo, hi, bounds), target.summary(lo, hi, bounds))
+    for i, (source_summary, target_summary) in enumerate(summaries):
+        result.ranges += 1
+        if source_summary != target_summary:
+            diff_range(source, target, edges[i], edges[i + 1], (source_summary[0], target_summary[0]),
+                       fanout, leaf_rows, result)
+
+
+def diff_tables(source: Side, target: Side, fanout: int = DEFAULT_FANOUT,
+                leaf_rows: int = DEFAULT_LEAF_ROWS) -> TableDiff:
+    result = TableDiff()
+    (source_summary,), (target_summary,) = source.summary(None, None, []), target.summary(None, None, [])
+    result.source_rows, result.target_rows = source_summary[0], target_summary[0]
+    result.ranges = 1
+    if source_summary != target_summary:
+        diff_range(source, target, None, None, (source_summary[0], target_summary[0]), fanout, leaf_rows, result)
+    for keys in (result.missing, result.extra, result.changed):
+        keys.sort()
+    return result
+
+
+def open_postgres(location: str):
+    import psycopg2
+    conn = psycopg2.connect(location)
+    conn.set_session(readonly=True)
+    return conn, 'postgres'
+
+
+def open_snowflake(location: str):
+    import snowflake.connector
+    return snowflake.connector.connect(connection_name=location or None), 'snowflake'
+
+
+def open_duckdb(location: str):
+    import duckdb
+    return duckdb.connect(location, read_only=True), 'duckdb'
+
+
+def open_parquet(location: str, spec: TableSpec):
+    """An in-memory DuckDB database with a view of the files under the table's name."""
+    import duckdb
+    path = Path(location)
+    files = sorted(path.glob(spec.parquet_glob)) if path.is_dir() else [path]
+    if not files or not all(f.is_file() for f in files):
+        raise ValueError(f"No {spec.parquet_glob} files at {location}")
+    schema = spec.table.split('.')[0]
+    sources = ', '.join("'" + str(f).replace("'", "''") + "'" for f in files)
+    conn = duckdb.connect()
+    conn.execute(f"CREATE SCHEMA {schema}")
+    conn.execute(f"CREATE VIEW {spec.table} AS SELECT * FROM read_parquet([{sources}])")
+    return conn, 'duckdb'
+
+
+OPENERS = {
+    'postgres': lambda location, spec: open_postgres(location),
+    'snowflake': lambda location, spec: open_snowflake(location),
+    'duckdb': lambda location, spec: open_duckdb(location),
+    'parquet': open_parquet,
+}
+
+
+def open_side(location: str, spec: TableSpec, table: Optional[str], label: str) -> Side:
+    """A Side for a 'kind:location' argument, e.g. 'postgres:dbname=demo' or 'parquet:../data'."""
+    kind, _, rest = location.partition(':')
+    if kind not in OPENERS:
+        raise ValueError(f"Unknown side '{location}', expected one of: {', '.join(f'{k}:...' for k in OPENERS)}")
+    conn, dialect = OPENERS[kind](rest, spec)
+    return Side(label, conn, DIALECTS[dialect], table or spec.table, spec)
+
+
+def print_rows(title: str, keys: List[Key], source_rows: Dict[Key, tuple], target_rows: Dict[Key, tuple],
+               spec: TableSpec, limit: int):
+    if not keys:
+        return
+    print(f"\n{title} ({len(keys):,}):")
+    for key in keys[:limit]:
+        label = ', '.join(f"{column}={value}" for column, value in zip(spec.key, key))
+        for side, rows in (('source', source_rows), ('target', target_rows)):
+            if key in rows:
+                values = ', '.join(f"{column}={value}" for column, value in zip(spec.values, rows[key]))
+                print(f"  {label}  {side}: {values}")
+    if len(keys) > limit:
+        print(f"  ... {len(keys) - limit:,} more")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Find the rows that differ between two copies of a demo table')
+    parser.add_argument('source', help='Source side, e.g. postgres: or postgres:dbname=demo')
+    parser.add_argument('target', help='Target side, e.g. snowflake:default or parquet:../data/parquet')
+    parser.add_argument('--dataset', choices=sorted(TABLES), required=True, help='Table to compare')
+    parser.add_argument('--source-table', help='Table name on the source side (default: the demo table)')
+    parser.add_argument('--target-table', help='Table name on the target side (default: the demo table)')
+    parser.add_argument('--fanout', type=int, default=DEFAULT_FANOUT,
+                        help=f'Sub-ranges per differing range (default: {DEFAULT_FANOUT})')
+    parser.add_argument('--leaf-rows', type=int, default=DEFAULT_LEAF_ROWS,
+                        help=f'Compare ranges up to this many rows row by row (default: {DEFAULT_LEAF_ROWS})')
+    parser.add_argument('--show', type=int, default=20, help='Differing rows to print per kind (default: 20)')
+    args = parser.parse_args()
+    if args.fanout < 2 or args.leaf_rows < 1:
+        parser.error('--fanout must be at least 2 and --leaf-rows at least 1')
+
+    spec = TABLES[args.dataset]
+    sides = []
+    try:
+        sides.append(open_side(args.source, spec, args.source_table, 'source'))
+        sides.append(open_side(args.target, spec, args.target_table, 'target'))
+        source, target = sides
+        start = time.perf_counter()
+        result = diff_tables(source, target, args.fanout, args.leaf_rows)
+        shown = [*result.missing[:args.show], *result.extra[:args.show], *result.changed[:args.show]]
+        source_rows, target_rows = source.rows(shown), target.rows(shown)
+        elapsed = time.perf_counter() - start
+    except Exception as e:
+        # A missing table or column, a lost connection, a query a database rejects: exit 2, as diff does
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(2)
+    finally:
+        for side in sides:
+            side.conn.close()
+
+    print(f"{source.table}: {result.source_rows:,} source rows, {result.target_rows:,} target rows")
+    print(f"  {'identical' if not result else result.describe()}")
+    print_rows('Missing from the target', result.missing, source_rows, target_rows, spec, args.show)
+    print_rows('Only in the target', result.extra, source_rows, target_rows, spec, args.show)
+    print_rows('Changed', result.changed, source_rows, target_rows, spec, args.show)
+
+    full = (result.source_rows + result.target_rows) * len(spec.key + spec.values)
+    fetched = source.values_fetched + target.values_fetched
+    print(f"\n{result.ranges:,} ranges hashed, {result.leaves:,} compared row by row, in {elapsed:.2f}s")
+    for side in sides:
+        print(f"  {side.label}: {side.queries:,} queries, {side.values_fetched:,} values fetched")
+    if full:
+        print(f"  {fetched:,} values fetched in total, {fetched / full * 100:.3f}% of the {full:,} "
+              f"a full comparison would fetch")
+    sys.exit(1 if result else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Load Parquet files written by csv_to_parquet.py into PostgreSQL.
+
+This is the Parquet counterpart of the CSV seed steps, for both
+nasdaq.historical_stock_quotes (02-seed-data.sql) and who.life_expectancy
+(postgres-cdc-demo). The file already has the table's types, so there is no
+text cleaning left to do. Each row group is COPYed into a temporary staging
+table and inserted in one transaction. Rows already present are skipped with
+ON CONFLICT DO NOTHING, as in 02-seed-data.sql.
+
+The target table must exist (01-schema.sql, or the postgres-cdc-demo table
+step). Connection settings come from the standard libpq variables (PGHOST,
+PGPORT, PGUSER, PGPASSWORD, PGDATABASE).
+
+Usage:
+    uv run --with pyarrow --with psycopg2-binary python load_parquet.py ../data/HistoricalData_TSLA.parquet
+    uv run --with pyarrow --with psycopg2-binary python load_parquet.py ../../postgres-cdc-demo/RELAY_WHS.parquet
+"""
+
+import argparse
+import io
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+import psycopg2
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+from psycopg2 import sql
+
+from csv_to_parquet import DATASETS, detect_dataset
+
+STAGING_SQL = "CREATE TEMP TABLE parquet_staging ON COMMIT DROP AS SELECT {columns} FROM {table} WITH NO DATA"
+INSERT_SQL = "INSERT INTO {table} ({columns}) SELECT {columns} FROM parquet_staging ON CONFLICT DO NOTHING"
+
+
+def find_parquet_files(paths: List[Path]) -> List[Path]:
+    files = []
+    for path in paths:
+        if path.is_dir():
+            files.extend(sorted(f for f in path.glob('*.parquet') if detect_dataset(f)))
+        elif path.is_file():
+            files.append(path)
+        else:
+            raise ValueError(f"Path {path} does not exist")
+    return files
+
+
+def load(conn, path: Path, dataset: str) -> int:
+    """Load one file in one transaction; returns the number of rows inserted."""
+    parquet = pq.ParquetFile(path)
+    table = sql.Identifier(*DATASETS[dataset].table.split('.'))
+    columns = sql.SQL(', ').join(map(sql.Identifier, parquet.schema_arrow.names))
+    write_options = pacsv.WriteOptions(include_header=False)
+    try:
+        with conn.cursor() as cur:
+            cur.execute(sql.SQL(STAGING_SQL).format(columns=columns, table=table))
+            for group in range(parquet.num_row_groups):
+                buffer = io.BytesIO()
+                pacsv.write_csv(parquet.read_row_group(group), buffer, write_options)
+                buffer.seek(0)
+                cur.copy_expert("COPY parquet_staging FROM STDIN WITH (FORMAT csv)", buffer)
+            cur.execute(sql.SQL(INSERT_SQL).format(columns=columns, table=table))
+            inserted = cur.rowcount
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return inserted
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load Parquet files written by csv_to_parquet.py into PostgreSQL')
+    parser.add_argument('paths', nargs='+', type=Path, help='Parquet files, or directories of them')
+    parser.add_argument('--dataset', choices=sorted(DATASETS),
+                        help='Target dataset (default: from the file name, HistoricalData_<SYMBOL> or RELAY_WHS)')
+    parser.add_argument('--dsn', type=str, default='',
+                        help='PostgreSQL connection string (default: PGHOST, PGUSER, ... from the environment)')
+    args = parser.parse_args()
+
+    try:
+        files = find_parquet_files(args.paths)
+        conn = psycopg2.connect(args.dsn)
+    except (ValueError, psycopg2.OperationalError) as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        for path in files:
+            dataset = args.dataset or detect_dataset(path)
+            if not dataset:
+                print(f"ERROR: {path.name}: cannot tell the dataset from the name, use --dataset", file=sys.stderr)
+                sys.exit(1)
+            start = time.perf_counter()
+            inserted = load(conn, path, dataset)
+            print(f"{path.name} -> {DATASETS[dataset].table}: {inserted:,} rows inserted "
+                  f"in {time.perf_counter() - start:.2f}s")
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -3,6 +3,18 @@ set -e
 
 # Openflow PostgreSQL CDC Demo - Database Setup Script (Native psql)
 # This script sets up the demo database schema and data using local psql
+#
+# Usage: ./setup.sh [--partitioned]
+#   --partitioned  use 01-schema-partitioned.sql (yearly partitions, BRIN on dates)
+
+SCHEMA_FILE="01-schema.sql"
+if [[ "$1" == "--partitioned" ]]; then
+    SCHEMA_FILE="01-schema-partitioned.sql"
+elif [[ -n "$1" ]]; then
+    echo "❌ Error: Unknown option '$1'"
+    echo "   Usage: $0 [--partitioned]"
+    exit 1
+fi
 
 echo "🚀 Setting up Openflow CDC Demo Database..."
 
@@ -50,8 +62,8 @@ export PGDATABASE="postgres"
 # Run the database setup
 SCRIPT_DIR="$(cd "$(dirname "$0")" && pwd)"
 
-echo "📋 Creating schema and tables..."
-psql -f "$SCRIPT_DIR/01-schema.sql"
+echo "📋 Creating schema and tables ($SCHEMA_FILE)..."
+psql -f "$SCRIPT_DIR/$SCHEMA_FILE"
 
 echo "📊 Loading demo data..."
 psql -f "$SCRIPT_DIR/02-seed-data.sql"
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""Exercise upload_reports.py against the local SFTP stand-in.
+
+Generates a synthetic reports tree (one directory of PDFs per ticker), starts
+sftp_server.py in-process with a per-operation latency, and runs:
+
+    cold sequential  - empty server and manifest, one connection
+    cold parallel    - empty server and manifest, --connections connections
+    re-run           - nothing changed: no uploads
+    new ticker       - one ticker's reports added: only those upload
+    touched          - every mtime bumped, content unchanged: re-hashed, no uploads
+    modified         - one report rewritten: one upload
+    deleted remotely - one report removed from the server, --verify-remote: one upload
+
+Each scenario prints wall time, MB uploaded, aggregate MB/s and the upload
+count. At the end the server tree is compared with the local tree by hash.
+The script exits non-zero if any scenario uploads the wrong number of files,
+if any file differs, or if any .part file is left behind.
+
+Usage:
+    python benchmark_upload.py [--tickers 10] [--reports 8] [--size-mb 2] [--latency-ms 40] [--connections 4]
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+import paramiko
+
+from sftp_server import SFTPStandIn
+from upload_reports import MB, file_sha256, find_files, sync_reports
+
+
+def write_report(path, size, seed):
+    rng = random.Random(seed)
+    with open(path, "wb") as f:
+        f.write(b"%PDF-1.7\n")
+        f.write(rng.randbytes(max(0, size - 9)))
+
+
+def add_ticker(source, ticker, reports, size):
+    directory = os.path.join(source, ticker)
+    os.makedirs(directory, exist_ok=True)
+    for quarter in range(reports):
+        write_report(os.path.join(directory, f"{ticker}_FY{2024 + quarter // 4}_Q{quarter % 4 + 1}.pdf"),
+                     size, seed=hash((ticker, quarter)))
+
+
+def run_scenario(name, expected_uploads, **kwargs):
+    start = time.perf_counter()
+    summary = sync_reports(**kwargs)
+    elapsed = time.perf_counter() - start
+    mb = summary["bytes"] / MB
+    ok = summary["uploaded"] == expected_uploads and summary["failed"] == 0
+    print(f"{'✅' if ok else '❌'} {name:<17} {elapsed:>7.2f}s {mb:>9.1f} MB {mb / elapsed:>8.1f} MB/s  "
+          f"{summary['uploaded']:>3} uploaded, {summary['skipped']:>3} skipped, {summary['rehashed']:>3} re-hashed, "
+          f"{summary['connections']} connections")
+    return ok
+
+
+def trees_match(source, root):
+    local = {relative: file_sha256(path) for path, relative in find_files(source, "*")}
+    remote = {relative: file_sha256(path) for path, relative in find_files(root, "*")}
+    return local == remote
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark upload_reports.py against a local SFTP stand-in")
+    parser.add_argument("--tickers", type=int, default=10, help="Tickers in the initial tree (default: 10)")
+    parser.add_argument("--reports", type=int, default=8, help="Reports per ticker (default: 8)")
+    parser.add_argument("--size-mb", type=float, default=2, help="Size of each report in MB (default: 2)")
+    parser.add_argument("--latency-ms", type=float, default=40, help="Stand-in delay per SFTP operation (default: 40)")
+    parser.add_argument("--connections", type=int, default=4, help="Connections for the parallel runs (default: 4)")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="sftp_bench_")
+    source = os.path.join(workdir, "reports")
+    size = int(args.size_mb * MB)
+    key_path = os.path.join(workdir, "test_key")
+    paramiko.RSAKey.generate(2048).write_private_key_file(key_path)
+    for t in range(args.tickers):
+        add_ticker(source, f"T{t:03d}", args.reports, size)
+
+    checks = []
+    servers = []
+    try:
+        def server(name):
+            stand_in = SFTPStandIn(os.path.join(workdir, name), latency=args.latency_ms / 1000).start()
+            servers.append(stand_in)
+            return stand_in
+
+        def options(stand_in, manifest, **extra):
+            return {"source": source, "host": stand_in.address[0], "port": stand_in.address[1], "key_path": key_path,
+                    "manifest_path": os.path.join(workdir, manifest), **extra}
+
+        total = args.tickers * args.reports
+        print(f"📁 {total} reports × {args.size_mb:g} MB, stand-in latency {args.latency_ms:g} ms per operation")
+        print()
+
+        sequential = server("sequential")
+        checks.append(run_scenario("cold sequential", total, **options(sequential, "sequential.json", connections=1)))
+
+        stand_in = server("parallel")
+        manifest = "parallel.json"
+        checks.append(run_scenario("cold parallel", total, **options(stand_in, manifest, connections=args.connections)))
+        checks.append(run_scenario("re-run", 0, **options(stand_in, manifest, connections=args.connections)))
+
+        add_ticker(source, "NEW", args.reports, size)
+        checks.append(run_scenario("new ticker", args.reports, **options(stand_in, manifest, connections=args.connections)))
+
+        future = time.time() + 60
+        for path, _ in find_files(source, "*.pdf"):
+            os.utime(path, (future, future))
+        checks.append(run_scenario("touched", 0, **options(stand_in, manifest, connections=args.connections)))
+
+        modified, _ = next(find_files(source, "*.pdf"))
+        write_report(modified, size, seed="modified")
+        checks.append(run_scenario("modified", 1, **options(stand_in, manifest, connections=args.connections)))
+
+        os.remove(os.path.join(stand_in.root, "NEW", os.listdir(os.path.join(stand_in.root, "NEW"))[0]))
+        checks.append(run_scenario("deleted remotely", 1, **options(stand_in, manifest, connections=args.connections,
+                                                                   verify=True)))
+
+        leftovers = [relative for _, relative in find_files(stand_in.root, "*.part")]
+        matches = trees_match(source, stand_in.root) and not leftovers
+        print()
+        print("✅ Server tree matches the local reports" if matches
+              else f"❌ Server tree differs from the local reports (partial files: {leftovers})")
+        checks.append(matches)
+    finally:
+        for stand_in in servers:
+            stand_in.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if not all(checks):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
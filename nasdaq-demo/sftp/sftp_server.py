@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""Local SFTP stand-in for the AWS Transfer Family server.
+
+Serves a local directory over SFTP with paramiko, so upload_reports.py can be
+exercised without AWS. Logins use public-key auth. With --authorized-key,
+only that key is accepted. Without it, any key is accepted. The host key is
+generated at startup. --latency-ms delays every file and directory operation
+to approximate a round trip to a remote endpoint.
+
+Usage:
+    python sftp_server.py --root /tmp/sftp-root --port 2222
+    python sftp_server.py --root /tmp/sftp-root --authorized-key ../../terraform/sftp/aws_sftp_key.pub --latency-ms 40
+
+Then point the uploader at it:
+    python upload_reports.py --host localhost --port 2222 --key ~/.ssh/id_rsa
+"""
+
+import argparse
+import base64
+import os
+import socket
+import threading
+import time
+
+import paramiko
+from paramiko.sftp import SFTP_FAILURE, SFTP_NO_SUCH_FILE, SFTP_OK, SFTP_PERMISSION_DENIED
+
+USERNAME = "openflow-user"
+
+
+def sftp_error(e):
+    return paramiko.SFTPServer.convert_errno(e.errno)
+
+
+class StandInServer(paramiko.ServerInterface):
+    def __init__(self, authorized_key):
+        self.authorized_key = authorized_key
+
+    def check_auth_publickey(self, username, key):
+        if self.authorized_key is None or key == self.authorized_key:
+            return paramiko.AUTH_SUCCESSFUL
+        return paramiko.AUTH_FAILED
+
+    def get_allowed_auths(self, username):
+        return "publickey"
+
+    def check_channel_request(self, kind, chanid):
+        if kind == "session":
+            return paramiko.OPEN_SUCCEEDED
+        return paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+
+
+class StandInHandle(paramiko.SFTPHandle):
+    def stat(self):
+        try:
+            return paramiko.SFTPAttributes.from_stat(os.fstat(self.readfile.fileno()))
+        except OSError as e:
+            return sftp_error(e)
+
+    def chattr(self, attr):
+        return SFTP_OK
+
+
+class StandInSFTP(paramiko.SFTPServerInterface):
+    """Maps SFTP paths onto a root directory, the way Transfer Family maps them onto a bucket prefix."""
+
+    root = "."
+    latency = 0.0
+    stats = None
+
+    def _path(self, path):
+        resolved = os.path.realpath(os.path.join(self.root, self.canonicalize(path).lstrip("/")))
+        if resolved != self.root and not resolved.startswith(self.root + os.sep):
+            raise PermissionError(path)
+        return resolved
+
+    def _wait(self, operation):
+        if self.latency:
+            time.sleep(self.latency)
+        with self.stats["lock"]:
+            self.stats[operation] = self.stats.get(operation, 0) + 1
+
+    def list_folder(self, path):
+        self._wait("list")
+        try:
+            local = self._path(path)
+            entries = []
+            for name in os.listdir(local):
+                attr = paramiko.SFTPAttributes.from_stat(os.stat(os.path.join(local, name)))
+                attr.filename = name
+                entries.append(attr)
+            return entries
+        except OSError as e:
+            return sftp_error(e)
+
+    def stat(self, path):
+        self._wait("stat")
+        try:
+            return paramiko.SFTPAttributes.from_stat(os.stat(self._path(path)))
+        except OSError as e:
+            return sftp_error(e)
+
+    lstat = stat
+
+    def open(self, path, flags, attr):
+        self._wait("open")
+        try:
+            local = self._path(path)
+            fd = os.open(local, flags | getattr(os, "O_BINARY", 0), 0o644)
+        except OSError as e:
+            return sftp_error(e)
+        if flags & os.O_WRONLY:
+            mode = "ab" if flags & os.O_APPEND else "wb"
+        elif flags & os.O_RDWR:
+            mode = "a+b" if flags & os.O_APPEND else "r+b"
+        else:
+            mode = "rb"
+        f = os.fdopen(fd, mode)
+        handle = StandInHandle(flags)
+        handle.filename = local
+        handle.readfile = f
+        handle.writefile = f
+        return handle
+
+    def remove(self, path):
+        self._wait("remove")
+        try:
+            os.remove(self._path(path))
+        except OSError as e:
+            return sftp_error(e)
+        return SFTP_OK
+
+    def rename(self, oldpath, newpath):
+        self._wait("rename")
+        try:
+            target = self._path(newpath)
+            # SFTP v3 rename refuses to replace an existing file
+            if os.path.exists(target):
+                return SFTP_FAILURE
+            os.rename(self._path(oldpath), target)
+        except OSError as e:
+            return sftp_error(e)
+        return SFTP_OK
+
+    def posix_rename(self, oldpath, newpath):
+        self._wait("rename")
+        try:
+            os.replace(self._path(oldpath), self._path(newpath))
+        except OSError as e:
+            return sftp_error(e)
+        return SFTP_OK
+
+    def mkdir(self, path, attr):
+        self._wait("mkdir")
+        try:
+            os.mkdir(self._path(path))
+        except OSError as e:
+            return sftp_error(e)
+        return SFTP_OK
+
+    def rmdir(self, path):
+        self._wait("rmdir")
+        try:
+            os.rmdir(self._path(path))
+        except OSError as e:
+            return sftp_error(e)
+        return SFTP_OK
+
+    def chattr(self, path, attr):
+        return SFTP_OK if os.path.exists(self._path(path)) else SFTP_NO_SUCH_FILE
+
+    def symlink(self, target_path, path):
+        return SFTP_PERMISSION_DENIED
+
+    def readlink(self, path):
+        return SFTP_PERMISSION_DENIED
+
+
+def load_public_key(path):
+    with open(path, encoding="utf-8") as f:
+        key_type, data = f.read().split()[:2]
+    return paramiko.PKey.from_type_string(key_type, base64.b64decode(data))
+
+
+class SFTPStandIn:
+    """Accepts SSH connections on a background thread and serves SFTP from root."""
+
+    def __init__(self, root, host="127.0.0.1", port=0, authorized_key=None, latency=0.0):
+        self.root = os.path.realpath(root)
+        os.makedirs(self.root, exist_ok=True)
+        self.host_key = paramiko.RSAKey.generate(2048)
+        self.authorized_key = authorized_key
+        self.stats = {"lock": threading.Lock(), "connections": 0}
+        # A fresh subclass per server, so two stand-ins in one process keep separate roots
+        self.sftp_class = type("RootedSFTP", (StandInSFTP,), {"root": self.root, "latency": latency, "stats": self.stats})
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind((host, port))
+        self.sock.listen(64)
+        self.address = self.sock.getsockname()
+        self.transports = []
+        self.running = True
+
+    def serve_forever(self):
+        while self.running:
+            try:
+                client, _ = self.sock.accept()
+            except OSError:
+                break
+            transport = paramiko.Transport(client)
+            transport.add_server_key(self.host_key)
+            transport.set_subsystem_handler("sftp", paramiko.SFTPServer, self.sftp_class)
+            transport.start_server(server=StandInServer(self.authorized_key))
+            self.transports.append(transport)
+            with self.stats["lock"]:
+                self.stats["connections"] += 1
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.running = False
+        self.sock.close()
+        for transport in self.transports:
+            transport.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local SFTP stand-in for the Transfer Family server")
+    parser.add_argument("--root", required=True, help="Directory to serve as the user's home")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=2222, help="Port to listen on (default: 2222)")
+    parser.add_argument("--authorized-key", help="Public key file to accept (default: any key)")
+    parser.add_argument("--latency-ms", type=float, default=0, help="Delay per file/directory operation (default: 0)")
+    args = parser.parse_args()
+
+    authorized_key = load_public_key(args.authorized_key) if args.authorized_key else None
+    server = SFTPStandIn(args.root, args.host, args.port, authorized_key, args.latency_ms / 1000)
+    print(f"🖥️  SFTP stand-in on {server.address[0]}:{server.address[1]} serving {server.root} "
+          f"as {USERNAME} ({'one authorized key' if authorized_key else 'any key'})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+        stats = {k: v for k, v in server.stats.items() if k != "lock"}
+        print(f"\n📊 {stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,397 @@
+#!/usr/bin/env python3
+"""Parallel, incremental upload of earnings report PDFs to the SFTP server.
+
+A faster alternative to upload_reports.sh. The shell script starts an sftp
+session per directory. This keeps a small pool of SSH connections open instead,
+and sends files over them concurrently. A local manifest records the size, mtime
+and SHA-256 of every file uploaded to each server. Later runs skip files whose
+size and mtime are unchanged, and files whose content hash is unchanged, so
+re-running after adding one ticker's reports uploads only that ticker.
+
+Files are written as <name>.part and renamed once complete, so ListSFTP in
+the Openflow flow never picks up a partial PDF.
+
+The endpoint comes from --host or SFTP_HOST. Otherwise `terraform output` is
+run once and cached in the manifest until the Terraform state changes.
+
+Usage:
+    python upload_reports.py                          # every report under ../data/reports
+    python upload_reports.py ../data/reports/TSLA     # one company
+    python upload_reports.py --connections 8 --verify-remote
+    python upload_reports.py --host localhost --port 2222 --key /tmp/test_key   # local stand-in
+"""
+
+import argparse
+import fnmatch
+import hashlib
+import json
+import os
+import posixpath
+import queue
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+
+import paramiko
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+TERRAFORM_DIR = os.path.join(SCRIPT_DIR, "..", "..", "terraform", "sftp")
+DEFAULT_SOURCE = os.path.join(SCRIPT_DIR, "..", "data", "reports")
+DEFAULT_KEY = os.path.join(TERRAFORM_DIR, "aws_sftp_key")
+DEFAULT_MANIFEST = os.path.join(SCRIPT_DIR, ".upload_manifest.json")
+DEFAULT_USERNAME = "openflow-user"
+CHUNK_SIZE = 1024 * 1024
+MB = 1024 * 1024
+
+
+class Manifest:
+    """What has been uploaded to each server: {server: {remote path: {size, mtime_ns, sha256}}}."""
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        try:
+            with open(path, encoding="utf-8") as f:
+                self.data = json.load(f)
+        except FileNotFoundError:
+            self.data = {}
+        self.data.setdefault("servers", {})
+
+    def files(self, server):
+        return self.data["servers"].setdefault(server, {})
+
+    def record(self, server, remote_path, entry):
+        with self.lock:
+            self.files(server)[remote_path] = entry
+
+    def forget(self, server, remote_path):
+        with self.lock:
+            self.files(server).pop(remote_path, None)
+
+    def save(self):
+        with self.lock:
+            data = json.dumps(self.data, indent=2, sort_keys=True)
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(temp_path, self.path)
+
+
+def resolve_endpoint(manifest, terraform_dir=TERRAFORM_DIR):
+    """Run `terraform output` only when the Terraform state has changed since the last run."""
+    state_path = os.path.join(terraform_dir, "terraform.tfstate")
+    state_mtime = os.path.getmtime(state_path) if os.path.exists(state_path) else None
+    cached = manifest.data.get("endpoint")
+    if cached and state_mtime is not None and cached.get("state_mtime") == state_mtime:
+        return cached["host"]
+    host = subprocess.run(["terraform", "output", "-raw", "server_endpoint"], cwd=terraform_dir,
+                          check=True, capture_output=True, text=True).stdout.strip()
+    manifest.data["endpoint"] = {"host": host, "state_mtime": state_mtime}
+    return host
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class HashingReader:
+    """File wrapper that hashes what putfo reads, so each file is read once."""
+
+    def __init__(self, f):
+        self.f = f
+        self.digest = hashlib.sha256()
+
+    def read(self, size=-1):
+        data = self.f.read(size)
+        self.digest.update(data)
+        return data
+
+
+def find_files(source, pattern):
+    """Yield (local path, path relative to source with / separators) for matching files."""
+    for directory, dirs, files in os.walk(source):
+        dirs.sort()
+        for name in sorted(files):
+            if fnmatch.fnmatch(name.lower(), pattern.lower()):
+                local = os.path.join(directory, name)
+                yield local, os.path.relpath(local, source).replace(os.sep, "/")
+
+
+def plan_uploads(source, pattern, remote_dir, known, force=False):
+    """Split local files into uploads and skips, using the manifest entries for this server.
+
+    Returns (uploads, skipped, retouched). Uploads and skips are (local, remote, size) tuples.
+    retouched maps remote paths to updated manifest entries for files whose
+    mtime changed but whose content did not.
+    """
+    uploads, skipped, retouched = [], [], {}
+    for local, relative in find_files(source, pattern):
+        remote = posixpath.join(remote_dir, relative) if remote_dir not in ("", ".") else relative
+        st = os.stat(local)
+        entry = None if force else known.get(remote)
+        if entry and entry["size"] == st.st_size:
+            if entry["mtime_ns"] == st.st_mtime_ns:
+                skipped.append((local, remote, st.st_size))
+                continue
+            # Touched but maybe not modified: the hash decides
+            if file_sha256(local) == entry["sha256"]:
+                retouched[remote] = {**entry, "mtime_ns": st.st_mtime_ns}
+                skipped.append((local, remote, st.st_size))
+                continue
+        uploads.append((local, remote, st.st_size))
+    return uploads, skipped, retouched
+
+
+class ConnectionPool:
+    """Up to `size` SFTP sessions, opened on first use and reused for every file."""
+
+    def __init__(self, host, port, username, key_path, size):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.key_path = key_path
+        self.size = size
+        self.idle = queue.Queue()
+        self.opened = 0
+        self.clients = []
+        self.lock = threading.Lock()
+
+    def _connect(self):
+        client = paramiko.SSHClient()
+        client.load_system_host_keys()
+        # Matches the flow's "Strict Host Key Checking: false"; Transfer Family host keys rotate with the server
+        client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        client.connect(self.host, port=self.port, username=self.username, key_filename=self.key_path,
+                       look_for_keys=False, allow_agent=False, timeout=30)
+        with self.lock:
+            self.clients.append(client)
+        return client.open_sftp()
+
+    @contextmanager
+    def session(self):
+        try:
+            sftp = self.idle.get_nowait()
+        except queue.Empty:
+            with self.lock:
+                can_open = self.opened < self.size
+                if can_open:
+                    self.opened += 1
+            if not can_open:
+                sftp = self.idle.get()
+            else:
+                try:
+                    sftp = self._connect()
+                except Exception:
+                    with self.lock:
+                        self.opened -= 1
+                    raise
+        try:
+            yield sftp
+        except BaseException:
+            # A session that saw any error may be mid-transfer or broken; drop it and let a fresh one take its place
+            try:
+                sftp.close()
+            except Exception:
+                pass
+            with self.lock:
+                self.opened -= 1
+            raise
+        self.idle.put(sftp)
+
+    def close(self):
+        with self.lock:
+            for client in self.clients:
+                client.close()
+
+
+class RemoteDirectories:
+    """Creates each remote directory at most once per run, whichever worker gets there first."""
+
+    def __init__(self):
+        self.ready = set()
+        self.lock = threading.Lock()
+
+    def ensure(self, sftp, directory):
+        if directory in ("", ".", "/") or directory in self.ready:
+            return
+        self.ensure(sftp, posixpath.dirname(directory))
+        with self.lock:
+            if directory in self.ready:
+                return
+            try:
+                sftp.stat(directory)
+            except FileNotFoundError:
+                try:
+                    sftp.mkdir(directory)
+                except OSError:
+                    # Another uploader may have created it in the meantime
+                    sftp.stat(directory)
+            self.ready.add(directory)
+
+
+def upload_file(pool, directories, local, remote, size):
+    """Upload one file via <remote>.part and a rename; return (sha256, seconds)."""
+    start = time.perf_counter()
+    partial = remote + ".part"
+    with pool.session() as sftp, open(local, "rb") as f:
+        directories.ensure(sftp, posixpath.dirname(remote))
+        reader = HashingReader(f)
+        sftp.putfo(reader, partial, file_size=size, confirm=True)
+        try:
+            sftp.posix_rename(partial, remote)
+        except OSError:
+            # Servers without posix-rename@openssh.com only rename onto a free name
+            try:
+                sftp.remove(remote)
+            except FileNotFoundError:
+                pass
+            sftp.rename(partial, remote)
+    return reader.digest.hexdigest(), time.perf_counter() - start
+
+
+def verify_remote(pool, skipped):
+    """Return the skipped files that are missing or a different size on the server, one listing per directory."""
+    by_directory = {}
+    for item in skipped:
+        by_directory.setdefault(posixpath.dirname(item[1]) or ".", []).append(item)
+    missing = []
+    with pool.session() as sftp:
+        for directory, items in by_directory.items():
+            try:
+                sizes = {attr.filename: attr.st_size for attr in sftp.listdir_attr(directory)}
+            except FileNotFoundError:
+                sizes = {}
+            missing.extend(item for item in items if sizes.get(posixpath.basename(item[1])) != item[2])
+    return missing
+
+
+def sync_reports(source, host, port=22, username=DEFAULT_USERNAME, key_path=DEFAULT_KEY, connections=4,
+                 manifest_path=DEFAULT_MANIFEST, pattern="*.pdf", remote_dir=".", force=False, verify=False,
+                 dry_run=False, on_file=None):
+    """Upload new and changed files under source; return a summary dict."""
+    manifest = Manifest(manifest_path)
+    server = f"{username}@{host}:{port}"
+    known = manifest.files(server)
+    uploads, skipped, retouched = plan_uploads(source, pattern, remote_dir, {**known}, force)
+    for remote, entry in retouched.items():
+        manifest.record(server, remote, entry)
+
+    pool = ConnectionPool(host, port, username, key_path, max(1, connections))
+    summary = {"uploaded": 0, "skipped": len(skipped), "rehashed": len(retouched), "failed": 0,
+               "bytes": 0, "seconds": 0.0, "reuploaded_missing": 0, "files": []}
+    start = time.perf_counter()
+    try:
+        if verify and skipped:
+            missing = verify_remote(pool, skipped)
+            summary["reuploaded_missing"] = len(missing)
+            summary["skipped"] -= len(missing)
+            uploads.extend(missing)
+        if dry_run:
+            summary["files"] = [{"remote": remote, "bytes": size, "status": "planned"} for _, remote, size in uploads]
+            return summary
+
+        directories = RemoteDirectories()
+        with ThreadPoolExecutor(max_workers=pool.size) as executor:
+            futures = {executor.submit(upload_file, pool, directories, local, remote, size): (local, remote, size)
+                       for local, remote, size in uploads}
+            for future in as_completed(futures):
+                local, remote, size = futures[future]
+                try:
+                    sha256, seconds = future.result()
+                except Exception as e:
+                    summary["failed"] += 1
+                    error = str(e) if isinstance(e, (OSError, paramiko.SSHException)) else f"{type(e).__name__}: {e}"
+                    result = {"remote": remote, "bytes": size, "status": "failed", "error": error}
+                    manifest.forget(server, remote)
+                else:
+                    st = os.stat(local)
+                    manifest.record(server, remote, {"size": size, "mtime_ns": st.st_mtime_ns, "sha256": sha256})
+                    summary["uploaded"] += 1
+                    summary["bytes"] += size
+                    result = {"remote": remote, "bytes": size, "status": "uploaded", "seconds": seconds}
+                summary["files"].append(result)
+                if on_file:
+                    on_file(result)
+    finally:
+        summary["seconds"] = time.perf_counter() - start
+        summary["connections"] = len(pool.clients)
+        pool.close()
+        if not dry_run:
+            manifest.save()
+    return summary
+
+
+def print_file(result):
+    if result["status"] == "failed":
+        print(f"   ❌ {result['remote']}: {result['error']}")
+        return
+    mb = result["bytes"] / MB
+    print(f"   ⬆️  {result['remote']:<50} {mb:>8.2f} MB {result['seconds']:>7.2f}s "
+          f"{mb / max(result['seconds'], 1e-9):>8.1f} MB/s")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Upload earnings reports to SFTP, skipping files already uploaded")
+    parser.add_argument("source", nargs="?", default=DEFAULT_SOURCE, help="Reports directory (default: ../data/reports)")
+    parser.add_argument("--host", default=os.getenv("SFTP_HOST"), help="SFTP endpoint (default: SFTP_HOST or terraform output)")
+    parser.add_argument("--port", type=int, default=int(os.getenv("SFTP_PORT", "22")), help="SFTP port (default: 22)")
+    parser.add_argument("--username", default=os.getenv("SFTP_USERNAME", DEFAULT_USERNAME),
+                        help=f"SFTP user (default: {DEFAULT_USERNAME})")
+    parser.add_argument("--key", default=os.getenv("SFTP_KEY", DEFAULT_KEY), help="Private key (default: terraform/sftp/aws_sftp_key)")
+    parser.add_argument("--connections", type=int, default=4, help="SSH connections and concurrent transfers (default: 4)")
+    parser.add_argument("--remote-dir", default=".", help="Remote directory to upload into (default: home)")
+    parser.add_argument("--pattern", default="*.pdf", help="Files to upload, case-insensitive (default: *.pdf)")
+    parser.add_argument("--manifest", default=DEFAULT_MANIFEST, help="Manifest file (default: sftp/.upload_manifest.json)")
+    parser.add_argument("--force", action="store_true", help="Upload everything, ignoring the manifest")
+    parser.add_argument("--verify-remote", action="store_true",
+                        help="List remote directories and re-upload skipped files that are missing or a different size")
+    parser.add_argument("--dry-run", action="store_true", help="Show what would be uploaded")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if not os.path.isdir(args.source):
+        sys.exit(f"❌ Directory '{args.source}' does not exist")
+    if not os.path.isfile(args.key):
+        sys.exit(f"❌ SSH key not found at {args.key}\n   See terraform/sftp/README.md for setup instructions")
+
+    host = args.host
+    if not host:
+        manifest = Manifest(args.manifest)
+        host = resolve_endpoint(manifest)
+        manifest.save()
+
+    print(f"📤 Uploading {args.pattern} from {args.source} to {args.username}@{host}:{args.port} "
+          f"over {args.connections} connections")
+    summary = sync_reports(args.source, host, args.port, args.username, args.key, args.connections, args.manifest,
+                           args.pattern, args.remote_dir, args.force, args.verify_remote, args.dry_run, print_file)
+
+    if args.dry_run:
+        for item in summary["files"]:
+            print(f"   📝 {item['remote']} ({item['bytes'] / MB:.2f} MB)")
+        print(f"📝 Would upload {len(summary['files'])} files; {summary['skipped']} unchanged")
+        return
+
+    mb = summary["bytes"] / MB
+    print()
+    print(f"📊 Uploaded {summary['uploaded']} files ({mb:,.2f} MB) in {summary['seconds']:.2f}s, "
+          f"{mb / max(summary['seconds'], 1e-9):,.1f} MB/s aggregate over {summary['connections']} connections")
+    print(f"   {summary['skipped']} unchanged skipped ({summary['rehashed']} re-hashed after an mtime change)"
+          + (f", {summary['reuploaded_missing']} missing on the server re-uploaded" if summary["reuploaded_missing"] else ""))
+    if summary["failed"]:
+        print(f"❌ {summary['failed']} files failed")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Time full reruns of the Streamlit dashboard headlessly, without Snowflake.
+
+For each size, writes synthetic quotes in the HISTORICAL_QUOTES_TYPED layout
+(SYMBOL, QUOTE_DATE, CLOSE_LAST_USD, VOLUME, OPEN_USD, HIGH_USD, LOW_USD) and
+runs streamlit_app.py against them with the local DuckDB backend, using
+Streamlit's AppTest harness. Three runs are timed per size:
+
+    cold      - first run: DuckDB query, transfer and downcast, then every section
+    rerun     - the same inputs again, as on any widget interaction; data is cached
+    filter    - a different symbol selection, so per-filter work is redone
+
+The performance panel is switched on for the rerun and the filter run, and
+the slowest sections of each are reported. The run fails if the app raises
+an error or does not report the expected row count.
+
+A share of the quotes (--replayed) is written twice, as on the Kafka path
+when produce.py is run again over files it has already sent.
+
+Usage:
+    uv run --with streamlit --with altair --with duckdb --with pyarrow python benchmark_dashboard.py
+    uv run --with streamlit --with altair --with duckdb --with pyarrow python benchmark_dashboard.py --rows 10000 1000000
+"""
+
+import argparse
+import logging
+import math
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+# The app keeps use_container_width for older Streamlit-in-Snowflake runtimes; don't log its deprecation per chart
+logging.getLogger('streamlit.deprecation_util').disabled = True
+
+APP_PATH = Path(__file__).resolve().parent / 'streamlit_app.py'
+DEFAULT_ROWS = [10_000, 1_000_000, 10_000_000]
+TRADING_DAYS = 2520  # ten years of trading days per symbol
+
+
+def symbol_names(count: int):
+    """AAAA, AAAB, ... as many four-letter symbols as needed."""
+    return [''.join(chr(ord('A') + i // 26 ** k % 26) for k in (3, 2, 1, 0)) for i in range(count)]
+
+
+def synthetic_quotes(rows: int, seed: int = 42) -> pa.Table:
+    """`rows` quotes as per-symbol random walks over consecutive business days, newest dates last."""
+    days = min(rows, TRADING_DAYS)
+    symbols = math.ceil(rows / days)
+    rng = np.random.default_rng(seed)
+
+    dates = np.busday_offset('2015-01-02', np.arange(days), roll='forward')
+    log_returns = rng.normal(0.0003, 0.02, size=(symbols, days))
+    close = (rng.uniform(10, 500, size=(symbols, 1)) * np.exp(np.cumsum(log_returns, axis=1))).ravel()[:rows]
+    open_ = close * (1 + rng.normal(0, 0.005, size=rows))
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.01, size=rows)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.01, size=rows)))
+
+    symbol_index = np.repeat(np.arange(symbols, dtype=np.int32), days)[:rows]
+    return pa.table({
+        'SYMBOL': pa.DictionaryArray.from_arrays(symbol_index, symbol_names(symbols)),
+        'QUOTE_DATE': pa.array(np.tile(dates, symbols)[:rows].astype('datetime64[D]')),
+        'CLOSE_LAST_USD': np.round(close, 4),
+        'VOLUME': rng.integers(100_000, 50_000_000, size=rows),
+        'OPEN_USD': np.round(open_, 4),
+        'HIGH_USD': np.round(high, 4),
+        'LOW_USD': np.round(low, 4),
+    })
+
+
+def with_replays(table: pa.Table, fraction: float, seed: int = 7) -> pa.Table:
+    """Append a random `fraction` of the rows again, as a second produce.py run over the same files does."""
+    count = int(table.num_rows * fraction)
+    if not count:
+        return table
+    indices = np.random.default_rng(seed).choice(table.num_rows, size=count, replace=False)
+    return pa.concat_tables([table, table.take(np.sort(indices))])
+
+
+def write_quotes(table: pa.Table, workdir: Path, file_format: str) -> Path:
+    path = workdir / f"quotes_{table.num_rows}.{file_format}"
+    if file_format == 'parquet':
+        pq.write_table(table, path)
+    else:
+        pacsv.write_csv(table.cast(table.schema.set(0, pa.field('SYMBOL', pa.string()))), path)
+    return path
+
+
+def timed_run(app: AppTest, timeout: float) -> float:
+    start = time.perf_counter()
+    app.run(timeout=timeout)
+    return time.perf_counter() - start
+
+
+def widget(widgets, label: str):
+    return next(w for w in widgets if w.label == label)
+
+
+def perf_sections(app: AppTest):
+    """The per-section timings table of the performance panel, if it was rendered."""
+    for frame in app.dataframe:
+        if 'SECTION' in frame.value.columns:
+            return frame.value
+    return None
+
+
+def app_errors(app: AppTest):
+    return [str(e.value) for e in app.exception] + [str(e.value) for e in app.error]
+
+
+def describe_sections(sections, top: int) -> str:
+    if sections is None:
+        return 'no performance panel'
+    slowest = sections.nlargest(top, 'TOTAL_MS')
+    return ', '.join(f"{row.SECTION} {row.TOTAL_MS:.0f} ms" for row in slowest.itertuples())
+
+
+def benchmark(rows: int, args, workdir: Path) -> bool:
+    start = time.perf_counter()
+    table = with_replays(synthetic_quotes(rows), args.replayed)
+    total = table.num_rows
+    path = write_quotes(table, workdir, args.format)
+    del table
+    print(f"{rows:>12,} rows  (+{total - rows:,} replayed, {path.stat().st_size / 1024**2:.1f} MB {args.format}, "
+          f"written in {time.perf_counter() - start:.1f}s)")
+
+    # A new data file needs new caches: the app keys them by filters, not by source
+    st.cache_data.clear()
+    st.cache_resource.clear()
+    os.environ['DASHBOARD_BACKEND'] = 'local'
+    os.environ['DASHBOARD_DATA'] = str(path)
+
+    app = AppTest.from_file(str(APP_PATH), default_timeout=args.timeout)
+    timings = {'cold': timed_run(app, args.timeout)}
+    errors = app_errors(app)
+
+    sections = {}
+    if not errors:
+        widget(app.sidebar.checkbox, 'Performance instrumentation').check()
+        timings['rerun'] = timed_run(app, args.timeout)
+        sections['rerun'] = perf_sections(app)
+
+        symbols = widget(app.sidebar.multiselect, 'Select Stock Symbols')
+        symbols.set_value(symbols.options[-3:])
+        timings['filter'] = timed_run(app, args.timeout)
+        sections['filter'] = perf_sections(app)
+        errors = app_errors(app)
+
+    footer = ' '.join(md.value for md in app.markdown)
+    ok = not errors and f"**Total Records:** {total:,}" in footer
+    print('  ' + '  '.join(f"{name} {seconds:6.2f}s" for name, seconds in timings.items()) +
+          f"  {'OK' if ok else 'FAIL'}")
+    for name, table in sections.items():
+        over = int(table['OVER_BUDGET'].sum()) if table is not None else 0
+        print(f"    {name:<7} slowest: {describe_sections(table, args.top)}"
+              f"{f'  ({over} over budget)' if over else ''}")
+    for error in errors:
+        print(f"    error: {error}")
+    path.unlink()
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Time full reruns of the Streamlit dashboard on synthetic data')
+    parser.add_argument('--rows', type=int, nargs='+', default=DEFAULT_ROWS,
+                        help='Row counts to benchmark (default: 10000 1000000 10000000)')
+    parser.add_argument('--format', choices=['parquet', 'csv'], default='parquet',
+                        help='File format of the synthetic data (default: parquet)')
+    parser.add_argument('--timeout', type=float, default=600.0, help='Seconds allowed per script run (default: 600)')
+    parser.add_argument('--replayed', type=float, default=0.01,
+                        help='Share of quotes written twice, as from a repeated produce.py run (default: 0.01)')
+    parser.add_argument('--top', type=int, default=3, help='Slowest sections to list per run (default: 3)')
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix='dashboard_bench_'))
+    os.environ['DASHBOARD_PERF_LOG'] = str(workdir / 'dashboard_perf_log.csv')
+    try:
+        print(f"{APP_PATH.name} on the local DuckDB backend\n")
+        results = [benchmark(rows, args, workdir) for rows in args.rows]
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print("\nPASS" if all(results) else "\nFAIL")
+    if not all(results):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,26 @@
+-- Derived per-symbol analytics over HISTORICAL_QUOTES_TYPED, consumed by the Streamlit dashboard.
+-- Returns and ranges are computed once in Snowflake so the app only has to filter and
+-- renormalize cumulative return to the selected start date.
+--
+-- All derived columns are percentages:
+--   DAILY_RETURN      - close-to-close change from the previous trading day
+--   CUMULATIVE_RETURN - change in close since the symbol's first trading day
+--   DAILY_RANGE       - intraday high-low range relative to the open
+
+CREATE OR REPLACE DYNAMIC TABLE NASDAQ_DEMO.PUBLIC.HISTORICAL_QUOTES_ANALYTICS
+    TARGET_LAG = '1 hour'
+    WAREHOUSE = COMPUTE_WH
+    COMMENT = 'Daily return, cumulative return and intraday range per symbol and date.'
+AS
+    SELECT
+        SYMBOL,
+        QUOTE_DATE,
+        CLOSE_LAST_USD,
+        VOLUME,
+        OPEN_USD,
+        HIGH_USD,
+        LOW_USD,
+        (CLOSE_LAST_USD / LAG(CLOSE_LAST_USD) OVER (PARTITION BY SYMBOL ORDER BY QUOTE_DATE) - 1) * 100 AS DAILY_RETURN,
+        (CLOSE_LAST_USD / FIRST_VALUE(CLOSE_LAST_USD) OVER (PARTITION BY SYMBOL ORDER BY QUOTE_DATE) - 1) * 100 AS CUMULATIVE_RETURN,
+        (HIGH_USD - LOW_USD) / NULLIF(OPEN_USD, 0) * 100 AS DAILY_RANGE
+    FROM NASDAQ_DEMO.PUBLIC.HISTORICAL_QUOTES_TYPED;
@@ -9,6 +9,7 @@ DROP AGENT IF EXISTS NASDAQ_AGENT;
 
 -- Phase 3: Streamlit Dashboard
 DROP STREAMLIT IF EXISTS NASDAQ_FINANCIAL_DASHBOARD;
+DROP TABLE IF EXISTS DASHBOARD_PERF_LOG;
 
 -- Phase 4: Cortex AI
 DROP CORTEX SEARCH SERVICE IF EXISTS EARNINGS_REPORTS_SEARCH;
@@ -19,5 +20,7 @@ REMOVE @EARNINGS_REPORTS_STAGE;
 DROP STAGE IF EXISTS EARNINGS_REPORTS_STAGE;
 
 -- Phase 2/3: Structured Data + Typed View
+DROP DYNAMIC TABLE IF EXISTS HISTORICAL_QUOTES_ANALYTICS;
 DROP VIEW IF EXISTS HISTORICAL_QUOTES_TYPED;
 TRUNCATE TABLE IF EXISTS HISTORICAL_STOCK_QUOTES;
+TRUNCATE TABLE IF EXISTS HISTORICAL_STOCK_QUOTES_V2;
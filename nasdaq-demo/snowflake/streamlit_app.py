@@ -2,13 +2,32 @@
 Stock Quote History Visualization
 A Streamlit application for visualizing historical stock data from Snowflake.
 Inspired by the Streamlit stockpeers demo.
+
+Runs against Snowflake through the active Snowpark session by default. Set
+DASHBOARD_BACKEND=local and DASHBOARD_DATA to Parquet or CSV files in the
+HISTORICAL_QUOTES_TYPED layout to run it locally on DuckDB instead:
+
+    DASHBOARD_BACKEND=local DASHBOARD_DATA=quotes.parquet streamlit run streamlit_app.py
 """
 
+import functools
+import glob
+import gzip
+import io
+import math
+import os
+import time
+import tracemalloc
+import uuid
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
 import streamlit as st
+import numpy as np
 import pandas as pd
 import altair as alt
 from datetime import datetime, timedelta
-from snowflake.snowpark.context import get_active_session
+from pandas.api.types import union_categoricals
 
 # Page configuration
 st.set_page_config(
@@ -32,39 +51,508 @@ st.markdown("""
     """, unsafe_allow_html=True)
 
 
-session = get_active_session()
+PERF_LOG_TABLE = "DASHBOARD_PERF_LOG"
+PERF_LOG_COLUMNS = ['RUN_ID', 'SECTION', 'METRIC', 'VALUE']
+
+ANALYTICS_QUERY = """
+SELECT 
+    SYMBOL,
+    QUOTE_DATE::TIMESTAMP_NTZ AS QUOTE_DATE,
+    CLOSE_LAST_USD,
+    VOLUME,
+    OPEN_USD,
+    HIGH_USD,
+    LOW_USD,
+    DAILY_RETURN,
+    CUMULATIVE_RETURN,
+    DAILY_RANGE
+FROM HISTORICAL_QUOTES_ANALYTICS
+ORDER BY QUOTE_DATE DESC
+"""
+
+# The derived columns of snowflake/models/historical_quotes_analytics.sql, computed on the fly
+LOCAL_ANALYTICS_QUERY = """
+SELECT
+    SYMBOL,
+    QUOTE_DATE::TIMESTAMP AS QUOTE_DATE,
+    CLOSE_LAST_USD,
+    VOLUME,
+    OPEN_USD,
+    HIGH_USD,
+    LOW_USD,
+    (CLOSE_LAST_USD / LAG(CLOSE_LAST_USD) OVER w - 1) * 100 AS DAILY_RETURN,
+    (CLOSE_LAST_USD / FIRST_VALUE(CLOSE_LAST_USD) OVER w - 1) * 100 AS CUMULATIVE_RETURN,
+    (HIGH_USD - LOW_USD) / NULLIF(OPEN_USD, 0) * 100 AS DAILY_RANGE
+FROM {source}
+WINDOW w AS (PARTITION BY SYMBOL ORDER BY QUOTE_DATE)
+ORDER BY QUOTE_DATE DESC
+"""
+
+LOCAL_BATCH_ROWS = 1_000_000
+
+
+class SnowparkBackend:
+    """The HISTORICAL_QUOTES_ANALYTICS dynamic table, read through the app's active Snowpark session."""
+
+    label = 'Snowflake'
+    source = 'the HISTORICAL_QUOTES_ANALYTICS table'
+    help = "Make sure you're running this app in Snowflake with access to the HISTORICAL_QUOTES_ANALYTICS dynamic table."
+    perf_log = PERF_LOG_TABLE
+
+    def __init__(self, data_path=None):
+        from snowflake.snowpark.context import get_active_session
+        self.session = get_active_session()
+
+    def fetch_batches(self):
+        """Pandas batches of the analytics query; the query runs when the first batch is requested."""
+        return self.session.sql(ANALYTICS_QUERY).to_pandas_batches()
+
+    def log_perf_rows(self, rows):
+        from snowflake.snowpark.functions import current_timestamp
+        log_df = self.session.create_dataframe(rows, schema=PERF_LOG_COLUMNS)
+        log_df.with_column('LOGGED_AT', current_timestamp()).write.mode('append').save_as_table(PERF_LOG_TABLE)
+
+
+class LocalBackend:
+    """
+    Parquet or CSV files in the HISTORICAL_QUOTES_TYPED layout, queried with
+    DuckDB. The analytics columns are derived the same way as the dynamic table.
+    Timings are appended to a CSV file (DASHBOARD_PERF_LOG).
+    """
+
+    label = 'local files'
+
+    def __init__(self, data_path=None):
+        if not data_path:
+            raise ValueError("Set DASHBOARD_DATA to a Parquet or CSV file, directory or glob to use the local backend")
+        self.source = data_path
+        self.help = f"Make sure {data_path} holds Parquet or CSV files with the HISTORICAL_QUOTES_TYPED columns."
+        self.perf_log = os.environ.get('DASHBOARD_PERF_LOG', 'dashboard_perf_log.csv')
+        self.query = LOCAL_ANALYTICS_QUERY.format(source=self.table_function(data_path))
+
+    @staticmethod
+    def table_function(path):
+        """DuckDB table function for a file, a glob, or a directory of .parquet (else .csv) files."""
+        if os.path.isdir(path):
+            parquet = os.path.join(path, '*.parquet')
+            path = parquet if glob.glob(parquet) else os.path.join(path, '*.csv')
+        reader = 'read_parquet' if path.endswith('.parquet') else 'read_csv'
+        escaped = path.replace("'", "''")
+        return f"{reader}('{escaped}')"
+
+    def fetch_batches(self):
+        """Pandas batches of the analytics query, streamed from DuckDB as Arrow record batches."""
+        import duckdb
+        # One in-memory connection per load, so concurrent sessions never share a cursor
+        with duckdb.connect() as con:
+            for batch in con.execute(self.query).to_arrow_reader(LOCAL_BATCH_ROWS):
+                yield batch.to_pandas()
+
+    def log_perf_rows(self, rows):
+        log_df = pd.DataFrame(rows, columns=PERF_LOG_COLUMNS).assign(LOGGED_AT=pd.Timestamp.now())
+        log_df.to_csv(self.perf_log, mode='a', header=not os.path.exists(self.perf_log), index=False)
+
+
+BACKENDS = {
+    'snowpark': SnowparkBackend,
+    'local': LocalBackend,
+}
+
+
+@st.cache_resource
+def get_backend(name, data_path):
+    """The data backend selected by DASHBOARD_BACKEND (default: snowpark), created once per process."""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown DASHBOARD_BACKEND '{name}', expected one of: {', '.join(BACKENDS)}")
+    return BACKENDS[name](data_path)
+
+
+backend = get_backend(os.environ.get('DASHBOARD_BACKEND', 'snowpark'), os.environ.get('DASHBOARD_DATA'))
+
+# Per-section latency budgets in milliseconds, flagged in the performance panel
+SECTION_BUDGETS_MS = {
+    'Data Load': 3000,
+    'Filters': 250,
+    'Key Metrics': 250,
+    'Price Range': 500,
+    'Volume': 500,
+    'Returns': 500,
+    'Price Comparison': 500,
+    'Technical Indicators': 750,
+    'Correlation': 1000,
+    'Raw Data': 500,
+}
 
-@st.cache_data(ttl=600)
+
+class PerfTracker:
+    """
+    Wall-clock timings per dashboard section and stage for one script run,
+    plus call/miss counts for cached functions (hits = calls - misses).
+    """
+
+    def __init__(self):
+        self.run_id = str(uuid.uuid4())
+        self.timings = defaultdict(float)
+        self.cache_calls = Counter()
+        self.cache_misses = Counter()
+        self._section = None
+
+    @contextmanager
+    def section(self, name):
+        """Time a dashboard section; nested stages are attributed to it."""
+        previous, self._section = self._section, name
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[(name, 'total')] += time.perf_counter() - started
+            self._section = previous
+
+    @contextmanager
+    def stage(self, name):
+        """Time a stage (e.g. render) within the current section."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[(self._section, name)] += time.perf_counter() - started
+
+    def record(self, section, stage, seconds):
+        self.timings[(section, stage)] += seconds
+
+    def summary(self):
+        """One row per section: total, render and remaining compute time in ms."""
+        rows = []
+        for section in dict.fromkeys(s for s, _ in self.timings):
+            stages = {stage: secs * 1000 for (s, stage), secs in self.timings.items() if s == section}
+            total = stages.pop('total', sum(stages.values()))
+            render = stages.pop('render', 0.0)
+            budget = SECTION_BUDGETS_MS.get(section)
+            rows.append({
+                'SECTION': section,
+                'TOTAL_MS': total,
+                'RENDER_MS': render,
+                'COMPUTE_MS': total - render,
+                **{f'{stage.upper()}_MS': ms for stage, ms in stages.items()},
+                'BUDGET_MS': budget,
+                'OVER_BUDGET': budget is not None and total > budget,
+            })
+        return pd.DataFrame(rows)
+
+    def cache_summary(self):
+        return pd.DataFrame([
+            {'FUNCTION': name, 'CALLS': calls, 'MISSES': self.cache_misses[name], 'HITS': calls - self.cache_misses[name]}
+            for name, calls in self.cache_calls.items()
+        ])
+
+
+perf = PerfTracker()
+
+
+def cached(func):
+    """st.cache_data(ttl=600) that also counts calls and misses in the run's PerfTracker."""
+    @functools.wraps(func)
+    def on_miss(*args, **kwargs):
+        perf.cache_misses[func.__name__] += 1
+        return func(*args, **kwargs)
+    
+    cached_func = st.cache_data(ttl=600)(on_miss)
+    
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        perf.cache_calls[func.__name__] += 1
+        return cached_func(*args, **kwargs)
+    
+    return wrapper
+
+
+def show_chart(chart):
+    """Render an Altair chart at full width, timed as the current section's render stage."""
+    with perf.stage('render'):
+        st.altair_chart(chart, use_container_width=True)
+
+
+def log_perf(perf, load_stats):
+    """Append this run's timings and cache counts to the backend's perf log for latency budgeting."""
+    rows = [
+        (perf.run_id, section, f'{stage}_ms', secs * 1000)
+        for (section, stage), secs in perf.timings.items()
+    ]
+    for name, calls in perf.cache_calls.items():
+        rows.append((perf.run_id, 'Cache', f'{name}_calls', float(calls)))
+        rows.append((perf.run_id, 'Cache', f'{name}_misses', float(perf.cache_misses[name])))
+    rows.append((perf.run_id, 'Data Load', 'peak_memory_mb', load_stats['peak_bytes'] / 1024**2))
+    
+    backend.log_perf_rows(rows)
+
+
+PRICE_COLUMNS = [
+    'CLOSE_LAST_USD', 'OPEN_USD', 'HIGH_USD', 'LOW_USD',
+    'DAILY_RETURN', 'CUMULATIVE_RETURN', 'DAILY_RANGE'
+]
+
+
+def compact_batch(batch):
+    """Downcast one fetched batch: prices to float32, volume to the smallest fitting integer."""
+    batch[PRICE_COLUMNS] = batch[PRICE_COLUMNS].astype(np.float32)
+    volume = batch['VOLUME']
+    if volume.empty or (volume.min() >= 0 and volume.max() <= np.iinfo(np.uint32).max):
+        batch['VOLUME'] = volume.astype(np.uint32)
+    else:
+        batch['VOLUME'] = volume.astype(np.int64)
+    batch['SYMBOL'] = batch['SYMBOL'].astype('category')
+    return batch
+
+
+@cached
 def load_data():
-    """Load stock quote data from Snowflake via Snowpark session."""
-    query = """
-    SELECT 
-        SYMBOL,
-        QUOTE_DATE,
-        CLOSE_LAST_USD,
-        VOLUME,
-        OPEN_USD,
-        HIGH_USD,
-        LOW_USD
-    FROM HISTORICAL_QUOTES_TYPED
-    ORDER BY QUOTE_DATE DESC
     """
+    Load stock quote data from the configured backend (Snowpark by default).
+    Streams Arrow-backed batches and downcasts each one as it arrives so the
+    full result never exists in 64-bit/object form. Returns the DataFrame and
+    a dict of load statistics (rows, final and peak memory in bytes, query
+    and transfer seconds).
+    """
+    tracemalloc.start()
+    try:
+        # The query runs when the first batch is requested; the rest is transfer + downcast
+        started = time.perf_counter()
+        batch_iter = iter(backend.fetch_batches())
+        first_batch = next(batch_iter, None)
+        query_seconds = time.perf_counter() - started
+        
+        batches = [] if first_batch is None else [compact_batch(first_batch)]
+        batches.extend(compact_batch(batch) for batch in batch_iter)
+        transfer_seconds = time.perf_counter() - started - query_seconds
+        
+        if batches:
+            # Align symbol categories across batches so concat keeps the categorical dtype
+            symbols = union_categoricals([b['SYMBOL'] for b in batches], sort_categories=True)
+            for batch in batches:
+                batch['SYMBOL'] = batch['SYMBOL'].cat.set_categories(symbols.categories)
+            df = pd.concat(batches, ignore_index=True)
+        else:
+            df = pd.DataFrame(columns=['SYMBOL', 'QUOTE_DATE', 'VOLUME'] + PRICE_COLUMNS)
+        del batches
+        
+        _, peak_bytes = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
     
-    df = session.sql(query).to_pandas()
-    df['QUOTE_DATE'] = pd.to_datetime(df['QUOTE_DATE'])
+    load_stats = {
+        'rows': len(df),
+        'memory_bytes': int(df.memory_usage(deep=True).sum()),
+        'peak_bytes': peak_bytes,
+        'query_seconds': query_seconds,
+        'transfer_seconds': transfer_seconds,
+    }
     
-    return df
+    return df, load_stats
+
+
+def calculate_returns(df):
+    """
+    Renormalize the precomputed cumulative returns to 0% at the first date in df.
+    DAILY_RETURN and CUMULATIVE_RETURN come from HISTORICAL_QUOTES_ANALYTICS.
+    """
+    returns_df = df.sort_values(['SYMBOL', 'QUOTE_DATE'])
+    growth = 1 + returns_df['CUMULATIVE_RETURN'] / 100
+    base = growth.groupby(returns_df['SYMBOL'], observed=True).transform('first')
+    returns_df['CUMULATIVE_RETURN'] = (growth / base - 1) * 100
+    return returns_df
+
+
+# Technical indicators. Each takes a date-indexed float64 close series and
+# returns a DataFrame of one or more indicator columns aligned to it.
+
+TRADING_DAYS_PER_YEAR = 252
+
+
+def simple_moving_average(close, window=50):
+    """Simple moving average over `window` trading days."""
+    return pd.DataFrame({f'SMA {window}': close.rolling(window).mean()})
+
+
+def exponential_moving_average(close, span=20):
+    """Exponential moving average with the given span."""
+    return pd.DataFrame({f'EMA {span}': close.ewm(span=span, adjust=False, min_periods=span).mean()})
 
 
+def bollinger_bands(close, window=20, num_std=2.0):
+    """Middle band (SMA) with upper/lower bands `num_std` rolling standard deviations away."""
+    rolling = close.rolling(window)
+    middle = rolling.mean()
+    width = rolling.std() * num_std
+    return pd.DataFrame({
+        'BB Middle': middle,
+        'BB Upper': middle + width,
+        'BB Lower': middle - width
+    })
 
 
-@st.cache_data
-def calculate_returns(df, symbol):
-    """Calculate daily returns and cumulative returns for a symbol."""
-    symbol_df = df[df['SYMBOL'] == symbol].sort_values('QUOTE_DATE')
-    symbol_df['DAILY_RETURN'] = symbol_df['CLOSE_LAST_USD'].pct_change() * 100
-    symbol_df['CUMULATIVE_RETURN'] = ((symbol_df['CLOSE_LAST_USD'] / symbol_df['CLOSE_LAST_USD'].iloc[0]) - 1) * 100
-    return symbol_df
+def rolling_volatility(close, window=21):
+    """Annualized rolling standard deviation of daily log returns, in percent."""
+    log_returns = np.log(close).diff()
+    volatility = log_returns.rolling(window).std() * np.sqrt(TRADING_DAYS_PER_YEAR) * 100
+    return pd.DataFrame({f'Volatility {window}d': volatility})
+
+
+def relative_strength_index(close, period=14):
+    """Wilder's RSI: ratio of smoothed average gains to losses, scaled 0-100."""
+    change = close.diff()
+    avg_gain = change.clip(lower=0).ewm(alpha=1 / period, adjust=False, min_periods=period).mean()
+    avg_loss = (-change.clip(upper=0)).ewm(alpha=1 / period, adjust=False, min_periods=period).mean()
+    rsi = 100 - 100 / (1 + avg_gain / avg_loss)
+    return pd.DataFrame({f'RSI {period}': rsi.where(avg_loss != 0, 100.0)})
+
+
+def drawdown(close):
+    """Percentage decline from the running peak close."""
+    return pd.DataFrame({'Drawdown': (close / close.cummax() - 1) * 100})
+
+
+INDICATORS = {
+    'SMA': simple_moving_average,
+    'EMA': exponential_moving_average,
+    'Bollinger Bands': bollinger_bands,
+    'Volatility': rolling_volatility,
+    'RSI': relative_strength_index,
+    'Drawdown': drawdown,
+}
+
+# Indicators measured from the start of the selected range rather than
+# warmed up on the symbol's full history.
+RANGE_RELATIVE_INDICATORS = {'Drawdown'}
+
+
+@cached
+def symbol_close_history(symbol):
+    """Full date-ordered close series for one symbol, as float64."""
+    df, _ = load_data()
+    symbol_df = df.loc[df['SYMBOL'] == symbol, ['QUOTE_DATE', 'CLOSE_LAST_USD']].sort_values('QUOTE_DATE')
+    return symbol_df.set_index('QUOTE_DATE')['CLOSE_LAST_USD'].astype(np.float64)
+
+
+@cached
+def compute_indicator(symbol, indicator, params, start_date, end_date):
+    """
+    Compute one indicator for one symbol over [start_date, end_date].
+    Cached per (symbol, indicator, params, range) so toggling one indicator
+    never recomputes the others. Rolling windows are warmed up on the full
+    history so values at the start of the range are not NaN.
+    """
+    close = symbol_close_history(symbol)
+    in_range = (close.index.date >= start_date) & (close.index.date <= end_date)
+    
+    if indicator in RANGE_RELATIVE_INDICATORS:
+        return INDICATORS[indicator](close[in_range], **dict(params))
+    return INDICATORS[indicator](close, **dict(params))[in_range]
+
+
+def indicator_long(frames):
+    """Stack date-indexed indicator frames into QUOTE_DATE/SERIES/VALUE rows for Altair."""
+    wide = pd.concat(frames, axis=1)
+    return wide.reset_index().melt('QUOTE_DATE', var_name='SERIES', value_name='VALUE').dropna()
+
+
+MIN_CORRELATION_PERIODS = 20
+MAX_HEATMAP_SYMBOLS = 60
+
+
+def pairwise_correlation(returns, min_periods=MIN_CORRELATION_PERIODS):
+    """
+    Pearson correlation between every pair of columns in a date x symbol matrix.
+    Missing values are handled pairwise (as in DataFrame.corr), but all pairs are
+    computed together with a handful of matrix products instead of a per-pair loop.
+    """
+    values = returns.to_numpy(dtype=np.float64)
+    observed = ~np.isnan(values)
+    x = np.where(observed, values, 0.0)
+    m = observed.astype(np.float64)
+    
+    n = m.T @ m                 # overlapping observations per pair
+    sum_x = x.T @ m             # sum of column i where column j is also observed
+    sum_xx = (x * x).T @ m
+    sum_xy = x.T @ x
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cov = sum_xy - sum_x * sum_x.T / n
+        var_x = sum_xx - sum_x ** 2 / n
+        corr = cov / np.sqrt(var_x * var_x.T)
+    
+    corr[n < min_periods] = np.nan
+    np.fill_diagonal(corr, np.where(np.diag(n) >= min_periods, 1.0, np.nan))
+    return pd.DataFrame(np.clip(corr, -1.0, 1.0), index=returns.columns, columns=returns.columns)
+
+
+@cached
+def daily_return_matrix(symbols, start_date, end_date):
+    """Pivot DAILY_RETURN into a date x symbol matrix for the given symbols and range."""
+    df, _ = load_data()
+    mask = (
+        df['SYMBOL'].isin(symbols) &
+        (df['QUOTE_DATE'].dt.date >= start_date) &
+        (df['QUOTE_DATE'].dt.date <= end_date)
+    )
+    # Re-running produce.py appends the same quotes again, so a (date, symbol) pair can repeat
+    rows = df.loc[mask].drop_duplicates(['QUOTE_DATE', 'SYMBOL'], keep='last')
+    matrix = rows.pivot(index='QUOTE_DATE', columns='SYMBOL', values='DAILY_RETURN')
+    matrix.columns = matrix.columns.astype(str)
+    return matrix.sort_index().astype(np.float64)
+
+
+@cached
+def correlation_matrix(symbols, start_date, end_date):
+    """Correlation of daily returns, cached per (sorted symbol set, date range)."""
+    return pairwise_correlation(daily_return_matrix(symbols, start_date, end_date))
+
+
+@cached
+def rolling_correlation(symbols, reference, window, start_date, end_date):
+    """Rolling correlation of every symbol's daily returns against a reference symbol."""
+    matrix = daily_return_matrix(symbols, start_date, end_date)
+    rolling = matrix.drop(columns=reference).rolling(window, min_periods=window // 2)
+    return rolling.corr(matrix[reference])
+
+
+def top_correlated_pairs(corr, n=10):
+    """Most and least correlated distinct pairs from a correlation matrix."""
+    upper = np.triu_indices(len(corr), k=1)
+    pairs = pd.DataFrame({
+        'SYMBOL_A': corr.index[upper[0]],
+        'SYMBOL_B': corr.columns[upper[1]],
+        'CORRELATION': corr.to_numpy()[upper]
+    }).dropna()
+    return pairs.nlargest(n, 'CORRELATION'), pairs.nsmallest(n, 'CORRELATION')
+
+
+RAW_DATA_FORMAT = {
+    'CLOSE_LAST_USD': '${:.2f}',
+    'OPEN_USD': '${:.2f}',
+    'HIGH_USD': '${:.2f}',
+    'LOW_USD': '${:.2f}',
+    'VOLUME': '{:,.0f}',
+    'QUOTE_DATE': lambda x: x.strftime('%Y-%m-%d')
+}
+
+CSV_CHUNK_ROWS = 50_000
+
+
+def build_csv_export(df, compress=False):
+    """
+    Write df to CSV bytes in row chunks, optionally gzip-compressed.
+    Chunking keeps the intermediate text for any one write small.
+    """
+    buffer = io.BytesIO()
+    sink = gzip.GzipFile(fileobj=buffer, mode='wb') if compress else buffer
+    
+    for offset in range(0, max(len(df), 1), CSV_CHUNK_ROWS):
+        chunk = df.iloc[offset:offset + CSV_CHUNK_ROWS]
+        sink.write(chunk.to_csv(index=False, header=(offset == 0)).encode('utf-8'))
+    
+    if compress:
+        sink.close()
+    return buffer.getvalue()
 
 
 def format_large_number(num):
@@ -85,266 +573,465 @@ st.markdown("Explore and compare historical stock performance")
 
 # Load data
 try:
-    with st.spinner("Loading data from Snowflake..."):
-        df = load_data()
+    with perf.section('Data Load'):
+        with st.spinner(f"Loading data from {backend.label}..."):
+            df, load_stats = load_data()
+        if perf.cache_misses['load_data']:
+            perf.record('Data Load', 'query', load_stats['query_seconds'])
+            perf.record('Data Load', 'transfer', load_stats['transfer_seconds'])
     
     if df.empty:
-        st.warning("No data available in the HISTORICAL_QUOTES_TYPED table.")
+        st.warning(f"No data available in {backend.source}.")
         st.stop()
     
     # Sidebar filters
-    st.sidebar.header("Filters")
-    
-    # Get available symbols
-    available_symbols = sorted(df['SYMBOL'].unique())
-    
-    # Symbol selection
-    selected_symbols = st.sidebar.multiselect(
-        "Select Stock Symbols",
-        options=available_symbols,
-        default=available_symbols[:min(3, len(available_symbols))],
-        help="Choose one or more stock symbols to visualize"
-    )
-    
-    if not selected_symbols:
-        st.warning("Please select at least one stock symbol from the sidebar.")
-        st.stop()
-    
-    # Date range selection
-    min_date = df['QUOTE_DATE'].min().date()
-    max_date = df['QUOTE_DATE'].max().date()
-    
-    default_start = max(min_date, max_date - timedelta(days=365))
-    
-    date_range = st.sidebar.date_input(
-        "Date Range",
-        value=(default_start, max_date),
-        min_value=min_date,
-        max_value=max_date,
-        help="Select the date range for analysis"
-    )
-    
-    if len(date_range) == 2:
-        start_date, end_date = date_range
-    else:
-        start_date = end_date = date_range[0]
-    
-    # Filter data
-    filtered_df = df[
-        (df['SYMBOL'].isin(selected_symbols)) &
-        (df['QUOTE_DATE'].dt.date >= start_date) &
-        (df['QUOTE_DATE'].dt.date <= end_date)
-    ].copy()
-    
-    if filtered_df.empty:
-        st.warning("No data available for the selected filters.")
-        st.stop()
-    
-    # Metrics comparison
-    st.header("Key Metrics")
-    st.markdown("Current price and performance metrics for each selected stock symbol in the chosen date range.")
-    
-    cols = st.columns(len(selected_symbols))
-    for idx, symbol in enumerate(selected_symbols):
-        symbol_df = filtered_df[filtered_df['SYMBOL'] == symbol].sort_values('QUOTE_DATE')
+    with perf.section('Filters'):
+        st.sidebar.header("Filters")
         
-        if not symbol_df.empty:
-            latest_price = symbol_df['CLOSE_LAST_USD'].iloc[-1]
-            first_price = symbol_df['CLOSE_LAST_USD'].iloc[0]
-            price_change = latest_price - first_price
-            price_change_pct = (price_change / first_price) * 100
-            avg_volume = symbol_df['VOLUME'].mean()
-            
-            with cols[idx]:
-                st.metric(
-                    label=f"{symbol}",
-                    value=f"${latest_price:.2f}",
-                    delta=f"{price_change_pct:+.2f}%"
-                )
-                st.caption(f"Avg Volume: {format_large_number(avg_volume)}")
-    
-    # Price range analysis (candlestick-style view)
-    st.header("Price Range Analysis")
-    st.markdown("Examine intraday price movements between opening, high, low, and closing prices. For single stocks, see candlestick-style visualization; for multiple stocks, compare daily volatility patterns.")
-    
-    # For single symbol, show detailed candlestick-style chart
-    if len(selected_symbols) == 1:
-        symbol = selected_symbols[0]
-        symbol_df = filtered_df[filtered_df['SYMBOL'] == symbol].copy()
+        # Get available symbols
+        available_symbols = sorted(df['SYMBOL'].unique())
         
-        # Calculate color based on open vs close
-        symbol_df['COLOR'] = symbol_df.apply(
-            lambda row: 'green' if row['CLOSE_LAST_USD'] >= row['OPEN_USD'] else 'red',
-            axis=1
+        # Symbol selection
+        selected_symbols = st.sidebar.multiselect(
+            "Select Stock Symbols",
+            options=available_symbols,
+            default=available_symbols[:min(3, len(available_symbols))],
+            help="Choose one or more stock symbols to visualize"
         )
         
-        # High-low range
-        range_chart = alt.Chart(symbol_df).mark_rule().encode(
-            x=alt.X('QUOTE_DATE:T', title='Date', axis=alt.Axis(format='%b %Y')),
-            y=alt.Y('LOW_USD:Q', title='Price (USD)', scale=alt.Scale(zero=False)),
-            y2='HIGH_USD:Q',
-            color=alt.Color('COLOR:N', scale=None, legend=None),
-            tooltip=[
-                alt.Tooltip('QUOTE_DATE:T', title='Date', format='%b %d, %Y'),
-                alt.Tooltip('OPEN_USD:Q', title='Open', format='$.2f'),
-                alt.Tooltip('HIGH_USD:Q', title='High', format='$.2f'),
-                alt.Tooltip('LOW_USD:Q', title='Low', format='$.2f'),
-                alt.Tooltip('CLOSE_LAST_USD:Q', title='Close', format='$.2f')
-            ]
-        ).properties(
-            height=400
-        )
+        if not selected_symbols:
+            st.warning("Please select at least one stock symbol from the sidebar.")
+            st.stop()
+        
+        # Date range selection
+        min_date = df['QUOTE_DATE'].min().date()
+        max_date = df['QUOTE_DATE'].max().date()
+        
+        default_start = max(min_date, max_date - timedelta(days=365))
         
-        # Open-close bars
-        bar_chart = alt.Chart(symbol_df).mark_bar(size=10).encode(
-            x=alt.X('QUOTE_DATE:T'),
-            y=alt.Y('OPEN_USD:Q'),
-            y2='CLOSE_LAST_USD:Q',
-            color=alt.Color('COLOR:N', scale=None, legend=None)
+        date_range = st.sidebar.date_input(
+            "Date Range",
+            value=(default_start, max_date),
+            min_value=min_date,
+            max_value=max_date,
+            help="Select the date range for analysis"
         )
         
-        st.altair_chart((range_chart + bar_chart).interactive(), use_container_width=True)
-    else:
-        # For multiple symbols, show daily volatility comparison
-        volatility_df = filtered_df.copy()
-        volatility_df['DAILY_RANGE'] = ((volatility_df['HIGH_USD'] - volatility_df['LOW_USD']) / volatility_df['OPEN_USD'] * 100)
+        if len(date_range) == 2:
+            start_date, end_date = date_range
+        else:
+            start_date = end_date = date_range[0]
         
-        volatility_chart = alt.Chart(volatility_df).mark_line().encode(
-            x=alt.X('QUOTE_DATE:T', title='Date', axis=alt.Axis(format='%b %Y')),
-            y=alt.Y('DAILY_RANGE:Q', title='Daily Volatility (%)'),
-            color=alt.Color('SYMBOL:N', title='Symbol', legend=alt.Legend(orient='top')),
-            tooltip=[
-                alt.Tooltip('SYMBOL:N', title='Symbol'),
-                alt.Tooltip('QUOTE_DATE:T', title='Date', format='%b %d, %Y'),
-                alt.Tooltip('DAILY_RANGE:Q', title='Volatility', format='.2f')
-            ]
-        ).properties(
-            height=400
-        ).interactive()
+        # Opt-in performance instrumentation
+        st.sidebar.header("Diagnostics")
+        show_perf = st.sidebar.checkbox(
+            "Performance instrumentation",
+            value=False,
+            help="Show per-section timings and cache hits/misses for this rerun"
+        )
+        log_perf_enabled = st.sidebar.checkbox(
+            f"Log timings to {backend.perf_log}",
+            value=False,
+            disabled=not show_perf,
+            help="Append each rerun's timings to a table (Snowflake) or CSV file (local) for tracking latency budgets"
+        )
         
-        st.altair_chart(volatility_chart, use_container_width=True)
-    
-    # Volume analysis
-    st.header("Trading Volume Analysis")
-    st.markdown("Analyze trading activity and liquidity patterns. Higher volumes often indicate greater investor interest and can signal potential price movements.")
+        # Filter data
+        filtered_df = df[
+            (df['SYMBOL'].isin(selected_symbols)) &
+            (df['QUOTE_DATE'].dt.date >= start_date) &
+            (df['QUOTE_DATE'].dt.date <= end_date)
+        ].copy()
+        
+        if filtered_df.empty:
+            st.warning("No data available for the selected filters.")
+            st.stop()
     
-    col1, col2 = st.columns(2)
+    # Metrics comparison
+    with perf.section('Key Metrics'):
+        st.header("Key Metrics")
+        st.markdown("Current price and performance metrics for each selected stock symbol in the chosen date range.")
+        
+        cols = st.columns(len(selected_symbols))
+        for idx, symbol in enumerate(selected_symbols):
+            symbol_df = filtered_df[filtered_df['SYMBOL'] == symbol].sort_values('QUOTE_DATE')
+            
+            if not symbol_df.empty:
+                latest_price = symbol_df['CLOSE_LAST_USD'].iloc[-1]
+                first_price = symbol_df['CLOSE_LAST_USD'].iloc[0]
+                price_change = latest_price - first_price
+                price_change_pct = (price_change / first_price) * 100
+                avg_volume = symbol_df['VOLUME'].mean()
+                
+                with cols[idx]:
+                    st.metric(
+                        label=f"{symbol}",
+                        value=f"${latest_price:.2f}",
+                        delta=f"{price_change_pct:+.2f}%"
+                    )
+                    st.caption(f"Avg Volume: {format_large_number(avg_volume)}")
     
-    with col1:
-        st.subheader("Volume Over Time")
-        volume_chart = alt.Chart(filtered_df).mark_bar().encode(
-            x=alt.X('QUOTE_DATE:T', title='Date', axis=alt.Axis(format='%b %Y')),
-            y=alt.Y('VOLUME:Q', title='Volume'),
-            color=alt.Color('SYMBOL:N', title='Symbol'),
-            tooltip=[
-                alt.Tooltip('SYMBOL:N', title='Symbol'),
-                alt.Tooltip('QUOTE_DATE:T', title='Date', format='%b %d, %Y'),
-                alt.Tooltip('VOLUME:Q', title='Volume', format=',')
-            ]
-        ).properties(
-            height=300
-        ).interactive()
+    # Price range analysis (candlestick-style view)
+    with perf.section('Price Range'):
+        st.header("Price Range Analysis")
+        st.markdown("Examine intraday price movements between opening, high, low, and closing prices. For single stocks, see candlestick-style visualization; for multiple stocks, compare daily volatility patterns.")
         
-        st.altair_chart(volume_chart, use_container_width=True)
+        # For single symbol, show detailed candlestick-style chart
+        if len(selected_symbols) == 1:
+            symbol = selected_symbols[0]
+            symbol_df = filtered_df[filtered_df['SYMBOL'] == symbol].copy()
+            
+            # Calculate color based on open vs close
+            symbol_df['COLOR'] = symbol_df.apply(
+                lambda row: 'green' if row['CLOSE_LAST_USD'] >= row['OPEN_USD'] else 'red',
+                axis=1
+            )
+            
+            # High-low range
+            range_chart = alt.Chart(symbol_df).mark_rule().encode(
+                x=alt.X('QUOTE_DATE:T', title='Date', axis=alt.Axis(format='%b %Y')),
+                y=alt.Y('LOW_USD:Q', title='Price (USD)', scale=alt.Scale(zero=False)),
+                y2='HIGH_USD:Q',
+                color=alt.Color('COLOR:N', scale=None, legend=None),
+                tooltip=[
+                    alt.Tooltip('QUOTE_DATE:T', title='Date', format='%b %d, %Y'),
+                    alt.Tooltip('OPEN_USD:Q', title='Open', format='$.2f'),
+                    alt.Tooltip('HIGH_USD:Q', title='High', format='$.2f'),
+                    alt.Tooltip('LOW_USD:Q', title='Low', format='$.2f'),
+                    alt.Tooltip('CLOSE_LAST_USD:Q', title='Close', format='$.2f')
+                ]
+            ).properties(
+                height=400
+            )
+            
+            # Open-close bars
+            bar_chart = alt.Chart(symbol_df).mark_bar(size=10).encode(
+                x=alt.X('QUOTE_DATE:T'),
+                y=alt.Y('OPEN_USD:Q'),
+                y2='CLOSE_LAST_USD:Q',
+                color=alt.Color('COLOR:N', scale=None, legend=None)
+            )
+            
+            show_chart((range_chart + bar_chart).interactive())
+        else:
+            # For multiple symbols, show daily volatility comparison
+            volatility_chart = alt.Chart(filtered_df).mark_line().encode(
+                x=alt.X('QUOTE_DATE:T', title='Date', axis=alt.Axis(format='%b %Y')),
+                y=alt.Y('DAILY_RANGE:Q', title='Daily Volatility (%)'),
+                color=alt.Color('SYMBOL:N', title='Symbol', legend=alt.Legend(orient='top')),
+                tooltip=[
+                    alt.Tooltip('SYMBOL:N', title='Symbol'),
+                    alt.Tooltip('QUOTE_DATE:T', title='Date', format='%b %d, %Y'),
+                    alt.Tooltip('DAILY_RANGE:Q', title='Volatility', format='.2f')
+                ]
+            ).properties(
+                height=400
+            ).interactive()
+            
+            show_chart(volatility_chart)
     
-    with col2:
-        st.subheader("Average Volume by Symbol")
-        avg_volume_df = filtered_df.groupby('SYMBOL')['VOLUME'].mean().reset_index()
-        avg_volume_df.columns = ['SYMBOL', 'AVG_VOLUME']
+    # Volume analysis
+    with perf.section('Volume'):
+        st.header("Trading Volume Analysis")
+        st.markdown("Analyze trading activity and liquidity patterns. Higher volumes often indicate greater investor interest and can signal potential price movements.")
         
-        avg_volume_chart = alt.Chart(avg_volume_df).mark_bar().encode(
-            x=alt.X('SYMBOL:N', title='Symbol', sort='-y'),
-            y=alt.Y('AVG_VOLUME:Q', title='Average Volume'),
-            color=alt.Color('SYMBOL:N', legend=None),
-            tooltip=[
-                alt.Tooltip('SYMBOL:N', title='Symbol'),
-                alt.Tooltip('AVG_VOLUME:Q', title='Avg Volume', format=',')
-            ]
-        ).properties(
-            height=300
-        )
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.subheader("Volume Over Time")
+            volume_chart = alt.Chart(filtered_df).mark_bar().encode(
+                x=alt.X('QUOTE_DATE:T', title='Date', axis=alt.Axis(format='%b %Y')),
+                y=alt.Y('VOLUME:Q', title='Volume'),
+                color=alt.Color('SYMBOL:N', title='Symbol'),
+                tooltip=[
+                    alt.Tooltip('SYMBOL:N', title='Symbol'),
+                    alt.Tooltip('QUOTE_DATE:T', title='Date', format='%b %d, %Y'),
+                    alt.Tooltip('VOLUME:Q', title='Volume', format=',')
+                ]
+            ).properties(
+                height=300
+            ).interactive()
+            
+            show_chart(volume_chart)
         
-        st.altair_chart(avg_volume_chart, use_container_width=True)
+        with col2:
+            st.subheader("Average Volume by Symbol")
+            avg_volume_df = filtered_df.groupby('SYMBOL', observed=True)['VOLUME'].mean().reset_index()
+            avg_volume_df.columns = ['SYMBOL', 'AVG_VOLUME']
+            
+            avg_volume_chart = alt.Chart(avg_volume_df).mark_bar().encode(
+                x=alt.X('SYMBOL:N', title='Symbol', sort='-y'),
+                y=alt.Y('AVG_VOLUME:Q', title='Average Volume'),
+                color=alt.Color('SYMBOL:N', legend=None),
+                tooltip=[
+                    alt.Tooltip('SYMBOL:N', title='Symbol'),
+                    alt.Tooltip('AVG_VOLUME:Q', title='Avg Volume', format=',')
+                ]
+            ).properties(
+                height=300
+            )
+            
+            show_chart(avg_volume_chart)
     
     # Normalized returns comparison
-    st.header("Cumulative Returns Comparison")
-    st.markdown("Compare relative performance across stocks by normalizing returns to the same starting point. This helps identify which stocks have outperformed regardless of their absolute price levels.")
-    st.markdown("_Returns normalized to 0% at the start date_")
-    
-    # Calculate normalized returns for each symbol
-    returns_data = []
-    for symbol in selected_symbols:
-        symbol_returns = calculate_returns(filtered_df, symbol)
-        returns_data.append(symbol_returns)
+    with perf.section('Returns'):
+        st.header("Cumulative Returns Comparison")
+        st.markdown("Compare relative performance across stocks by normalizing returns to the same starting point. This helps identify which stocks have outperformed regardless of their absolute price levels.")
+        st.markdown("_Returns normalized to 0% at the start date_")
+        
+        # Rebase the precomputed cumulative returns to the selected start date
+        returns_df = calculate_returns(filtered_df)
+        
+        if not returns_df.empty:
+            returns_chart = alt.Chart(returns_df).mark_line(size=3).encode(
+                x=alt.X('QUOTE_DATE:T', title='Date', axis=alt.Axis(format='%b %Y')),
+                y=alt.Y('CUMULATIVE_RETURN:Q', title='Cumulative Return (%)', scale=alt.Scale(zero=False)),
+                color=alt.Color('SYMBOL:N', title='Symbol', legend=alt.Legend(orient='top')),
+                tooltip=[
+                    alt.Tooltip('SYMBOL:N', title='Symbol'),
+                    alt.Tooltip('QUOTE_DATE:T', title='Date', format='%b %d, %Y'),
+                    alt.Tooltip('CUMULATIVE_RETURN:Q', title='Return', format='.2f')
+                ]
+            ).properties(
+                height=400
+            ).interactive()
+            
+            # Add zero line
+            zero_line = alt.Chart(pd.DataFrame({'y': [0]})).mark_rule(
+                strokeDash=[5, 5],
+                color='gray'
+            ).encode(y='y:Q')
+            
+            show_chart(returns_chart + zero_line)
     
-    if returns_data:
-        returns_df = pd.concat(returns_data, ignore_index=True)
+    # Price comparison chart
+    with perf.section('Price Comparison'):
+        st.header("Price Comparison")
+        st.markdown("Track closing prices over time to compare absolute stock values and identify trends.")
         
-        returns_chart = alt.Chart(returns_df).mark_line(size=3).encode(
+        price_chart = alt.Chart(filtered_df).mark_line(point=True).encode(
             x=alt.X('QUOTE_DATE:T', title='Date', axis=alt.Axis(format='%b %Y')),
-            y=alt.Y('CUMULATIVE_RETURN:Q', title='Cumulative Return (%)', scale=alt.Scale(zero=False)),
+            y=alt.Y('CLOSE_LAST_USD:Q', title='Closing Price (USD)', scale=alt.Scale(zero=False)),
             color=alt.Color('SYMBOL:N', title='Symbol', legend=alt.Legend(orient='top')),
             tooltip=[
                 alt.Tooltip('SYMBOL:N', title='Symbol'),
                 alt.Tooltip('QUOTE_DATE:T', title='Date', format='%b %d, %Y'),
-                alt.Tooltip('CUMULATIVE_RETURN:Q', title='Return', format='.2f')
+                alt.Tooltip('CLOSE_LAST_USD:Q', title='Close', format='$.2f'),
+                alt.Tooltip('VOLUME:Q', title='Volume', format=',')
             ]
         ).properties(
             height=400
         ).interactive()
         
-        # Add zero line
-        zero_line = alt.Chart(pd.DataFrame({'y': [0]})).mark_rule(
-            strokeDash=[5, 5],
-            color='gray'
-        ).encode(y='y:Q')
-        
-        st.altair_chart(returns_chart + zero_line, use_container_width=True)
+        show_chart(price_chart)
     
-    # Price comparison chart
-    st.header("Price Comparison")
-    st.markdown("Track closing prices over time to compare absolute stock values and identify trends.")
-    
-    price_chart = alt.Chart(filtered_df).mark_line(point=True).encode(
-        x=alt.X('QUOTE_DATE:T', title='Date', axis=alt.Axis(format='%b %Y')),
-        y=alt.Y('CLOSE_LAST_USD:Q', title='Closing Price (USD)', scale=alt.Scale(zero=False)),
-        color=alt.Color('SYMBOL:N', title='Symbol', legend=alt.Legend(orient='top')),
-        tooltip=[
-            alt.Tooltip('SYMBOL:N', title='Symbol'),
-            alt.Tooltip('QUOTE_DATE:T', title='Date', format='%b %d, %Y'),
-            alt.Tooltip('CLOSE_LAST_USD:Q', title='Close', format='$.2f'),
-            alt.Tooltip('VOLUME:Q', title='Volume', format=',')
-        ]
-    ).properties(
-        height=400
-    ).interactive()
+    # Technical indicators
+    with perf.section('Technical Indicators'):
+        st.header("Technical Indicators")
+        st.markdown("Overlay moving averages and Bollinger bands on the closing price, and track momentum (RSI), rolling volatility, and drawdown from the running peak.")
+        
+        ind_col1, ind_col2 = st.columns([1, 3])
+        with ind_col1:
+            indicator_symbol = st.selectbox("Symbol", options=selected_symbols, key='indicator_symbol')
+        with ind_col2:
+            selected_indicators = st.multiselect(
+                "Indicators",
+                options=list(INDICATORS),
+                default=['SMA', 'Bollinger Bands', 'RSI'],
+                help="Each indicator is computed and cached independently"
+            )
+        
+        with st.expander("Indicator Parameters"):
+            p1, p2, p3, p4, p5 = st.columns(5)
+            indicator_params = {
+                'SMA': (('window', int(p1.number_input("SMA window", min_value=2, max_value=250, value=50))),),
+                'EMA': (('span', int(p2.number_input("EMA span", min_value=2, max_value=250, value=20))),),
+                'Bollinger Bands': (
+                    ('window', int(p3.number_input("Bollinger window", min_value=2, max_value=250, value=20))),
+                    ('num_std', float(p3.number_input("Bollinger std devs", min_value=0.5, max_value=4.0, value=2.0, step=0.5))),
+                ),
+                'Volatility': (('window', int(p4.number_input("Volatility window", min_value=2, max_value=250, value=21))),),
+                'RSI': (('period', int(p5.number_input("RSI period", min_value=2, max_value=100, value=14))),),
+                'Drawdown': (),
+            }
+        
+        indicator_frames = {
+            name: compute_indicator(indicator_symbol, name, indicator_params[name], start_date, end_date)
+            for name in selected_indicators
+        }
+        
+        overlay_names = [n for n in ('SMA', 'EMA', 'Bollinger Bands') if n in indicator_frames]
+        if overlay_names:
+            close = symbol_close_history(indicator_symbol)
+            close = close[(close.index.date >= start_date) & (close.index.date <= end_date)]
+            overlay_df = indicator_long([close.rename('Close').to_frame()] + [indicator_frames[n] for n in overlay_names])
+            
+            overlay_chart = alt.Chart(overlay_df).mark_line().encode(
+                x=alt.X('QUOTE_DATE:T', title='Date', axis=alt.Axis(format='%b %Y')),
+                y=alt.Y('VALUE:Q', title='Price (USD)', scale=alt.Scale(zero=False)),
+                color=alt.Color('SERIES:N', title='Series', legend=alt.Legend(orient='top')),
+                strokeDash=alt.condition(
+                    alt.FieldOneOfPredicate(field='SERIES', oneOf=['BB Upper', 'BB Lower']),
+                    alt.value([4, 4]),
+                    alt.value([1, 0])
+                ),
+                tooltip=[
+                    alt.Tooltip('SERIES:N', title='Series'),
+                    alt.Tooltip('QUOTE_DATE:T', title='Date', format='%b %d, %Y'),
+                    alt.Tooltip('VALUE:Q', title='Value', format='$.2f')
+                ]
+            ).properties(
+                height=400,
+                title=f"{indicator_symbol} Price Overlays"
+            ).interactive()
+            
+            show_chart(overlay_chart)
+        
+        oscillator_names = [n for n in ('RSI', 'Volatility', 'Drawdown') if n in indicator_frames]
+        if oscillator_names:
+            oscillator_cols = st.columns(len(oscillator_names))
+            for col, name in zip(oscillator_cols, oscillator_names):
+                with col:
+                    st.subheader(name)
+                    osc_df = indicator_long([indicator_frames[name]])
+                    osc_chart = alt.Chart(osc_df).mark_line().encode(
+                        x=alt.X('QUOTE_DATE:T', title='Date', axis=alt.Axis(format='%b %Y')),
+                        y=alt.Y('VALUE:Q', title=f"{name} (%)" if name != 'RSI' else name),
+                        color=alt.Color('SERIES:N', legend=None),
+                        tooltip=[
+                            alt.Tooltip('QUOTE_DATE:T', title='Date', format='%b %d, %Y'),
+                            alt.Tooltip('VALUE:Q', title=name, format='.2f')
+                        ]
+                    ).properties(
+                        height=250
+                    )
+                    
+                    if name == 'RSI':
+                        # Conventional overbought/oversold thresholds
+                        thresholds = alt.Chart(pd.DataFrame({'y': [30, 70]})).mark_rule(
+                            strokeDash=[5, 5],
+                            color='gray'
+                        ).encode(y='y:Q')
+                        osc_chart = osc_chart + thresholds
+                    
+                    show_chart(osc_chart.interactive())
     
-    st.altair_chart(price_chart, use_container_width=True)
+    # Cross-symbol correlation
+    with perf.section('Correlation'):
+        st.header("Return Correlation")
+        st.markdown("Compare how daily returns move together across symbols. Values near 1 move in lockstep, near 0 are unrelated, and negative values tend to move in opposite directions.")
+        
+        corr_col1, corr_col2, corr_col3 = st.columns([2, 1, 1])
+        with corr_col1:
+            corr_universe = st.radio(
+                "Symbols",
+                options=["Selected symbols", "All symbols"],
+                horizontal=True,
+                help="All symbols correlates every symbol in the table over the chosen date range"
+            )
+        with corr_col2:
+            show_rolling = st.checkbox("Rolling correlation", value=False)
+        with corr_col3:
+            rolling_window = st.number_input("Window (days)", min_value=10, max_value=252, value=63, disabled=not show_rolling)
+        
+        corr_symbols = tuple(sorted(available_symbols if corr_universe == "All symbols" else selected_symbols))
+        
+        if len(corr_symbols) < 2:
+            st.info("Select at least two symbols to compare correlations.")
+        else:
+            corr = correlation_matrix(corr_symbols, start_date, end_date)
+            
+            if len(corr_symbols) <= MAX_HEATMAP_SYMBOLS:
+                corr_long = corr.rename_axis('SYMBOL_A').reset_index().melt('SYMBOL_A', var_name='SYMBOL_B', value_name='CORRELATION')
+                heatmap = alt.Chart(corr_long).mark_rect().encode(
+                    x=alt.X('SYMBOL_A:N', title=None, sort=list(corr_symbols)),
+                    y=alt.Y('SYMBOL_B:N', title=None, sort=list(corr_symbols)),
+                    color=alt.Color('CORRELATION:Q', title='Correlation', scale=alt.Scale(scheme='redblue', domain=[-1, 1], reverse=True)),
+                    tooltip=[
+                        alt.Tooltip('SYMBOL_A:N', title='Symbol'),
+                        alt.Tooltip('SYMBOL_B:N', title='Symbol'),
+                        alt.Tooltip('CORRELATION:Q', title='Correlation', format='.2f')
+                    ]
+                ).properties(
+                    height=max(300, 18 * len(corr_symbols))
+                )
+                show_chart(heatmap)
+            else:
+                st.caption(f"Heatmap hidden for more than {MAX_HEATMAP_SYMBOLS} symbols; showing the strongest pairs instead.")
+            
+            most_correlated, least_correlated = top_correlated_pairs(corr)
+            pairs_col1, pairs_col2 = st.columns(2)
+            with pairs_col1:
+                st.subheader("Most Correlated Pairs")
+                st.dataframe(most_correlated.style.format({'CORRELATION': '{:.2f}'}), hide_index=True, use_container_width=True)
+            with pairs_col2:
+                st.subheader("Least Correlated Pairs")
+                st.dataframe(least_correlated.style.format({'CORRELATION': '{:.2f}'}), hide_index=True, use_container_width=True)
+            
+            if show_rolling:
+                reference_symbol = st.selectbox("Reference symbol", options=corr_symbols, key='corr_reference')
+                rolling_df = rolling_correlation(corr_symbols, reference_symbol, int(rolling_window), start_date, end_date)
+                # Plot against the symbols selected in the sidebar to keep the chart readable
+                plotted = [sym for sym in selected_symbols if sym in rolling_df.columns] or list(rolling_df.columns[:10])
+                rolling_long = rolling_df[plotted].reset_index().melt('QUOTE_DATE', var_name='SYMBOL', value_name='CORRELATION').dropna()
+                
+                rolling_chart = alt.Chart(rolling_long).mark_line().encode(
+                    x=alt.X('QUOTE_DATE:T', title='Date', axis=alt.Axis(format='%b %Y')),
+                    y=alt.Y('CORRELATION:Q', title=f"{int(rolling_window)}-day Correlation with {reference_symbol}", scale=alt.Scale(domain=[-1, 1])),
+                    color=alt.Color('SYMBOL:N', title='Symbol', legend=alt.Legend(orient='top')),
+                    tooltip=[
+                        alt.Tooltip('SYMBOL:N', title='Symbol'),
+                        alt.Tooltip('QUOTE_DATE:T', title='Date', format='%b %d, %Y'),
+                        alt.Tooltip('CORRELATION:Q', title='Correlation', format='.2f')
+                    ]
+                ).properties(
+                    height=300
+                ).interactive()
+                show_chart(rolling_chart)
     
     # Data table
-    with st.expander("View Raw Data"):
-        display_df = filtered_df.sort_values(['SYMBOL', 'QUOTE_DATE'], ascending=[True, False])
-        st.dataframe(
-            display_df.style.format({
-                'CLOSE_LAST_USD': '${:.2f}',
-                'OPEN_USD': '${:.2f}',
-                'HIGH_USD': '${:.2f}',
-                'LOW_USD': '${:.2f}',
-                'VOLUME': '{:,.0f}',
-                'QUOTE_DATE': lambda x: x.strftime('%Y-%m-%d')
-            }),
-            height=400,
-            use_container_width=True
-        )
-        
-        # Download button
-        csv = display_df.to_csv(index=False)
-        st.download_button(
-            label="Download Data as CSV",
-            data=csv,
-            file_name=f"stock_quotes_{start_date}_{end_date}.csv",
-            mime="text/csv"
-        )
+    with perf.section('Raw Data'):
+        with st.expander("View Raw Data"):
+            display_df = filtered_df.sort_values(['SYMBOL', 'QUOTE_DATE'], ascending=[True, False])
+            
+            page_col, size_col = st.columns([3, 1])
+            with size_col:
+                page_size = st.selectbox("Rows per page", options=[50, 100, 500, 1000], index=1)
+            num_pages = max(1, math.ceil(len(display_df) / page_size))
+            with page_col:
+                page = st.number_input(f"Page (of {num_pages})", min_value=1, max_value=num_pages, value=1, step=1)
+            
+            # Only the visible page is styled
+            page_df = display_df.iloc[(page - 1) * page_size:page * page_size]
+            with perf.stage('render'):
+                st.dataframe(
+                    page_df.style.format(RAW_DATA_FORMAT),
+                    height=400,
+                    use_container_width=True
+                )
+            st.caption(f"Showing rows {(page - 1) * page_size + 1:,}-{(page - 1) * page_size + len(page_df):,} of {len(display_df):,}")
+            
+            # Download: the CSV is only built on request and kept until the filters change
+            compress = st.checkbox("Compress (gzip)", value=False)
+            export_key = (tuple(selected_symbols), start_date, end_date, compress)
+            export = st.session_state.get('csv_export')
+            if export is not None and export['key'] != export_key:
+                del st.session_state['csv_export']
+                export = None
+            
+            if export is None and st.button("Prepare CSV Download"):
+                with st.spinner("Building CSV..."):
+                    export = {'key': export_key, 'data': build_csv_export(display_df, compress)}
+                st.session_state['csv_export'] = export
+            
+            if export is not None:
+                file_name = f"stock_quotes_{start_date}_{end_date}.csv"
+                st.download_button(
+                    label="Download Data as CSV",
+                    data=export['data'],
+                    file_name=file_name + ('.gz' if compress else ''),
+                    mime="application/gzip" if compress else "text/csv"
+                )
     
     # Footer
     st.markdown("---")
@@ -353,22 +1040,59 @@ try:
         f"**Total Records:** {len(df):,} | "
         f"**Symbols:** {len(available_symbols)}"
     )
+    st.caption(
+        f"Loaded {load_stats['rows']:,} rows into {load_stats['memory_bytes'] / 1024**2:.1f} MB "
+        f"(peak {load_stats['peak_bytes'] / 1024**2:.1f} MB during load)"
+    )
+    
+    # Performance instrumentation panel
+    if show_perf:
+        with st.expander("Performance", expanded=True):
+            st.markdown("Wall-clock time per section for this rerun. _Render_ is time spent serializing charts and tables; _compute_ is everything else.")
+            
+            perf_summary = perf.summary()
+            st.dataframe(
+                perf_summary.style.format(precision=1, na_rep='-').apply(
+                    lambda row: ['background-color: #fde2e1' if row['OVER_BUDGET'] else '' for _ in row],
+                    axis=1
+                ),
+                hide_index=True,
+                use_container_width=True
+            )
+            
+            st.subheader("Cache Hits and Misses")
+            st.dataframe(perf.cache_summary(), hide_index=True, use_container_width=True)
+            
+            if perf.cache_misses['load_data']:
+                st.caption(
+                    f"Data load: query {load_stats['query_seconds'] * 1000:.0f} ms, "
+                    f"transfer {load_stats['transfer_seconds'] * 1000:.0f} ms"
+                )
+            else:
+                st.caption("Data load served from cache")
+            
+            if log_perf_enabled:
+                log_perf(perf, load_stats)
+                st.caption(f"Logged run {perf.run_id} to {backend.perf_log}")
 
 except Exception as e:
     st.error(f"An error occurred: {str(e)}")
-    st.info("Make sure you're running this app in Snowflake with access to the HISTORICAL_QUOTES_TYPED table.")
+    st.info(backend.help)
     
     # Show debug info
     with st.expander("Debug Information"):
         st.write("Error details:", e)
-        st.write("This app expects a table named HISTORICAL_QUOTES_TYPED with the following schema:")
+        st.write("This app expects a dynamic table named HISTORICAL_QUOTES_ANALYTICS with the following schema:")
         st.code("""
-        SYMBOL          VARCHAR(16777216)
-        QUOTE_DATE      DATE
-        CLOSE_LAST_USD  FLOAT
-        VOLUME          NUMBER(38,0)
-        OPEN_USD        FLOAT
-        HIGH_USD        FLOAT
-        LOW_USD         FLOAT
+        SYMBOL            VARCHAR(16777216)
+        QUOTE_DATE        DATE
+        CLOSE_LAST_USD    FLOAT
+        VOLUME            NUMBER(38,0)
+        OPEN_USD          FLOAT
+        HIGH_USD          FLOAT
+        LOW_USD           FLOAT
+        DAILY_RETURN      FLOAT
+        CUMULATIVE_RETURN FLOAT
+        DAILY_RANGE       FLOAT
         """)
 
@@ -238,6 +238,9 @@ WHERE GEO_NAME = 'Switzerland'
 ORDER BY YEAR DESC, SEX
 LIMIT 10;
 
+-- To compare every row with the Postgres source, not just a sample, run
+-- nasdaq-demo/postgres/diff_tables.py (see README.md, "Verifying the replica").
+
 
 -- =====================================================================
 -- STEP 6: Test live CDC
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""Request/reply round-trip latency benchmark for Amazon MQ ActiveMQ over STOMP.
+
+Usage:
+    python benchmark_activemq.py
+    python benchmark_activemq.py --sizes 256,4096 --delivery persistent --concurrency 1,16 --messages 5000
+    python benchmark_activemq.py --label mq.m5.large --csv results.csv
+
+A requester sends messages with a correlation-id and reply-to header over one
+connection. An echo responder on a second connection sends each body back to
+the reply queue. Latency is measured from send to the matching reply. With
+--one-way the requester subscribes to its own request queue instead, which
+measures send-to-receive without a responder.
+
+Each combination of --sizes, --delivery and --concurrency runs --warmup
+messages, then --messages measured ones. Concurrency is the number of
+requests kept in flight. Use --label and --csv to collect results from
+several broker instance types in one file.
+
+Environment variables required:
+    MQ_ENDPOINT - The STOMP endpoint (ssl://..., or tcp://... for a local broker)
+    MQ_USERNAME - The broker username
+    MQ_PASSWORD - The broker password
+"""
+
+import argparse
+import csv
+import itertools
+import os
+import sys
+import threading
+import time
+import uuid
+
+import stomp
+
+from send_message import percentile
+from test_activemq_connection import create_connection
+
+
+class EchoResponder(stomp.ConnectionListener):
+    """Sends every request body back to its reply-to destination."""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def on_message(self, frame):
+        reply_to = frame.headers.get("reply-to")
+        if reply_to:
+            self.conn.send(
+                body=frame.body,
+                destination=reply_to,
+                headers={
+                    "correlation-id": frame.headers.get("correlation-id", ""),
+                    "persistent": frame.headers.get("persistent", "false"),
+                },
+            )
+
+
+class Requester(stomp.ConnectionListener):
+    """Matches replies to outstanding requests and keeps at most `concurrency` in flight."""
+
+    def __init__(self):
+        self.in_flight = None
+        self.sent_at = {}
+        self.latencies = []
+        self.done = threading.Event()
+        self.expected = 0
+        self.errors = 0
+
+    def start_run(self, concurrency, expected):
+        self.in_flight = threading.BoundedSemaphore(concurrency)
+        self.sent_at.clear()
+        self.latencies = []
+        self.expected = expected
+        self.done.clear()
+
+    def on_message(self, frame):
+        received = time.perf_counter()
+        sent = self.sent_at.pop(frame.headers.get("correlation-id"), None)
+        if sent is None:
+            return
+        self.latencies.append(received - sent)
+        self.in_flight.release()
+        if len(self.latencies) >= self.expected:
+            self.done.set()
+
+    def on_error(self, frame):
+        self.errors += 1
+        print(f"❌ Error: {frame.headers.get('message', frame.body)}")
+
+
+def run_combination(conn, requester, request_queue, reply_queue, size, persistent, concurrency, count, timeout):
+    """Send count requests with concurrency in flight; return (latencies, elapsed, lost)."""
+    body = "x" * size
+    headers = {"persistent": "true" if persistent else "false", "reply-to": reply_queue}
+    requester.start_run(concurrency, count)
+
+    start = time.perf_counter()
+    for _ in range(count):
+        if not requester.in_flight.acquire(timeout=timeout):
+            break
+        correlation_id = uuid.uuid4().hex
+        requester.sent_at[correlation_id] = time.perf_counter()
+        conn.send(body=body, destination=request_queue, headers={**headers, "correlation-id": correlation_id})
+    requester.done.wait(timeout=timeout)
+    elapsed = time.perf_counter() - start
+
+    return requester.latencies, elapsed, count - len(requester.latencies)
+
+
+def parse_list(value, cast=str):
+    return [cast(item) for item in value.split(",") if item]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Request/reply latency benchmark for Amazon MQ ActiveMQ")
+    parser.add_argument("--sizes", default="128,1024,16384", help="Comma-separated message sizes in bytes (default: 128,1024,16384)")
+    parser.add_argument("--delivery", default="non-persistent,persistent",
+                        help="Comma-separated delivery modes: persistent, non-persistent (default: both)")
+    parser.add_argument("--concurrency", default="1,8", help="Comma-separated requests in flight (default: 1,8)")
+    parser.add_argument("--messages", type=int, default=1000, help="Measured messages per combination (default: 1000)")
+    parser.add_argument("--warmup", type=int, default=100, help="Unmeasured messages per combination (default: 100)")
+    parser.add_argument("--one-way", action="store_true", help="Measure send-to-receive on one queue without a responder")
+    parser.add_argument("--timeout", type=float, default=30, help="Seconds to wait for outstanding replies (default: 30)")
+    parser.add_argument("--label", default="", help="Label for this run in the CSV, e.g. the broker instance type")
+    parser.add_argument("--csv", help="Append results to this CSV file")
+    args = parser.parse_args()
+
+    args.sizes = parse_list(args.sizes, int)
+    args.delivery = parse_list(args.delivery)
+    args.concurrency = parse_list(args.concurrency, int)
+    unknown = set(args.delivery) - {"persistent", "non-persistent"}
+    if unknown:
+        parser.error(f"unknown delivery mode: {', '.join(sorted(unknown))}")
+    return args
+
+
+def main():
+    args = parse_args()
+
+    endpoint = os.environ.get("MQ_ENDPOINT", "")
+    username = os.environ.get("MQ_USERNAME", "")
+    password = os.environ.get("MQ_PASSWORD", "")
+
+    if not all([endpoint, username, password]):
+        print("Error: MQ_ENDPOINT, MQ_USERNAME, and MQ_PASSWORD must be set")
+        sys.exit(1)
+
+    run_id = uuid.uuid4().hex[:8]
+    request_queue = f"/queue/openflow-benchmark.request.{run_id}"
+    reply_queue = request_queue if args.one_way else f"/queue/openflow-benchmark.reply.{run_id}"
+
+    print("🚀 Amazon MQ request/reply benchmark")
+    print("=" * 50)
+    print(f"   Endpoint: {endpoint}")
+    print(f"   Mode: {'one-way send-to-receive' if args.one_way else 'request/reply via echo responder'}")
+    print(f"   Messages: {args.messages:,} per combination (+{args.warmup:,} warmup)")
+
+    conn = create_connection(endpoint)
+    requester = Requester()
+    conn.set_listener("requester", requester)
+    responder_conn = None
+
+    results = []
+    try:
+        conn.connect(username, password, wait=True)
+        conn.subscribe(destination=reply_queue, id="replies", ack="auto")
+
+        if not args.one_way:
+            responder_conn = create_connection(endpoint)
+            responder_conn.set_listener("responder", EchoResponder(responder_conn))
+            responder_conn.connect(username, password, wait=True)
+            responder_conn.subscribe(destination=request_queue, id="requests", ack="auto")
+
+        print()
+        print(f"   {'size':>7} {'delivery':>14} {'conc':>5} {'msgs/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} {'lost':>5}")
+        for size, delivery, concurrency in itertools.product(args.sizes, args.delivery, args.concurrency):
+            persistent = delivery == "persistent"
+            if args.warmup:
+                run_combination(conn, requester, request_queue, reply_queue, size, persistent,
+                                concurrency, args.warmup, args.timeout)
+            latencies, elapsed, lost = run_combination(conn, requester, request_queue, reply_queue, size,
+                                                       persistent, concurrency, args.messages, args.timeout)
+            ordered = sorted(latencies)
+            row = {
+                "label": args.label,
+                "mode": "one-way" if args.one_way else "request-reply",
+                "size": size,
+                "delivery": delivery,
+                "concurrency": concurrency,
+                "messages": len(ordered),
+                "msgs_per_sec": round(len(ordered) / elapsed, 1),
+                "p50_ms": round(percentile(ordered, 50) * 1000, 3) if ordered else None,
+                "p95_ms": round(percentile(ordered, 95) * 1000, 3) if ordered else None,
+                "p99_ms": round(percentile(ordered, 99) * 1000, 3) if ordered else None,
+                "max_ms": round(ordered[-1] * 1000, 3) if ordered else None,
+                "lost": lost,
+            }
+            results.append(row)
+            fmt = lambda v: "-" if v is None else f"{v:.2f}"
+            print(f"   {size:>7,} {delivery:>14} {concurrency:>5} {row['msgs_per_sec']:>9,.0f} "
+                  f"{fmt(row['p50_ms']):>8} {fmt(row['p95_ms']):>8} {fmt(row['p99_ms']):>8} {fmt(row['max_ms']):>8} {lost:>5}")
+
+    except stomp.exception.ConnectFailedException as e:
+        print(f"❌ Connection failed: {e}")
+        sys.exit(1)
+    except KeyboardInterrupt:
+        print("\nStopped.")
+    finally:
+        for c in (conn, responder_conn):
+            if c is not None and c.is_connected():
+                c.disconnect()
+
+    if args.csv and results:
+        write_header = not os.path.exists(args.csv)
+        with open(args.csv, "a", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(results[0]))
+            if write_header:
+                writer.writeheader()
+            writer.writerows(results)
+        print(f"\n✅ Appended {len(results)} rows to {args.csv}")
+
+    if any(row["lost"] for row in results) or requester.errors:
+        print("⚠️  Some requests got no reply within --timeout")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
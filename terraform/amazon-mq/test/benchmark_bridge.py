@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""Throughput and integrity benchmark for mq_kafka_bridge.py.
+
+Usage:
+    python benchmark_bridge.py
+    python benchmark_bridge.py --messages 50000 --size 1024 --max-in-flight 5000
+
+Sends --messages messages to a fresh queue, bridges them with the same
+connection, listener and producer settings as mq_kafka_bridge.py into a
+librdkafka mock cluster, so no Kafka cluster is needed, and reports forwarded
+msgs/s and bridge latency. Bodies are random bytes, plus fixed ones that are
+not valid UTF-8, contain NUL bytes, or are empty. The run fails unless every
+body Kafka acknowledges is byte-for-byte one that was sent, and every message
+is forwarded exactly once.
+
+Environment variables required:
+    MQ_ENDPOINT - The STOMP endpoint (ssl://..., or tcp://... for a local broker)
+    MQ_USERNAME - The broker username
+    MQ_PASSWORD - The broker password
+"""
+
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+
+import stomp
+from confluent_kafka import Producer
+
+from mq_kafka_bridge import BridgeStats, start_bridge
+from send_message import latency_summary
+from test_activemq_connection import create_connection
+
+# Payloads a text-decoding bridge would corrupt or truncate
+FIXED_BODIES = [
+    b"\xff\xfe\x00\x01binary",
+    b"\x00\x00\x00\x00",
+    b"\x80\x81\x82 invalid continuation bytes",
+    "café → UTF-8 text".encode(),
+    b"",
+]
+
+
+class RecordingProducer(Producer):
+    """A producer that records the value of every message Kafka acknowledges."""
+
+    def __init__(self, config):
+        super().__init__(config)
+        self.lock = threading.Lock()
+        self.delivered = Counter()
+
+    def produce(self, topic, value=None, on_delivery=None, **kwargs):
+        def recorded(err, msg):
+            if err is None:
+                with self.lock:
+                    self.delivered[msg.value() or b""] += 1
+            if on_delivery:
+                on_delivery(err, msg)
+
+        super().produce(topic, value=value, on_delivery=recorded, **kwargs)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark mq_kafka_bridge.py against a mock Kafka cluster")
+    parser.add_argument("--messages", type=int, default=10000, help="Random-body messages to send (default: 10000)")
+    parser.add_argument("--size", type=int, default=512, help="Random body size in bytes (default: 512)")
+    parser.add_argument("--max-in-flight", type=int, default=2000,
+                        help="Bridge --max-in-flight (default: 2000)")
+    parser.add_argument("--timeout", type=float, default=60, help="Seconds to wait for forwarding (default: 60)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    endpoint = os.environ.get("MQ_ENDPOINT", "")
+    username = os.environ.get("MQ_USERNAME", "")
+    password = os.environ.get("MQ_PASSWORD", "")
+
+    if not all([endpoint, username, password]):
+        print("Error: MQ_ENDPOINT, MQ_USERNAME, and MQ_PASSWORD must be set")
+        sys.exit(1)
+
+    rng = random.Random(42)
+    bodies = FIXED_BODIES + [rng.randbytes(args.size) for _ in range(args.messages)]
+    queue_name = f"/queue/openflow-bridge-benchmark.{uuid.uuid4().hex[:8]}"
+
+    print("🚀 ActiveMQ → Kafka bridge benchmark")
+    print("=" * 50)
+    print(f"   Endpoint: {endpoint}, Kafka: mock cluster")
+    print(f"   {len(bodies):,} messages ({len(FIXED_BODIES)} fixed binary/text bodies, "
+          f"{args.messages:,} random {args.size:,}-byte bodies)")
+
+    producer = RecordingProducer({
+        "test.mock.num.brokers": 1,
+        "client.id": "mq-kafka-bridge-benchmark",
+        "acks": "all",
+        "enable.idempotence": True,
+        "linger.ms": 20,
+        "compression.type": "lz4",
+        "log_level": 3,
+    })
+    stats = BridgeStats()
+    sender = create_connection(endpoint)
+    bridge_conn = None
+    try:
+        sender.connect(username, password, wait=True)
+        for body in bodies:
+            sender.send(destination=queue_name, body=body, headers={"content-type": "application/octet-stream"})
+
+        started = time.time()
+        bridge_conn, listener = start_bridge(endpoint, username, password, producer,
+                                             [(queue_name, "MQ_BRIDGE_BENCHMARK")], args.max_in_flight, stats)
+        while stats.forwarded + stats.failed < len(bodies) and time.time() - started < args.timeout:
+            producer.poll(0.1)
+        elapsed = time.time() - started
+        producer.flush(10)
+    except stomp.exception.ConnectFailedException as e:
+        print(f"❌ Connection failed: {e}")
+        sys.exit(1)
+    finally:
+        for conn in (sender, bridge_conn):
+            if conn is not None and conn.is_connected():
+                conn.disconnect()
+
+    bridge, _ = stats.take_latencies()
+    expected = Counter(bodies)
+    corrupted = sum((producer.delivered - expected).values())
+    missing = sum((expected - producer.delivered).values())
+
+    print()
+    print("📊 Results")
+    print("=" * 50)
+    print(f"   Forwarded {stats.forwarded:,} messages ({stats.bytes / (1024 * 1024):,.1f} MB) in {elapsed:.2f}s: "
+          f"{stats.forwarded / elapsed:,.0f} msgs/s")
+    print(f"   Bridge latency: {latency_summary(bridge)}")
+    print(f"   Failed deliveries: {stats.failed:,}, broker errors: {listener.errors:,}")
+    print(f"   Bodies changed in transit or duplicated: {corrupted:,}, missing: {missing:,}")
+
+    if corrupted or missing or stats.failed or listener.errors:
+        print("❌ FAIL")
+        sys.exit(1)
+    print("✅ PASS: every body reached Kafka unchanged")
+
+
+if __name__ == "__main__":
+    main()
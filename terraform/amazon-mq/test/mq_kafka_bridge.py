@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""Bridge Amazon MQ ActiveMQ queues to Kafka (e.g. the MSK cluster in terraform/msk).
+
+Usage:
+    python mq_kafka_bridge.py --route openflow-queue=OPENFLOW_EVENTS
+    python mq_kafka_bridge.py --route orders=ORDERS --route trades=TRADES --max-in-flight 5000
+
+Each --route subscribes to a STOMP queue with client-individual acks and
+produces every message to a Kafka topic. Producer batching and compression
+are tuned with --linger-ms, --batch-size and --compression. A message is
+acked on the MQ side only after Kafka confirms delivery. Failed deliveries
+are nacked so the broker redelivers them, which makes the bridge
+at-least-once. The number of unacknowledged messages per queue is bounded
+by --max-in-flight, which is sent to the broker as activemq.prefetchSize.
+Message bodies are forwarded byte for byte; they are never decoded as text.
+
+The bridge reports forwarded msgs/s, bridge latency (MQ receive to Kafka ack)
+and end-to-end latency (broker enqueue timestamp to Kafka ack).
+
+Environment variables required:
+    MQ_ENDPOINT - The STOMP endpoint (ssl://..., or tcp://... for a local broker)
+    MQ_USERNAME - The broker username
+    MQ_PASSWORD - The broker password
+    MSK_BOOTSTRAP_SERVERS - Kafka bootstrap servers
+    KAFKA_USERNAME / KAFKA_PASSWORD - SASL/SCRAM credentials
+    KAFKA_SECURITY_PROTOCOL - Defaults to SASL_SSL, set to PLAINTEXT for a local broker
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+import uuid
+
+import stomp
+from confluent_kafka import Producer
+
+from send_message import latency_summary
+from test_activemq_connection import create_connection
+
+
+def get_kafka_config():
+    """Kafka producer settings from the same environment variables as terraform/msk/test."""
+    security_protocol = os.environ.get("KAFKA_SECURITY_PROTOCOL", "SASL_SSL")
+    config = {
+        "bootstrap.servers": os.environ.get("MSK_BOOTSTRAP_SERVERS", ""),
+        "security.protocol": security_protocol,
+    }
+    if security_protocol.startswith("SASL"):
+        config.update({
+            "sasl.mechanisms": "SCRAM-SHA-512",
+            "sasl.username": os.environ.get("KAFKA_USERNAME", ""),
+            "sasl.password": os.environ.get("KAFKA_PASSWORD", ""),
+        })
+    return config
+
+
+class BridgeStats:
+    """Counters and latency samples shared by the STOMP and Kafka callbacks."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.received = 0
+        self.forwarded = 0
+        self.failed = 0
+        self.bytes = 0
+        self.bridge_latencies = []
+        self.end_to_end_latencies = []
+
+    def take_latencies(self):
+        with self.lock:
+            bridge, self.bridge_latencies = self.bridge_latencies, []
+            end_to_end, self.end_to_end_latencies = self.end_to_end_latencies, []
+        return bridge, end_to_end
+
+
+class BridgeListener(stomp.ConnectionListener):
+    """Produces each MQ message to Kafka and acks it from the delivery callback."""
+
+    def __init__(self, conn, producer, routes, stats):
+        self.conn = conn
+        self.producer = producer
+        self.routes = routes
+        self.stats = stats
+        self.errors = 0
+        self.stopping = threading.Event()
+        self.disconnected = threading.Event()
+
+    def on_message(self, frame):
+        if self.stopping.is_set():
+            # Left unacked, so the broker redelivers it to the next consumer
+            return
+        received_at = time.time()
+        subscription_id = frame.headers["subscription"]
+        topic = self.routes[subscription_id]
+        ack_id = frame.headers.get("ack", frame.headers["message-id"])
+        enqueued_ms = frame.headers.get("timestamp")
+        body = frame.body
+
+        def on_delivery(err, msg):
+            if err is not None:
+                self.conn.nack(ack_id, subscription_id)
+                with self.stats.lock:
+                    self.stats.failed += 1
+                return
+            self.conn.ack(ack_id, subscription_id)
+            delivered_at = time.time()
+            with self.stats.lock:
+                self.stats.forwarded += 1
+                self.stats.bytes += len(body)
+                self.stats.bridge_latencies.append(delivered_at - received_at)
+                if enqueued_ms:
+                    self.stats.end_to_end_latencies.append(delivered_at - int(enqueued_ms) / 1000)
+
+        headers = [("mq-message-id", frame.headers["message-id"]), ("mq-destination", frame.headers["destination"])]
+        while True:
+            try:
+                self.producer.produce(topic, value=body, headers=headers, on_delivery=on_delivery)
+                break
+            except BufferError:
+                # Local queue full: wait for deliveries to free space
+                self.producer.poll(0.05)
+        with self.stats.lock:
+            self.stats.received += 1
+
+    def on_error(self, frame):
+        self.errors += 1
+        print(f"❌ Error: {frame.headers.get('message') or frame.body.decode('utf-8', 'replace')}")
+
+    def on_disconnected(self):
+        self.disconnected.set()
+
+
+def start_bridge(endpoint, username, password, producer, route_list, max_in_flight, stats):
+    """Connect to the broker and subscribe to every (queue, topic) route; return (conn, listener)."""
+    routes = {}
+    # Bodies stay bytes: stomp.py would otherwise decode them as UTF-8 and mangle binary payloads
+    conn = create_connection(endpoint, auto_decode=False)
+    listener = BridgeListener(conn, producer, routes, stats)
+    conn.set_listener("bridge", listener)
+    conn.connect(username, password, wait=True)
+    for queue_name, topic in route_list:
+        subscription_id = str(uuid.uuid4())
+        routes[subscription_id] = topic
+        conn.subscribe(
+            destination=queue_name,
+            id=subscription_id,
+            ack="client-individual",
+            headers={"activemq.prefetchSize": str(max_in_flight)},
+        )
+    return conn, listener
+
+
+def parse_route(value):
+    queue_name, sep, topic = value.partition("=")
+    if not sep or not queue_name or not topic:
+        raise argparse.ArgumentTypeError(f"expected QUEUE=TOPIC, got '{value}'")
+    if not queue_name.startswith("/queue/"):
+        queue_name = f"/queue/{queue_name}"
+    return queue_name, topic
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Forward ActiveMQ queues to Kafka topics")
+    parser.add_argument("--route", type=parse_route, action="append", required=True, metavar="QUEUE=TOPIC",
+                        help="Forward messages from QUEUE to TOPIC (repeatable)")
+    parser.add_argument("--max-in-flight", type=int, default=2000,
+                        help="Unacknowledged MQ messages per queue, sent as activemq.prefetchSize (default: 2000)")
+    parser.add_argument("--linger-ms", type=int, default=20, help="Kafka producer linger.ms (default: 20)")
+    parser.add_argument("--batch-size", type=int, default=256 * 1024, help="Kafka producer batch.size in bytes (default: 262144)")
+    parser.add_argument("--compression", default="lz4", choices=["none", "gzip", "snappy", "lz4", "zstd"],
+                        help="Kafka compression.type (default: lz4)")
+    parser.add_argument("--report-interval", type=float, default=10, help="Seconds between progress lines (default: 10)")
+    parser.add_argument("--duration", type=float, help="Stop after this many seconds (default: run until Ctrl+C)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    endpoint = os.environ.get("MQ_ENDPOINT", "")
+    username = os.environ.get("MQ_USERNAME", "")
+    password = os.environ.get("MQ_PASSWORD", "")
+
+    if not all([endpoint, username, password]):
+        print("Error: MQ_ENDPOINT, MQ_USERNAME, and MQ_PASSWORD must be set")
+        sys.exit(1)
+
+    kafka_config = get_kafka_config()
+    if not kafka_config["bootstrap.servers"]:
+        print("Error: MSK_BOOTSTRAP_SERVERS must be set")
+        sys.exit(1)
+
+    producer = Producer({
+        **kafka_config,
+        "client.id": "mq-kafka-bridge",
+        "acks": "all",
+        "enable.idempotence": True,
+        "linger.ms": args.linger_ms,
+        "batch.size": args.batch_size,
+        "compression.type": args.compression,
+        # Every in-flight MQ message fits in the local queue, so produce() rarely blocks
+        "queue.buffering.max.messages": max(100000, args.max_in_flight * len(args.route) * 2),
+    })
+
+    stats = BridgeStats()
+
+    print("🚀 Starting ActiveMQ → Kafka bridge")
+    print("=" * 50)
+    print(f"   MQ Endpoint: {endpoint}")
+    print(f"   Kafka Bootstrap Servers: {kafka_config['bootstrap.servers']}")
+    for queue_name, topic in args.route:
+        print(f"   {queue_name} → {topic}")
+    print(f"   Max in flight: {args.max_in_flight} per queue, linger {args.linger_ms} ms, "
+          f"compression {args.compression}")
+
+    try:
+        conn, listener = start_bridge(endpoint, username, password, producer, args.route, args.max_in_flight, stats)
+        print("✅ Bridge running (Ctrl+C to stop)")
+    except stomp.exception.ConnectFailedException as e:
+        print(f"❌ Connection failed: {e}")
+        sys.exit(1)
+
+    started = last_report = time.time()
+    last_forwarded = 0
+    try:
+        while not listener.disconnected.is_set():
+            # Serves delivery callbacks, which ack or nack the MQ messages
+            producer.poll(0.1)
+            now = time.time()
+            if now - last_report >= args.report_interval:
+                bridge, end_to_end = stats.take_latencies()
+                forwarded = stats.forwarded
+                print(f"   forwarded {forwarded:,} ({(forwarded - last_forwarded) / (now - last_report):,.0f} msg/s), "
+                      f"in flight {stats.received - forwarded - stats.failed:,}, failed {stats.failed:,}")
+                print(f"      bridge {latency_summary(bridge)}")
+                print(f"      end-to-end {latency_summary(end_to_end)}")
+                last_report, last_forwarded = now, forwarded
+            if args.duration and now - started >= args.duration:
+                break
+    except KeyboardInterrupt:
+        print("\nStopping...")
+
+    # Stop producing new messages, then let outstanding deliveries ack before disconnecting
+    listener.stopping.set()
+    remaining = producer.flush(30)
+    if conn.is_connected():
+        conn.disconnect()
+
+    elapsed = time.time() - started
+    print()
+    print("📊 Summary")
+    print("=" * 50)
+    print(f"   Forwarded {stats.forwarded:,} messages ({stats.bytes / (1024 * 1024):,.1f} MB) in {elapsed:.1f}s: "
+          f"{stats.forwarded / elapsed:,.0f} msgs/s")
+    print(f"   Failed deliveries (nacked for redelivery): {stats.failed:,}")
+    bridge, end_to_end = stats.take_latencies()
+    if bridge:
+        print(f"   Since last report: bridge {latency_summary(bridge)}")
+        print(f"                      end-to-end {latency_summary(end_to_end)}")
+    if remaining or listener.errors:
+        print(f"⚠️  {remaining:,} messages still undelivered, {listener.errors:,} broker errors; "
+              f"unacked messages will be redelivered by the broker")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
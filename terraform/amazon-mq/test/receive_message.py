@@ -4,43 +4,193 @@
 Usage:
     python receive_message.py <queue_name> [--continuous]
 
+    # Bulk mode: drain a queue as fast as possible, optionally to an NDJSON file
+    python receive_message.py <queue_name> --bulk [--prefetch 1000] [--output messages.ndjson]
+
+In bulk mode the subscription uses client-individual acks and an
+activemq.prefetchSize window. Received messages are buffered and handled in
+batches of --ack-batch messages or every --ack-interval seconds, whichever
+comes first. Each batch is written to the sink in one call and flushed before
+its messages are acknowledged. The run ends once the queue has been idle for
+--idle-timeout seconds, and reports msgs/s and the time taken to drain it.
+
 Environment variables required:
-    MQ_ENDPOINT - The STOMP endpoint (ssl://...)
+    MQ_ENDPOINT - The STOMP endpoint (ssl://..., or tcp://... for a local broker)
     MQ_USERNAME - The broker username
     MQ_PASSWORD - The broker password
 """
 
+import argparse
+import json
 import os
 import ssl
 import sys
+import threading
 import time
 import uuid
 
 import stomp
 
+from test_activemq_connection import create_connection
+
 
 class MessageListener(stomp.ConnectionListener):
     """Listener to receive and print messages."""
 
     def __init__(self, continuous=False):
         self.continuous = continuous
-        self.received = False
+        self.received = threading.Event()
+        self.disconnected = threading.Event()
 
     def on_message(self, frame):
         print(f"📨 Received: {frame.body}")
-        self.received = True
+        self.received.set()
 
     def on_error(self, frame):
         print(f"❌ Error: {frame.body}")
 
+    def on_disconnected(self):
+        self.disconnected.set()
 
-def main():
-    if len(sys.argv) < 2:
-        print("Usage: python receive_message.py <queue_name> [--continuous]")
+
+class BatchListener(stomp.ConnectionListener):
+    """Buffers messages and wakes the main thread when a full batch is ready."""
+
+    def __init__(self, batch_size):
+        self.batch_size = batch_size
+        self.lock = threading.Lock()
+        self.batch = []
+        self.ready = threading.Event()
+        self.disconnected = threading.Event()
+        self.first_message_at = None
+        self.last_message_at = None
+        self.errors = 0
+
+    def on_message(self, frame):
+        now = time.time()
+        with self.lock:
+            self.batch.append(frame)
+            self.first_message_at = self.first_message_at or now
+            self.last_message_at = now
+            if len(self.batch) >= self.batch_size:
+                self.ready.set()
+
+    def on_error(self, frame):
+        self.errors += 1
+        print(f"❌ Error: {frame.headers.get('message', frame.body)}")
+
+    def on_disconnected(self):
+        self.disconnected.set()
+        self.ready.set()
+
+    def take(self):
+        with self.lock:
+            batch, self.batch = self.batch, []
+            self.ready.clear()
+        return batch
+
+
+def to_ndjson(frames):
+    return "".join(
+        json.dumps({
+            "message_id": frame.headers.get("message-id"),
+            "destination": frame.headers.get("destination"),
+            "timestamp": frame.headers.get("timestamp"),
+            "body": frame.body,
+        }) + "\n"
+        for frame in frames
+    )
+
+
+def receive_bulk(conn, username, password, queue_name, args):
+    """Consume with prefetch and batched client-individual acks until the queue is idle."""
+    listener = BatchListener(args.ack_batch)
+    conn.set_listener("batch", listener)
+    sink = open(args.output, "a", encoding="utf-8", buffering=1024 * 1024) if args.output else None
+
+    conn.connect(username, password, wait=True)
+    subscription_id = str(uuid.uuid4())
+    conn.subscribe(
+        destination=queue_name,
+        id=subscription_id,
+        ack="client-individual",
+        headers={"activemq.prefetchSize": str(args.prefetch)},
+    )
+    print(f"Draining '{queue_name}' (prefetch {args.prefetch}, ack every {args.ack_batch} messages "
+          f"or {args.ack_interval:g}s)... (Ctrl+C to stop)")
+
+    consumed = batches = 0
+    started = last_report = time.time()
+    last_consumed = 0
+    try:
+        while not listener.disconnected.is_set():
+            listener.ready.wait(timeout=args.ack_interval)
+            batch = listener.take()
+            if batch:
+                if sink:
+                    sink.write(to_ndjson(batch))
+                    sink.flush()
+                # Ack only after the batch has reached the sink
+                for frame in batch:
+                    conn.ack(frame.headers["ack"] if "ack" in frame.headers else frame.headers["message-id"],
+                             subscription_id)
+                consumed += len(batch)
+                batches += 1
+
+            now = time.time()
+            if now - last_report >= args.report_interval:
+                print(f"   consumed {consumed:,} ({(consumed - last_consumed) / (now - last_report):,.0f} msg/s)")
+                last_report, last_consumed = now, consumed
+
+            idle_since = listener.last_message_at or started
+            if args.idle_timeout and not batch and now - idle_since >= args.idle_timeout:
+                break
+    except KeyboardInterrupt:
+        print("\nStopped listening.")
+    finally:
+        # Anything still buffered was never acknowledged and will be redelivered
+        conn.disconnect()
+        if sink:
+            sink.close()
+
+    print()
+    if not consumed:
+        print(f"No messages in queue '{queue_name}'")
+        return
+    drain_time = max(listener.last_message_at - listener.first_message_at, 1e-9)
+    print(f"📊 Consumed {consumed:,} messages from '{queue_name}' in {batches:,} batches")
+    print(f"   Drain time: {drain_time:.2f}s (first to last message), {consumed / drain_time:,.0f} msgs/s")
+    if args.output:
+        print(f"   Written to {args.output}")
+    if listener.errors:
+        print(f"⚠️  {listener.errors:,} broker errors")
         sys.exit(1)
 
-    queue_name = sys.argv[1]
-    continuous = "--continuous" in sys.argv
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Receive messages from Amazon MQ ActiveMQ over STOMP")
+    parser.add_argument("queue_name", help="Queue to receive from (the /queue/ prefix is optional)")
+    parser.add_argument("--continuous", action="store_true", help="Print messages until Ctrl+C")
+    bulk = parser.add_argument_group("bulk mode")
+    bulk.add_argument("--bulk", action="store_true", help="Drain the queue with prefetch and batched acks")
+    bulk.add_argument("--prefetch", type=int, default=1000, help="activemq.prefetchSize: unacked messages the broker may push (default: 1000)")
+    bulk.add_argument("--ack-batch", type=int, default=500, help="Handle and ack after this many messages (default: 500)")
+    bulk.add_argument("--ack-interval", type=float, default=1.0, help="Or after this many seconds (default: 1)")
+    bulk.add_argument("--output", help="Append messages to this NDJSON file")
+    bulk.add_argument("--idle-timeout", type=float, default=5.0, help="Stop after this many seconds without messages, 0 to run until Ctrl+C (default: 5)")
+    bulk.add_argument("--report-interval", type=float, default=5.0, help="Seconds between progress lines (default: 5)")
+    args = parser.parse_args()
+
+    if args.bulk and args.prefetch < args.ack_batch:
+        print(f"⚠️  --prefetch {args.prefetch} is below --ack-batch {args.ack_batch}; "
+              f"batches will only be flushed by --ack-interval")
+    return args
+
+
+def main():
+    args = parse_args()
+    queue_name = args.queue_name
+    continuous = args.continuous
 
     # Ensure queue name has proper prefix
     if not queue_name.startswith("/queue/"):
@@ -55,16 +205,15 @@ def main():
         print("Error: MQ_ENDPOINT, MQ_USERNAME, and MQ_PASSWORD must be set")
         sys.exit(1)
 
-    # Parse endpoint
-    host = endpoint.replace("ssl://", "").split(":")[0]
-    port = 61614  # ActiveMQ STOMP+SSL port
+    conn = create_connection(endpoint)
 
-    # Setup SSL connection
-    conn = stomp.Connection(
-        [(host, port)],
-        heartbeats=(10000, 10000),
-    )
-    conn.set_ssl(for_hosts=[(host, port)])
+    if args.bulk:
+        try:
+            receive_bulk(conn, username, password, queue_name, args)
+        except Exception as e:
+            print(f"❌ Error: {e}")
+            sys.exit(1)
+        return
 
     listener = MessageListener(continuous)
     conn.set_listener("receiver", listener)
@@ -76,16 +225,10 @@ def main():
 
         if continuous:
             print(f"Listening for messages on '{queue_name}'... (Ctrl+C to stop)")
-            while True:
-                time.sleep(1)
+            listener.disconnected.wait()
         else:
             # Wait briefly for a single message
-            timeout = 3
-            start = time.time()
-            while not listener.received and (time.time() - start) < timeout:
-                time.sleep(0.1)
-
-            if not listener.received:
+            if not listener.received.wait(timeout=3):
                 print(f"No messages in queue '{queue_name}'")
 
             conn.disconnect()
@@ -1,29 +1,242 @@
 #!/usr/bin/env python3
-"""Send a message to Amazon MQ ActiveMQ using STOMP protocol.
+"""Send messages to Amazon MQ ActiveMQ using STOMP protocol.
 
 Usage:
     python send_message.py <queue_name> <message>
 
+    # Bulk mode: keep connections open and stream many messages
+    python send_message.py <queue_name> --file messages.txt [--rate 1000]
+    cat messages.txt | python send_message.py <queue_name> --file -
+    python send_message.py <queue_name> --count 100000 --size 512 --connections 4
+
+In bulk mode every message is sent with a receipt request. Each connection
+allows at most --window unacknowledged messages, and receipts are handled
+asynchronously by the listener, so the sender only blocks when the window is
+full. The report shows msgs/s and receipt latency percentiles.
+
 Environment variables required:
-    MQ_ENDPOINT - The STOMP endpoint (ssl://...)
+    MQ_ENDPOINT - The STOMP endpoint (ssl://..., or tcp://... for a local broker)
     MQ_USERNAME - The broker username
     MQ_PASSWORD - The broker password
 """
 
+import argparse
+import itertools
+import json
 import os
 import ssl
 import sys
+import threading
+import time
 
 import stomp
 
+from test_activemq_connection import create_connection
 
-def main():
-    if len(sys.argv) < 3:
-        print("Usage: python send_message.py <queue_name> <message>")
+
+class ReceiptTracker(stomp.ConnectionListener):
+    """Tracks outstanding receipts for one connection and bounds them to a window."""
+
+    def __init__(self, window):
+        self.window = window
+        # One lock for pending and failed, so a receipt can never slip between a check and an update
+        self.condition = threading.Condition()
+        self.pending = {}
+        self.latencies = []
+        self.errors = 0
+        self.failed = None
+
+    def track(self, receipt_id, timeout):
+        """Wait for room in the window and register the receipt; False if the connection failed or timed out."""
+        with self.condition:
+            has_room = self.condition.wait_for(lambda: self.failed or len(self.pending) < self.window, timeout)
+            if not has_room:
+                self.failed = f"no receipt for {timeout:.0f}s with {len(self.pending)} outstanding"
+            if self.failed:
+                return False
+            self.pending[receipt_id] = time.perf_counter()
+            return True
+
+    def wait_drained(self, timeout):
+        """Wait until every receipt arrived or the connection failed."""
+        with self.condition:
+            self.condition.wait_for(lambda: self.failed or not self.pending, timeout)
+
+    def fail(self, reason):
+        """Stop waiting for receipts on this connection; the first reason is kept."""
+        with self.condition:
+            self.failed = self.failed or reason
+            self.condition.notify_all()
+
+    def on_receipt(self, frame):
+        with self.condition:
+            sent_at = self.pending.pop(frame.headers.get("receipt-id"), None)
+            if sent_at is None:
+                return
+            self.latencies.append(time.perf_counter() - sent_at)
+            self.condition.notify_all()
+
+    def on_error(self, frame):
+        message = frame.headers.get('message', frame.body)
+        with self.condition:
+            self.errors += 1
+        # The broker closes the connection after an ERROR frame: no more receipts will come
+        self.fail(f"broker error: {message}")
+        print(f"❌ Error: {message}")
+
+    def on_disconnected(self):
+        self.fail("connection lost")
+
+
+def percentile(ordered, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def latency_summary(latencies):
+    """Format p50/p95/p99/max of a list of latencies in seconds."""
+    if not latencies:
+        return "no samples"
+    ordered = sorted(latencies)
+    return (f"p50 {percentile(ordered, 50) * 1000:.2f} ms, p95 {percentile(ordered, 95) * 1000:.2f} ms, "
+            f"p99 {percentile(ordered, 99) * 1000:.2f} ms, max {ordered[-1] * 1000:.2f} ms")
+
+
+def read_messages(path):
+    """Yield one message per line from a file, or stdin for '-'."""
+    stream = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    try:
+        for line in stream:
+            line = line.rstrip("\n")
+            if line:
+                yield line
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+def generate_messages(count, size):
+    """Yield JSON messages padded to roughly size bytes."""
+    for seq in range(count):
+        message = json.dumps({"seq": seq, "payload": ""})
+        yield message[:-2] + "x" * max(0, size - len(message)) + message[-2:]
+
+
+def send_bulk(endpoint, username, password, queue_name, messages, args):
+    """Send messages over persistent connections at the target rate and report throughput."""
+    source = iter(messages)
+    source_lock = threading.Lock()
+    counter = itertools.count()
+    totals = {"sent": 0, "bytes": 0}
+    headers = {"persistent": "true"} if args.persistent else {}
+
+    connections = []
+    for i in range(args.connections):
+        conn = create_connection(endpoint)
+        tracker = ReceiptTracker(args.window)
+        conn.set_listener("receipts", tracker)
+        conn.connect(username, password, wait=True)
+        connections.append((conn, tracker))
+    print(f"✅ Opened {len(connections)} connection(s), window {args.window} per connection")
+
+    start = time.perf_counter()
+
+    def sender(conn, tracker):
+        while True:
+            with source_lock:
+                message = next(source, None)
+                seq = next(counter)
+            if message is None:
+                return
+            if args.rate:
+                # Pace against the schedule, not the previous send, so stalls are caught up
+                delay = start + seq / args.rate - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            receipt_id = f"r-{seq}"
+            if not tracker.track(receipt_id, args.drain_timeout):
+                print(f"❌ {threading.current_thread().name} stopped: {tracker.failed}")
+                return
+            try:
+                conn.send(body=message, destination=queue_name, headers={**headers, "receipt": receipt_id})
+            except stomp.exception.StompException as e:
+                tracker.fail(f"send failed: {e}")
+                print(f"❌ {threading.current_thread().name} stopped: {tracker.failed}")
+                return
+            with source_lock:
+                totals["sent"] += 1
+                totals["bytes"] += len(message)
+
+    threads = [
+        threading.Thread(target=sender, args=pair, name=f"Sender-{i}", daemon=True)
+        for i, pair in enumerate(connections)
+    ]
+    for thread in threads:
+        thread.start()
+
+    last_report, last_sent = start, 0
+    while True:
+        alive = [thread for thread in threads if thread.is_alive()]
+        if not alive:
+            break
+        alive[0].join(timeout=0.5)
+        now = time.perf_counter()
+        if now - last_report >= args.report_interval:
+            acked = sum(len(tracker.latencies) for _, tracker in connections)
+            print(f"   sent {totals['sent']:,} ({(totals['sent'] - last_sent) / (now - last_report):,.0f} msg/s), "
+                  f"receipts {acked:,}")
+            last_report, last_sent = now, totals["sent"]
+
+    for _, tracker in connections:
+        tracker.wait_drained(args.drain_timeout)
+    elapsed = time.perf_counter() - start
+
+    # Read the results before disconnecting, which would count as a lost connection
+    latencies = [latency for _, tracker in connections for latency in tracker.latencies]
+    missing = sum(len(tracker.pending) for _, tracker in connections)
+    errors = sum(tracker.errors for _, tracker in connections)
+    failed = [tracker.failed for _, tracker in connections if tracker.failed]
+
+    for conn, _ in connections:
+        if conn.is_connected():
+            conn.disconnect()
+
+    print()
+    print(f"📊 Sent {totals['sent']:,} messages ({totals['bytes'] / (1024 * 1024):,.1f} MB) to '{queue_name}' "
+          f"in {elapsed:.1f}s")
+    print(f"   Throughput: {totals['sent'] / elapsed:,.0f} msgs/s, {totals['bytes'] / elapsed / (1024 * 1024):,.2f} MB/s")
+    print(f"   Receipt latency: {latency_summary(latencies)}")
+    if missing or errors or failed:
+        print(f"⚠️  {missing:,} receipts not received, {errors:,} broker errors, "
+              f"{len(failed)} connection(s) failed")
         sys.exit(1)
 
-    queue_name = sys.argv[1]
-    message = " ".join(sys.argv[2:])
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Send messages to Amazon MQ ActiveMQ over STOMP")
+    parser.add_argument("queue_name", help="Queue to send to (the /queue/ prefix is optional)")
+    parser.add_argument("message", nargs="*", help="Message to send once")
+    bulk = parser.add_argument_group("bulk mode")
+    bulk.add_argument("--file", help="Send one message per line from this file ('-' for stdin)")
+    bulk.add_argument("--count", type=int, help="Send this many generated JSON messages")
+    bulk.add_argument("--size", type=int, default=256, help="Size of generated messages in bytes (default: 256)")
+    bulk.add_argument("--rate", type=float, default=0, help="Target msgs/s across all connections (default: unlimited)")
+    bulk.add_argument("--connections", type=int, default=1, help="Connections to send on in parallel (default: 1)")
+    bulk.add_argument("--window", type=int, default=500, help="Max unacknowledged receipts per connection (default: 500)")
+    bulk.add_argument("--persistent", action="store_true", help="Send with persistent:true (ActiveMQ STOMP defaults to non-persistent)")
+    bulk.add_argument("--report-interval", type=float, default=5, help="Seconds between progress lines (default: 5)")
+    bulk.add_argument("--drain-timeout", type=float, default=30,
+                      help="Seconds to wait for a receipt before giving up on a connection (default: 30)")
+    args = parser.parse_args()
+
+    if bool(args.message) + bool(args.file) + bool(args.count) != 1:
+        parser.error("give exactly one of a message, --file or --count")
+    return args
+
+
+def main():
+    args = parse_args()
+    queue_name = args.queue_name
 
     # Ensure queue name has proper prefix
     if not queue_name.startswith("/queue/"):
@@ -38,18 +251,16 @@ def main():
         print("Error: MQ_ENDPOINT, MQ_USERNAME, and MQ_PASSWORD must be set")
         sys.exit(1)
 
-    # Parse endpoint
-    host = endpoint.replace("ssl://", "").split(":")[0]
-    port = 61614  # ActiveMQ STOMP+SSL port
-
-    # Setup SSL connection
-    conn = stomp.Connection(
-        [(host, port)],
-        heartbeats=(10000, 10000),
-    )
-    conn.set_ssl(for_hosts=[(host, port)])
-
     try:
+        if args.file:
+            send_bulk(endpoint, username, password, queue_name, read_messages(args.file), args)
+            return
+        if args.count:
+            send_bulk(endpoint, username, password, queue_name, generate_messages(args.count, args.size), args)
+            return
+
+        message = " ".join(args.message)
+        conn = create_connection(endpoint)
         conn.connect(username, password, wait=True)
         conn.send(body=message, destination=queue_name)
         print(f"✅ Sent to '{queue_name}': {message}")
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""Minimal local STOMP 1.2 broker for running the test scripts without Amazon MQ.
+
+Usage:
+    python stomp_broker.py [--port 61613]
+
+    export MQ_ENDPOINT=tcp://localhost:61613 MQ_USERNAME=admin MQ_PASSWORD=admin
+    python send_message.py openflow-queue --count 10000
+
+Supports what the scripts in this directory use: CONNECT, SEND with receipts,
+SUBSCRIBE with auto/client/client-individual acks and activemq.prefetchSize,
+ACK/NACK, UNSUBSCRIBE and DISCONNECT. Destinations under /topic/ are
+broadcast to every subscriber; everything else is a queue. Credentials are
+not checked and nothing is persisted, so unconsumed messages are lost when
+the broker stops.
+
+This is only for checking that the scripts work end to end. For numbers that
+say anything about Amazon MQ, run a real ActiveMQ, e.g.:
+
+    docker run -p 61613:61613 apache/activemq-classic:5.18.6
+"""
+
+import argparse
+import asyncio
+import itertools
+import time
+from collections import Counter, OrderedDict, defaultdict, deque
+
+DEFAULT_PREFETCH = 1000
+# Stop dispatching to a connection whose socket buffer is this full
+WRITE_HIGH_WATER = 4 * 1024 * 1024
+
+ESCAPES = {"\\": "\\\\", "\n": "\\n", "\r": "\\r", ":": "\\c"}
+UNESCAPES = {"\\\\": "\\", "\\n": "\n", "\\r": "\r", "\\c": ":"}
+
+
+def escape(value):
+    return "".join(ESCAPES.get(c, c) for c in str(value))
+
+
+def unescape(value):
+    if "\\" not in value:
+        return value
+    out, i = [], 0
+    while i < len(value):
+        pair = value[i:i + 2]
+        if pair in UNESCAPES:
+            out.append(UNESCAPES[pair])
+            i += 2
+        else:
+            out.append(value[i])
+            i += 1
+    return "".join(out)
+
+
+def encode_frame(command, headers, body=b""):
+    lines = [command]
+    lines.extend(f"{escape(k)}:{escape(v)}" for k, v in headers.items())
+    lines.append(f"content-length:{len(body)}")
+    return ("\n".join(lines) + "\n\n").encode() + body + b"\x00"
+
+
+class Subscription:
+    def __init__(self, session, sub_id, destination, ack, prefetch):
+        self.session = session
+        self.id = sub_id
+        self.destination = destination
+        self.ack = ack
+        self.prefetch = prefetch
+        self.unacked = OrderedDict()
+
+    def has_capacity(self):
+        if self.session.paused:
+            return False
+        return self.ack == "auto" or len(self.unacked) < self.prefetch
+
+
+class Broker:
+    def __init__(self):
+        self.queues = defaultdict(deque)
+        self.subscriptions = defaultdict(list)
+        self.message_ids = itertools.count(1)
+        self.enqueued = Counter()
+        self.dequeued = Counter()
+
+    def publish(self, destination, headers, body):
+        # Like ActiveMQ, stamp the enqueue time in epoch milliseconds
+        headers.setdefault("timestamp", str(int(time.time() * 1000)))
+        message = (f"ID:stomp-broker-{next(self.message_ids)}", headers, body)
+        self.enqueued[destination] += 1
+        if destination.startswith("/topic/"):
+            for sub in self.subscriptions[destination]:
+                self.deliver(sub, message)
+            return
+        self.queues[destination].append(message)
+        self.dispatch(destination)
+
+    def dispatch(self, destination):
+        """Hand queued messages round-robin to subscribers with prefetch capacity."""
+        queue = self.queues[destination]
+        ready = [s for s in self.subscriptions[destination] if s.has_capacity()]
+        while queue and ready:
+            for sub in list(ready):
+                if not queue:
+                    break
+                self.deliver(sub, queue.popleft())
+                if not sub.has_capacity():
+                    ready.remove(sub)
+
+    def deliver(self, sub, message):
+        message_id, headers, body = message
+        if sub.ack != "auto":
+            sub.unacked[message_id] = message
+        self.dequeued[sub.destination] += 1
+        sub.session.send_frame("MESSAGE", {
+            **headers,
+            "subscription": sub.id,
+            "message-id": message_id,
+            "destination": sub.destination,
+            "ack": message_id,
+        }, body)
+
+    def requeue(self, sub, message_ids):
+        """Put unacknowledged messages back at the head of the queue, oldest first."""
+        queue = self.queues[sub.destination]
+        for message_id in reversed(message_ids):
+            message_id, headers, body = sub.unacked.pop(message_id)
+            queue.appendleft((message_id, {**headers, "redelivered": "true"}, body))
+            self.dequeued[sub.destination] -= 1
+
+    def settle(self, session, ack_id, requeue):
+        for sub in session.subscriptions.values():
+            if ack_id not in sub.unacked:
+                continue
+            if sub.ack == "client":
+                # Cumulative: settles everything delivered up to and including ack_id
+                ids = list(itertools.takewhile(lambda i: i != ack_id, sub.unacked)) + [ack_id]
+            else:
+                ids = [ack_id]
+            if requeue:
+                self.requeue(sub, ids)
+            else:
+                for message_id in ids:
+                    del sub.unacked[message_id]
+            self.dispatch(sub.destination)
+            return True
+        return False
+
+    def unsubscribe(self, sub):
+        self.subscriptions[sub.destination].remove(sub)
+        self.requeue(sub, list(sub.unacked))
+        self.dispatch(sub.destination)
+
+
+class StompSession(asyncio.Protocol):
+    def __init__(self, broker):
+        self.broker = broker
+        self.buffer = bytearray()
+        self.subscriptions = {}
+        self.paused = False
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+        transport.set_write_buffer_limits(high=WRITE_HIGH_WATER)
+
+    def connection_lost(self, exc):
+        for sub in list(self.subscriptions.values()):
+            self.broker.unsubscribe(sub)
+        self.subscriptions.clear()
+
+    def pause_writing(self):
+        self.paused = True
+
+    def resume_writing(self):
+        self.paused = False
+        for destination in {sub.destination for sub in self.subscriptions.values()}:
+            self.broker.dispatch(destination)
+
+    def send_frame(self, command, headers, body=b""):
+        if not self.transport.is_closing():
+            self.transport.write(encode_frame(command, headers, body))
+
+    def data_received(self, data):
+        self.buffer += data
+        while True:
+            frame = self.next_frame()
+            if frame is None:
+                return
+            self.handle(*frame)
+
+    def next_frame(self):
+        # Skip heart-beat EOLs between frames
+        while self.buffer[:1] in (b"\n", b"\r"):
+            del self.buffer[:1]
+        end = self.buffer.find(b"\n\n")
+        crlf_end = self.buffer.find(b"\r\n\r\n")
+        if crlf_end != -1 and (end == -1 or crlf_end < end):
+            end, separator = crlf_end, 4
+        elif end != -1:
+            separator = 2
+        else:
+            return None
+
+        lines = self.buffer[:end].decode().replace("\r\n", "\n").split("\n")
+        command, headers = lines[0], {}
+        for line in lines[1:]:
+            key, _, value = line.partition(":")
+            if command not in ("CONNECT", "STOMP"):
+                key, value = unescape(key), unescape(value)
+            headers.setdefault(key, value)
+
+        start = end + separator
+        if "content-length" in headers:
+            stop = start + int(headers["content-length"])
+            if len(self.buffer) < stop + 1:
+                return None
+        else:
+            stop = self.buffer.find(b"\x00", start)
+            if stop == -1:
+                return None
+        body = bytes(self.buffer[start:stop])
+        del self.buffer[:stop + 1]
+        return command, headers, body
+
+    def handle(self, command, headers, body):
+        handler = getattr(self, f"on_{command.lower()}", None)
+        if handler is None:
+            self.send_frame("ERROR", {"message": f"Unsupported command {command}"})
+            return
+        handler(headers, body)
+        if "receipt" in headers and command != "DISCONNECT":
+            self.send_frame("RECEIPT", {"receipt-id": headers["receipt"]})
+
+    def on_connect(self, headers, body):
+        self.send_frame("CONNECTED", {"version": "1.2", "heart-beat": "0,0", "server": "stomp-broker/0.1"})
+
+    on_stomp = on_connect
+
+    def on_send(self, headers, body):
+        forwarded = {k: v for k, v in headers.items() if k not in ("receipt", "content-length", "transaction")}
+        self.broker.publish(headers["destination"], forwarded, body)
+
+    def on_subscribe(self, headers, body):
+        sub = Subscription(
+            self, headers["id"], headers["destination"], headers.get("ack", "auto"),
+            int(headers.get("activemq.prefetchSize", DEFAULT_PREFETCH)),
+        )
+        self.subscriptions[sub.id] = sub
+        self.broker.subscriptions[sub.destination].append(sub)
+        self.broker.dispatch(sub.destination)
+
+    def on_unsubscribe(self, headers, body):
+        sub = self.subscriptions.pop(headers["id"], None)
+        if sub is not None:
+            self.broker.unsubscribe(sub)
+
+    def on_ack(self, headers, body):
+        self.broker.settle(self, headers.get("id") or headers.get("message-id"), requeue=False)
+
+    def on_nack(self, headers, body):
+        self.broker.settle(self, headers.get("id") or headers.get("message-id"), requeue=True)
+
+    def on_disconnect(self, headers, body):
+        if "receipt" in headers:
+            self.send_frame("RECEIPT", {"receipt-id": headers["receipt"]})
+        self.transport.close()
+
+
+async def serve(host, port):
+    broker = Broker()
+    server = await asyncio.get_running_loop().create_server(lambda: StompSession(broker), host, port)
+    print(f"✅ STOMP broker listening on {host}:{port} (Ctrl+C to stop)")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        for destination in sorted(broker.enqueued):
+            depth = len(broker.queues.get(destination, ()))
+            print(f"   {destination}: {broker.enqueued[destination]:,} enqueued, "
+                  f"{broker.dequeued[destination]:,} dequeued, {depth:,} pending")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Minimal local STOMP 1.2 broker")
+    parser.add_argument("--host", default="localhost", help="Listen address (default: localhost)")
+    parser.add_argument("--port", type=int, default=61613, help="Listen port (default: 61613)")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args.host, args.port))
+    except KeyboardInterrupt:
+        print("\nStopped.")
+
+
+if __name__ == "__main__":
+    main()
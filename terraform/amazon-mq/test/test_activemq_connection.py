@@ -18,6 +18,26 @@ TEST_QUEUE = "/queue/openflow-test-queue"
 TEST_MESSAGE = "Hello from OpenFlow Amazon MQ test!"
 
 
+def parse_endpoint(endpoint):
+    """Return (host, port, use_ssl) for an endpoint such as ssl://b-xxxx.mq.region.amazonaws.com:61614.
+
+    tcp:// or stomp:// endpoints (e.g. tcp://localhost:61613 for a local broker) connect without TLS.
+    """
+    scheme, _, address = endpoint.rpartition("://")
+    host, _, port = address.partition(":")
+    use_ssl = scheme not in ("tcp", "stomp")
+    return host, int(port) if port else 61614, use_ssl
+
+
+def create_connection(endpoint=ENDPOINT, heartbeats=(10000, 10000), **kwargs):
+    """Create a STOMP connection for the endpoint, with TLS for ssl:// endpoints."""
+    host, port, use_ssl = parse_endpoint(endpoint)
+    conn = stomp.Connection([(host, port)], heartbeats=heartbeats, **kwargs)
+    if use_ssl:
+        conn.set_ssl(for_hosts=[(host, port)])
+    return conn
+
+
 class TestListener(stomp.ConnectionListener):
     """Listener to receive messages."""
 
@@ -37,18 +57,12 @@ def main():
         print("Error: MQ_ENDPOINT, MQ_USERNAME, and MQ_PASSWORD must be set")
         sys.exit(1)
 
-    # Parse endpoint - format: ssl://b-xxxx.mq.region.amazonaws.com:61614
-    host = ENDPOINT.replace("ssl://", "").split(":")[0]
-    port = 61614  # ActiveMQ STOMP+SSL port
+    # Endpoint format: ssl://b-xxxx.mq.region.amazonaws.com:61614
+    host, port, _ = parse_endpoint(ENDPOINT)
 
     print(f"Connecting to ActiveMQ at {host}:{port}...")
 
-    # Setup SSL connection
-    conn = stomp.Connection(
-        [(host, port)],
-        heartbeats=(10000, 10000),
-    )
-    conn.set_ssl(for_hosts=[(host, port)])
+    conn = create_connection()
 
     listener = TestListener()
     conn.set_listener("test", listener)
@@ -0,0 +1,431 @@
+#!/usr/bin/env python3
+"""
+MSK Load and Latency Benchmark
+Drives configurable produce/consume load against a Kafka cluster and reports
+sustained throughput and end-to-end latency percentiles.
+
+Every message carries the time it was scheduled to be sent, so latency is
+measured from the producer to receipt by a consumer in the benchmark's consumer
+group. When a target rate is set, the scheduled (not actual) send time is used,
+so a producer that falls behind shows up as latency rather than being hidden.
+Producers and consumers run in separate processes so they don't share a GIL.
+
+Works against any bootstrap servers: MSK (SASL/SCRAM, the default), or a local
+broker with KAFKA_SECURITY_PROTOCOL=PLAINTEXT.
+
+Usage:
+    uv pip install confluent-kafka
+    python benchmark_msk.py --message-size 1024 --rate 5000 --duration 60 \\
+        --producers 2 --consumers 3 --partitions 6
+
+    # Local single-node broker
+    KAFKA_SECURITY_PROTOCOL=PLAINTEXT MSK_BOOTSTRAP_SERVERS=localhost:9092 \\
+        python benchmark_msk.py --duration 10
+"""
+
+import argparse
+import math
+import multiprocessing
+import os
+import queue
+import struct
+import sys
+import time
+import uuid
+from collections import Counter
+
+from confluent_kafka import Consumer, KafkaError, Producer
+from confluent_kafka.admin import AdminClient, NewTopic
+
+from test_msk_connection import BOOTSTRAP_SERVERS, get_kafka_config
+
+# Payload header: scheduled send time (epoch seconds), producer id, sequence number
+HEADER = struct.Struct('>dIQ')
+
+# Upper bounds (ms) of the buckets printed in the latency histogram
+DISPLAY_BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, math.inf]
+
+
+class LatencyHistogram:
+    """
+    Log-bucketed latency histogram with ~2% relative precision.
+    Memory stays bounded however many samples are recorded, and histograms
+    from several processes can be merged before computing percentiles.
+    """
+
+    BASE = 1.02
+
+    def __init__(self, buckets=None):
+        self.buckets = Counter(buckets or {})
+
+    def record(self, seconds):
+        micros = max(seconds * 1_000_000, 1.0)
+        self.buckets[int(math.log(micros, self.BASE))] += 1
+
+    def merge(self, other):
+        self.buckets.update(other.buckets)
+
+    @property
+    def count(self):
+        return sum(self.buckets.values())
+
+    def _bucket_ms(self, index):
+        return self.BASE ** (index + 0.5) / 1000
+
+    def percentile(self, pct):
+        """Latency in milliseconds at the given percentile (0-100)."""
+        total = self.count
+        if not total:
+            return float('nan')
+        threshold = total * pct / 100
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= threshold:
+                return self._bucket_ms(index)
+        return self._bucket_ms(max(self.buckets))
+
+    def render(self, width=40):
+        """ASCII histogram over DISPLAY_BUCKETS_MS."""
+        counts = Counter()
+        for index, n in self.buckets.items():
+            ms = self._bucket_ms(index)
+            counts[next(b for b in DISPLAY_BUCKETS_MS if ms <= b)] += n
+        total = self.count or 1
+        peak = max(counts.values(), default=1)
+        lines = []
+        lower = 0
+        for bound in DISPLAY_BUCKETS_MS:
+            n = counts.get(bound, 0)
+            label = f"{lower:g}-{bound:g} ms" if bound != math.inf else f">{lower:g} ms"
+            if n or lower == 0:
+                bar = '█' * max(1 if n else 0, round(width * n / peak))
+                lines.append(f"   {label:>14} | {bar:<{width}} {100 * n / total:5.1f}% ({n:,})")
+            lower = bound
+        return '\n'.join(lines)
+
+
+def print_latency_report(title, histogram):
+    """Print percentiles and histogram for one latency distribution."""
+    print(f"⏱️  {title} ({histogram.count:,} samples):")
+    if not histogram.count:
+        print("   no samples")
+        return
+    print("   " + "  ".join(f"p{p:g}={histogram.percentile(p):.2f}ms" for p in (50, 90, 99, 99.9, 100)))
+    print(histogram.render())
+
+
+def run_producer(producer_id, args, config, start_at, results):
+    """Produce fixed-size messages at the per-producer share of the target rate."""
+    producer = Producer({
+        **config,
+        'client.id': f'msk-bench-producer-{producer_id}',
+        'acks': args.acks,
+        'linger.ms': args.linger_ms,
+        'batch.size': args.batch_size,
+        'compression.type': args.compression,
+    })
+    padding = os.urandom(max(0, args.message_size - HEADER.size))
+    interval = args.producers / args.rate if args.rate else 0.0
+    ack_latency = LatencyHistogram()
+    stats = Counter()
+
+    def on_delivery(err, msg):
+        if err is not None:
+            stats['failed'] += 1
+        else:
+            stats['delivered'] += 1
+            stats['delivered_bytes'] += len(msg.value())
+            ack_latency.record(msg.latency())
+
+    while time.time() < start_at:
+        time.sleep(0.01)
+
+    end_at = start_at + args.duration
+    next_send = start_at
+    seq = 0
+    while True:
+        now = time.time()
+        if now >= end_at:
+            break
+        if interval:
+            if next_send > now:
+                producer.poll(next_send - now)
+                continue
+            scheduled = next_send
+        else:
+            scheduled = now
+
+        try:
+            producer.produce(
+                args.topic,
+                value=HEADER.pack(scheduled, producer_id, seq) + padding,
+                on_delivery=on_delivery
+            )
+        except BufferError:
+            # Local queue full: let librdkafka drain before retrying the same message
+            producer.poll(0.05)
+            continue
+
+        seq += 1
+        next_send += interval
+        producer.poll(0)
+
+    remaining = producer.flush(args.drain_timeout + 30)
+    stats['sent'] = seq
+    stats['undelivered'] = remaining
+    stats['elapsed'] = time.time() - start_at
+    results.put(('producer', producer_id, dict(stats), dict(ack_latency.buckets)))
+
+
+def run_consumer(consumer_id, args, config, group_id, assigned, producers_done, results):
+    """Consume in batches and record end-to-end latency from the payload timestamp."""
+    consumer = Consumer({
+        **config,
+        'client.id': f'msk-bench-consumer-{consumer_id}',
+        'group.id': group_id,
+        'auto.offset.reset': 'earliest',
+        'enable.auto.commit': True,
+        'fetch.wait.max.ms': 50,
+    })
+
+    def on_assign(consumer, partitions):
+        if partitions:
+            assigned.set()
+
+    consumer.subscribe([args.topic], on_assign=on_assign)
+
+    latency = LatencyHistogram()
+    stats = Counter()
+    first_at = last_at = None
+    idle_since = time.time()
+
+    while True:
+        # consume() blocks until the batch is full or the timeout expires, which adds up to
+        # the timeout to measured latency at low rates
+        messages = consumer.consume(num_messages=args.consume_batch, timeout=args.consume_timeout_ms / 1000)
+        now = time.time()
+
+        for msg in messages:
+            if msg.error():
+                if msg.error().code() != KafkaError._PARTITION_EOF:
+                    stats['errors'] += 1
+                continue
+            value = msg.value()
+            scheduled, _, _ = HEADER.unpack_from(value)
+            latency.record(now - scheduled)
+            stats['received'] += 1
+            stats['received_bytes'] += len(value)
+
+        if messages:
+            first_at = first_at or now
+            last_at = now
+            idle_since = now
+        elif producers_done.is_set() and now - idle_since > args.drain_timeout:
+            break
+
+    consumer.close()
+    stats['first_at'] = first_at or 0
+    stats['last_at'] = last_at or 0
+    results.put(('consumer', consumer_id, dict(stats), dict(latency.buckets)))
+
+
+def create_benchmark_topic(config, topic, partitions):
+    """Create the benchmark topic, replicated up to 3 ways. Returns False if it couldn't be created."""
+    admin_client = AdminClient(config)
+    metadata = admin_client.list_topics(timeout=10)
+    if topic in metadata.topics:
+        print(f"✅ Using existing topic '{topic}'")
+        return False
+
+    replication = min(3, len(metadata.brokers))
+    futures = admin_client.create_topics([NewTopic(topic, num_partitions=partitions, replication_factor=replication)])
+    for name, future in futures.items():
+        try:
+            future.result(timeout=15)
+            print(f"✅ Created topic '{name}' ({partitions} partitions, replication {replication})")
+            return True
+        except Exception as e:
+            print(f"⚠️  Could not create topic '{name}' ({e}); relying on broker auto-creation")
+    return False
+
+
+def wait_for_partitions(config, topic, timeout=30):
+    """
+    Wait until the topic's partitions appear in metadata and return how many there are.
+    A producer metadata request also triggers auto-creation on brokers that allow it.
+    """
+    producer = Producer(config)
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        metadata = producer.list_topics(topic, timeout=5).topics.get(topic)
+        if metadata is not None and metadata.error is None and metadata.partitions:
+            return len(metadata.partitions)
+        time.sleep(0.5)
+    return 0
+
+
+def delete_benchmark_topic(config, topic):
+    futures = AdminClient(config).delete_topics([topic], operation_timeout=30)
+    for name, future in futures.items():
+        try:
+            future.result(timeout=30)
+            print(f"🧹 Deleted topic '{name}'")
+        except Exception as e:
+            print(f"⚠️  Failed to delete topic '{name}': {e}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Kafka produce/consume throughput and latency benchmark')
+    parser.add_argument('--bootstrap-servers', help='Override MSK_BOOTSTRAP_SERVERS')
+    parser.add_argument('--topic', help='Topic to use (default: a new msk-bench-<timestamp> topic, deleted afterwards)')
+    parser.add_argument('--partitions', type=int, default=6, help='Partitions for a newly created topic (default: 6)')
+    parser.add_argument('--message-size', type=int, default=1024, help=f'Message size in bytes, minimum {HEADER.size} (default: 1024)')
+    parser.add_argument('--rate', type=float, default=0, help='Target total messages/s across producers; 0 = as fast as possible (default: 0)')
+    parser.add_argument('--duration', type=float, default=30, help='Seconds to produce for (default: 30)')
+    parser.add_argument('--producers', type=int, default=1, help='Producer processes (default: 1)')
+    parser.add_argument('--consumers', type=int, default=1, help='Consumer processes in one group (default: 1)')
+    parser.add_argument('--acks', default='all', help='Producer acks: 0, 1 or all (default: all)')
+    parser.add_argument('--linger-ms', type=int, default=5, help='Producer linger.ms (default: 5)')
+    parser.add_argument('--batch-size', type=int, default=131072, help='Producer batch.size in bytes (default: 131072)')
+    parser.add_argument('--compression', default='none', help='Producer compression.type (default: none)')
+    parser.add_argument('--consume-batch', type=int, default=500, help='Messages per consume() call (default: 500)')
+    parser.add_argument('--consume-timeout-ms', type=int, default=10, help='Max wait per consume() call (default: 10)')
+    parser.add_argument('--drain-timeout', type=float, default=5, help='Seconds of consumer idleness after producers finish before stopping (default: 5)')
+    parser.add_argument('--keep-topic', action='store_true', help="Don't delete a topic created by the benchmark")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    config = get_kafka_config()
+    if args.bootstrap_servers:
+        config['bootstrap.servers'] = args.bootstrap_servers
+    elif BOOTSTRAP_SERVERS == 'your-msk-brokers:9096':
+        print("⚠️  Set MSK_BOOTSTRAP_SERVERS or pass --bootstrap-servers")
+        sys.exit(1)
+    if args.message_size < HEADER.size:
+        print(f"❌ --message-size must be at least {HEADER.size} bytes")
+        sys.exit(1)
+
+    topic_created = False
+    if not args.topic:
+        args.topic = f"msk-bench-{int(time.time())}"
+        topic_created = create_benchmark_topic(config, args.topic, args.partitions)
+    partitions = wait_for_partitions(config, args.topic)
+    if not partitions:
+        print(f"❌ Topic '{args.topic}' has no partitions available")
+        sys.exit(1)
+
+    print("🚀 Starting MSK benchmark")
+    print("=" * 50)
+    print(f"   Bootstrap Servers: {config['bootstrap.servers']}")
+    print(f"   Topic: {args.topic} ({partitions} partitions)")
+    print(f"   Message Size: {args.message_size:,} bytes")
+    print(f"   Target Rate: {f'{args.rate:,.0f} msg/s' if args.rate else 'unlimited'}")
+    print(f"   Duration: {args.duration:g}s")
+    print(f"   Producers: {args.producers}  Consumers: {args.consumers}")
+    print(f"   acks={args.acks} linger.ms={args.linger_ms} batch.size={args.batch_size} compression={args.compression}")
+    print()
+
+    # spawn, not fork: the parent already has librdkafka threads from the admin client
+    ctx = multiprocessing.get_context('spawn')
+    results = ctx.Queue()
+    producers_done = ctx.Event()
+    group_id = f"msk-bench-{uuid.uuid4()}"
+
+    consumers = []
+    assigned_events = []
+    for consumer_id in range(args.consumers):
+        assigned = ctx.Event()
+        proc = ctx.Process(
+            target=run_consumer,
+            args=(consumer_id, args, config, group_id, assigned, producers_done, results)
+        )
+        proc.start()
+        consumers.append(proc)
+        assigned_events.append(assigned)
+
+    # Consumers beyond the partition count stay idle, so only wait for those that can be assigned
+    print("⏳ Waiting for consumer partition assignment...")
+    expected = min(args.consumers, partitions)
+    deadline = time.time() + 60
+    while time.time() < deadline and sum(e.is_set() for e in assigned_events) < expected:
+        time.sleep(0.1)
+
+    start_at = time.time() + 1
+    producers = [
+        ctx.Process(target=run_producer, args=(producer_id, args, config, start_at, results))
+        for producer_id in range(args.producers)
+    ]
+    for proc in producers:
+        proc.start()
+    print(f"📤 Producing for {args.duration:g}s...")
+
+    # Read results while waiting: a child can't exit until its queued result is consumed
+    collected = []
+    while any(proc.is_alive() for proc in producers):
+        try:
+            collected.append(results.get(timeout=0.5))
+        except queue.Empty:
+            pass
+    producers_done.set()
+    print("📥 Producers finished, draining consumers...")
+    while len(collected) < args.producers + args.consumers:
+        collected.append(results.get())
+    for proc in producers + consumers:
+        proc.join()
+
+    if topic_created and not args.keep_topic:
+        delete_benchmark_topic(config, args.topic)
+
+    report(args, start_at, collected)
+
+
+def report(args, start_at, collected):
+    """Summarize throughput and latency across all producer and consumer processes."""
+    produced = Counter()
+    consumed = Counter()
+    ack_latency = LatencyHistogram()
+    e2e_latency = LatencyHistogram()
+    produce_elapsed = 0.0
+    first_receive = math.inf
+    last_receive = 0.0
+
+    for role, _, stats, buckets in collected:
+        if role == 'producer':
+            produced.update({k: v for k, v in stats.items() if k != 'elapsed'})
+            produce_elapsed = max(produce_elapsed, stats['elapsed'])
+            ack_latency.merge(LatencyHistogram(buckets))
+        else:
+            consumed.update({k: v for k, v in stats.items() if k not in ('first_at', 'last_at')})
+            if stats['first_at']:
+                first_receive = min(first_receive, stats['first_at'])
+                last_receive = max(last_receive, stats['last_at'])
+            e2e_latency.merge(LatencyHistogram(buckets))
+
+    consume_elapsed = max(last_receive - start_at, 1e-9) if consumed['received'] else 0
+    mb = 1024 * 1024
+
+    print()
+    print("📊 Results")
+    print("=" * 50)
+    print(f"📤 Produced: {produced['sent']:,} sent, {produced['delivered']:,} acked, "
+          f"{produced['failed']:,} failed, {produced['undelivered']:,} unflushed")
+    if produce_elapsed:
+        print(f"   {produced['delivered'] / produce_elapsed:,.0f} msg/s, "
+              f"{produced['delivered_bytes'] / mb / produce_elapsed:,.2f} MB/s sustained over {produce_elapsed:.1f}s")
+    print(f"📥 Consumed: {consumed['received']:,} messages, {consumed['errors']:,} errors")
+    if consume_elapsed:
+        print(f"   {consumed['received'] / consume_elapsed:,.0f} msg/s, "
+              f"{consumed['received_bytes'] / mb / consume_elapsed:,.2f} MB/s over {consume_elapsed:.1f}s")
+    if consumed['received'] < produced['delivered']:
+        print(f"⚠️  {produced['delivered'] - consumed['received']:,} acked messages were not consumed")
+    print()
+    print_latency_report("Produce acknowledgement latency", ack_latency)
+    print()
+    print_latency_report("End-to-end latency", e2e_latency)
+
+
+if __name__ == '__main__':
+    main()
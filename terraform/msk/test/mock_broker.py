@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Local Mock Kafka Broker
+Starts librdkafka's built-in mock cluster and prints its bootstrap servers,
+so the test and benchmark scripts can be smoke-tested without MSK or a JVM.
+
+The mock cluster auto-creates topics (4 partitions) on first use, does not
+support CreateTopics, and only retains the most recent few thousand messages
+per partition, so a consumer that falls far behind will miss messages. Its
+throughput says nothing about a real broker: use it to check that scripts run
+end to end, not to size clusters.
+
+Usage:
+    uv pip install confluent-kafka
+    python mock_broker.py [--brokers 1]
+
+    # In another shell, with the printed address:
+    export KAFKA_SECURITY_PROTOCOL=PLAINTEXT
+    export MSK_BOOTSTRAP_SERVERS=127.0.0.1:<port>
+"""
+
+import argparse
+import signal
+import sys
+
+from confluent_kafka import Producer
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run a local librdkafka mock Kafka cluster')
+    parser.add_argument('--brokers', type=int, default=1, help='Number of mock brokers (default: 1)')
+    args = parser.parse_args()
+
+    # The mock cluster lives as long as this client does
+    client = Producer({'test.mock.num.brokers': args.brokers, 'log_level': 3})
+    metadata = client.list_topics(timeout=10)
+    bootstrap = ','.join(f"{b.host}:{b.port}" for b in metadata.brokers.values())
+
+    print(bootstrap, flush=True)
+    print(f"🧪 Mock cluster with {args.brokers} broker(s) running (Ctrl+C to stop)", file=sys.stderr)
+
+    try:
+        signal.pause()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
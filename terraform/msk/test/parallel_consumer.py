@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+MSK Parallel Batch Consumer
+Drains a topic with one consumer per partition and continuously reports
+per-partition lag and throughput, to check that downstream readers keep up
+with producers such as nasdaq-demo/kafka/produce.py.
+
+Each worker is explicitly assigned its partitions (no group rebalancing),
+reads with batched consume() calls and commits offsets asynchronously every
+--commit-every messages or --commit-interval seconds, whichever comes first.
+Workers are processes by default; use --threads to compare.
+
+The report compares each partition's consume rate (messages read) with its
+produce rate (high watermark growth), so you can see whether lag is shrinking.
+
+Usage:
+    uv pip install confluent-kafka
+    python parallel_consumer.py --topic HISTORICAL_STOCK_QUOTES --from-beginning
+
+    # Exit once the consumer group has caught up
+    python parallel_consumer.py --topic HISTORICAL_STOCK_QUOTES --until-drained
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+from collections import Counter
+
+from confluent_kafka import OFFSET_BEGINNING, Consumer, KafkaError, KafkaException, TopicPartition
+from confluent_kafka.admin import AdminClient
+
+from test_msk_connection import BOOTSTRAP_SERVERS, get_kafka_config
+
+
+def run_worker(worker_id, partitions, args, config, stop, reports):
+    """Consume the given partitions in batches, commit asynchronously and push stats to the reporter."""
+    stats = Counter()
+    partition_counts = Counter()
+
+    def on_commit(err, committed):
+        stats['commit_errors' if err is not None else 'commits'] += 1
+
+    consumer = Consumer({
+        **config,
+        'client.id': f'msk-parallel-consumer-{worker_id}',
+        'group.id': args.group,
+        'enable.auto.commit': False,
+        'auto.offset.reset': 'earliest' if args.from_beginning else 'latest',
+        'on_commit': on_commit,
+    })
+    start_offset = OFFSET_BEGINNING if args.from_beginning else None
+    assignment = [
+        TopicPartition(args.topic, p) if start_offset is None else TopicPartition(args.topic, p, start_offset)
+        for p in partitions
+    ]
+    consumer.assign(assignment)
+
+    uncommitted = 0
+    last_commit = last_report = time.time()
+
+    while not stop.is_set():
+        messages = consumer.consume(num_messages=args.batch_size, timeout=args.poll_timeout)
+
+        for msg in messages:
+            if msg.error():
+                if msg.error().code() != KafkaError._PARTITION_EOF:
+                    stats['errors'] += 1
+                continue
+            value = msg.value() or b''
+            if args.parse_json:
+                json.loads(value)
+            stats['consumed'] += 1
+            stats['bytes'] += len(value)
+            partition_counts[msg.partition()] += 1
+            uncommitted += 1
+
+        now = time.time()
+        if uncommitted and (uncommitted >= args.commit_every or now - last_commit >= args.commit_interval):
+            consumer.commit(asynchronous=True)
+            uncommitted = 0
+            last_commit = now
+
+        if now - last_report >= args.report_interval / 2:
+            reports.put((worker_id, now, partition_offsets(consumer, assignment, partition_counts), dict(stats)))
+            last_report = now
+
+    if uncommitted:
+        # The commit callback for a synchronous commit is only served by a later poll, so count it here
+        try:
+            consumer.commit(asynchronous=False)
+            stats['commits'] += 1
+        except KafkaException:
+            stats['commit_errors'] += 1
+    reports.put((worker_id, time.time(), partition_offsets(consumer, assignment, partition_counts), dict(stats)))
+    consumer.close()
+
+
+def partition_offsets(consumer, assignment, partition_counts):
+    """{partition: (position, high watermark, consumed)} using the high watermark cached from the last fetch."""
+    offsets = {}
+    for tp in consumer.position([TopicPartition(tp.topic, tp.partition) for tp in assignment]):
+        _, high = consumer.get_watermark_offsets(tp, cached=True)
+        if high < 0:
+            _, high = consumer.get_watermark_offsets(tp, timeout=5)
+        position = tp.offset if tp.offset >= 0 else None
+        offsets[tp.partition] = (position, high, partition_counts[tp.partition])
+    return offsets
+
+
+class LagReporter:
+    """Aggregates worker reports and prints per-partition lag and rates."""
+
+    def __init__(self, partition_workers):
+        self.partition_workers = partition_workers
+        self.offsets = {}
+        self.worker_stats = {}
+        self.previous = None
+        self.started = time.time()
+
+    def update(self, report):
+        worker_id, _, offsets, stats = report
+        self.offsets.update(offsets)
+        self.worker_stats[worker_id] = stats
+
+    def totals(self):
+        total = Counter()
+        for stats in self.worker_stats.values():
+            total.update(stats)
+        return total
+
+    def total_lag(self):
+        """Sum of (high watermark - position), or None until every partition has a position."""
+        if len(self.offsets) < len(self.partition_workers):
+            return None
+        lags = [high - position for position, high, _ in self.offsets.values() if position is not None]
+        return sum(lags) if len(lags) == len(self.offsets) else None
+
+    def print_report(self):
+        now = time.time()
+        totals = self.totals()
+        snapshot = (now, dict(self.offsets), totals['consumed'], totals['bytes'])
+        prev_time, prev_offsets, prev_consumed, prev_bytes = self.previous or (self.started, {}, 0, 0)
+        elapsed = max(now - prev_time, 1e-9)
+        self.previous = snapshot
+
+        consume_rate = (totals['consumed'] - prev_consumed) / elapsed
+        mb_rate = (totals['bytes'] - prev_bytes) / elapsed / (1024 * 1024)
+        lag = self.total_lag()
+
+        print(f"\n⏱️  {now - self.started:6.1f}s  consumed {consume_rate:,.0f} msg/s ({mb_rate:,.2f} MB/s)  "
+              f"total {totals['consumed']:,}  lag {'?' if lag is None else f'{lag:,}'}  "
+              f"commits {totals['commits']:,} (errors {totals['commit_errors']:,})")
+        print(f"   {'partition':>9} {'worker':>6} {'position':>12} {'high':>12} {'lag':>10} {'consume/s':>10} {'produce/s':>10}  trend")
+
+        produce_total = 0.0
+        for partition in sorted(self.partition_workers):
+            position, high, count = self.offsets.get(partition, (None, -1, 0))
+            _, prev_high, prev_count = prev_offsets.get(partition, (None, high, 0))
+            consumed = (count - prev_count) / elapsed
+            produced = (high - prev_high) / elapsed if high >= 0 and prev_high >= 0 else 0.0
+            produce_total += produced
+            part_lag = high - position if position is not None and high >= 0 else None
+            if part_lag is None:
+                trend = ''
+            elif part_lag == 0:
+                trend = 'caught up'
+            else:
+                trend = 'draining' if consumed > produced else 'falling behind'
+            print(f"   {partition:>9} {self.partition_workers[partition]:>6} "
+                  f"{'-' if position is None else f'{position:,}':>12} {f'{high:,}' if high >= 0 else '-':>12} "
+                  f"{'-' if part_lag is None else f'{part_lag:,}':>10} {consumed:>10,.0f} {produced:>10,.0f}  {trend}")
+
+        if produce_total:
+            verdict = "✅ keeping up" if consume_rate >= produce_total else "⚠️  slower than producers"
+            print(f"   produce rate {produce_total:,.0f} msg/s vs consume rate {consume_rate:,.0f} msg/s: {verdict}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Parallel batch consumer with per-partition lag reporting')
+    parser.add_argument('--topic', default=os.getenv('KAFKA_TOPIC', 'HISTORICAL_STOCK_QUOTES'),
+                        help='Topic to drain (default: $KAFKA_TOPIC or HISTORICAL_STOCK_QUOTES)')
+    parser.add_argument('--group', default='msk-parallel-consumer', help='Consumer group for committed offsets (default: msk-parallel-consumer)')
+    parser.add_argument('--bootstrap-servers', help='Override MSK_BOOTSTRAP_SERVERS')
+    parser.add_argument('--workers', type=int, help='Worker count (default: one per partition)')
+    parser.add_argument('--threads', action='store_true', help='Run workers as threads instead of processes')
+    parser.add_argument('--from-beginning', action='store_true', help='Start from the earliest offset, ignoring committed offsets')
+    parser.add_argument('--batch-size', type=int, default=1000, help='Messages per consume() call (default: 1000)')
+    parser.add_argument('--poll-timeout', type=float, default=0.1, help='Max seconds per consume() call (default: 0.1)')
+    parser.add_argument('--commit-every', type=int, default=10000, help='Commit after this many messages (default: 10000)')
+    parser.add_argument('--commit-interval', type=float, default=2.0, help='Or after this many seconds (default: 2)')
+    parser.add_argument('--parse-json', action='store_true', help='Decode each message as JSON to include parse cost')
+    parser.add_argument('--report-interval', type=float, default=5.0, help='Seconds between lag reports (default: 5)')
+    parser.add_argument('--duration', type=float, help='Stop after this many seconds')
+    parser.add_argument('--until-drained', action='store_true', help='Stop once every partition has zero lag')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    config = get_kafka_config()
+    if args.bootstrap_servers:
+        config['bootstrap.servers'] = args.bootstrap_servers
+    elif BOOTSTRAP_SERVERS == 'your-msk-brokers:9096':
+        print("⚠️  Set MSK_BOOTSTRAP_SERVERS or pass --bootstrap-servers")
+        sys.exit(1)
+
+    metadata = AdminClient(config).list_topics(args.topic, timeout=10).topics.get(args.topic)
+    if metadata is None or metadata.error is not None or not metadata.partitions:
+        print(f"❌ Topic '{args.topic}' not found")
+        sys.exit(1)
+
+    partitions = sorted(metadata.partitions)
+    num_workers = min(args.workers or len(partitions), len(partitions))
+    assignments = {w: partitions[w::num_workers] for w in range(num_workers)}
+    partition_workers = {p: w for w, ps in assignments.items() for p in ps}
+
+    print("🚀 Starting parallel consumer")
+    print("=" * 50)
+    print(f"   Bootstrap Servers: {config['bootstrap.servers']}")
+    print(f"   Topic: {args.topic} ({len(partitions)} partitions)")
+    print(f"   Group: {args.group}")
+    print(f"   Workers: {num_workers} {'threads' if args.threads else 'processes'}")
+    print(f"   Batch: {args.batch_size} messages, commit every {args.commit_every:,} messages or {args.commit_interval:g}s")
+
+    if args.threads:
+        stop, reports = threading.Event(), queue.Queue()
+        workers = [
+            threading.Thread(target=run_worker, args=(w, ps, args, config, stop, reports), name=f"Consumer-{w}")
+            for w, ps in assignments.items()
+        ]
+    else:
+        ctx = multiprocessing.get_context('spawn')
+        stop, reports = ctx.Event(), ctx.Queue()
+        workers = [
+            ctx.Process(target=run_worker, args=(w, ps, args, config, stop, reports), name=f"Consumer-{w}")
+            for w, ps in assignments.items()
+        ]
+    for worker in workers:
+        worker.start()
+
+    reporter = LagReporter(partition_workers)
+    started = time.time()
+    next_report = started + args.report_interval
+
+    try:
+        while True:
+            try:
+                reporter.update(reports.get(timeout=max(0.0, next_report - time.time())))
+            except queue.Empty:
+                pass
+            if time.time() < next_report:
+                continue
+
+            reporter.print_report()
+            next_report += args.report_interval
+            if args.duration and time.time() - started >= args.duration:
+                break
+            if args.until_drained and reporter.total_lag() == 0:
+                print("\n✅ All partitions drained")
+                break
+    except KeyboardInterrupt:
+        print("\nStopping...")
+
+    stop.set()
+    # Workers send a final report after their last commit; read them before joining
+    deadline = time.time() + 30
+    while any(w.is_alive() for w in workers) and time.time() < deadline:
+        try:
+            reporter.update(reports.get(timeout=0.5))
+        except queue.Empty:
+            pass
+    for worker in workers:
+        worker.join()
+
+    totals = reporter.totals()
+    elapsed = time.time() - started
+    print()
+    print("📊 Summary")
+    print("=" * 50)
+    print(f"   Consumed {totals['consumed']:,} messages ({totals['bytes'] / (1024 * 1024):,.1f} MB) in {elapsed:.1f}s: "
+          f"{totals['consumed'] / elapsed:,.0f} msg/s")
+    print(f"   Commits: {totals['commits']:,} ok, {totals['commit_errors']:,} failed; consume errors: {totals['errors']:,}")
+    lag = reporter.total_lag()
+    print(f"   Remaining lag: {'unknown' if lag is None else f'{lag:,}'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -21,18 +21,24 @@ from confluent_kafka.admin import AdminClient, NewTopic
 BOOTSTRAP_SERVERS = os.getenv('MSK_BOOTSTRAP_SERVERS', 'your-msk-brokers:9096')
 SASL_USERNAME = os.getenv('KAFKA_USERNAME', 'kafka-user')
 SASL_PASSWORD = os.getenv('KAFKA_PASSWORD', 'your-password')
+# Set to PLAINTEXT to point the scripts at a local broker without SASL/TLS
+SECURITY_PROTOCOL = os.getenv('KAFKA_SECURITY_PROTOCOL', 'SASL_SSL')
 TOPIC_NAME = 'msk-test-topic'
 CONSUMER_GROUP = 'msk-test-group'
 
 def get_kafka_config():
     """Get base Kafka configuration for SASL/SCRAM authentication."""
-    return {
+    config = {
         'bootstrap.servers': BOOTSTRAP_SERVERS,
-        'security.protocol': 'SASL_SSL',
-        'sasl.mechanisms': 'SCRAM-SHA-512',
-        'sasl.username': SASL_USERNAME,
-        'sasl.password': SASL_PASSWORD,
+        'security.protocol': SECURITY_PROTOCOL,
     }
+    if SECURITY_PROTOCOL.startswith('SASL'):
+        config.update({
+            'sasl.mechanisms': 'SCRAM-SHA-512',
+            'sasl.username': SASL_USERNAME,
+            'sasl.password': SASL_PASSWORD,
+        })
+    return config
 
 def test_connection():
     """Test basic connection to MSK cluster."""
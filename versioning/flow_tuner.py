@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+"""Throughput linter and profile rewriter for Openflow / NiFi flow definitions.
+
+Works offline on the flow snapshots the GitHub flow registry stores, such as
+imf-datamapper-demo/imf-weo.json or nasdaq-demo/openflow/default/*.json. No
+runtime is needed. The tool traces which connections carry the fan-out of a
+split or listing (the high-volume path) and reports settings that limit
+throughput there:
+
+    single-threaded   1 concurrent task on a high-volume processor
+    primary-only      a primary-node source whose output is not load balanced
+    tight-queue       default-sized back pressure after a splitter or before a single-threaded I/O processor
+    scheduled         a non-zero run schedule on a high-volume processor that is not a source
+    no-batching       a 0 ms run duration on a processor that supports session batching
+    batch-size        a "Max Batch Size" of 1 on a high-volume processor
+
+`apply` rewrites one of the named profiles into the files:
+    bulk-backfill     a backfill or catch-up load, where throughput matters more than latency
+    low-latency       a steady trickle, where shallow queues keep end-to-end latency down
+    default           NiFi's defaults, undoing either of the other profiles
+
+Files are written back in the registry's own JSON layout, so `git diff` shows
+only the settings that changed.
+
+Usage:
+    python flow_tuner.py lint                                   # every flow in the repo
+    python flow_tuner.py lint ../imf-datamapper-demo/imf-weo.json --strict
+    python flow_tuner.py profiles
+    python flow_tuner.py apply bulk-backfill ../imf-datamapper-demo/imf-weo.json --dry-run
+    python flow_tuner.py apply low-latency flow.json -o flow-low-latency.json
+"""
+
+import argparse
+import json
+import os
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_OBJECT_THRESHOLD = 10000
+DEFAULT_SIZE_THRESHOLD = "1 GB"
+
+# Processors that emit many FlowFiles per input or per run
+FAN_OUT_TYPES = {"SplitJson", "SplitText", "SplitXml", "SplitRecord", "SplitContent", "SplitAvro",
+                 "ListSFTP", "ListFTP", "ListFile", "ListS3", "ListGCSBucket", "ListAzureBlobStorage_v12",
+                 "ConsumeKafka", "ConsumeKafka_2_6", "ConsumeJMS", "ListenHTTP", "QueryDatabaseTable",
+                 "GenerateTableFetch"}
+# Processors that bring the fan-out back together
+FAN_IN_TYPES = {"MergeContent", "MergeRecord"}
+# Network or database bound: worth the most extra threads
+IO_TYPES = {"InvokeHTTP", "FetchSFTP", "FetchFTP", "FetchS3Object", "ExecuteSQL", "ExecuteSQLRecord",
+            "ExecuteSQLStatement", "PutDatabaseRecord", "PutSnowpipeStreaming", "PutSnowflakeInternalStageFile",
+            "PublishKafka", "PublishKafka_2_6", "PutSFTP", "PutS3Object"}
+# Annotated @SupportsBatching, so a run duration above 0 ms batches session commits
+BATCHING_TYPES = {"RouteOnAttribute", "RouteOnContent", "EvaluateJsonPath", "UpdateAttribute", "JoltTransformJSON",
+                  "SplitJson", "SplitText", "ReplaceText", "ExtractText", "AttributesToJSON", "ConvertRecord",
+                  "UpdateRecord", "LogAttribute", "InvokeHTTP"}
+# Relationships that carry at most one FlowFile per input, not the fan-out itself
+LOW_VOLUME_RELATIONSHIPS = {"original", "failure", "retry", "no retry", "comms.failure", "not.found",
+                            "permission.denied", "unmatched"}
+
+PROFILES = {
+    "default": {
+        "description": "NiFi defaults: one task, no batching, 10,000 objects / 1 GB queues, no load balancing",
+        "tasks": 1,
+        "io_tasks": 1,
+        "run_duration_ms": 0,
+        "object_threshold": DEFAULT_OBJECT_THRESHOLD,
+        "size_threshold": DEFAULT_SIZE_THRESHOLD,
+        "load_balance": "DO_NOT_LOAD_BALANCE",
+        "properties": {"PutSnowpipeStreaming": {"Max Batch Size": "10000", "Client Lag": "1 sec"}},
+    },
+    "bulk-backfill": {
+        "description": "Throughput first: more threads, 100 ms batching, deep queues, large Snowpipe batches",
+        "tasks": 2,
+        "io_tasks": 8,
+        "run_duration_ms": 100,
+        "object_threshold": 100000,
+        "size_threshold": "4 GB",
+        "load_balance": "ROUND_ROBIN",
+        "properties": {"PutSnowpipeStreaming": {"Max Batch Size": "50000", "Client Lag": "10 sec"}},
+    },
+    "low-latency": {
+        "description": "Latency first: parallel I/O, no batching, shallow queues, small Snowpipe batches",
+        "tasks": 2,
+        "io_tasks": 4,
+        "run_duration_ms": 0,
+        "object_threshold": 1000,
+        "size_threshold": "100 MB",
+        "load_balance": "ROUND_ROBIN",
+        "properties": {"PutSnowpipeStreaming": {"Max Batch Size": "1000", "Client Lag": "1 sec"}},
+    },
+}
+
+
+def dumps(value, level=0):
+    """Serialize like the registry's Jackson pretty printer, so rewritten files diff cleanly."""
+    if isinstance(value, dict):
+        if not value:
+            return "{ }"
+        pad = "  " * (level + 1)
+        members = ",\n".join(f"{pad}{json.dumps(key, ensure_ascii=False)} : {dumps(item, level + 1)}"
+                             for key, item in value.items())
+        return "{\n" + members + "\n" + "  " * level + "}"
+    if isinstance(value, list):
+        if not value:
+            return "[ ]"
+        return "[ " + ", ".join(dumps(item, level) for item in value) + " ]"
+    return json.dumps(value, ensure_ascii=False)
+
+
+def load_flow(path):
+    with open(path, encoding="utf-8") as f:
+        flow = json.load(f)
+    if "flowContents" not in flow:
+        raise ValueError(f"{path} is not a flow snapshot (no flowContents)")
+    return flow
+
+
+def find_flows(root=REPO_ROOT):
+    """Every flow snapshot in the repository."""
+    paths = []
+    for directory, dirs, files in os.walk(root):
+        dirs[:] = [d for d in dirs if not d.startswith(".") and d not in ("node_modules", "__pycache__", "data")]
+        for name in files:
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(directory, name)
+            try:
+                with open(path, encoding="utf-8") as f:
+                    head = f.read(4096)
+            except (OSError, UnicodeDecodeError):
+                continue
+            if '"flowContents"' in head:
+                paths.append(path)
+    return sorted(paths)
+
+
+def short_type(component):
+    return component.get("type", "").rsplit(".", 1)[-1]
+
+
+class FlowGraph:
+    """Processors and connections of every process group, with the high-volume path traced."""
+
+    def __init__(self, flow):
+        self.processors = {}
+        self.connections = []
+        self._collect(flow["flowContents"])
+        self.incoming = {}
+        self.outgoing = {}
+        for connection in self.connections:
+            self.outgoing.setdefault(connection["source"]["id"], []).append(connection)
+            self.incoming.setdefault(connection["destination"]["id"], []).append(connection)
+        self.high_volume = self._trace_high_volume()
+
+    def _collect(self, group):
+        for processor in group.get("processors", []):
+            self.processors[processor["identifier"]] = processor
+        self.connections.extend(group.get("connections", []))
+        for child in group.get("processGroups", []):
+            self._collect(child)
+
+    def is_source(self, processor):
+        return not self.incoming.get(processor["identifier"])
+
+    @staticmethod
+    def carries_fan_out(connection):
+        return any(r.lower() not in LOW_VOLUME_RELATIONSHIPS for r in connection.get("selectedRelationships", []))
+
+    def _trace_high_volume(self):
+        """Return the identifiers of connections downstream of a fan-out and before any fan-in."""
+        high = set()
+        pending = []
+        for processor in self.processors.values():
+            if short_type(processor) in FAN_OUT_TYPES:
+                pending.extend(self.outgoing.get(processor["identifier"], []))
+        while pending:
+            connection = pending.pop()
+            if connection["identifier"] in high or not self.carries_fan_out(connection):
+                continue
+            high.add(connection["identifier"])
+            destination = connection["destination"]
+            processor = self.processors.get(destination["id"])
+            if processor is not None and short_type(processor) in FAN_IN_TYPES:
+                continue
+            # Funnels and ports pass the volume straight through
+            pending.extend(self.outgoing.get(destination["id"], []))
+        return high
+
+    def on_high_volume_path(self, processor):
+        return any(c["identifier"] in self.high_volume for c in self.incoming.get(processor["identifier"], []))
+
+
+def is_slow(processor):
+    kind = short_type(processor)
+    return kind in IO_TYPES or kind.startswith("Execute")
+
+
+def finding(severity, rule, component, message):
+    return {"severity": severity, "rule": rule, "component": component.get("name") or short_type(component),
+            "message": message}
+
+
+def lint_flow(flow, tight_queue=DEFAULT_OBJECT_THRESHOLD):
+    """Return the throughput findings for one flow snapshot."""
+    graph = FlowGraph(flow)
+    findings = []
+
+    for processor in graph.processors.values():
+        kind = short_type(processor)
+        tasks = processor.get("concurrentlySchedulableTaskCount", 1)
+        if graph.is_source(processor):
+            if processor.get("executionNode") == "PRIMARY":
+                for connection in graph.outgoing.get(processor["identifier"], []):
+                    if connection.get("loadBalanceStrategy", "DO_NOT_LOAD_BALANCE") == "DO_NOT_LOAD_BALANCE":
+                        findings.append(finding(
+                            "warning", "primary-only", connection["source"],
+                            f"runs on the primary node only and its output to {connection['destination']['name']!r} "
+                            f"is not load balanced, so downstream work stays on one node"))
+            continue
+        if not graph.on_high_volume_path(processor):
+            continue
+
+        if tasks == 1 and processor.get("executionNode") != "PRIMARY":
+            findings.append(finding(
+                "warning" if is_slow(processor) else "info", "single-threaded", processor,
+                f"{kind} with 1 concurrent task on a high-volume path"
+                + (" (network/database bound; waits serialize)" if kind in IO_TYPES else "")))
+        if processor.get("schedulingStrategy") == "TIMER_DRIVEN" and processor.get("schedulingPeriod", "0 sec") not in ("0 sec", "0 ms", "0"):
+            findings.append(finding(
+                "warning", "scheduled", processor,
+                f"runs every {processor['schedulingPeriod']} although it is fed by a high-volume queue"))
+        if processor.get("runDurationMillis", 0) == 0 and kind in BATCHING_TYPES:
+            findings.append(finding(
+                "info", "no-batching", processor,
+                f"{kind} supports session batching but has a 0 ms run duration; 25-100 ms cuts commit overhead"))
+        if processor.get("properties", {}).get("Max Batch Size") == "1":
+            findings.append(finding("info", "batch-size", processor, "Max Batch Size is 1: one transaction per FlowFile"))
+
+    for connection in graph.connections:
+        if connection["identifier"] not in graph.high_volume:
+            continue
+        threshold = connection.get("backPressureObjectThreshold", DEFAULT_OBJECT_THRESHOLD)
+        if threshold > tight_queue:
+            continue
+        source = graph.processors.get(connection["source"]["id"])
+        destination = graph.processors.get(connection["destination"]["id"])
+        reasons = []
+        if source is not None and short_type(source) in FAN_OUT_TYPES:
+            reasons.append(f"one {short_type(source)} run can fill it")
+        if destination is not None and destination.get("concurrentlySchedulableTaskCount", 1) == 1 and is_slow(destination):
+            reasons.append(f"{destination['name']!r} drains it with one task")
+        if reasons:
+            findings.append(finding(
+                "info", "tight-queue", {"name": f"{connection['source']['name']} → {connection['destination']['name']}"},
+                f"back pressure at {threshold:,} objects / {connection.get('backPressureDataSizeThreshold', '?')}; "
+                + " and ".join(reasons)))
+    return findings
+
+
+def apply_profile(flow, profile):
+    """Rewrite the high-volume path of a flow with a profile; return a list of change descriptions."""
+    graph = FlowGraph(flow)
+    changes = []
+
+    def set_value(component, key, value, label=None):
+        if component.get(key) != value:
+            changes.append(f"{component.get('name') or label}: {key} {component.get(key)!r} → {value!r}")
+            component[key] = value
+
+    for processor in graph.processors.values():
+        if graph.is_source(processor) or not graph.on_high_volume_path(processor):
+            continue
+        kind = short_type(processor)
+        if processor.get("executionNode") != "PRIMARY":
+            set_value(processor, "concurrentlySchedulableTaskCount",
+                      profile["io_tasks"] if kind in IO_TYPES else profile["tasks"])
+        if kind in BATCHING_TYPES:
+            set_value(processor, "runDurationMillis", profile["run_duration_ms"])
+        for prop, value in profile["properties"].get(kind, {}).items():
+            properties = processor.setdefault("properties", {})
+            if properties.get(prop) != value:
+                changes.append(f"{processor['name']}: {prop!r} {properties.get(prop)!r} → {value!r}")
+                properties[prop] = value
+
+    for connection in graph.connections:
+        label = f"{connection['source']['name']} → {connection['destination']['name']}"
+        if connection["identifier"] in graph.high_volume:
+            set_value(connection, "backPressureObjectThreshold", profile["object_threshold"], label)
+            set_value(connection, "backPressureDataSizeThreshold", profile["size_threshold"], label)
+        source = graph.processors.get(connection["source"]["id"])
+        if source is not None and graph.is_source(source) and source.get("executionNode") == "PRIMARY":
+            set_value(connection, "loadBalanceStrategy", profile["load_balance"], label)
+    return changes
+
+
+def profile_name(value):
+    name = value.strip().lower().replace(" ", "-").replace("_", "-")
+    if name not in PROFILES:
+        raise argparse.ArgumentTypeError(f"unknown profile {value!r} (choose from {', '.join(PROFILES)})")
+    return name
+
+
+def display_path(path):
+    relative = os.path.relpath(os.path.abspath(path), REPO_ROOT)
+    return path if relative.startswith("..") else relative
+
+
+def cmd_lint(args):
+    paths = args.files or find_flows()
+    icons = {"warning": "⚠️ ", "info": "💡"}
+    totals = {"warning": 0, "info": 0}
+    for path in paths:
+        flow = load_flow(path)
+        findings = lint_flow(flow, args.tight_queue)
+        print(f"📄 {display_path(path)} ({flow['flowContents'].get('name', '')})")
+        if not findings:
+            print("   ✅ No throughput issues found")
+        for item in sorted(findings, key=lambda f: (f["severity"] != "warning", f["rule"], f["component"])):
+            totals[item["severity"]] += 1
+            print(f"   {icons[item['severity']]} [{item['rule']}] {item['component']}: {item['message']}")
+        print()
+    print(f"📊 {len(paths)} flows: {totals['warning']} warnings, {totals['info']} suggestions")
+    if args.strict and totals["warning"]:
+        sys.exit(1)
+
+
+def cmd_profiles(args):
+    for name, profile in PROFILES.items():
+        print(f"🎛️  {name}: {profile['description']}")
+        print(f"     tasks {profile['tasks']} (I/O {profile['io_tasks']}), run duration {profile['run_duration_ms']} ms, "
+              f"queues {profile['object_threshold']:,} / {profile['size_threshold']}, "
+              f"primary-node output {profile['load_balance']}")
+        for kind, properties in profile["properties"].items():
+            print(f"     {kind}: " + ", ".join(f"{k} = {v}" for k, v in properties.items()))
+
+
+def cmd_apply(args):
+    if args.output and len(args.files) != 1:
+        sys.exit("❌ --output needs exactly one input file")
+    profile = PROFILES[args.profile]
+    for path in args.files:
+        flow = load_flow(path)
+        changes = apply_profile(flow, profile)
+        target = args.output or path
+        print(f"🎛️  {args.profile} → {display_path(path)}: {len(changes)} changes")
+        for change in changes:
+            print(f"   • {change}")
+        if args.dry_run:
+            continue
+        if changes or args.output:
+            with open(target, "w", encoding="utf-8") as f:
+                f.write(dumps(flow))
+            print(f"   ✅ Wrote {display_path(target)}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Lint and tune Openflow flow definitions for throughput")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    lint = subparsers.add_parser("lint", help="Report likely throughput bottlenecks")
+    lint.add_argument("files", nargs="*", help="Flow JSON files (default: every flow in the repository)")
+    lint.add_argument("--tight-queue", type=int, default=DEFAULT_OBJECT_THRESHOLD,
+                      help=f"Flag high-volume queues with back pressure at or below this many objects "
+                           f"(default: {DEFAULT_OBJECT_THRESHOLD})")
+    lint.add_argument("--strict", action="store_true", help="Exit non-zero if there are warnings")
+    lint.set_defaults(func=cmd_lint)
+
+    profiles = subparsers.add_parser("profiles", help="List the performance profiles")
+    profiles.set_defaults(func=cmd_profiles)
+
+    apply = subparsers.add_parser("apply", help="Rewrite a performance profile into flow files")
+    apply.add_argument("profile", type=profile_name, help=f"One of: {', '.join(PROFILES)}")
+    apply.add_argument("files", nargs="+", help="Flow JSON files (rewritten in place unless --output is given)")
+    apply.add_argument("-o", "--output", help="Write the tuned flow here instead (single input only)")
+    apply.add_argument("--dry-run", action="store_true", help="Show the changes without writing")
+    apply.set_defaults(func=cmd_apply)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    try:
+        args.func(args)
+    except (OSError, ValueError) as e:
+        sys.exit(f"❌ {e}")
+
+
+if __name__ == "__main__":
+    main()